@@ -5,10 +5,20 @@ __all__ = [
     "app",
     "config",
     "database",
+    "export_cache",
+    "gherkin",
     "graph",
+    "graph_cache",
+    "history_cli",
+    "history_writer",
+    "http_api",
+    "job_runner",
     "llm",
+    "pdf_cache",
     "pdf_generator",
+    "plan_state",
     "prompts",
+    "render_pool",
     "schemas",
     "state_manager",
     "utils",
@@ -14,10 +14,12 @@
 #   • Comentários didáticos onde a lógica não for óbvia
 # ==========================================================
 
+import copy
 import datetime
-import json
 import logging
 import sqlite3
+import time
+from typing import Iterable, Optional
 
 import pandas as pd
 import streamlit as st
@@ -40,17 +42,37 @@ from .a11y import (
 from .database import (
     clear_history,
     delete_analysis_by_id,
+    delete_test_case_row,
     get_all_analysis_history,
     get_analysis_by_id,
     init_db,
+    parse_legacy_test_plan_json,
+    run_history_maintenance,
+    update_test_case_row,
 )
 
 # Grafos de IA (LangGraph) — invocados nas funções cacheadas
 from .graph import grafo_analise, grafo_plano_testes
+
+# Chaves de conteúdo do cache dos grafos (sem campos voláteis) + hits/misses
+from .graph_cache import cached_graph_call, graph_cache_key
+
+# Fila write-behind — atualizações do histórico fora do fluxo de render
+from .history_writer import get_history_writer
+
+# Jobs em segundo plano — chamadas à IA sobrevivem a reruns e recargas
+from .job_runner import Job, get_job_runner, job_key
 from .observability import generate_trace_id
 
 # Gerador de PDF — consolida análise e plano de testes em um relatório
-from .pdf_generator import generate_pdf_report
+# (`pdf_generator`, com o fpdf, só é importado ao gerar o primeiro PDF)
+from .pdf_cache import build_pdf, get_cached_pdf, schedule_pdf_build
+
+# Plano de testes da sessão — casos + sumário; DataFrame/JSON/Markdown/PDF derivados
+from .plan_state import TestPlan, cases_dataframe, extract_plan_summary
+
+# Pool de processos — o PDF é renderizado fora da thread do script
+from .render_pool import RenderTimeoutError, render_pdf_report
 
 # Estado global e reset — para nova análise sem resquícios
 from .state_manager import initialize_state, reset_session
@@ -59,21 +81,27 @@ from .state_manager import initialize_state, reset_session
 from .text_utils import (
     clean_markdown_report,
     gerar_nome_arquivo_seguro,
-    gerar_relatorio_md_dos_cenarios,
     get_flexible,
 )
+from .export_cache import CaseFragmentCache, ExportArtifactCache, plan_fingerprint
 from .exports import (
     gerar_csv_azure_from_df,
     gerar_csv_xray_from_df,
     gerar_csv_testrail_from_df,
     preparar_df_para_zephyr_xlsx,
+    stream_csv_azure_from_df,
+    stream_csv_testrail_from_df,
+    stream_csv_xray_from_df,
     to_excel,
 )
 
 
 # Métricas Prometheus (opcional)
 # Métricas Prometheus (opcional)
-from .metrics import track_analysis, track_export, start_metrics_server
+from .metrics import get_metrics_collector, start_metrics_server, track_analysis
+
+# API HTTP (opcional) — análises e exportações para integrações
+from .http_api import start_api_server_in_background
 
 
 @st.cache_resource
@@ -84,6 +112,10 @@ def init_metrics():
 
 init_metrics()
 
+# API HTTP opcional (`HTTP_API_PORT`) no próprio processo do app: as
+# requisições compartilham o executor de jobs e o cliente LLM da interface
+start_api_server_in_background()
+
 logger = logging.getLogger(__name__)
 
 
@@ -164,20 +196,12 @@ def _save_current_analysis_to_history(update_existing: bool = False):
         )
         analysis_report_to_save = (analysis_report or "").strip()
 
-        test_plan_report = st.session_state.get("test_plan_report")
-        test_plan_report_to_save = (test_plan_report or "").strip()
-        test_plan_summary_to_save = _extract_plan_summary(
-            st.session_state.get("test_plan_report_intro", test_plan_report_to_save)
+        plan = _get_test_plan()
+        test_plan_report_to_save = _test_plan_report().strip()
+        test_plan_summary_to_save = extract_plan_summary(
+            plan.summary if plan is not None else ""
         )
-
-        test_plan_df_json_to_save = st.session_state.get("test_plan_df_json")
-        if not test_plan_df_json_to_save:
-            records = st.session_state.get("test_plan_df_records")
-            if records:
-                try:
-                    test_plan_df_json_to_save = json.dumps(records, ensure_ascii=False)
-                except (TypeError, ValueError):
-                    test_plan_df_json_to_save = None
+        test_cases_to_save = plan.records if plan is not None else []
 
         # 🔍 Validação mínima
         if not any(
@@ -191,63 +215,75 @@ def _save_current_analysis_to_history(update_existing: bool = False):
             logger.warning("⚠️ Nenhum dado válido para salvar no histórico.")
             return
 
-        from .database import get_db_connection  # evita dependência circular
-
-        from contextlib import closing
-
-        with closing(get_db_connection()) as conn:
-            cursor = conn.cursor()
-            timestamp = datetime.datetime.now()
+        timestamp = datetime.datetime.now()
+
+        # --- Se já houver registro e pedimos update_existing=True, atualiza ---
+        # A atualização vai para a fila write-behind: edições consecutivas do
+        # mesmo registro são coalescidas e gravadas fora do fluxo de render.
+        # Os casos de teste NÃO são regravados aqui: edições e exclusões
+        # pontuais já enfileiraram a linha correspondente em `test_cases`.
+        if update_existing and st.session_state.get("last_saved_id"):
+            analysis_id = st.session_state["last_saved_id"]
+            params = (
+                timestamp,
+                user_story_to_save,
+                analysis_report_to_save,
+                test_plan_report_to_save,
+                test_plan_summary_to_save,
+                analysis_id,
+            )
 
-            # --- Se já houver registro e pedimos update_existing=True, atualiza ---
-            if update_existing and st.session_state.get("last_saved_id"):
+            def _update_history_entry(cursor):
                 cursor.execute(
                     """
                     UPDATE analysis_history
-                    SET created_at = ?, user_story = ?, analysis_report = ?, test_plan_report = ?, test_plan_summary = ?, test_plan_df_json = ?
+                    SET created_at = ?, user_story = ?, analysis_report = ?, test_plan_report = ?, test_plan_summary = ?
                     WHERE id = ?;
                     """,
-                    (
-                        timestamp,
-                        user_story_to_save,
-                        analysis_report_to_save,
-                        test_plan_report_to_save,
-                        test_plan_summary_to_save,
-                        test_plan_df_json_to_save,
-                        st.session_state["last_saved_id"],
-                    ),
-                )
-                logger.info(
-                    f"♻️ Registro existente atualizado (ID {st.session_state['last_saved_id']}) em {timestamp}"
+                    params,
                 )
-            else:
-                # Caso contrário, cria um novo registro
-                cursor.execute(
-                    """
-                    INSERT INTO analysis_history (
-                        created_at,
-                        user_story,
-                        analysis_report,
-                        test_plan_report,
-                        test_plan_summary,
-                        test_plan_df_json
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?);
-                    """,
-                    (
-                        timestamp,
-                        user_story_to_save,
-                        analysis_report_to_save,
-                        test_plan_report_to_save,
-                        test_plan_summary_to_save,
-                        test_plan_df_json_to_save,
-                    ),
-                )
-                st.session_state["last_saved_id"] = cursor.lastrowid
-                st.session_state["history_saved"] = True
-                logger.info(f"💾 Análise salva no histórico em {timestamp}")
 
+            _submit_history_write(
+                _update_history_entry, key=("analysis_history", analysis_id)
+            )
+            logger.info(
+                f"♻️ Atualização do registro {analysis_id} enfileirada em {timestamp}"
+            )
+            return
+
+        # evita dependência circular
+        from .database import get_db_connection, replace_test_cases
+
+        from contextlib import closing
+
+        # Criação de registro é síncrona: precisamos do ID para as edições.
+        with closing(get_db_connection()) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO analysis_history (
+                    created_at,
+                    user_story,
+                    analysis_report,
+                    test_plan_report,
+                    test_plan_summary
+                )
+                VALUES (?, ?, ?, ?, ?);
+                """,
+                (
+                    timestamp,
+                    user_story_to_save,
+                    analysis_report_to_save,
+                    test_plan_report_to_save,
+                    test_plan_summary_to_save,
+                ),
+            )
+            if test_cases_to_save:
+                replace_test_cases(cursor, cursor.lastrowid, test_cases_to_save)
+            st.session_state["last_saved_id"] = cursor.lastrowid
+            st.session_state["history_saved"] = True
             conn.commit()
+            logger.info(f"💾 Análise salva no histórico em {timestamp}")
 
     except sqlite3.Error as db_error:
         logger.error(f"❌ Erro de banco de dados ao salvar: {db_error}")
@@ -272,11 +308,66 @@ def save_analysis_to_history(update_existing: bool = False):
     return _save_current_analysis_to_history(update_existing=update_existing)
 
 
+def _history_writer_owner() -> str:
+    """Identificador da sessão usado para devolver erros da fila de escrita."""
+    owner = st.session_state.get("history_writer_owner")
+    if not owner:
+        owner = generate_trace_id()
+        st.session_state["history_writer_owner"] = owner
+    return owner
+
+
+def _submit_history_write(operation, *, key=None):
+    """Enfileira uma escrita do histórico na fila write-behind da sessão atual."""
+    get_history_writer().submit(operation, key=key, owner=_history_writer_owner())
+
+
+def _announce_history_write_errors():
+    """
+    Anuncia erros de gravações em segundo plano desta sessão.
+
+    A escrita acontece fora do render; por isso os erros são recolhidos
+    no próximo rerun e exibidos com a mesma mensagem do caminho síncrono.
+    """
+    errors = get_history_writer().drain_errors(_history_writer_owner())
+    if errors:
+        announce(
+            "Erro ao salvar no banco de dados. Verifique o arquivo de log.",
+            "error",
+            st_api=st,
+        )
+
+
 # ==========================================================
 #  Funções cacheadas (IA via LangGraph)
 # ==========================================================
-@track_analysis
+_ANALYSIS_GRAPH = "analysis"
+_TEST_PLAN_GRAPH = "test_plan"
+
+
+# O `st.cache_data` é indexado só pela chave de conteúdo (`graph_cache_key`):
+# os parâmetros iniciados por "_" ficam fora do hash do Streamlit.
 @st.cache_data(show_spinner=False, ttl=3600)
+def _cached_analysis_graph(cache_key: str, _user_story: str, _on_miss=None):
+    if _on_miss is not None:
+        _on_miss()
+    estado_inicial = {
+        "user_story": _user_story,
+        "trace_id": generate_trace_id(),
+    }
+    return grafo_analise.invoke(estado_inicial)
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _cached_test_plan_graph(cache_key: str, _analysis_state: dict, _on_miss=None):
+    if _on_miss is not None:
+        _on_miss()
+    estado_inicial = {**_analysis_state}
+    estado_inicial.setdefault("trace_id", generate_trace_id())
+    return grafo_plano_testes.invoke(estado_inicial)
+
+
+@track_analysis
 def run_analysis_graph(user_story: str):
     """
     Executa o grafo de análise de User Story.
@@ -284,14 +375,12 @@ def run_analysis_graph(user_story: str):
       - 'analise_da_us': blocos estruturados (avaliacao/pontos/riscos/criterios/perguntas)
       - 'relatorio_analise_inicial': texto consolidado em Markdown
     """
-    estado_inicial = {
-        "user_story": user_story,
-        "trace_id": generate_trace_id(),
-    }
-    return grafo_analise.invoke(estado_inicial)
+    cache_key = graph_cache_key(_ANALYSIS_GRAPH, user_story)
+    return cached_graph_call(
+        _ANALYSIS_GRAPH, _cached_analysis_graph, cache_key, user_story
+    )
 
 
-@st.cache_data(show_spinner=False, ttl=3600)
 def run_test_plan_graph(analysis_state: dict):
     """
     Executa o grafo de geração de Plano de Testes.
@@ -300,9 +389,127 @@ def run_test_plan_graph(analysis_state: dict):
       - 'plano_e_casos_de_teste' com 'casos_de_teste_gherkin' (lista de cenários)
       - 'relatorio_plano_de_testes' (Markdown)
     """
-    estado_inicial = {**analysis_state}
-    estado_inicial.setdefault("trace_id", generate_trace_id())
-    return grafo_plano_testes.invoke(estado_inicial)
+    cache_key = graph_cache_key(
+        _TEST_PLAN_GRAPH, analysis_state.get("user_story"), analysis_state
+    )
+    return cached_graph_call(
+        _TEST_PLAN_GRAPH, _cached_test_plan_graph, cache_key, analysis_state
+    )
+
+
+# ==========================================================
+#  Execuções da IA em segundo plano (jobs)
+# ==========================================================
+# O job da sessão fica em `ai_job_id` e no parâmetro `?job=` da URL: um
+# rerun ou a recarga da aba retomam o acompanhamento sem refazer a chamada.
+_ANALYSIS_JOB = "analysis"
+_TEST_PLAN_JOB = "test_plan"
+_AI_JOB_STEPS = {
+    _ANALYSIS_JOB: (
+        "🔮 O Oráculo está trabalhando...",
+        "🔍 Analisando requisitos da User Story...",
+    ),
+    _TEST_PLAN_JOB: (
+        "🔮 Elaborando o Plano de Testes...",
+        "🧠 Refinando cenários Gherkin...",
+    ),
+}
+# Intervalo (s) entre as verificações do job enquanto ele roda
+_AI_JOB_POLL_INTERVAL = 1.0
+
+
+def _start_ai_job(kind: str, fn, payload) -> None:
+    """
+    Submete a chamada à IA como job da sessão e passa a acompanhá-lo.
+
+    Um job já concluído (execução síncrona ou resultado reaproveitado de
+    um job com a mesma entrada) é aplicado de imediato.
+    """
+    job = get_job_runner().submit(kind, fn, payload, key=job_key(kind, payload))
+    st.session_state["ai_job_id"] = job.id
+    st.query_params["job"] = job.id
+    if job.done:
+        _render_ai_job()
+    else:
+        st.rerun()
+
+
+def _clear_ai_job() -> None:
+    st.session_state.pop("ai_job_id", None)
+    st.query_params.pop("job", None)
+
+
+def _current_ai_job() -> Optional[Job]:
+    """Job da sessão; após a recarga da aba, recuperado pelo id na URL."""
+    job_id = st.session_state.get("ai_job_id") or st.query_params.get("job")
+    if not isinstance(job_id, str):
+        return None
+    job = get_job_runner().get(job_id)
+    if job is None or job.kind not in _AI_JOB_STEPS:
+        _clear_ai_job()
+        return None
+    st.session_state["ai_job_id"] = job.id
+    return job
+
+
+def _watch_ai_job(job_id: str) -> None:
+    """Fragmento periódico: mostra o tempo decorrido e reexecuta a página ao fim."""
+    job = get_job_runner().get(job_id)
+    if job is None or job.done:
+        st.rerun()
+        return
+    st.caption(f"⏳ {job.elapsed:.0f}s")
+
+
+def _render_ai_job() -> bool:
+    """
+    Acompanha o job da IA da sessão.
+
+    Returns:
+        bool: True se havia job (em andamento ou recém-aplicado); nesse caso
+        o restante do fluxo de entrada não deve ser renderizado.
+    """
+    job = _current_ai_job()
+    if job is None:
+        return False
+
+    if job.done:
+        _clear_ai_job()
+        if job.kind == _ANALYSIS_JOB:
+            _apply_analysis_job(job)
+        else:
+            _apply_test_plan_job(job)
+        return True
+
+    label, step = _AI_JOB_STEPS[job.kind]
+    with st.status(label, expanded=True):
+        st.write(step)
+        # Só o fragmento roda a cada intervalo; a página inteira, ao fim do job
+        st.fragment(run_every=_AI_JOB_POLL_INTERVAL)(_watch_ai_job)(job.id)
+    return True
+
+
+def _apply_analysis_job(job: Job) -> None:
+    """Leva o resultado da análise para a sessão (etapa de edição)."""
+    if job.error:
+        logger.error(f"❌ Falha na análise da User Story: {job.error}")
+        announce(
+            "O Oráculo não conseguiu analisar a User Story. Tente novamente.",
+            "error",
+            st_api=st,
+        )
+        return
+
+    if not st.session_state.get("user_story_input"):
+        st.session_state["user_story_input"] = job.args[0]
+    # Cópia: o resultado do job pode ser reaproveitado por outras sessões
+    st.session_state["analysis_state"] = copy.deepcopy(job.result)
+
+    # Enquanto a edição não é confirmada, não mostramos o botão de gerar o plano
+    st.session_state["show_generate_plan_button"] = False
+
+    # Re-renderiza a página para exibir a seção de edição
+    st.rerun()
 
 
 # ==========================================================
@@ -437,22 +644,8 @@ def _render_user_story_input():
                 st.session_state["show_generate_plan_button"] = False
                 return True
 
-            with st.status("🔮 O Oráculo está trabalhando...", expanded=True) as status:
-                st.write("🔍 Analisando requisitos da User Story...")
-                resultado_analise = run_analysis_graph(user_story_txt)
-                st.write("✅ Análise concluída!")
-                status.update(
-                    label="✨ Análise Finalizada!", state="complete", expanded=False
-                )
-
-                # Guarda o resultado bruto da IA para edição posterior
-                st.session_state["analysis_state"] = resultado_analise
-
-                # Enquanto a edição não é confirmada, não mostramos o botão de gerar o plano
-                st.session_state["show_generate_plan_button"] = False
-
-                # Re-renderiza a página para exibir a seção de edição
-                st.rerun()
+            # A análise roda em segundo plano; a página acompanha o job
+            _start_ai_job(_ANALYSIS_JOB, run_analysis_graph, user_story_txt)
         else:
             announce(
                 "Por favor, insira uma User Story antes de analisar.",
@@ -673,83 +866,12 @@ def _render_test_plan_generation():
     if col1.button(
         "Sim, Gerar Plano de Testes", type="primary", use_container_width=True
     ):
-        with st.status("🔮 Elaborando o Plano de Testes...", expanded=True) as status:
-            st.write("🧠 Refinando cenários Gherkin...")
-            try:
-                resultado_plano = run_test_plan_graph(
-                    st.session_state.get("analysis_state", {})
-                )
-                st.write("✅ Plano gerado com sucesso!")
-                status.update(
-                    label="✨ Plano de Testes Pronto!", state="complete", expanded=False
-                )
-
-                casos_de_teste = resultado_plano.get("plano_e_casos_de_teste", {}).get(
-                    "casos_de_teste_gherkin", []
-                )
-
-                if not casos_de_teste or not isinstance(casos_de_teste, list):
-                    # Força a entrada no 'except' se a IA não retornar o formato esperado
-                    raise ValueError(
-                        "O Oráculo não conseguiu gerar um plano de testes estruturado."
-                    )
-
-                st.session_state["test_plan_report"] = resultado_plano.get(
-                    "relatorio_plano_de_testes"
-                )
-                df = pd.DataFrame(casos_de_teste)
-                df_clean = df.apply(
-                    lambda col: col.apply(
-                        lambda x: ("\n".join(map(str, x)) if isinstance(x, list) else x)
-                    )
-                )
-                df_clean.fillna("", inplace=True)
-                st.session_state["test_plan_df"] = df_clean
-                st.session_state["test_plan_report_intro"] = (
-                    st.session_state.get("test_plan_report") or ""
-                )
-                records = df_clean.to_dict(orient="records")
-                st.session_state["test_plan_df_records"] = records
-                st.session_state["test_plan_df_json"] = (
-                    json.dumps(records, ensure_ascii=False) if records else None
-                )
-                st.session_state["test_plan_report"] = _compose_test_plan_report(
-                    st.session_state.get("test_plan_report_intro", ""),
-                    df_clean,
-                )
-
-                pdf_bytes = generate_pdf_report(
-                    st.session_state.get("analysis_state", {}).get(
-                        "relatorio_analise_inicial", ""
-                    ),
-                    df_clean,
-                )
-                st.session_state["pdf_report_bytes"] = pdf_bytes
-
-                if not st.session_state.get("history_saved"):
-                    _save_current_analysis_to_history()
-                    st.session_state["history_saved"] = True  # evita duplicação
-
-                st.session_state["analysis_finished"] = True
-                announce("Plano de Testes gerado com sucesso!", "success", st_api=st)
-                st.rerun()
-
-            except Exception as e:
-                # Em caso de falha, informa o usuário, mas não perde o progresso
-                logger.error(f"❌ Falha na geração do plano de testes: {e}")
-                announce(
-                    "O Oráculo não conseguiu gerar um plano de testes estruturado.",
-                    "error",
-                    st_api=st,
-                )
-                # Limpa qualquer resquício de plano de teste para não exibir dados errados
-                st.session_state["test_plan_report"] = ""
-                st.session_state["test_plan_df"] = None
-                st.session_state.pop("test_plan_df_records", None)
-                st.session_state.pop("test_plan_df_json", None)
-                st.session_state.pop("test_plan_report_intro", None)
-                _save_current_analysis_to_history()
-                st.rerun()
+        # O plano roda em segundo plano; a página acompanha o job
+        _start_ai_job(
+            _TEST_PLAN_JOB,
+            run_test_plan_graph,
+            st.session_state.get("analysis_state", {}),
+        )
 
     # Botão para encerrar sem gerar plano (mas salvando análise)
     if col2.button("Não, Encerrar", use_container_width=True):
@@ -760,99 +882,98 @@ def _render_test_plan_generation():
         st.rerun()
 
 
-def _compose_test_plan_report(summary_text: str, df: pd.DataFrame) -> str:
-    """
-    Combina o sumário original do plano de testes com os cenários atuais.
+def _apply_test_plan_job(job: Job) -> None:
+    """Leva o plano gerado pela IA para a sessão (tela de resultados)."""
+    # Após a recarga da aba, a análise usada vem da entrada do job
+    if not st.session_state.get("analysis_state"):
+        st.session_state["analysis_state"] = copy.deepcopy(job.args[0])
+        st.session_state["show_generate_plan_button"] = True
+    if not st.session_state.get("user_story_input"):
+        st.session_state["user_story_input"] = job.args[0].get("user_story", "")
 
-    Motivações:
-    • O sumário inicial é gerado pela IA com objetivo, escopo e estratégia.
-    • Os cenários Gherkin retornam em uma estrutura tabular (DataFrame).
-    • Durante edições/exclusões, precisamos atualizar apenas a seção de cenários
-      sem perder as partes redigidas pela IA.
-    """
+    try:
+        if job.error:
+            raise RuntimeError(job.error)
+        resultado_plano = job.result or {}
 
-    summary = (summary_text or "").strip()
-    scenarios_md = (gerar_relatorio_md_dos_cenarios(df) or "").strip()
+        casos_de_teste = resultado_plano.get("plano_e_casos_de_teste", {}).get(
+            "casos_de_teste_gherkin", []
+        )
 
-    if not summary:
-        return scenarios_md
-    if not scenarios_md:
-        return summary
+        if not casos_de_teste or not isinstance(casos_de_teste, list):
+            # Força a entrada no 'except' se a IA não retornar o formato esperado
+            raise ValueError(
+                "O Oráculo não conseguiu gerar um plano de testes estruturado."
+            )
 
-    marker = "### 🧩"
-    if marker in summary:
-        header = summary.split(marker, 1)[0].rstrip()
-        if header:
-            return f"{header}\n\n{scenarios_md}"
-        return scenarios_md
+        st.session_state["test_plan"] = TestPlan.from_dataframe(
+            cases_dataframe(casos_de_teste),
+            summary=resultado_plano.get("relatorio_plano_de_testes") or "",
+            fragments=_get_fragment_cache(),
+        )
 
-    return f"{summary}\n\n---\n\n{scenarios_md}"
+        # O PDF só é gerado no download (ou em segundo plano)
+        _mark_pdf_dirty()
 
+        if not st.session_state.get("history_saved"):
+            _save_current_analysis_to_history()
+            st.session_state["history_saved"] = True  # evita duplicação
 
-def _extract_plan_summary(report_text: str) -> str:
-    """
-    Extrai apenas o cabeçalho/introdução do plano de testes.
+        st.session_state["analysis_finished"] = True
+        announce("Plano de Testes gerado com sucesso!", "success", st_api=st)
+        st.rerun()
 
-    Motivo:
-    • Evitar que os cenários apareçam duplicados no resumo principal.
-    • Permitir salvar o sumário gerado pela IA separadamente no banco (test_plan_summary).
-    """
-    if not report_text:
-        return ""
+    except Exception as e:
+        # Em caso de falha, informa o usuário, mas não perde o progresso
+        logger.error(f"❌ Falha na geração do plano de testes: {e}")
+        announce(
+            "O Oráculo não conseguiu gerar um plano de testes estruturado.",
+            "error",
+            st_api=st,
+        )
+        # Limpa qualquer resquício de plano de teste para não exibir dados errados
+        st.session_state["test_plan"] = None
+        _save_current_analysis_to_history()
+        st.rerun()
 
-    marker = "### 🧩"
-    if marker in report_text:
-        return report_text.split(marker, 1)[0].rstrip()
-    return report_text.strip()
 
+def _get_test_plan() -> Optional[TestPlan]:
+    """Plano de testes da sessão (None enquanto não houver plano)."""
+    return st.session_state.get("test_plan")
 
-def _get_plan_summary_from_state() -> str:
-    """
-    Obtém o sumário do plano armazenado no session_state.
 
-    Estratégia:
-    • Usa `test_plan_report_intro` quando disponível (persistido na geração inicial via IA).
-    • Caso contrário, extrai do `test_plan_report` já existente.
-    • Armazena o resultado para acessos subsequentes (evita retrabalho).
-    """
-    summary = st.session_state.get("test_plan_report_intro")
-    if summary:
-        return summary
-    full_report = st.session_state.get("test_plan_report", "")
-    summary = _extract_plan_summary(full_report)
-    st.session_state["test_plan_report_intro"] = summary
-    return summary
+def _test_plan_df() -> Optional[pd.DataFrame]:
+    """Visão em DataFrame do plano da sessão (None sem plano)."""
+    plan = _get_test_plan()
+    return None if plan is None else plan.df
+
+
+def _test_plan_report() -> str:
+    """Relatório Markdown do plano da sessão (sumário + cenários)."""
+    plan = _get_test_plan()
+    return "" if plan is None else plan.markdown
 
 
 def _update_test_plan_outputs(updated_df: pd.DataFrame):
     """
-    Atualiza DataFrame, relatório Markdown e PDF após modificações nos cenários.
+    Troca os casos do plano após modificações nos cenários.
 
     Responsabilidades principais:
-    • Persistir DataFrame atualizado em memoria/JSON (para histórico/exportações).
-    • Remontar o markdown do plano sem perder o sumário introdutório.
-    • Regenerar o PDF para downloads imediatos.
-    • Deixar `test_plan_df_json` pronto para salvar no histórico.
-    """
-    st.session_state["test_plan_df"] = updated_df
-    records = updated_df.fillna("").to_dict(orient="records")
-    st.session_state["test_plan_df_records"] = records
-    st.session_state["test_plan_df_json"] = (
-        json.dumps(records, ensure_ascii=False) if records else None
-    )
-    intro = _get_plan_summary_from_state()
-    st.session_state["test_plan_report"] = _compose_test_plan_report(intro, updated_df)
+    • Substituir os casos do plano — DataFrame, JSON, Markdown e PDF são
+      visões derivadas, descartadas juntas e refeitas só quando usadas.
+    • Marcar o PDF como desatualizado (gerado no download ou em segundo plano).
+    """
+    # Artefatos gerados para a versão anterior do plano deixam de valer
+    _invalidate_export_cache()
 
-    analysis_report = st.session_state.get("analysis_state", {}).get(
-        "relatorio_analise_inicial", ""
-    )
-    try:
-        st.session_state["pdf_report_bytes"] = generate_pdf_report(
-            analysis_report, updated_df
+    plan = _get_test_plan()
+    if plan is None:
+        st.session_state["test_plan"] = TestPlan.from_dataframe(
+            updated_df, fragments=_get_fragment_cache()
         )
-    except Exception as pdf_error:
-        logger.error(f"❌ Erro ao regenerar PDF após atualização do plano: {pdf_error}")
-        st.session_state["pdf_report_bytes"] = b""
+    else:
+        plan.replace_cases(updated_df)
+    _mark_pdf_dirty()
 
 
 def _delete_test_case(pending_case: dict):
@@ -869,7 +990,7 @@ def _delete_test_case(pending_case: dict):
     • Atualiza o registro no histórico (update_existing=True).
     • Exibe feedback acessível (announce + toast).
     """
-    df_original = st.session_state.get("test_plan_df")
+    df_original = _test_plan_df()
 
     if df_original is None or df_original.empty:
         announce(
@@ -919,11 +1040,19 @@ def _delete_test_case(pending_case: dict):
         st.rerun()
         return
 
+    position = df_original.index.get_loc(index_label)
     updated_df = df_original.drop(index=index_label).reset_index(drop=True)
 
     _update_test_plan_outputs(updated_df)
     st.session_state.pop("pending_case_deletion", None)
 
+    # Remove apenas a linha do caso em `test_cases`; o restante do registro
+    # (markdown/sumário) é atualizado pelo save abaixo.
+    analysis_id = st.session_state.get("last_saved_id")
+    if analysis_id:
+        _submit_history_write(
+            lambda cursor: delete_test_case_row(cursor, analysis_id, position)
+        )
     _save_current_analysis_to_history(update_existing=True)
     announce(
         "Cenário removido do plano de testes e histórico atualizado.",
@@ -945,20 +1074,21 @@ def _save_scenario_edit(index: int, new_scenario: str) -> None:
     # Converte para string para evitar problemas com mocks em testes
     cenario_str = str(new_scenario).strip()
 
-    # Atualiza DataFrame
-    st.session_state["test_plan_df"].at[index, "cenario"] = cenario_str
-
-    # Atualiza JSON para persistência
-    updated_df = st.session_state["test_plan_df"]
-    records = updated_df.fillna("").to_dict(orient="records")
-    st.session_state["test_plan_df_records"] = records
-    st.session_state["test_plan_df_json"] = (
-        json.dumps(records, ensure_ascii=False) if records else None
-    )
-
-    # Atualiza relatório markdown
-    intro = _get_plan_summary_from_state()
-    st.session_state["test_plan_report"] = _compose_test_plan_report(intro, updated_df)
+    # Atualiza só o caso editado; as visões do plano são refeitas sob demanda
+    plan = _get_test_plan()
+    position = plan.df.index.get_loc(index)
+    record = plan.update_case(position, "cenario", cenario_str)
+    _invalidate_export_cache()
+    _mark_pdf_dirty()
+
+    # Persiste somente o caso editado (UPDATE de uma linha em `test_cases`).
+    # Edições repetidas do mesmo caso antes do flush são coalescidas.
+    analysis_id = st.session_state.get("last_saved_id")
+    if analysis_id:
+        _submit_history_write(
+            lambda cursor: update_test_case_row(cursor, analysis_id, position, record),
+            key=("test_cases", analysis_id, position),
+        )
 
     # Salva no histórico
     _save_current_analysis_to_history(update_existing=True)
@@ -976,13 +1106,11 @@ def _render_test_cases_table():
     • Quando há exclusão pendente, a confirmação aparece dentro do expander
       correspondente (contexto visual + acessibilidade).
     """
-    if (
-        st.session_state.get("test_plan_df") is None
-        or st.session_state["test_plan_df"].empty
-    ):
+    df = _test_plan_df()
+    if df is None or df.empty:
         return
 
-    df = st.session_state["test_plan_df"].copy()
+    df = df.copy()
 
     #  Define as colunas completas para o resumo
     colunas_resumo = [
@@ -1249,11 +1377,11 @@ def _render_history_test_plan(analysis_entry: dict):
 
     Contém:
     • Sumário em Markdown (introdução do plano).
-    • Tabela + expanders somente leitura, quando dispomos dos dados em JSON.
+    • Tabela + expanders somente leitura, quando dispomos dos casos em `test_cases`.
     • Como fallback, mostra o markdown completo salvo, garantindo compatibilidade
       com registros antigos (anteriores à migração).
     """
-    summary_text = analysis_entry.get("test_plan_summary") or _extract_plan_summary(
+    summary_text = analysis_entry.get("test_plan_summary") or extract_plan_summary(
         analysis_entry.get("test_plan_report", "")
     )
 
@@ -1266,13 +1394,9 @@ def _render_history_test_plan(analysis_entry: dict):
                 unsafe_allow_html=True,
             )
 
-    df_json = analysis_entry.get("test_plan_df_json")
-    records: list[dict] = []
-    if df_json:
-        try:
-            records = json.loads(df_json)
-        except (TypeError, ValueError, json.JSONDecodeError):
-            records = []
+    records: list[dict] = analysis_entry.get(
+        "test_cases"
+    ) or parse_legacy_test_plan_json(analysis_entry.get("test_plan_df_json"))
 
     if records:
         df = pd.DataFrame(records)
@@ -1315,11 +1439,12 @@ def _render_results_section():
         # ==================================================
         #  RELATÓRIO DO PLANO DE TESTES (VISÃO GERAL)
         # ==================================================
-        if st.session_state.get("test_plan_report"):
+        plan = _get_test_plan()
+        if plan is not None:
             with st.expander(
                 "🧪 Plano de Testes Gerado (Resumo em Markdown)", expanded=True
             ):
-                summary_md = _get_plan_summary_from_state()
+                summary_md = plan.summary
                 if summary_md:
                     st.markdown(
                         clean_markdown_report(summary_md),
@@ -1338,23 +1463,225 @@ def _render_results_section():
 
 
 # ==========================================================
-#  Wrappers de Exportação com Métricas
+#  Cache de artefatos de exportação (por sessão)
+# ==========================================================
+# Reruns sem mudança no plano reaproveitam os arquivos já gerados: nenhuma
+# exportação é refeita e as métricas de exportação não são incrementadas.
+
+
+def _get_export_cache() -> ExportArtifactCache:
+    cache = st.session_state.get("export_artifact_cache")
+    if cache is None:
+        cache = ExportArtifactCache()
+        st.session_state["export_artifact_cache"] = cache
+    return cache
+
+
+def _get_fragment_cache() -> CaseFragmentCache:
+    """Fragmentos renderizados por caso (Markdown, CSV, .feature, JSON...)."""
+    fragments = st.session_state.get("export_fragment_cache")
+    if fragments is None:
+        fragments = CaseFragmentCache()
+        st.session_state["export_fragment_cache"] = fragments
+    return fragments
+
+
+def _export_plan_fingerprint() -> str:
+    """
+    Hash do conteúdo atual do plano (casos, sumário e análise).
+
+    O resultado é memorizado enquanto as partes forem os mesmos objetos,
+    então um rerun sem mudanças não recalcula o hash.
+    """
+    plan = _get_test_plan()
+    parts = (
+        plan.content_hash if plan is not None else None,
+        (st.session_state.get("analysis_state") or {}).get(
+            "relatorio_analise_inicial"
+        ),
+    )
+    memo = st.session_state.get("export_plan_fingerprint")
+    if memo is not None and all(
+        cached is current for cached, current in zip(memo[0], parts)
+    ):
+        return memo[1]
+
+    fingerprint = plan_fingerprint(*parts)
+    st.session_state["export_plan_fingerprint"] = (parts, fingerprint)
+    return fingerprint
+
+
+def _cached_export(kind: str, builder, **options):
+    """Obtém o artefato `kind` do cache ou o gera com `builder()`."""
+    return _get_export_cache().get_or_build(
+        kind, _export_plan_fingerprint(), builder, options
+    )
+
+
+def _invalidate_export_cache() -> None:
+    """Descarta os artefatos da sessão (chamado quando o plano muda)."""
+    cache = st.session_state.get("export_artifact_cache")
+    if cache is not None:
+        cache.invalidate()
+    st.session_state.pop("export_plan_fingerprint", None)
+    # O pacote completo e o PDF voltam a ser gerados só quando solicitados
+    st.session_state.pop("export_bundle_requested", None)
+    st.session_state.pop("pdf_report_requested", None)
+
+
+# ==========================================================
+#  Exportações e Métricas
 # ==========================================================
-@track_export(format="markdown")
 def _prepare_markdown_export(analysis_report: str, test_plan_report: str) -> bytes:
-    """Prepara o conteúdo Markdown para exportação, registrando métricas."""
+    """Prepara o conteúdo Markdown para exportação."""
     content = f"{analysis_report or ''}\n\n---\n\n{test_plan_report or ''}"
     return _ensure_bytes(content)
 
 
-@track_export(format="pdf")
-def _prepare_pdf_export(analysis_report: str, test_plan_df) -> bytes:
-    """Gera o PDF para exportação, registrando métricas."""
-    # Se já tivermos os bytes em cache (session_state), poderíamos retornar direto,
-    # mas para registrar a métrica de 'exportação realizada', vamos chamar o gerador
-    # ou apenas registrar que foi feito.
-    # Aqui, vamos assumir que se chama esta função, é para gerar/obter o PDF.
-    return generate_pdf_report(analysis_report, test_plan_df)
+def _record_download(export_format: str) -> None:
+    """Callback dos botões de download: conta a exportação entregue ao usuário."""
+    get_metrics_collector().record_export(format=export_format, status="success")
+
+
+# ==========================================================
+#  PDF sob demanda
+# ==========================================================
+def _pdf_builder(on_progress=None):
+    """
+    Gerador do PDF para o conteúdo atual, sem depender do `session_state`
+    (pode rodar na thread de pré-geração).
+    """
+    analysis_report = (st.session_state.get("analysis_state") or {}).get(
+        "relatorio_analise_inicial", ""
+    )
+    # A lista de casos não é alterada no lugar (o plano troca a lista a
+    # cada edição), então a thread pode usá-la sem cópia
+    plan = _get_test_plan()
+    test_plan_df = None if plan is None else plan.records
+    # Sem métricas aqui: a pré-geração é especulativa; a exportação é contada
+    # no download (`_record_download`) e o tempo, na espera do usuário
+    return lambda: render_pdf_report(
+        analysis_report, test_plan_df, on_progress=on_progress
+    )
+
+
+def _pdf_build_slot() -> str:
+    """Identificador da sessão para a pré-geração do PDF."""
+    slot = st.session_state.get("pdf_build_slot")
+    if slot is None:
+        slot = generate_trace_id()
+        st.session_state["pdf_build_slot"] = slot
+    return slot
+
+
+def _mark_pdf_dirty() -> None:
+    """
+    Agenda o PDF do plano após mudanças (a visão `pdf` já foi descartada).
+
+    A geração fica para o download ou para a pré-geração em segundo plano,
+    agendada para depois de um intervalo sem novas edições.
+    """
+    try:
+        schedule_pdf_build(
+            _pdf_build_slot(), _export_plan_fingerprint(), _pdf_builder()
+        )
+    except Exception as e:
+        logger.warning(f"Não foi possível agendar a pré-geração do PDF: {e}")
+
+
+def _current_pdf_bytes() -> Optional[bytes]:
+    """PDF do conteúdo atual, se já gerado (no plano ou no cache)."""
+    plan = _get_test_plan()
+    if plan is not None and plan.pdf:
+        return plan.pdf
+    pdf_bytes = get_cached_pdf(_export_plan_fingerprint())
+    if pdf_bytes and plan is not None:
+        plan.pdf = pdf_bytes
+    return pdf_bytes
+
+
+def _build_current_pdf(on_progress=None) -> bytes:
+    """Gera o PDF do conteúdo atual (ou aguarda a pré-geração em andamento)."""
+    pdf_bytes = build_pdf(
+        _export_plan_fingerprint(),
+        _pdf_builder(on_progress=on_progress),
+        on_wait=on_progress,
+    )
+    plan = _get_test_plan()
+    if plan is not None:
+        plan.pdf = pdf_bytes
+    return pdf_bytes
+
+
+def _render_pdf_progress(col_pdf) -> bytes:
+    """
+    Gera o PDF mostrando o tempo decorrido e um botão de cancelamento.
+
+    A renderização roda no pool de processos; esta thread só acompanha.
+    Cancelar (ou qualquer rerun) interrompe a espera e cancela o job.
+    """
+    col_pdf.button(
+        "✖️ Cancelar PDF",
+        key="pdf_report_cancel",
+        on_click=lambda: st.session_state.pop("pdf_report_requested", None),
+    )
+    status = col_pdf.empty()
+    started_at = time.monotonic()
+
+    def _on_progress():
+        status.caption(f"⏳ Gerando PDF... {time.monotonic() - started_at:.0f}s")
+
+    _on_progress()
+    metrics = get_metrics_collector()
+    try:
+        with metrics.time_export(format="pdf"):
+            return _build_current_pdf(on_progress=_on_progress)
+    except RenderTimeoutError as e:
+        logger.error(f"❌ Tempo limite ao gerar PDF: {e}")
+        metrics.record_export(format="pdf", status="error")
+        metrics.record_error(error_type=type(e).__name__)
+        announce(
+            "O PDF demorou demais para ser gerado e foi cancelado.",
+            "warning",
+            st_api=st,
+        )
+    except Exception as e:
+        logger.error(f"❌ Erro ao gerar PDF: {e}")
+        metrics.record_export(format="pdf", status="error")
+        metrics.record_error(error_type=type(e).__name__)
+    finally:
+        status.empty()
+    # Nova tentativa só com um novo clique em "Preparar PDF"
+    st.session_state.pop("pdf_report_requested", None)
+    return b""
+
+
+def _render_pdf_export(col_pdf) -> None:
+    """Botão do PDF: prepara sob demanda e depois oferece o download."""
+    file_name = gerar_nome_arquivo_seguro(
+        st.session_state.get("analysis_state", {}).get("user_story", ""), "pdf"
+    )
+    pdf_bytes = _current_pdf_bytes()
+    if not pdf_bytes:
+        if not st.session_state.get("pdf_report_requested"):
+            col_pdf.button(
+                "📄 Preparar PDF",
+                key="pdf_report_button",
+                on_click=lambda: st.session_state.update(pdf_report_requested=True),
+                help="Gera o relatório PDF formatado para download",
+            )
+            return
+        pdf_bytes = _render_pdf_progress(col_pdf)
+
+    col_pdf.download_button(
+        "📄 Relatório (.pdf)",
+        pdf_bytes,
+        file_name=file_name,
+        help="Baixa um relatório PDF formatado",
+        disabled=not pdf_bytes,
+        on_click=_record_download,
+        args=("pdf",),
+    )
 
 
 def _render_basic_exports():
@@ -1364,23 +1691,17 @@ def _render_basic_exports():
     col_md, col_pdf, col_cucumber, col_postman = st.columns(4)
 
     # 📝 Exporta relatório Markdown
-    # Preparamos o conteúdo sob demanda (lazy) seria ideal, mas o st.download_button
-    # pede os dados já prontos ou uma função callback.
-    # Para simplificar e garantir o tracking, vamos preparar os dados aqui.
-    # Nota: O tracking ocorrerá a cada re-render se chamarmos a função aqui.
-    # O ideal para download_button é usar o callback, mas ele não permite retornar dados,
-    # apenas executar ações.
-    # Abordagem: Vamos preparar os dados (o que dispara a métrica) apenas se o usuário clicar?
-    # O Streamlit não facilita isso no download_button padrão sem recarregar.
-    # Vamos manter a geração prévia, mas cuidado com métricas duplicadas a cada render.
-    # Melhoria: Usar st.cache_data nos wrappers se quisermos evitar re-processamento,
-    # mas queremos contar EXPORTAÇÕES (cliques).
-    # Com download_button, a contagem de cliques é difícil via backend puro do Streamlit.
-    # Vamos aceitar que a métrica será "geração de arquivo para exportação" por enquanto.
-
-    md_content = _prepare_markdown_export(
-        st.session_state.get("analysis_state", {}).get("relatorio_analise_inicial", ""),
-        st.session_state.get("test_plan_report", ""),
+    # O `st.download_button` precisa dos bytes prontos: o conteúdo fica no
+    # cache de artefatos (refeito só quando o plano muda) e a exportação é
+    # contada no clique, pelo callback do botão (`_record_download`).
+    md_content = _cached_export(
+        "markdown",
+        lambda: _prepare_markdown_export(
+            st.session_state.get("analysis_state", {}).get(
+                "relatorio_analise_inicial", ""
+            ),
+            _test_plan_report(),
+        ),
     )
 
     col_md.download_button(
@@ -1390,48 +1711,27 @@ def _render_basic_exports():
             st.session_state.get("analysis_state", {}).get("user_story", ""), "md"
         ),
         help="Baixa a análise e o plano de testes em Markdown",
+        on_click=_record_download,
+        args=("markdown",),
     )
 
     # 📄 Exporta relatório PDF
-    # O PDF pode ser pesado para gerar a cada render.
-    # Vamos usar o que está no session_state se existir, mas para tracking
-    # precisaríamos saber quando baixou.
-    # Como limitação do Streamlit, vamos registrar a métrica quando o PDF é GERADO/ATUALIZADO
-    # (que acontece no _update_test_plan_outputs ou na geração inicial).
-    # A função _prepare_pdf_export acima pode ser usada lá.
-    # AQUI apenas entregamos os bytes.
-
-    pdf_bytes = st.session_state.get("pdf_report_bytes")
-    if not pdf_bytes:
-        # Tenta gerar se não existir
-        try:
-            pdf_bytes = _prepare_pdf_export(
-                st.session_state.get("analysis_state", {}).get(
-                    "relatorio_analise_inicial", ""
-                ),
-                st.session_state.get("test_plan_df"),
-            )
-            st.session_state["pdf_report_bytes"] = pdf_bytes
-        except Exception:
-            pdf_bytes = b""
-
-    col_pdf.download_button(
-        "📄 Relatório (.pdf)",
-        pdf_bytes,
-        file_name=gerar_nome_arquivo_seguro(
-            st.session_state.get("analysis_state", {}).get("user_story", ""), "pdf"
-        ),
-        help="Baixa um relatório PDF formatado",
-        disabled=not pdf_bytes,
-    )
+    # O PDF é pesado: é gerado só quando solicitado (ou já foi pré-gerado em
+    # segundo plano) e fica em cache pelo hash do conteúdo do plano.
+    _render_pdf_export(col_pdf)
 
     # 🥒 Exporta para Cucumber Studio (ZIP de .feature files)
-    df_para_cucumber = st.session_state.get("test_plan_df")
+    df_para_cucumber = _test_plan_df()
     if df_para_cucumber is not None and not df_para_cucumber.empty:
         from .utils.exporters import export_to_cucumber_zip
 
         try:
-            cucumber_zip = export_to_cucumber_zip(df_para_cucumber)
+            cucumber_zip = _cached_export(
+                "cucumber",
+                lambda: export_to_cucumber_zip(
+                    df_para_cucumber, fragments=_get_fragment_cache()
+                ),
+            )
             col_cucumber.download_button(
                 "🥒 Cucumber (.zip)",
                 cucumber_zip,
@@ -1452,16 +1752,22 @@ def _render_basic_exports():
             )
 
     # 📮 Exporta para Postman Collection (JSON)
-    df_para_postman = st.session_state.get("test_plan_df")
+    df_para_postman = _test_plan_df()
     if df_para_postman is not None and not df_para_postman.empty:
         from .utils.exporters import export_to_postman_collection
 
         try:
             user_story = st.session_state.get("user_story_input", "")
-            postman_json = export_to_postman_collection(df_para_postman, user_story)
+            postman_bytes = _cached_export(
+                "postman",
+                lambda: export_to_postman_collection(
+                    df_para_postman, user_story, fragments=_get_fragment_cache()
+                ).encode("utf-8"),
+                user_story=user_story,
+            )
             col_postman.download_button(
                 "📮 Postman (.json)",
-                postman_json.encode("utf-8"),
+                postman_bytes,
                 file_name=gerar_nome_arquivo_seguro(
                     st.session_state.get("user_story_input", ""), "postman.json"
                 ),
@@ -1483,100 +1789,207 @@ def _render_basic_exports():
     return col_azure, col_zephyr, col_xray
 
 
+# Quantidade de linhas exibidas nos previews
+PREVIEW_CSV_LINES = 50
+PREVIEW_ZEPHYR_ROWS = 20
+
+_PREVIEW_TABS = ["Markdown", "Azure CSV", "TestRail CSV", "Xray CSV", "Zephyr (Dados)"]
+
+
+def _csv_preview(chunks: Iterable[bytes], max_lines: int = PREVIEW_CSV_LINES) -> str:
+    """
+    Primeiras linhas de um CSV em streaming, como texto para o preview.
+
+    Consome os blocos do exportador só até ter linhas suficientes — o
+    restante do arquivo nunca é gerado. O BOM (Azure), se houver, é removido.
+    """
+    data = b""
+    for chunk in chunks:
+        data += chunk
+        if data.count(b"\n") >= max_lines:
+            break
+    return "\n".join(data.decode("utf-8-sig").splitlines()[:max_lines])
+
+
+def _zephyr_preview(
+    df: pd.DataFrame, max_rows: int = PREVIEW_ZEPHYR_ROWS
+) -> pd.DataFrame:
+    """
+    Primeiras linhas do DataFrame do Zephyr, preparando só os casos necessários.
+
+    Cada caso com cenário gera ao menos uma linha, então os casos são
+    processados em janelas de `max_rows` até completar o preview.
+    """
+    options = (
+        st.session_state.get("jira_priority", "Medium"),
+        st.session_state.get("jira_labels", ""),
+        st.session_state.get("jira_description", ""),
+    )
+    frames = [preparar_df_para_zephyr_xlsx(df.iloc[:max_rows], *options)]
+    total = len(frames[0])
+    start = max_rows
+    while total < max_rows and start < len(df):
+        part = preparar_df_para_zephyr_xlsx(df.iloc[start : start + max_rows], *options)
+        frames.append(part)
+        total += len(part)
+        start += max_rows
+    return pd.concat(frames, ignore_index=True).head(max_rows)
+
+
+def _get_zephyr_df(df: pd.DataFrame) -> pd.DataFrame:
+    """DataFrame completo do Zephyr para o download (.xlsx)."""
+    options = {
+        "priority": st.session_state.get("jira_priority", "Medium"),
+        "labels": st.session_state.get("jira_labels", ""),
+        "description": st.session_state.get("jira_description", ""),
+    }
+    return _cached_export(
+        "zephyr_df",
+        lambda: preparar_df_para_zephyr_xlsx(
+            df,
+            options["priority"],
+            options["labels"],
+            options["description"],
+            fragments=_get_fragment_cache(),
+        ),
+        **options,
+    )
+
+
+def _preview_xray_fields() -> dict:
+    """Campos do Xray usados no preview (versão simplificada do download)."""
+    xray_fields = {}
+    if st.session_state.get("xray_labels"):
+        xray_fields["Labels"] = st.session_state.get("xray_labels")
+    if st.session_state.get("xray_priority"):
+        xray_fields["Priority"] = st.session_state.get("xray_priority")
+
+    # Campos customizados
+    custom_text = st.session_state.get("xray_custom_fields", "").strip()
+    if custom_text:
+        for raw_line in custom_text.split("\n"):
+            if "=" in raw_line:
+                key, value = raw_line.split("=", 1)
+                xray_fields[key.strip()] = value.strip()
+    return xray_fields
+
+
 def _render_export_previews():
     """
-    Renderiza previews dos arquivos de exportação em um expander com abas.
+    Renderiza previews dos arquivos de exportação em um expander.
     Permite ao usuário verificar o conteúdo antes de baixar.
+
+    Os previews são sob demanda: nada é gerado até o usuário escolher um
+    formato, e só o formato escolhido é calculado — apenas as primeiras
+    linhas, consumindo os exportadores em streaming.
     """
-    if not st.session_state.get("test_plan_df") is not None:
+    df = _test_plan_df()
+    if df is None:
         return
 
     with st.expander("👁️ Visualizar Arquivos de Exportação (Preview)", expanded=False):
-        tabs = st.tabs(
-            ["Markdown", "Azure CSV", "TestRail CSV", "Xray CSV", "Zephyr (Dados)"]
+        selected = st.radio(
+            "Formato do preview:",
+            _PREVIEW_TABS,
+            index=None,
+            horizontal=True,
+            key="export_preview_format",
         )
+        if selected is None:
+            st.caption("Escolha um formato para visualizar o arquivo.")
+            return
 
         # 1. Markdown Preview
-        with tabs[0]:
+        if selected == "Markdown":
             content = (
                 f"{(st.session_state.get('analysis_state', {}).get('relatorio_analise_inicial') or '')}\n\n"
                 f"---\n\n"
-                f"{(st.session_state.get('test_plan_report') or '')}"
+                f"{_test_plan_report()}"
             )
             st.caption(f"Total: {len(content)} caracteres")
             st.code(content, language="markdown")
 
         # 2. Azure CSV Preview
-        with tabs[1]:
+        elif selected == "Azure CSV":
             try:
-                csv_azure_bytes = gerar_csv_azure_from_df(
-                    st.session_state.get("test_plan_df"),
-                    st.session_state.get("area_path_input", ""),
-                    st.session_state.get("assigned_to_input", ""),
+                area_path = st.session_state.get("area_path_input", "")
+                assigned_to = st.session_state.get("assigned_to_input", "")
+                preview_azure = _cached_export(
+                    "preview_azure",
+                    lambda: _csv_preview(
+                        stream_csv_azure_from_df(
+                            df, area_path, assigned_to, chunk_rows=PREVIEW_CSV_LINES
+                        )
+                    ),
+                    area_path=area_path,
+                    assigned_to=assigned_to,
                 )
-                csv_azure_str = csv_azure_bytes.decode("utf-8-sig")
-                st.caption("Preview das primeiras 50 linhas")
-                st.code("\n".join(csv_azure_str.splitlines()[:50]), language="csv")
+                st.caption(f"Preview das primeiras {PREVIEW_CSV_LINES} linhas")
+                st.code(preview_azure, language="csv")
             except Exception as e:
                 st.warning(f"⚠️ Não foi possível gerar o preview do Azure: {e}")
 
         # 3. TestRail CSV Preview
-        with tabs[2]:
+        elif selected == "TestRail CSV":
             try:
-                csv_testrail_bytes = gerar_csv_testrail_from_df(
-                    st.session_state.get("test_plan_df"),
-                    st.session_state.get("testrail_section", ""),
-                    st.session_state.get("testrail_priority", "Medium"),
-                    "Test Case (Steps)",
-                    st.session_state.get("testrail_references", ""),
+                testrail_options = {
+                    "section": st.session_state.get("testrail_section", ""),
+                    "priority": st.session_state.get("testrail_priority", "Medium"),
+                    "references": st.session_state.get("testrail_references", ""),
+                }
+                preview_testrail = _cached_export(
+                    "preview_testrail",
+                    lambda: _csv_preview(
+                        stream_csv_testrail_from_df(
+                            df,
+                            testrail_options["section"],
+                            testrail_options["priority"],
+                            "Test Case (Steps)",
+                            testrail_options["references"],
+                            chunk_rows=PREVIEW_CSV_LINES,
+                        )
+                    ),
+                    **testrail_options,
                 )
-                csv_testrail_str = csv_testrail_bytes.decode("utf-8")
-                st.caption("Preview das primeiras 50 linhas")
-                st.code("\n".join(csv_testrail_str.splitlines()[:50]), language="csv")
+                st.caption(f"Preview das primeiras {PREVIEW_CSV_LINES} linhas")
+                st.code(preview_testrail, language="csv")
             except Exception as e:
                 st.warning(f"⚠️ Não foi possível gerar o preview do TestRail: {e}")
 
         # 4. Xray CSV Preview
-        with tabs[3]:
+        elif selected == "Xray CSV":
             try:
-                # Recria lógica de campos do Xray (simplificada para preview)
-                xray_fields = {}
-                if st.session_state.get("xray_labels"):
-                    xray_fields["Labels"] = st.session_state.get("xray_labels")
-                if st.session_state.get("xray_priority"):
-                    xray_fields["Priority"] = st.session_state.get("xray_priority")
-
-                # Campos customizados
-                custom_text = st.session_state.get("xray_custom_fields", "").strip()
-                if custom_text:
-                    for raw_line in custom_text.split("\n"):
-                        if "=" in raw_line:
-                            key, value = raw_line.split("=", 1)
-                            xray_fields[key.strip()] = value.strip()
-
-                csv_xray_bytes = gerar_csv_xray_from_df(
-                    st.session_state.get("test_plan_df"),
-                    st.session_state.get("xray_test_folder", "Preview_Folder"),
-                    xray_fields,
+                xray_fields = _preview_xray_fields()
+                xray_folder = st.session_state.get("xray_test_folder", "Preview_Folder")
+                preview_xray = _cached_export(
+                    "preview_xray",
+                    lambda: _csv_preview(
+                        stream_csv_xray_from_df(
+                            df, xray_folder, xray_fields, chunk_rows=PREVIEW_CSV_LINES
+                        )
+                    ),
+                    folder=xray_folder,
+                    fields=xray_fields,
                 )
-                csv_xray_str = csv_xray_bytes.decode("utf-8")
-                st.caption("Preview das primeiras 50 linhas")
-                st.code("\n".join(csv_xray_str.splitlines()[:50]), language="csv")
+                st.caption(f"Preview das primeiras {PREVIEW_CSV_LINES} linhas")
+                st.code(preview_xray, language="csv")
             except Exception as e:
                 st.warning(f"⚠️ Não foi possível gerar o preview do Xray: {e}")
 
         # 5. Zephyr Preview (mostra DataFrame preparado)
-        with tabs[4]:
+        else:
             try:
-                df_zephyr = preparar_df_para_zephyr_xlsx(
-                    st.session_state.get("test_plan_df"),
-                    st.session_state.get("jira_priority", "Medium"),
-                    st.session_state.get("jira_labels", ""),
-                    st.session_state.get("jira_description", ""),
+                df_zephyr = _cached_export(
+                    "preview_zephyr",
+                    lambda: _zephyr_preview(df),
+                    priority=st.session_state.get("jira_priority", "Medium"),
+                    labels=st.session_state.get("jira_labels", ""),
+                    description=st.session_state.get("jira_description", ""),
                 )
-                st.dataframe(df_zephyr.head(20), use_container_width=True)
+                st.dataframe(df_zephyr, use_container_width=True)
                 st.caption(
-                    "Mostrando primeiras 20 linhas dos dados preparados para Excel"
+                    f"Mostrando primeiras {PREVIEW_ZEPHYR_ROWS} linhas dos dados "
+                    "preparados para Excel"
                 )
             except Exception as e:
                 st.warning(f"⚠️ Não foi possível gerar o preview do Zephyr: {e}")
@@ -1599,10 +2012,8 @@ def _render_export_section():  # noqa: C901, PLR0915
     # ==================================================
     #  OPÇÕES DE EXPORTAÇÃO (AZURE / ZEPHYR)
     # ==================================================
-    if (
-        st.session_state.get("test_plan_df") is not None
-        and not st.session_state.get("test_plan_df").empty
-    ):
+    plan = _get_test_plan()
+    if plan is not None and not plan.empty:
         with st.expander(
             "⚙️ Opções de Exportação para Ferramentas Externas", expanded=False
         ):
@@ -1756,7 +2167,7 @@ def _render_export_section():  # noqa: C901, PLR0915
         # ------------------------------------------------------
         # Dados para exportações
         # ------------------------------------------------------
-        df_para_ferramentas = st.session_state.get("test_plan_df", pd.DataFrame())
+        df_para_ferramentas = plan.df
 
         # Azure requer que os campos de área e responsável estejam preenchidos
         is_azure_disabled = not (
@@ -1764,10 +2175,18 @@ def _render_export_section():  # noqa: C901, PLR0915
             and st.session_state.get("assigned_to_input", "").strip()
         )
 
-        csv_azure = gerar_csv_azure_from_df(
-            df_para_ferramentas,
-            st.session_state.get("area_path_input", ""),
-            st.session_state.get("assigned_to_input", ""),
+        area_path = st.session_state.get("area_path_input", "")
+        assigned_to = st.session_state.get("assigned_to_input", "")
+        csv_azure = _cached_export(
+            "azure_csv",
+            lambda: gerar_csv_azure_from_df(
+                df_para_ferramentas,
+                area_path,
+                assigned_to,
+                fragments=_get_fragment_cache(),
+            ),
+            area_path=area_path,
+            assigned_to=assigned_to,
         )
 
         col_azure.download_button(
@@ -1783,14 +2202,14 @@ def _render_export_section():  # noqa: C901, PLR0915
         )
 
         # Zephyr
-        df_zephyr = preparar_df_para_zephyr_xlsx(
-            df_para_ferramentas,
-            st.session_state.get("jira_priority", "Medium"),
-            st.session_state.get("jira_labels", ""),
-            st.session_state.get("jira_description", ""),
+        df_zephyr = _get_zephyr_df(df_para_ferramentas)
+        excel_zephyr_bytes = _cached_export(
+            "zephyr_xlsx",
+            lambda: _ensure_bytes(to_excel(df_zephyr, sheet_name="Zephyr Import")),
+            priority=st.session_state.get("jira_priority", "Medium"),
+            labels=st.session_state.get("jira_labels", ""),
+            description=st.session_state.get("jira_description", ""),
         )
-        excel_zephyr = to_excel(df_zephyr, sheet_name="Zephyr Import")
-        excel_zephyr_bytes = _ensure_bytes(excel_zephyr)
 
         col_zephyr.download_button(
             "📊 Jira Zephyr (.xlsx)",
@@ -1803,12 +2222,22 @@ def _render_export_section():  # noqa: C901, PLR0915
         )
 
         # TestRail CSV
-        csv_testrail = gerar_csv_testrail_from_df(
-            df_para_ferramentas,
-            st.session_state.get("testrail_section", ""),
-            st.session_state.get("testrail_priority", "Medium"),
-            "Test Case (Steps)",
-            st.session_state.get("testrail_references", ""),
+        testrail_options = {
+            "section": st.session_state.get("testrail_section", ""),
+            "priority": st.session_state.get("testrail_priority", "Medium"),
+            "references": st.session_state.get("testrail_references", ""),
+        }
+        csv_testrail = _cached_export(
+            "testrail_csv",
+            lambda: gerar_csv_testrail_from_df(
+                df_para_ferramentas,
+                testrail_options["section"],
+                testrail_options["priority"],
+                "Test Case (Steps)",
+                testrail_options["references"],
+                fragments=_get_fragment_cache(),
+            ),
+            **testrail_options,
         )
 
         col_zephyr.download_button(
@@ -1862,10 +2291,16 @@ def _render_export_section():  # noqa: C901, PLR0915
                     key, value = stripped_line.split("=", 1)
                     xray_fields[key.strip()] = value.strip()
 
-        csv_xray = gerar_csv_xray_from_df(
-            df_para_ferramentas,
-            xray_folder,
-            custom_fields=xray_fields if xray_fields else None,
+        csv_xray = _cached_export(
+            "xray_csv",
+            lambda: gerar_csv_xray_from_df(
+                df_para_ferramentas,
+                xray_folder,
+                custom_fields=xray_fields if xray_fields else None,
+                fragments=_get_fragment_cache(),
+            ),
+            folder=xray_folder,
+            fields=xray_fields,
         )
 
         col_xray.download_button(
@@ -1884,6 +2319,82 @@ def _render_export_section():  # noqa: C901, PLR0915
             ),
         )
 
+        # ======================================================================
+        # PACOTE COMPLETO - todos os formatos em um único ZIP
+        # ======================================================================
+        _render_export_bundle(
+            df_para_ferramentas,
+            {
+                "azure_csv": {"area_path": area_path, "assigned_to": assigned_to},
+                "xray_csv": {
+                    "test_repository_folder": xray_folder,
+                    "custom_fields": xray_fields or None,
+                },
+                "testrail_csv": testrail_options,
+                "zephyr_xlsx": {
+                    "priority": st.session_state.get("jira_priority", "Medium"),
+                    "labels": st.session_state.get("jira_labels", ""),
+                    "description": st.session_state.get("jira_description", ""),
+                },
+            },
+        )
+
+
+def _render_export_bundle(df: pd.DataFrame, options: dict) -> None:
+    """
+    Botão "exportar tudo": Markdown, PDF, CSVs (Azure, Xray, TestRail) e
+    Zephyr em um ZIP com manifest, montado em um único percurso do plano.
+
+    O pacote só é gerado depois que o usuário o solicita (evita o custo a
+    cada rerun); depois fica no cache de exportação até o plano mudar.
+    """
+    st.divider()
+    if not st.session_state.get("export_bundle_requested"):
+        st.button(
+            "📦 Preparar pacote completo (.zip)",
+            key="export_bundle_button",
+            on_click=lambda: st.session_state.update(export_bundle_requested=True),
+            use_container_width=True,
+            help="Gera um ZIP com todos os formatos de exportação e um manifest.",
+        )
+        return
+
+    from .utils.exporters import export_bundle_zip
+
+    analysis_state = st.session_state.get("analysis_state") or {}
+    user_story = st.session_state.get("user_story_input", "")
+    try:
+        bundle_zip = _cached_export(
+            "bundle",
+            lambda: export_bundle_zip(
+                df,
+                user_story=user_story,
+                analysis_report=analysis_state.get("relatorio_analise_inicial", ""),
+                test_plan_report=_test_plan_report(),
+                options=options,
+                pdf_bytes=_current_pdf_bytes() or None,
+            ),
+            **options,
+        )
+    except Exception as e:
+        logger.error(f"Erro ao gerar pacote de exportação: {e}")
+        st.button(
+            "📦 Exportar tudo (.zip)",
+            disabled=True,
+            use_container_width=True,
+            help="Erro ao gerar exportação",
+        )
+        return
+
+    st.download_button(
+        "📦 Exportar tudo (.zip)",
+        bundle_zip,
+        file_name=gerar_nome_arquivo_seguro(user_story, "pacote.zip"),
+        mime="application/zip",
+        use_container_width=True,
+        help="Markdown, PDF, Azure, Xray, TestRail e Zephyr em um único ZIP.",
+    )
+
 
 def _render_new_analysis_button():
     """
@@ -1921,6 +2432,9 @@ def render_main_analysis_page():  # noqa: C901, PLR0912, PLR0915
     4) Exportações (MD, PDF, CSV Azure, XLSX Zephyr).
     5) Botão para iniciar uma nova análise (reset).
     """
+    # Erros de gravações em segundo plano (fila write-behind) desta sessão
+    _announce_history_write_errors()
+
     # ------------------------------------------------------
     # 1) Entrada e execução da análise inicial
     # ------------------------------------------------------
@@ -1937,6 +2451,10 @@ def render_main_analysis_page():  # noqa: C901, PLR0912, PLR0915
             """
             )
 
+        # Chamada à IA em andamento (ou concluída desde o último rerun)
+        if _render_ai_job():
+            return
+
         # Se ainda não há análise no estado, exibimos o input inicial
         if not st.session_state.get("analysis_state"):
             with st.container():
@@ -2087,6 +2605,9 @@ def _render_history_page_impl():  # noqa: C901, PLR0912, PLR0915
         "Aqui você pode rever todas as análises de User Stories já realizadas pelo Oráculo."
     )
 
+    # Garante que edições ainda na fila write-behind apareçam na listagem
+    get_history_writer().flush(timeout=5)
+
     # ==========================================================
     #  BLOCO DE EXCLUSÃO (individual e total)
     # ==========================================================
@@ -2648,6 +3169,8 @@ def main():
     #  Inicialização de banco e estado
     # ------------------------------------------------------
     init_db()
+    # Retenção/vacuum em segundo plano (no máximo uma vez por intervalo)
+    run_history_maintenance()
     initialize_state()
     # ------------------------------------------------------
     # ♿ Acessibilidade global
@@ -4,7 +4,10 @@
 # 📘 Responsável por toda a comunicação com o banco SQLite:
 #    - Criação e inicialização do banco
 #    - Salvamento e leitura de análises realizadas
+#    - Casos de teste normalizados (tabela `test_cases`, 1 linha por caso)
 #    - Exclusão individual e total de registros
+#    - Exportação/importação em massa (NDJSON, streaming)
+#    - Retenção (idade/quantidade), arquivamento e vacuum incremental
 #
 # 🎯 Princípios QA Oráculo:
 #    • Banco testável em memória (usando SQLite :memory:)
@@ -18,10 +21,16 @@
 #    - Todas as funções lidam com exceções de forma segura.
 # ==========================================================
 import datetime
+import gzip
+import hashlib
+import json
 import logging
+import os
 import sqlite3
-from contextlib import closing
-from typing import Optional
+import threading
+import time
+from contextlib import closing, nullcontext
+from typing import IO, Any, Callable, Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -42,8 +51,6 @@ def get_db_connection():
     Usa row_factory para permitir acesso por chave (dict-like).
     """
     # Garante que o diretório data/ existe
-    import os
-
     os.makedirs(os.path.dirname(DB_NAME), exist_ok=True)
 
     conn = sqlite3.connect(
@@ -53,60 +60,240 @@ def get_db_connection():
     # Otimizações de performance para SQLite
     conn.execute("PRAGMA journal_mode=WAL;")
     conn.execute("PRAGMA synchronous=NORMAL;")
+    # Necessário para o ON DELETE CASCADE de test_cases → analysis_history
+    conn.execute("PRAGMA foreign_keys=ON;")
     return conn
 
 
 def init_db():
     """
-    Cria a tabela de histórico de análises se não existir.
+    Prepara o banco aplicando as migrações pendentes.
+
+    As migrações são versionadas por `PRAGMA user_version` (ver `MIGRATIONS`),
+    então a introspecção de schema acontece uma única vez por banco — nunca
+    no caminho de gravação. A conversão para vacuum incremental (um VACUUM
+    completo) fica fora daqui: ver `enable_incremental_auto_vacuum`.
     """
     try:
         with closing(get_db_connection()) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-            CREATE TABLE IF NOT EXISTS analysis_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                created_at TIMESTAMP NOT NULL,
-                user_story TEXT NOT NULL,
-                analysis_report TEXT,
-                test_plan_report TEXT,
-                test_plan_summary TEXT,
-                test_plan_df_json TEXT
-            );
-            """
-            )
-            # Adiciona índices para otimizar queries frequentes
+            run_migrations(conn)
+    except sqlite3.Error as e:
+        logger.error(f"Falha ao inicializar DB: {e}", exc_info=True)
+
+
+# ==========================================================
+# 🧬 Migrações de schema (PRAGMA user_version)
+# ==========================================================
+# Cada migração roda uma única vez, em ordem, dentro da sua própria
+# transação (BEGIN IMMEDIATE); o `user_version` é gravado na mesma
+# transação, então uma falha não deixa o banco em estado intermediário.
+# Para evoluir o schema, acrescente uma nova entrada ao final da lista —
+# nunca altere migrações já publicadas.
+# ==========================================================
+
+
+def _migration_001_analysis_history(cursor: sqlite3.Cursor):
+    """Tabela principal do histórico e índice por data."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS analysis_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TIMESTAMP NOT NULL,
+        user_story TEXT NOT NULL,
+        analysis_report TEXT,
+        test_plan_report TEXT,
+        test_plan_summary TEXT,
+        test_plan_df_json TEXT
+    );
+    """)
+    # Adiciona índices para otimizar queries frequentes
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_analysis_history_created_at
+    ON analysis_history(created_at DESC);
+    """)
+
+
+def _migration_002_optional_columns(cursor: sqlite3.Cursor):
+    """Colunas opcionais do plano em bases criadas antes delas existirem."""
+    cursor.execute("PRAGMA table_info(analysis_history);")
+    existing_columns = {row[1] for row in cursor.fetchall()}
+    for column_name in ("test_plan_summary", "test_plan_df_json"):
+        if column_name not in existing_columns:
             cursor.execute(
-                """
-            CREATE INDEX IF NOT EXISTS idx_analysis_history_created_at
-            ON analysis_history(created_at DESC);
-            """
+                f"ALTER TABLE analysis_history ADD COLUMN {column_name} TEXT;"
             )
-            _ensure_analysis_history_columns(cursor)
+
+
+def _migration_003_test_cases(cursor: sqlite3.Cursor):
+    """Tabela normalizada `test_cases` + migração dos planos em JSON."""
+    _create_test_cases_table(cursor)
+    _migrate_legacy_test_plans(cursor)
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "tabela analysis_history", _migration_001_analysis_history),
+    (2, "colunas opcionais do plano", _migration_002_optional_columns),
+    (3, "tabela test_cases", _migration_003_test_cases),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Versão de schema gravada no banco (`PRAGMA user_version`)."""
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Aplica, em ordem, as migrações com versão maior que a do banco.
+
+    A versão é relida dentro de cada transação, então processos que iniciam
+    ao mesmo tempo não aplicam a mesma migração duas vezes. Erros desfazem a
+    migração corrente e são propagados.
+
+    Returns:
+        Versão de schema após as migrações.
+    """
+    current = get_schema_version(conn)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+            current = get_schema_version(conn)
+            if version <= current:
+                conn.rollback()
+                continue
+            migrate(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {int(version)};")
             conn.commit()
-    except sqlite3.Error as e:
-        logger.error(f"Falha ao inicializar DB: {e}", exc_info=True)
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        current = version
+        logger.info(f"Migração de schema {version} aplicada: {description}")
+    return current
+
+
+def _create_test_cases_table(cursor: sqlite3.Cursor):
+    """
+    Cria a tabela normalizada de casos de teste (um registro por cenário).
+
+    • `position` preserva a ordem original do plano (0..n-1).
+    • `case_json` guarda o registro completo do caso (colunas livres vindas da IA).
+    • O índice (analysis_id, position) torna a leitura do plano uma consulta
+      indexada e a edição de um único caso um UPDATE de uma única linha.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS test_cases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        analysis_id INTEGER NOT NULL
+            REFERENCES analysis_history(id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        case_json TEXT NOT NULL
+    );
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_test_cases_analysis_position
+    ON test_cases(analysis_id, position);
+    """)
 
 
-def _ensure_analysis_history_columns(cursor: sqlite3.Cursor):
+def _migrate_legacy_test_plans(cursor: sqlite3.Cursor):
     """
-    Garante que colunas opcionais existam mesmo em bases antigas.
+    Migra planos salvos no formato antigo (`test_plan_df_json`) para `test_cases`.
+
+    Cada registro migrado tem o blob zerado para que a tabela normalizada
+    seja a única fonte da verdade. Blobs inválidos são mantidos intactos —
+    `parse_legacy_test_plan_json` continua capaz de lê-los.
+    """
+    cursor.execute("""
+        SELECT id, test_plan_df_json
+        FROM analysis_history
+        WHERE test_plan_df_json IS NOT NULL AND test_plan_df_json != ''
+          AND id NOT IN (SELECT DISTINCT analysis_id FROM test_cases);
+        """)
+    for analysis_id, legacy_json in cursor.fetchall():
+        records = parse_legacy_test_plan_json(legacy_json)
+        if not records:
+            continue
+        replace_test_cases(cursor, analysis_id, records)
+        cursor.execute(
+            "UPDATE analysis_history SET test_plan_df_json = NULL WHERE id = ?;",
+            (analysis_id,),
+        )
+        logger.info(
+            f"Plano da análise {analysis_id} migrado para test_cases "
+            f"({len(records)} casos)."
+        )
+
+
+def parse_legacy_test_plan_json(raw_json: Optional[str]) -> list[dict[str, Any]]:
+    """
+    Leitor de compatibilidade para o formato antigo (`test_plan_df_json`).
+
+    Retorna lista vazia para valores ausentes ou inválidos, nunca levanta.
     """
+    if not raw_json:
+        return []
     try:
-        cursor.execute("PRAGMA table_info(analysis_history);")
-        existing_columns = {row[1] for row in cursor.fetchall()}
-        required_columns = {
-            "test_plan_summary": "TEXT",
-            "test_plan_df_json": "TEXT",
-        }
-        for column_name, column_type in required_columns.items():
-            if column_name not in existing_columns:
-                cursor.execute(
-                    f"ALTER TABLE analysis_history ADD COLUMN {column_name} {column_type};"
-                )
-    except sqlite3.Error as e:
-        logger.error(f"Falha ao ajustar colunas: {e}", exc_info=True)
+        records = json.loads(raw_json)
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(records, list):
+        return []
+    return [record for record in records if isinstance(record, dict)]
+
+
+def replace_test_cases(
+    cursor: sqlite3.Cursor, analysis_id: int, records: list[dict[str, Any]]
+):
+    """
+    Substitui todos os casos de teste de uma análise (dentro da transação do chamador).
+
+    Usado ao salvar um plano novo; edições pontuais devem usar
+    `update_test_case` / `delete_test_case`.
+    """
+    cursor.execute("DELETE FROM test_cases WHERE analysis_id = ?;", (analysis_id,))
+    cursor.executemany(
+        "INSERT INTO test_cases (analysis_id, position, case_json) VALUES (?, ?, ?);",
+        [
+            (analysis_id, position, _dump_test_case(record))
+            for position, record in enumerate(records or [])
+        ],
+    )
+
+
+def _dump_test_case(record: dict[str, Any]) -> str:
+    """Serializa um caso de teste; valores não-JSON viram string."""
+    return json.dumps(record, ensure_ascii=False, default=str)
+
+
+def _load_test_cases(
+    cursor: sqlite3.Cursor, analysis_id: int, legacy_json: Optional[str] = None
+) -> list[dict[str, Any]]:
+    """
+    Lê os casos de teste de uma análise em ordem.
+
+    Sem linhas normalizadas (base ainda não migrada), recorre ao blob antigo.
+    """
+    try:
+        cursor.execute(
+            """
+            SELECT case_json FROM test_cases
+            WHERE analysis_id = ?
+            ORDER BY position;
+            """,
+            (analysis_id,),
+        )
+        rows = cursor.fetchall()
+    except sqlite3.OperationalError:
+        # Bases antigas sem a tabela test_cases
+        rows = []
+
+    if rows:
+        return [json.loads(row[0]) for row in rows]
+    return parse_legacy_test_plan_json(legacy_json)
 
 
 def save_analysis_to_history(
@@ -115,20 +302,26 @@ def save_analysis_to_history(
     test_plan_report: str,
     test_plan_summary: Optional[str] = None,
     test_plan_df_json: Optional[str] = None,
+    test_cases: Optional[list[dict[str, Any]]] = None,
 ):
     """
     Salva uma nova análise no histórico.
 
     • Além do markdown do plano (`test_plan_report`), também persistimos um
-      sumário (`test_plan_summary`) e a representação em JSON dos cenários
-      (`test_plan_df_json`).
+      sumário (`test_plan_summary`) e os cenários na tabela `test_cases`
+      (uma linha por caso).
 
     • Isso permite reconstruir a tabela e os expanders na tela de histórico,
       mantendo o mesmo layout informativo do fluxo principal.
 
-    • As colunas são opcionais: `_ensure_analysis_history_columns` garante a
-      existência delas mesmo para bases criadas antes desta evolução.
+    • `test_plan_df_json` é aceito por compatibilidade: o JSON é convertido
+      em linhas de `test_cases` e a coluna antiga fica vazia.
 
+    • O schema é responsabilidade de `init_db` (migrações versionadas):
+      nenhuma introspecção acontece aqui, no caminho de gravação.
+
+    Returns:
+        ID do registro criado, ou None se a gravação falhar.
     """
     try:
         # Sanitiza os campos para evitar valores nulos
@@ -139,9 +332,11 @@ def save_analysis_to_history(
             or "⚠️ Plano de Testes não disponível ou não pôde ser gerado."
         )
 
+        if test_cases is None:
+            test_cases = parse_legacy_test_plan_json(test_plan_df_json)
+
         with closing(get_db_connection()) as conn:
             cursor = conn.cursor()
-            _ensure_analysis_history_columns(cursor)
             timestamp = datetime.datetime.now()  # TIMESTAMP real, não string
             cursor.execute(
                 """
@@ -161,13 +356,18 @@ def save_analysis_to_history(
                     analysis_report,
                     test_plan_report,
                     test_plan_summary or test_plan_report,
-                    test_plan_df_json,
+                    None,
                 ),
             )
+            analysis_id = cursor.lastrowid
+            if test_cases:
+                replace_test_cases(cursor, analysis_id, test_cases)
             conn.commit()
             logger.info(f"Análise salva no histórico em {timestamp}")
+            return analysis_id
     except sqlite3.Error as e:
         logger.error(f"Falha ao salvar análise: {e}", exc_info=True)
+        return None
 
 
 def get_all_analysis_history():
@@ -177,8 +377,7 @@ def get_all_analysis_history():
     try:
         with closing(get_db_connection()) as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                """
+            cursor.execute("""
                 SELECT
                     id,
                     created_at,
@@ -188,14 +387,45 @@ def get_all_analysis_history():
                     test_plan_summary
                 FROM analysis_history
                 ORDER BY created_at DESC;
-                """
-            )
+                """)
             return cursor.fetchall()
     except sqlite3.Error as e:
         logger.error(f"Falha ao buscar histórico: {e}", exc_info=True)
         return []
 
 
+def get_analysis_history_page(
+    limit: int, offset: int = 0
+) -> tuple[int, list[dict[str, Any]]]:
+    """
+    Uma página do histórico (mais recentes primeiro) e o total de análises.
+
+    Só `id`, `created_at` e `user_story` são lidos, com `LIMIT ? OFFSET ?`:
+    o custo não cresce com o tamanho dos relatórios nem com o histórico.
+
+    Returns:
+        `(total, registros)`; `(0, [])` em caso de falha.
+    """
+    try:
+        with closing(get_db_connection()) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM analysis_history;")
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                """
+                SELECT id, created_at, user_story
+                FROM analysis_history
+                ORDER BY created_at DESC, id DESC
+                LIMIT ? OFFSET ?;
+                """,
+                (max(int(limit), 0), max(int(offset), 0)),
+            )
+            return total, [dict(row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        logger.error(f"Falha ao buscar página do histórico: {e}", exc_info=True)
+        return 0, []
+
+
 def get_analysis_by_id(analysis_id: int):
     """
     Busca uma análise específica pelo ID.
@@ -209,7 +439,11 @@ def get_analysis_by_id(analysis_id: int):
             )
             row = cursor.fetchone()
             if row is not None:
-                return dict(row)
+                entry = dict(row)
+                entry["test_cases"] = _load_test_cases(
+                    cursor, entry["id"], entry.get("test_plan_df_json")
+                )
+                return entry
             return None
 
     except sqlite3.Error as e:
@@ -220,6 +454,144 @@ def get_analysis_by_id(analysis_id: int):
         return None
 
 
+def _safe_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        logger.error(f"ID inválido fornecido: {value}")
+        return None
+
+
+def iter_analyses_by_ids(
+    analysis_ids: list[int], *, chunk_size: int = 500
+) -> Iterator[tuple[Any, Optional[dict[str, Any]]]]:
+    """
+    Busca várias análises (com os casos de teste) em poucas consultas.
+
+    Os IDs são lidos em blocos de `chunk_size` com `WHERE id IN (...)` —
+    duas consultas por bloco, em uma única conexão — em vez de uma conexão
+    e uma consulta por análise.
+
+    Yields:
+        Pares `(id, análise)` na ordem de `analysis_ids`; a análise é `None`
+        para IDs inexistentes ou inválidos.
+    """
+    try:
+        with closing(get_db_connection()) as conn:
+            for start in range(0, len(analysis_ids), chunk_size):
+                chunk = analysis_ids[start : start + chunk_size]
+                parsed_ids = [_safe_int(analysis_id) for analysis_id in chunk]
+                valid_ids = sorted({i for i in parsed_ids if i is not None})
+
+                found: dict[int, dict[str, Any]] = {}
+                if valid_ids:
+                    for record in _iter_history_records(
+                        conn, chunk_size, ids=valid_ids, iso_dates=False
+                    ):
+                        found[record["id"]] = record
+
+                for analysis_id, parsed_id in zip(chunk, parsed_ids):
+                    yield analysis_id, found.get(parsed_id)
+    except sqlite3.Error as e:
+        logger.error(f"Falha ao buscar análises em lote: {e}", exc_info=True)
+        raise
+
+
+def get_test_cases(analysis_id: int) -> list[dict[str, Any]]:
+    """
+    Retorna os casos de teste de uma análise, na ordem do plano.
+
+    Consulta indexada em `test_cases`; para registros ainda não migrados
+    recorre ao leitor de compatibilidade do `test_plan_df_json`.
+    """
+    try:
+        with closing(get_db_connection()) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT test_plan_df_json FROM analysis_history WHERE id = ?;",
+                (int(analysis_id),),
+            )
+            row = cursor.fetchone()
+            legacy_json = row[0] if row is not None else None
+            return _load_test_cases(cursor, int(analysis_id), legacy_json)
+    except sqlite3.Error as e:
+        logger.error(
+            f"Falha ao buscar casos de teste da análise {analysis_id}: {e}",
+            exc_info=True,
+        )
+        return []
+
+
+def update_test_case_row(
+    cursor: sqlite3.Cursor, analysis_id: int, position: int, record: dict[str, Any]
+) -> bool:
+    """Atualiza um caso de teste dentro da transação do chamador."""
+    cursor.execute(
+        """
+        UPDATE test_cases SET case_json = ?
+        WHERE analysis_id = ? AND position = ?;
+        """,
+        (_dump_test_case(record), analysis_id, position),
+    )
+    return cursor.rowcount > 0
+
+
+def delete_test_case_row(
+    cursor: sqlite3.Cursor, analysis_id: int, position: int
+) -> bool:
+    """Remove um caso de teste e reposiciona os seguintes (transação do chamador)."""
+    cursor.execute(
+        "DELETE FROM test_cases WHERE analysis_id = ? AND position = ?;",
+        (analysis_id, position),
+    )
+    deleted = cursor.rowcount > 0
+    if deleted:
+        cursor.execute(
+            """
+            UPDATE test_cases SET position = position - 1
+            WHERE analysis_id = ? AND position > ?;
+            """,
+            (analysis_id, position),
+        )
+    return deleted
+
+
+def update_test_case(analysis_id: int, position: int, record: dict[str, Any]) -> bool:
+    """
+    Atualiza um único caso de teste (UPDATE de uma linha).
+    Retorna True se o caso existia e foi atualizado.
+    """
+    try:
+        with closing(get_db_connection()) as conn:
+            updated = update_test_case_row(conn.cursor(), analysis_id, position, record)
+            conn.commit()
+            return updated
+    except sqlite3.Error as e:
+        logger.error(
+            f"Falha ao atualizar caso {position} da análise {analysis_id}: {e}",
+            exc_info=True,
+        )
+        return False
+
+
+def delete_test_case(analysis_id: int, position: int) -> bool:
+    """
+    Remove um único caso de teste e reposiciona os seguintes.
+    Retorna True se algo foi removido.
+    """
+    try:
+        with closing(get_db_connection()) as conn:
+            deleted = delete_test_case_row(conn.cursor(), analysis_id, position)
+            conn.commit()
+            return deleted
+    except sqlite3.Error as e:
+        logger.error(
+            f"Falha ao remover caso {position} da análise {analysis_id}: {e}",
+            exc_info=True,
+        )
+        return False
+
+
 def delete_analysis_by_id(entry_id: int) -> bool:
     """
     Deleta uma análise específica pelo ID.
@@ -240,13 +612,599 @@ def clear_history() -> int:
     """
     Remove todas as análises do histórico.
     Retorna o número de registros apagados.
+
+    A remoção é feita em lotes pequenos (uma transação por lote), para que
+    outras escritas não fiquem bloqueadas durante toda a limpeza.
     """
+    deleted = 0
     try:
         with closing(get_db_connection()) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM analysis_history")
-            conn.commit()
-            return cursor.rowcount
+            for batch_deleted in _delete_history_batches(conn, "1 = 1", ()):
+                deleted += batch_deleted
     except sqlite3.Error as e:
         logger.error(f"Falha ao limpar histórico: {e}", exc_info=True)
+    return deleted
+
+
+# ==========================================================
+# 📦 Exportação / importação em massa (NDJSON)
+# ==========================================================
+# Uma análise por linha, com os casos de teste embutidos:
+#   {"id": 1, "created_at": "...", "user_story": "...", ...,
+#    "test_cases": [...], "content_hash": "sha256..."}
+#
+# Ambos os sentidos trabalham em streaming (memória constante):
+#   • a exportação percorre `analysis_history` e `test_cases` em paralelo
+#     (merge pelos índices), lendo em lotes com `fetchmany`;
+#   • a importação grava em transações de `chunk_size` linhas com
+#     `executemany`.
+# Diferente das demais funções do módulo, erros do SQLite são registrados
+# e propagados: falhar em silêncio deixaria um backup incompleto.
+# ==========================================================
+
+_BULK_FIELDS = (
+    "created_at",
+    "user_story",
+    "analysis_report",
+    "test_plan_report",
+    "test_plan_summary",
+)
+
+ProgressCallback = Callable[[int], None]
+
+
+def history_content_hash(record: dict[str, Any]) -> str:
+    """
+    Hash SHA-256 do conteúdo de uma análise (ignora `id` e `content_hash`).
+
+    Usado para detectar duplicatas na importação: o mesmo registro exportado
+    de qualquer ambiente gera sempre o mesmo hash.
+    """
+    payload = {field: record.get(field) for field in _BULK_FIELDS}
+    payload["test_cases"] = record.get("test_cases") or []
+    canonical = json.dumps(
+        payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _dump_bulk_record(record: dict[str, Any]) -> str:
+    """Serializa uma análise como uma linha NDJSON (com `content_hash`)."""
+    record["content_hash"] = history_content_hash(record)
+    return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+
+def _iter_fetchmany(cursor: sqlite3.Cursor, batch_size: int) -> Iterator[Any]:
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _iter_history_records(
+    conn: sqlite3.Connection,
+    batch_size: int,
+    ids: Optional[list[int]] = None,
+    *,
+    iso_dates: bool = True,
+) -> Iterator[dict[str, Any]]:
+    """
+    Percorre o histórico em ordem de `id`, com os casos de teste embutidos.
+
+    As duas consultas são lidas em paralelo (merge por `analysis_id`), então
+    nenhuma tabela é carregada inteira em memória nem há uma consulta por
+    análise. `ids` restringe a leitura a um lote específico. Com
+    `iso_dates=False`, `created_at` é devolvido como lido do banco.
+    """
+    history_filter = cases_filter = ""
+    params: tuple[int, ...] = ()
+    if ids is not None:
+        placeholders = ",".join("?" * len(ids))
+        history_filter = f"WHERE id IN ({placeholders})"
+        cases_filter = f"WHERE analysis_id IN ({placeholders})"
+        params = tuple(ids)
+
+    history_cursor = conn.cursor()
+    history_cursor.execute(
+        f"""
+        SELECT id, created_at, user_story, analysis_report,
+               test_plan_report, test_plan_summary, test_plan_df_json
+        FROM analysis_history
+        {history_filter}
+        ORDER BY id;
+        """,
+        params,
+    )
+    cases_cursor = conn.cursor()
+    cases_cursor.execute(
+        f"""
+        SELECT analysis_id, case_json
+        FROM test_cases
+        {cases_filter}
+        ORDER BY analysis_id, position;
+        """,
+        params,
+    )
+    cases = _iter_fetchmany(cases_cursor, batch_size)
+    pending_case = next(cases, None)
+
+    for row in _iter_fetchmany(history_cursor, batch_size):
+        analysis_id = row[0]
+        while pending_case is not None and pending_case[0] < analysis_id:
+            # Casos órfãos (sem análise correspondente) são ignorados
+            pending_case = next(cases, None)
+
+        test_cases = []
+        while pending_case is not None and pending_case[0] == analysis_id:
+            test_cases.append(json.loads(pending_case[1]))
+            pending_case = next(cases, None)
+        if not test_cases:
+            test_cases = parse_legacy_test_plan_json(row[6])
+
+        created_at = row[1]
+        if iso_dates and isinstance(created_at, datetime.datetime):
+            created_at = created_at.isoformat()
+
+        yield {
+            "id": analysis_id,
+            "created_at": created_at,
+            "user_story": row[2],
+            "analysis_report": row[3],
+            "test_plan_report": row[4],
+            "test_plan_summary": row[5],
+            "test_cases": test_cases,
+        }
+
+
+def export_history_ndjson(
+    output: IO[str],
+    *,
+    batch_size: int = 500,
+    progress: Optional[ProgressCallback] = None,
+) -> int:
+    """
+    Exporta todo o histórico para `output` no formato NDJSON.
+
+    A leitura acontece dentro de uma única transação de leitura (snapshot
+    consistente mesmo com escritas concorrentes no modo WAL).
+
+    Args:
+        output: Arquivo texto aberto para escrita.
+        batch_size: Linhas lidas por `fetchmany` (e intervalo do progresso).
+        progress: Callback chamado com o total de registros já exportados.
+
+    Returns:
+        Quantidade de análises exportadas.
+    """
+    exported = 0
+    try:
+        with closing(get_db_connection()) as conn:
+            conn.execute("BEGIN;")
+            try:
+                for record in _iter_history_records(conn, batch_size):
+                    output.write(_dump_bulk_record(record))
+                    exported += 1
+                    if progress and exported % batch_size == 0:
+                        progress(exported)
+            finally:
+                conn.rollback()
+    except sqlite3.Error as e:
+        logger.error(f"Falha ao exportar histórico: {e}", exc_info=True)
+        raise
+
+    if progress:
+        progress(exported)
+    logger.info(f"{exported} análises exportadas em NDJSON")
+    return exported
+
+
+def _parse_bulk_record(line: str) -> Optional[dict[str, Any]]:
+    """Valida uma linha NDJSON; retorna None para linhas inválidas."""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(record, dict) or not record.get("user_story"):
+        return None
+
+    try:
+        created_at = datetime.datetime.fromisoformat(str(record.get("created_at")))
+    except ValueError:
+        return None
+
+    test_cases = record.get("test_cases") or []
+    if not isinstance(test_cases, list) or not all(
+        isinstance(case, dict) for case in test_cases
+    ):
+        return None
+
+    parsed = {field: record.get(field) for field in _BULK_FIELDS}
+    parsed["created_at"] = created_at.isoformat()
+    parsed["test_cases"] = test_cases
+    return parsed
+
+
+def _existing_content_hashes(conn: sqlite3.Connection, batch_size: int) -> set[str]:
+    return {
+        history_content_hash(record)
+        for record in _iter_history_records(conn, batch_size)
+    }
+
+
+def _insert_history_chunk(
+    cursor: sqlite3.Cursor, records: list[dict[str, Any]]
+) -> None:
+    """
+    Insere um lote de análises e seus casos (numa única transação).
+
+    Cada análise é inserida com `execute` para obter o id gerado
+    (`lastrowid`) — `executemany` não o expõe —, e os casos de todo o lote
+    vão num único `executemany`.
+    """
+    analysis_ids = []
+    for record in records:
+        cursor.execute(
+            """
+            INSERT INTO analysis_history (
+                created_at,
+                user_story,
+                analysis_report,
+                test_plan_report,
+                test_plan_summary,
+                test_plan_df_json
+            )
+            VALUES (?, ?, ?, ?, ?, NULL);
+            """,
+            (
+                record["created_at"],
+                record["user_story"],
+                record["analysis_report"],
+                record["test_plan_report"],
+                record["test_plan_summary"],
+            ),
+        )
+        analysis_ids.append(cursor.lastrowid)
+
+    cursor.executemany(
+        """
+        INSERT INTO test_cases (analysis_id, position, case_json)
+        VALUES (?, ?, ?);
+        """,
+        [
+            (analysis_id, position, _dump_test_case(case))
+            for analysis_id, record in zip(analysis_ids, records)
+            for position, case in enumerate(record["test_cases"])
+        ],
+    )
+
+
+def import_history_ndjson(
+    source: IO[str],
+    *,
+    chunk_size: int = 1000,
+    skip_duplicates: bool = False,
+    progress: Optional[ProgressCallback] = None,
+) -> dict[str, int]:
+    """
+    Importa análises de um arquivo NDJSON gerado por `export_history_ndjson`.
+
+    Os registros recebem novos ids; os casos de teste são recriados na tabela
+    `test_cases`. Cada lote de `chunk_size` linhas é gravado em uma transação,
+    então uma falha preserva os lotes anteriores.
+
+    Args:
+        source: Arquivo texto aberto para leitura.
+        chunk_size: Registros por transação.
+        skip_duplicates: Ignora registros cujo hash de conteúdo já exista no
+            banco (ou já tenha aparecido no próprio arquivo).
+        progress: Callback chamado com o total de linhas já processadas.
+
+    Returns:
+        Contadores `imported`, `duplicates` e `invalid`.
+    """
+    stats = {"imported": 0, "duplicates": 0, "invalid": 0}
+    processed = 0
+    try:
+        with closing(get_db_connection()) as conn:
+            cursor = conn.cursor()
+            seen = (
+                _existing_content_hashes(conn, chunk_size) if skip_duplicates else None
+            )
+
+            chunk: list[dict[str, Any]] = []
+            for line in source:
+                if not line.strip():
+                    continue
+                processed += 1
+                record = _parse_bulk_record(line)
+                if record is None:
+                    stats["invalid"] += 1
+                elif (
+                    seen is not None
+                    and (digest := history_content_hash(record)) in seen
+                ):
+                    stats["duplicates"] += 1
+                else:
+                    if seen is not None:
+                        seen.add(digest)
+                    chunk.append(record)
+
+                if len(chunk) >= chunk_size:
+                    _insert_history_chunk(cursor, chunk)
+                    conn.commit()
+                    stats["imported"] += len(chunk)
+                    chunk = []
+                if progress and processed % chunk_size == 0:
+                    progress(processed)
+
+            if chunk:
+                _insert_history_chunk(cursor, chunk)
+                conn.commit()
+                stats["imported"] += len(chunk)
+    except sqlite3.Error as e:
+        logger.error(f"Falha ao importar histórico: {e}", exc_info=True)
+        raise
+
+    if progress:
+        progress(processed)
+    logger.info(
+        "Importação NDJSON concluída: "
+        f"{stats['imported']} importadas, {stats['duplicates']} duplicadas, "
+        f"{stats['invalid']} inválidas"
+    )
+    return stats
+
+
+# ==========================================================
+# 🧹 Retenção, arquivamento e vacuum incremental
+# ==========================================================
+# Remoções em massa são feitas em lotes de `HISTORY_DELETE_BATCH_SIZE`
+# registros, cada um em sua própria transação curta: o lock de escrita é
+# liberado entre os lotes e outras gravações (app, fila write-behind)
+# seguem normalmente. Após cada lote, até `HISTORY_VACUUM_PAGES` páginas
+# livres são devolvidas ao sistema com `PRAGMA incremental_vacuum`.
+#
+# Configuração por variáveis de ambiente (ver `.env.example`):
+#   HISTORY_RETENTION_DAYS   → remove análises mais antigas que N dias
+#   HISTORY_MAX_ENTRIES      → mantém apenas as N análises mais recentes
+#   HISTORY_ARCHIVE_PATH     → arquiva os removidos em NDJSON gzip
+#   HISTORY_MAINTENANCE_INTERVAL → intervalo mínimo (s) entre manutenções
+# ==========================================================
+
+HISTORY_DELETE_BATCH_SIZE = 500
+HISTORY_VACUUM_PAGES = 256
+HISTORY_MAINTENANCE_INTERVAL = 3600
+
+_maintenance_lock = threading.Lock()
+_last_maintenance_at: Optional[float] = None
+
+
+def _incremental_vacuum(conn: sqlite3.Connection, max_pages: Optional[int]) -> int:
+    """Libera até `max_pages` páginas livres. Retorna quantas foram liberadas."""
+    before = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+    if not before:
         return 0
+    pragma = (
+        "PRAGMA incremental_vacuum;"
+        if max_pages is None
+        else f"PRAGMA incremental_vacuum({int(max_pages)});"
+    )
+    # O PRAGMA libera uma página por passo e `execute` avança só um passo;
+    # `executescript` (sqlite3_exec) executa o comando até o fim.
+    conn.executescript(pragma)
+    after = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+    return before - after
+
+
+def _delete_history_batches(
+    conn: sqlite3.Connection,
+    where_sql: str,
+    params: tuple[Any, ...],
+    *,
+    batch_size: int = HISTORY_DELETE_BATCH_SIZE,
+    archive: Optional[IO[str]] = None,
+) -> Iterator[int]:
+    """
+    Remove as análises que atendem `where_sql`, um lote por transação.
+
+    Os casos de teste são removidos via ON DELETE CASCADE. Com `archive`, cada
+    lote é gravado no arquivo (NDJSON) antes de ser apagado.
+
+    Yields:
+        Quantidade de análises removidas em cada lote.
+    """
+    cursor = conn.cursor()
+    while True:
+        cursor.execute(
+            f"""
+            SELECT id FROM analysis_history
+            WHERE {where_sql}
+            ORDER BY id
+            LIMIT ?;
+            """,
+            (*params, batch_size),
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return
+
+        if archive is not None:
+            for record in _iter_history_records(conn, batch_size, ids=ids):
+                archive.write(_dump_bulk_record(record))
+            archive.flush()
+
+        placeholders = ",".join("?" * len(ids))
+        cursor.execute(
+            f"DELETE FROM analysis_history WHERE id IN ({placeholders});", ids
+        )
+        conn.commit()
+        deleted = cursor.rowcount
+        _incremental_vacuum(conn, HISTORY_VACUUM_PAGES)
+        yield deleted
+
+
+def apply_retention_policy(
+    max_age_days: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    archive_path: Optional[str] = None,
+    batch_size: int = HISTORY_DELETE_BATCH_SIZE,
+) -> dict[str, int]:
+    """
+    Aplica a política de retenção do histórico.
+
+    Args:
+        max_age_days: Remove análises criadas há mais de N dias.
+        max_entries: Mantém apenas as N análises mais recentes.
+        archive_path: Se informado, as análises removidas são acrescentadas a
+            este arquivo NDJSON compactado (gzip). O arquivo pode ser
+            restaurado com `import_history_ndjson(gzip.open(path, "rt"))`.
+        batch_size: Análises removidas por transação.
+
+    Returns:
+        Contadores `deleted` e `archived`.
+    """
+    stats = {"deleted": 0, "archived": 0}
+    rules: list[tuple[str, tuple[Any, ...]]] = []
+    if max_age_days is not None:
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=max_age_days)
+        rules.append(("created_at < ?", (cutoff,)))
+    if max_entries is not None:
+        rules.append(
+            (
+                """id NOT IN (
+                    SELECT id FROM analysis_history
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT ?
+                )""",
+                (max(int(max_entries), 0),),
+            )
+        )
+    if not rules:
+        return stats
+
+    try:
+        if archive_path:
+            os.makedirs(os.path.dirname(archive_path) or ".", exist_ok=True)
+        with (
+            closing(get_db_connection()) as conn,
+            (
+                gzip.open(archive_path, "at", encoding="utf-8")
+                if archive_path
+                else nullcontext()
+            ) as archive,
+        ):
+            for where_sql, params in rules:
+                for deleted in _delete_history_batches(
+                    conn,
+                    where_sql,
+                    params,
+                    batch_size=batch_size,
+                    archive=archive,
+                ):
+                    stats["deleted"] += deleted
+                    if archive is not None:
+                        stats["archived"] += deleted
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Falha ao aplicar retenção do histórico: {e}", exc_info=True)
+
+    if stats["deleted"]:
+        logger.info(
+            f"Retenção do histórico: {stats['deleted']} análises removidas "
+            f"({stats['archived']} arquivadas)"
+        )
+    return stats
+
+
+def enable_incremental_auto_vacuum() -> bool:
+    """
+    Ativa `auto_vacuum=INCREMENTAL` para que o espaço de registros apagados
+    possa ser devolvido ao sistema aos poucos (`PRAGMA incremental_vacuum`).
+
+    Como a conexão já ativou o WAL (o que inicializa o arquivo), o novo modo
+    só é adotado após um VACUUM completo — demorado em históricos grandes,
+    por isso roda só sob demanda (`history_cli vacuum`), nunca no app.
+    Falhas (banco em uso, disco cheio) são registradas e não interrompem.
+
+    Returns:
+        True se o banco está (ou passou a estar) em modo incremental.
+    """
+    try:
+        with closing(get_db_connection()) as conn:
+            if conn.execute("PRAGMA auto_vacuum;").fetchone()[0] == 2:
+                return True
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+            logger.info("Convertendo banco para auto_vacuum incremental (VACUUM)")
+            conn.execute("VACUUM;")
+            return conn.execute("PRAGMA auto_vacuum;").fetchone()[0] == 2
+    except sqlite3.Error as e:
+        logger.error(f"Falha ao ativar o vacuum incremental: {e}", exc_info=True)
+        return False
+
+
+def incremental_vacuum(max_pages: Optional[int] = None) -> int:
+    """
+    Devolve ao sistema páginas livres do banco (todas, se `max_pages` for None).
+    Retorna o número de páginas liberadas.
+    """
+    try:
+        with closing(get_db_connection()) as conn:
+            return _incremental_vacuum(conn, max_pages)
+    except sqlite3.Error as e:
+        logger.error(f"Falha no vacuum incremental: {e}", exc_info=True)
+        return 0
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Valor inválido para {name}: {value!r} (ignorado)")
+        return None
+
+
+def _run_history_maintenance():
+    apply_retention_policy(
+        max_age_days=_env_int("HISTORY_RETENTION_DAYS"),
+        max_entries=_env_int("HISTORY_MAX_ENTRIES"),
+        archive_path=os.getenv("HISTORY_ARCHIVE_PATH") or None,
+    )
+    incremental_vacuum(HISTORY_VACUUM_PAGES)
+
+
+def run_history_maintenance(force: bool = False) -> Optional[threading.Thread]:
+    """
+    Dispara a manutenção periódica do histórico em segundo plano.
+
+    Aplica a retenção configurada por ambiente e um vacuum incremental, no
+    máximo uma vez a cada `HISTORY_MAINTENANCE_INTERVAL` segundos por
+    processo — seguro para ser chamado a cada rerun do Streamlit.
+
+    Returns:
+        A thread iniciada, ou None se a manutenção ainda não é devida.
+    """
+    global _last_maintenance_at
+    interval = _env_int("HISTORY_MAINTENANCE_INTERVAL")
+    if interval is None:
+        interval = HISTORY_MAINTENANCE_INTERVAL
+
+    with _maintenance_lock:
+        now = time.monotonic()
+        if (
+            not force
+            and _last_maintenance_at is not None
+            and now - _last_maintenance_at < interval
+        ):
+            return None
+        _last_maintenance_at = now
+
+    thread = threading.Thread(
+        target=_run_history_maintenance,
+        name="qa-oraculo-history-maintenance",
+        daemon=True,
+    )
+    thread.start()
+    return thread
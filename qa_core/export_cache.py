@@ -0,0 +1,233 @@
+# ==========================================================
+# export_cache.py — Cache de artefatos de exportação
+# ==========================================================
+# 📘 A cada rerun do Streamlit a página principal montava de novo o
+#    Markdown, o ZIP do Cucumber, a collection do Postman e os previews
+#    (Azure, TestRail, Xray, Zephyr) — e cada geração incrementava as
+#    métricas de exportação.
+#
+# 🎯 Os artefatos ficam guardados por sessão, indexados pelo hash do
+#    conteúdo do plano + opções da exportação. Reruns sem mudança apenas
+#    consultam o cache; `_update_test_plan_outputs` invalida explicitamente
+#    o que foi gerado para a versão anterior do plano.
+#
+# 🧩 Abaixo do cache de artefatos há um cache de fragmentos por caso: ao
+#    regenerar após uma edição, só o caso alterado é renderizado de novo.
+# ==========================================================
+import hashlib
+import json
+import math
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Mapping, Optional, TypeVar
+
+import pandas as pd
+
+# Limites padrão por sessão (quantidade de artefatos e bytes somados)
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+T = TypeVar("T")
+
+
+def plan_fingerprint(*parts: Optional[str]) -> str:
+    """
+    Calcula o hash de conteúdo do plano a partir das partes informadas
+    (JSON dos casos, relatórios, user story). `None` equivale a vazio.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        # Separador: ("ab", "") e ("a", "b") geram hashes diferentes
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def artifact_key(
+    kind: str, fingerprint: str, options: Optional[Mapping[str, Any]] = None
+) -> str:
+    """Chave do artefato: tipo + hash do plano + opções da exportação."""
+    options_json = json.dumps(
+        options or {}, sort_keys=True, ensure_ascii=False, default=str
+    )
+    return plan_fingerprint(kind, fingerprint, options_json)
+
+
+def _artifact_size(value: Any) -> int:
+    """Tamanho aproximado do artefato, usado para limitar a memória da sessão."""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return 0
+
+
+class ExportArtifactCache:
+    """Cache LRU de artefatos de exportação com limite de itens e de bytes.
+
+    Args:
+        max_entries: Quantidade máxima de artefatos guardados.
+        max_bytes: Soma máxima (aproximada) do tamanho dos artefatos.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self._entries: "OrderedDict[str, tuple[Any, int]]" = OrderedDict()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get_or_build(
+        self,
+        kind: str,
+        fingerprint: str,
+        builder: Callable[[], Any],
+        options: Optional[Mapping[str, Any]] = None,
+    ) -> Any:
+        """
+        Devolve o artefato em cache ou o gera com `builder`.
+
+        Exceções do `builder` são propagadas e nada é guardado.
+        """
+        key = artifact_key(kind, fingerprint, options)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        value = builder()
+        size = _artifact_size(value)
+        # Artefatos maiores que o limite inteiro não são guardados
+        if size <= self._max_bytes:
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+            self._evict()
+        return value
+
+    def _evict(self) -> None:
+        """Descarta os artefatos usados há mais tempo até respeitar os limites."""
+        while self._entries and (
+            len(self._entries) > self._max_entries
+            or self._total_bytes > self._max_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._total_bytes -= size
+
+    def invalidate(self) -> None:
+        """Remove todos os artefatos (ex.: após alterar o plano de testes)."""
+        self._entries.clear()
+        self._total_bytes = 0
+
+
+# ==========================================================
+#  Fragmentos por caso de teste
+# ==========================================================
+# Após editar um único cenário, os relatórios e exportações são remontados
+# por concatenação: o bloco Markdown, o arquivo .feature, as linhas CSV, o
+# item do Postman e o JSON de cada caso ficam em cache indexados pelo
+# conteúdo do caso, e só o caso alterado é renderizado de novo.
+DEFAULT_MAX_FRAGMENTS = 20_000
+
+
+_NAN_KEY = "NaN"
+
+
+def _is_nan(value: Any) -> bool:
+    return isinstance(value, float) and math.isnan(value)
+
+
+def case_key(record: Mapping[str, Any]) -> Hashable:
+    """
+    Chave de conteúdo de um caso de teste (registro coluna → valor).
+
+    Usa os próprios pares do registro (com o tipo de cada valor, para que
+    `1` e `True` não colidam); valores não hasheáveis, como cenários em
+    lista, caem na serialização JSON do registro. NaN vira um marcador fixo
+    (`nan != nan`: cada cópia geraria uma chave nova); não vira "", porque
+    os renderizadores exibem NaN e "" de formas diferentes.
+    """
+    key = tuple(
+        (column, value.__class__, _NAN_KEY if _is_nan(value) else value)
+        for column, value in record.items()
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return key
+
+
+class CaseFragmentCache:
+    """Cache LRU de fragmentos renderizados por caso de teste.
+
+    Args:
+        max_entries: Quantidade máxima de fragmentos guardados.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_FRAGMENTS):
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_render(
+        self,
+        kind: str,
+        record: Mapping[str, Any],
+        render: Callable[[], T],
+        options: Hashable = None,
+    ) -> T:
+        """
+        Devolve o fragmento `kind` do caso ou o gera com `render`.
+
+        `options` reúne o que, além do próprio caso, influencia o fragmento
+        (ex.: título padrão derivado do índice, campos do formulário).
+        """
+        key = (kind, options, case_key(record))
+        try:
+            value = self._entries[key]
+        except KeyError:
+            pass
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = render()
+        self._entries[key] = value
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def render_fragment(
+    fragments: Optional[CaseFragmentCache],
+    kind: str,
+    record: Mapping[str, Any],
+    render: Callable[[], T],
+    options: Hashable = None,
+) -> T:
+    """Usa o cache de fragmentos quando informado; sem cache, apenas renderiza."""
+    if fragments is None:
+        return render()
+    return fragments.get_or_render(kind, record, render, options)
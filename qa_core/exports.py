@@ -1,39 +1,220 @@
+import codecs
 import csv
 import io
 import locale
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+)
+
 import pandas as pd
 
+from .export_cache import CaseFragmentCache, render_fragment
+from .gherkin import ParsedCase, parse_cenario
+from .text_utils import iter_case_records
+
+# ==========================================================
+#  CASOS PREPARADOS (PERCURSO ÚNICO)
+# ==========================================================
+# Os geradores de linhas de cada formato recebem os casos já convertidos em
+# registros e com o cenário interpretado. Cada exportador individual faz o
+# próprio percurso do DataFrame; o pacote "exportar tudo" percorre uma vez
+# e alimenta todos os formatos com a mesma lista.
+
+
+class PreparedCase(NamedTuple):
+    """Caso de teste pronto para os exportadores.
+
+    Attributes:
+        index: Rótulo da linha no DataFrame original.
+        record: Registro da linha (coluna → valor).
+        parsed: Cenário Gherkin interpretado.
+    """
+
+    index: Any
+    record: dict
+    parsed: ParsedCase
+
+    @property
+    def title(self) -> str:
+        """Título do caso, ou "Caso de Teste N" quando a coluna não existe."""
+        return self.record.get("titulo", f"Caso de Teste {int(self.index)+1}")
+
+
+def iter_prepared_cases(df: Optional[pd.DataFrame]) -> Iterator[PreparedCase]:
+    """Percorre o DataFrame de cenários uma única vez, interpretando cada caso."""
+    if df is None or df.empty:
+        return
+    for index, row in iter_case_records(df):
+        yield PreparedCase(index, row, parse_cenario(row.get("cenario", [])))
+
+
+# Entrada dos exportadores: o DataFrame ou a lista de casos já preparados
+CaseSource = pd.DataFrame | Iterable[PreparedCase]
+
+
+def _as_cases(source: Optional[CaseSource]) -> Iterable[PreparedCase]:
+    """Aceita o DataFrame de cenários ou casos já preparados (percurso único)."""
+    if source is None or isinstance(source, pd.DataFrame):
+        return iter_prepared_cases(source)
+    return source
+
+
+def _linhas_por_caso(
+    cases: Iterable[PreparedCase],
+    kind: str,
+    render: Callable[..., Iterator[list]],
+    options: tuple,
+    fragments: Optional[CaseFragmentCache],
+) -> Iterator[list]:
+    """
+    Linhas de cada caso geradas por `render(case, *options)`, reaproveitando
+    o cache de fragmentos (se houver) para os casos que não mudaram.
+    """
+    for case in cases:
+        yield from render_fragment(
+            fragments,
+            kind,
+            case.record,
+            lambda case=case: list(render(case, *options)),
+            (case.title, options),
+        )
+
+
 # ==========================================================
 #  EXPORTAÇÃO PARA EXCEL
 # ==========================================================
 
 
-def to_excel(df: pd.DataFrame, sheet_name: str) -> bytes:
+# A partir deste número de linhas o Excel é gerado em modo streaming
+# (memória constante); abaixo dele segue pelo pandas/openpyxl padrão.
+EXCEL_STREAMING_MIN_ROWS = 1000
+
+
+def to_excel(
+    df: pd.DataFrame, sheet_name: str, *, streaming: Optional[bool] = None
+) -> bytes:
     """Converte um DataFrame Pandas em bytes de arquivo Excel.
 
     Gera um arquivo Excel (.xlsx) em memória a partir de um DataFrame,
     retornando os bytes prontos para download ou salvamento.
 
+    Planilhas grandes (ex.: Zephyr com milhares de passos) são escritas linha
+    a linha por um backend de memória constante: `xlsxwriter` com
+    `constant_memory`, se instalado, ou o modo write-only do openpyxl.
+
     Args:
         df: DataFrame Pandas contendo os dados a serem exportados.
         sheet_name: Nome da planilha (aba) no arquivo Excel.
+        streaming: Força (True) ou desativa (False) o backend de streaming;
+            por padrão é escolhido pelo tamanho (`EXCEL_STREAMING_MIN_ROWS`).
 
     Returns:
         Bytes do arquivo Excel (.xlsx) pronto para download.
     """
+    if streaming is None:
+        streaming = len(df) >= EXCEL_STREAMING_MIN_ROWS
+    if streaming:
+        xlsxwriter = _import_xlsxwriter()
+        if xlsxwriter is not None:
+            return _to_excel_xlsxwriter(xlsxwriter, df, sheet_name)
+        return _to_excel_openpyxl_write_only(df, sheet_name)
+
     output = io.BytesIO()
     with pd.ExcelWriter(output, engine="openpyxl", mode="w") as writer:
         df.to_excel(writer, index=False, sheet_name=sheet_name)
     return output.getvalue()
 
 
+def _import_xlsxwriter():
+    """Importa o xlsxwriter (opcional); retorna None se não estiver instalado."""
+    try:
+        import xlsxwriter  # type: ignore
+    except ImportError:
+        return None
+    return xlsxwriter
+
+
+def _excel_rows(df: pd.DataFrame) -> Iterator[tuple]:
+    """Linhas de dados do DataFrame, com valores ausentes (NaN/None) vazios."""
+    values = df.astype(object).where(df.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def _to_excel_xlsxwriter(xlsxwriter, df: pd.DataFrame, sheet_name: str) -> bytes:
+    output = io.BytesIO()
+    # constant_memory: cada linha é gravada em disco assim que a seguinte começa
+    workbook = xlsxwriter.Workbook(
+        output, {"constant_memory": True, "strings_to_urls": False}
+    )
+    # Mesmo estilo de cabeçalho do pandas (negrito, borda fina, centralizado)
+    header_format = workbook.add_format(
+        {"bold": True, "border": 1, "align": "center", "valign": "top"}
+    )
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(column) for column in df.columns], header_format)
+    for row_number, row in enumerate(_excel_rows(df), start=1):
+        worksheet.write_row(row_number, 0, row)
+    workbook.close()
+    return output.getvalue()
+
+
+def _to_excel_openpyxl_write_only(df: pd.DataFrame, sheet_name: str) -> bytes:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+
+    # Mesmo estilo de cabeçalho do pandas (negrito, borda fina, centralizado)
+    thin = Side(style="thin")
+    header = []
+    for column in df.columns:
+        cell = WriteOnlyCell(worksheet, value=str(column))
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal="center", vertical="top")
+        header.append(cell)
+    worksheet.append(header)
+
+    for row in _excel_rows(df):
+        worksheet.append(row)
+
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
 # ==========================================================
 #  EXPORTAÇÃO PARA JIRA ZEPHYR
 # ==========================================================
 
 
+# Colunas da planilha de importação do Zephyr
+ZEPHYR_COLUMNS = [
+    "Issue Type",
+    "Summary",
+    "Priority",
+    "Labels",
+    "Description",
+    "Test Step",
+    "Expected Result",
+]
+
+
 def preparar_df_para_zephyr_xlsx(
-    df_original: pd.DataFrame, priority: str, labels: str, description: str
+    df_original: CaseSource,
+    priority: str,
+    labels: str,
+    description: str,
+    *,
+    fragments: Optional[CaseFragmentCache] = None,
 ) -> pd.DataFrame:
     """
     Converte cenários de teste em DataFrame no formato aceito pelo Zephyr (Jira).
@@ -42,48 +223,99 @@ def preparar_df_para_zephyr_xlsx(
     a importação via Excel do Zephyr. Cada passo do cenário gera uma linha.
 
     Args:
-        df_original: DataFrame contendo os cenários gerados.
+        df_original: DataFrame contendo os cenários gerados (ou casos de
+            `iter_prepared_cases`, para reaproveitar um único percurso).
         priority: Prioridade a ser atribuída a todos os casos (ex: "High").
         labels: Etiquetas (labels) para os casos de teste.
         description: Descrição geral para os casos de teste.
+        fragments: Cache de fragmentos por caso, opcional (só os casos
+            alterados são processados de novo).
 
     Returns:
         DataFrame formatado com colunas específicas do Zephyr (Issue Type, Summary, etc.).
     """
-    zephyr_rows = []
-    header = [
-        "Issue Type",
-        "Summary",
-        "Priority",
-        "Labels",
-        "Description",
-        "Test Step",
-        "Expected Result",
-    ]
+    return pd.DataFrame(
+        _linhas_por_caso(
+            _as_cases(df_original),
+            "zephyr",
+            _linhas_caso_zephyr,
+            (priority, labels, description),
+            fragments,
+        ),
+        columns=ZEPHYR_COLUMNS,
+    )
+
+
+def _linhas_caso_zephyr(
+    case: PreparedCase, priority: str, labels: str, description: str
+) -> Iterator[list]:
+    summary = case.title
+    # Casos sem passos não geram linhas
+    for i, step in enumerate(case.parsed.texts):
+        yield [
+            "Test",
+            summary,
+            priority,
+            labels,
+            description if i == 0 else "",
+            step,
+            "",
+        ]
 
-    for index, row in df_original.iterrows():
-        summary = row.get("titulo", f"Caso de Teste {int(index)+1}")  # type: ignore
-        cenario_steps = row.get("cenario", [])
 
-        if isinstance(cenario_steps, str):
-            cenario_steps = [s.strip() for s in cenario_steps.split("\n") if s.strip()]
-        if not cenario_steps:
-            continue
+# ==========================================================
+#  STREAMING DE CSV
+# ==========================================================
+# Os exportadores CSV produzem blocos de bytes já codificados, sem montar
+# o arquivo inteiro em memória: o mesmo iterador alimenta um arquivo, uma
+# entrada de ZIP ou uma resposta HTTP. As funções `gerar_csv_*` continuam
+# devolvendo `bytes` para quem precisa do conteúdo completo.
+
+# Linhas CSV por bloco (cada bloco termina em uma linha completa)
+CSV_STREAM_CHUNK_ROWS = 500
+
+
+def _stream_csv(
+    rows: Iterable[list],
+    *,
+    delimiter: str,
+    quoting: int,
+    bom: bool = False,
+    chunk_rows: int = CSV_STREAM_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Serializa as linhas em blocos UTF-8, emitindo o BOM (se pedido) uma única vez."""
+    if bom:
+        yield codecs.BOM_UTF8
 
-        for i, step in enumerate(cenario_steps):
-            zephyr_rows.append(
-                {
-                    "Issue Type": "Test",
-                    "Summary": summary,
-                    "Priority": priority,
-                    "Labels": labels,
-                    "Description": description if i == 0 else "",
-                    "Test Step": step,
-                    "Expected Result": "",
-                }
-            )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, quoting=quoting)
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if pending:
+        yield buffer.getvalue().encode("utf-8")
+
+
+def write_stream(chunks: Iterable[bytes], target: BinaryIO) -> int:
+    """
+    Grava os blocos de um exportador em um destino binário (arquivo,
+    entrada de ZIP aberta com `ZipFile.open(..., "w")`, resposta HTTP).
 
-    return pd.DataFrame(zephyr_rows, columns=header)
+    Returns:
+        Total de bytes gravados.
+    """
+    total = 0
+    for chunk in chunks:
+        target.write(chunk)
+        total += len(chunk)
+    return total
 
 
 # ==========================================================
@@ -91,15 +323,18 @@ def preparar_df_para_zephyr_xlsx(
 # ==========================================================
 
 
-def gerar_csv_azure_from_df(  # noqa: C901
-    df_original: pd.DataFrame,
+def stream_csv_azure_from_df(
+    df_original: CaseSource,
     area_path: str,
     assigned_to: str,
     default_priority: str = "2",
     default_state: str = "Design",
-) -> bytes:
+    *,
+    chunk_rows: int = CSV_STREAM_CHUNK_ROWS,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> Iterator[bytes]:
     """
-    Gera um CSV 100% compatível com Azure Test Plans.
+    Gera, em blocos, um CSV 100% compatível com Azure Test Plans.
 
     - A 1ª coluna "ID" é obrigatória (vazia) — Azure gera automaticamente.
     - Cada linha do DataFrame é um Test Case.
@@ -109,13 +344,38 @@ def gerar_csv_azure_from_df(  # noqa: C901
         PT-BR → usa ';'
         EN-US → usa ','
     - Codificação UTF-8 com BOM → compatível com Excel e Azure.
+    - Com `fragments`, as linhas dos casos não alterados vêm do cache.
     """
 
     # 📌 Autodetecção de localidade do sistema (para decidir delimitador)
     loc = locale.getlocale()[0] or ""
     sep = ";" if "pt" in loc.lower() else ","
 
-    header = [
+    return _stream_csv(
+        _linhas_csv_azure(
+            _as_cases(df_original),
+            area_path,
+            assigned_to,
+            default_priority,
+            default_state,
+            fragments,
+        ),
+        delimiter=sep,
+        quoting=csv.QUOTE_MINIMAL,
+        bom=True,
+        chunk_rows=chunk_rows,
+    )
+
+
+def _linhas_csv_azure(
+    cases: Iterable[PreparedCase],
+    area_path: str,
+    assigned_to: str,
+    default_priority: str,
+    default_state: str,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> Iterator[list]:
+    yield [
         "ID",  # Coluna obrigatória, mesmo vazia
         "Work Item Type",
         "Title",
@@ -128,113 +388,88 @@ def gerar_csv_azure_from_df(  # noqa: C901
         "State",
     ]
 
-    buffer = io.StringIO()
-    writer = csv.writer(buffer, delimiter=sep, quoting=csv.QUOTE_MINIMAL)
-    writer.writerow(header)
-
-    if df_original.empty:
-        return buffer.getvalue().encode("utf-8-sig")
-
     area_path = (area_path or "").strip()
     assigned_to = (assigned_to or "").strip()
 
-    # Mapeia texto de prioridade → valor numérico
-    priority_map = {
-        "alta": "1",
-        "high": "1",
-        "média": "2",
-        "media": "2",
-        "medium": "2",
-        "baixa": "3",
-        "low": "3",
-    }
-
     # Cada linha do DF é um caso de teste
-    for index, row in df_original.iterrows():
-        title = row.get("titulo", f"Caso de Teste {int(index)+1}")  # type: ignore
-        priority_raw = str(row.get("prioridade", default_priority)).lower().strip()
-        priority_value = priority_map.get(priority_raw, default_priority)
-
-        cenario_steps = row.get("cenario", [])
-        if isinstance(cenario_steps, str):
-            cenario_steps = [x.strip() for x in cenario_steps.split("\n") if x.strip()]
-        if not isinstance(cenario_steps, list):
-            cenario_steps = []
-
-        # 1️Cabeçalho do Test Case
-        writer.writerow(
-            [
-                "",  # ID vazio
-                "Test Case",
-                title,
-                "1",
-                "",
-                "",
-                priority_value,
-                area_path,
-                assigned_to,
-                default_state,
-            ]
-        )
+    yield from _linhas_por_caso(
+        cases,
+        "azure_csv",
+        _linhas_caso_azure,
+        (area_path, assigned_to, default_priority, default_state),
+        fragments,
+    )
+
+
+# Mapeia texto de prioridade → valor numérico
+_AZURE_PRIORITY_MAP = {
+    "alta": "1",
+    "high": "1",
+    "média": "2",
+    "media": "2",
+    "medium": "2",
+    "baixa": "3",
+    "low": "3",
+}
+
+
+def _linhas_caso_azure(
+    case: PreparedCase,
+    area_path: str,
+    assigned_to: str,
+    default_priority: str,
+    default_state: str,
+) -> Iterator[list]:
+    priority_raw = str(case.record.get("prioridade", default_priority)).lower().strip()
+    priority_value = _AZURE_PRIORITY_MAP.get(priority_raw, default_priority)
+
+    # 1️Cabeçalho do Test Case
+    yield [
+        "",  # ID vazio
+        "Test Case",
+        case.title,
+        "1",
+        "",
+        "",
+        priority_value,
+        area_path,
+        assigned_to,
+        default_state,
+    ]
 
-        step_counter = 2
-        pending_quando = None
-
-        # 2️ Passos Gherkin
-        for step in cenario_steps:
-            step_lower = step.lower().strip()
-
-            if step_lower.startswith("dado"):
-                writer.writerow(
-                    ["", "", "", str(step_counter), step, "", "", "", "", ""]
-                )
-                step_counter += 1
-
-            elif step_lower.startswith("quando"):
-                pending_quando = step
-
-            elif step_lower.startswith(("então", "entao")):
-                writer.writerow(
-                    [
-                        "",
-                        "",
-                        "",
-                        str(step_counter),
-                        pending_quando or "",
-                        step,
-                        "",
-                        "",
-                        "",
-                        "",
-                    ]
-                )
-                pending_quando = None
-                step_counter += 1
-
-            elif step_lower.startswith("e "):
-                if pending_quando:
-                    writer.writerow(
-                        ["", "", "", str(step_counter), step, "", "", "", "", ""]
-                    )
-                else:
-                    writer.writerow(
-                        ["", "", "", str(step_counter), "", step, "", "", "", ""]
-                    )
-                step_counter += 1
-
-        # 3️Caso tenha um 'Quando' sem 'Então'
-        if pending_quando:
-            writer.writerow(
-                ["", "", "", str(step_counter), pending_quando, "", "", "", "", ""]
-            )
-            step_counter += 1
-
-        # 4️ Linha em branco para separar Test Cases
-        writer.writerow([])
-
-    csv_bytes = buffer.getvalue().encode("utf-8-sig")
-    buffer.close()
-    return csv_bytes
+    # 2️ Passos Gherkin já pareados (ação → resultado esperado):
+    #    'Então' fecha o 'Quando' pendente; 'Quando' sem 'Então' vira ação
+    for step_counter, (action, expected) in enumerate(case.parsed.step_pairs, start=2):
+        yield ["", "", "", str(step_counter), action, expected, "", "", "", ""]
+
+    # 4️ Linha em branco para separar Test Cases
+    yield []
+
+
+def gerar_csv_azure_from_df(
+    df_original: pd.DataFrame,
+    area_path: str,
+    assigned_to: str,
+    default_priority: str = "2",
+    default_state: str = "Design",
+    *,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> bytes:
+    """
+    Gera um CSV 100% compatível com Azure Test Plans.
+
+    Versão em memória de `stream_csv_azure_from_df` (mesmo conteúdo).
+    """
+    return b"".join(
+        stream_csv_azure_from_df(
+            df_original,
+            area_path,
+            assigned_to,
+            default_priority,
+            default_state,
+            fragments=fragments,
+        )
+    )
 
 
 # ==========================================================
@@ -242,26 +477,51 @@ def gerar_csv_azure_from_df(  # noqa: C901
 # ==========================================================
 
 
-def gerar_csv_xray_from_df(
-    df_original: pd.DataFrame,
+def stream_csv_xray_from_df(
+    df_original: CaseSource,
     test_repository_folder: str,
     custom_fields: dict | None = None,
-) -> bytes:
+    *,
+    chunk_rows: int = CSV_STREAM_CHUNK_ROWS,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> Iterator[bytes]:
     """
-    Gera um CSV 100% compatível com Xray (Jira Test Management).
+    Gera, em blocos, um CSV 100% compatível com Xray (Jira Test Management).
 
     Cria um arquivo CSV formatado para importação de testes manuais (Cucumber) no Xray.
     Inclui suporte a campos personalizados e estrutura Gherkin.
 
     Args:
-        df_original: DataFrame contendo os cenários de teste.
+        df_original: DataFrame contendo os cenários de teste (ou casos de
+            `iter_prepared_cases`, para reaproveitar um único percurso).
         test_repository_folder: Caminho da pasta no repositório de testes do Xray.
         custom_fields: Dicionário opcional de campos personalizados (chave=nome, valor=valor).
+        chunk_rows: Quantidade de linhas CSV por bloco.
+        fragments: Cache de fragmentos por caso, opcional (as linhas dos
+            casos não alterados vêm do cache).
 
     Returns:
-        Bytes do arquivo CSV codificado em UTF-8.
+        Iterador de blocos do arquivo CSV codificados em UTF-8.
     """
+    return _stream_csv(
+        _linhas_csv_xray(
+            _as_cases(df_original),
+            test_repository_folder,
+            custom_fields or {},
+            fragments,
+        ),
+        delimiter=",",
+        quoting=csv.QUOTE_ALL,
+        chunk_rows=chunk_rows,
+    )
+
 
+def _linhas_csv_xray(
+    cases: Iterable[PreparedCase],
+    test_repository_folder: str,
+    custom_fields: dict,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> Iterator[list]:
     # Campos obrigatórios do Xray
     header = [
         "Summary",
@@ -272,71 +532,78 @@ def gerar_csv_xray_from_df(
     ]
 
     # Adiciona campos personalizados ao cabeçalho
-    custom_fields = custom_fields or {}
     if custom_fields:
         header.extend(custom_fields.keys())
-
-    buffer = io.StringIO()
-    writer = csv.writer(buffer, delimiter=",", quoting=csv.QUOTE_ALL)
-    writer.writerow(header)
-
-    if df_original.empty:
-        return buffer.getvalue().encode("utf-8")
+    yield header
 
     test_repository_folder = (test_repository_folder or "").strip()
 
     # Cada linha do DataFrame é um caso de teste
-    for index, row in df_original.iterrows():
-        # Summary: usa o título do caso de teste
-        summary = row.get("titulo", f"Caso de Teste {int(index)+1}")  # type: ignore
-
-        # Description: combina critério de aceitação e justificativa de acessibilidade
-        criterio = row.get("criterio_de_aceitacao_relacionado", "")
-        justificativa = row.get("justificativa_acessibilidade", "")
-
-        description_parts = []
-        if criterio:
-            description_parts.append(f"Critério de Aceitação: {criterio}")
-        if justificativa:
-            description_parts.append(
-                f"Justificativa de Acessibilidade: {justificativa}"
-            )
-
-        description = (
-            " | ".join(description_parts)
-            if description_parts
-            else "Teste gerado pelo QA Oráculo"
-        )
-
-        # Test_Type: sempre "Cucumber"
-        test_type = "Cucumber"
-
-        # Gherkin_Definition: cenário completo preservando quebras de linha
-        cenario = row.get("cenario", "")
-        if isinstance(cenario, list):
-            gherkin_definition = "\n".join(cenario)
-        else:
-            gherkin_definition = str(cenario).strip()
-
-        # Monta a linha com campos obrigatórios
-        row_data = [
-            summary,
-            description,
-            test_repository_folder,
-            test_type,
-            gherkin_definition,
-        ]
+    yield from _linhas_por_caso(
+        cases,
+        "xray_csv",
+        _linhas_caso_xray,
+        (test_repository_folder, tuple(custom_fields.values())),
+        fragments,
+    )
+
+
+def _linhas_caso_xray(
+    case: PreparedCase, test_repository_folder: str, custom_values: tuple
+) -> Iterator[list]:
+    # Summary: usa o título do caso de teste
+    summary = case.title
+
+    # Description: combina critério de aceitação e justificativa de acessibilidade
+    criterio = case.record.get("criterio_de_aceitacao_relacionado", "")
+    justificativa = case.record.get("justificativa_acessibilidade", "")
+
+    description_parts = []
+    if criterio:
+        description_parts.append(f"Critério de Aceitação: {criterio}")
+    if justificativa:
+        description_parts.append(f"Justificativa de Acessibilidade: {justificativa}")
+
+    description = (
+        " | ".join(description_parts)
+        if description_parts
+        else "Teste gerado pelo QA Oráculo"
+    )
+
+    # Test_Type: sempre "Cucumber"
+    test_type = "Cucumber"
+
+    # Gherkin_Definition: cenário completo preservando quebras de linha
+    gherkin_definition = case.parsed.definition
+
+    # Monta a linha com campos obrigatórios + valores dos campos personalizados
+    yield [
+        summary,
+        description,
+        test_repository_folder,
+        test_type,
+        gherkin_definition,
+        *custom_values,
+    ]
 
-        # Adiciona valores dos campos personalizados
-        if custom_fields:
-            row_data.extend(custom_fields.values())
 
-        # Escreve a linha no CSV
-        writer.writerow(row_data)
+def gerar_csv_xray_from_df(
+    df_original: pd.DataFrame,
+    test_repository_folder: str,
+    custom_fields: dict | None = None,
+    *,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> bytes:
+    """
+    Gera um CSV 100% compatível com Xray (Jira Test Management).
 
-    csv_bytes = buffer.getvalue().encode("utf-8")
-    buffer.close()
-    return csv_bytes
+    Versão em memória de `stream_csv_xray_from_df` (mesmo conteúdo).
+    """
+    return b"".join(
+        stream_csv_xray_from_df(
+            df_original, test_repository_folder, custom_fields, fragments=fragments
+        )
+    )
 
 
 # ==========================================================
@@ -344,31 +611,60 @@ def gerar_csv_xray_from_df(
 # ==========================================================
 
 
-def gerar_csv_testrail_from_df(
-    df_original: pd.DataFrame,
+def stream_csv_testrail_from_df(
+    df_original: CaseSource,
     section: str = "",
     priority: str = "Medium",
     template: str = "Test Case (Steps)",
     references: str = "",
-) -> bytes:
+    *,
+    chunk_rows: int = CSV_STREAM_CHUNK_ROWS,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> Iterator[bytes]:
     """
-    Gera um CSV compatível com importação de casos no TestRail.
+    Gera, em blocos, um CSV compatível com importação de casos no TestRail.
 
     Formata os cenários de teste para o layout de importação CSV do TestRail,
     separando passos e resultados esperados.
 
     Args:
-        df_original: DataFrame contendo os cenários.
+        df_original: DataFrame contendo os cenários (ou casos de
+            `iter_prepared_cases`, para reaproveitar um único percurso).
         section: Seção (pasta) onde os casos serão criados no TestRail.
         priority: Prioridade dos casos (ex: "Medium", "High").
         template: Modelo de caso de teste (ex: "Test Case (Steps)").
         references: Referências externas (ex: IDs de tickets Jira).
+        chunk_rows: Quantidade de linhas CSV por bloco.
+        fragments: Cache de fragmentos por caso, opcional (as linhas dos
+            casos não alterados vêm do cache).
 
     Returns:
-        Bytes do arquivo CSV codificado em UTF-8.
+        Iterador de blocos do arquivo CSV codificados em UTF-8.
     """
-
-    header = [
+    return _stream_csv(
+        _linhas_csv_testrail(
+            _as_cases(df_original),
+            section,
+            priority,
+            template,
+            references,
+            fragments,
+        ),
+        delimiter=",",
+        quoting=csv.QUOTE_ALL,
+        chunk_rows=chunk_rows,
+    )
+
+
+def _linhas_csv_testrail(
+    cases: Iterable[PreparedCase],
+    section: str,
+    priority: str,
+    template: str,
+    references: str,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> Iterator[list]:
+    yield [
         "Title",
         "Section",
         "Template",
@@ -380,67 +676,66 @@ def gerar_csv_testrail_from_df(
         "Expected Result",
     ]
 
-    buffer = io.StringIO()
-    writer = csv.writer(buffer, delimiter=",", quoting=csv.QUOTE_ALL)
-    writer.writerow(header)
-
-    if df_original is None or df_original.empty:
-        return buffer.getvalue().encode("utf-8")
-
     # Normaliza campos padrões
     section = (section or "").strip()
     priority = (priority or "").strip() or "Medium"
     template = (template or "").strip() or "Test Case (Steps)"
     references = (references or "").strip()
 
-    for index, row in df_original.iterrows():
-        title = row.get("titulo", f"Caso de Teste {int(index)+1}")  # type: ignore
-
-        steps_raw = row.get("cenario", [])
-        if isinstance(steps_raw, str):
-            steps_list = [s.strip() for s in steps_raw.split("\n") if s.strip()]
-        elif isinstance(steps_raw, list):
-            steps_list = [str(s).strip() for s in steps_raw if str(s).strip()]
-        else:
-            steps_list = []
-
-        # Para manter compatibilidade simples, não geramos expected separado por passo.
-        # O campo "Expected Result" será preenchido com linhas vazias correspondentes,
-        # ou, se houver "então" explícitos, tenta mapear de forma básica.
-        expected_list = []
-        for s in steps_list:
-            lower = s.lower()
-            if lower.startswith("quando"):
-                expected_list.append("")
-            elif lower.startswith(("então", "entao")):
-                # Usa o próprio passo como expected para parear com o último 'Quando' se existir
-                if expected_list:
-                    expected_list[-1] = s
-                else:
-                    expected_list.append(s)
-            else:
-                expected_list.append("")
-
-        steps_text = "\n".join(steps_list)
-        expected_text = "\n".join(expected_list) if expected_list else ""
-
-        writer.writerow(
-            [
-                title,
-                section,
-                template,
-                "Functional",
-                priority,
-                "",
-                references,
-                steps_text,
-                expected_text,
-            ]
-        )
+    yield from _linhas_por_caso(
+        cases,
+        "testrail_csv",
+        _linhas_caso_testrail,
+        (section, priority, template, references),
+        fragments,
+    )
+
+
+def _linhas_caso_testrail(
+    case: PreparedCase, section: str, priority: str, template: str, references: str
+) -> Iterator[list]:
+    # Para manter compatibilidade simples, não geramos expected separado por passo:
+    # cada 'Então' é pareado com o passo anterior (normalmente o 'Quando').
+    steps_text = "\n".join(case.parsed.texts)
+    expected_text = "\n".join(case.parsed.expected_results)
+
+    yield [
+        case.title,
+        section,
+        template,
+        "Functional",
+        priority,
+        "",
+        references,
+        steps_text,
+        expected_text,
+    ]
+
 
-    csv_bytes = buffer.getvalue().encode("utf-8")
-    buffer.close()
-    return csv_bytes
+def gerar_csv_testrail_from_df(
+    df_original: pd.DataFrame,
+    section: str = "",
+    priority: str = "Medium",
+    template: str = "Test Case (Steps)",
+    references: str = "",
+    *,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> bytes:
+    """
+    Gera um CSV compatível com importação de casos no TestRail.
+
+    Versão em memória de `stream_csv_testrail_from_df` (mesmo conteúdo).
+    """
+    return b"".join(
+        stream_csv_testrail_from_df(
+            df_original,
+            section,
+            priority,
+            template,
+            references,
+            fragments=fragments,
+        )
+    )
 
 
 # ==========================================================
@@ -0,0 +1,215 @@
+# ==========================================================
+# gherkin.py — Representação intermediária dos cenários Gherkin
+# ==========================================================
+# 📘 Todos os exportadores (Azure, TestRail, Zephyr, Xray, Cucumber,
+#    Postman) consomem a mesma estrutura imutável por caso de teste:
+#      • palavra-chave de cada passo (enum `StepKeyword`)
+#      • texto do passo
+#      • pareamento passo → resultado esperado
+#
+# 🎯 O parsing é feito uma única vez por conteúdo: o resultado fica em
+#    cache indexado pelo texto do cenário (hash do conteúdo), então
+#    exportar o mesmo plano em vários formatos não reclassifica os
+#    passos a cada chamada.
+# ==========================================================
+import re
+import threading
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Hashable, NamedTuple, Optional
+
+
+class StepKeyword(str, Enum):
+    """Palavras-chave Gherkin reconhecidas (pt-BR)."""
+
+    DADO = "Dado"
+    QUANDO = "Quando"
+    ENTAO = "Então"
+    E = "E"
+    OUTRO = ""
+
+
+class GherkinStep(NamedTuple):
+    """Passo de um cenário.
+
+    Attributes:
+        keyword: Palavra-chave com que o passo começa.
+        text: Linha completa do passo, como escrita.
+        section: Seção efetiva do passo — um "E" herda a seção anterior.
+    """
+
+    keyword: StepKeyword
+    text: str
+    section: StepKeyword
+
+    @property
+    def body(self) -> str:
+        """Texto do passo sem a palavra-chave inicial."""
+        if self.keyword is StepKeyword.OUTRO:
+            return self.text
+        parts = self.text.split(maxsplit=1)
+        return parts[1] if len(parts) > 1 else ""
+
+
+class ParsedCase(NamedTuple):
+    """Cenário já interpretado, compartilhado entre os exportadores.
+
+    Attributes:
+        definition: Texto Gherkin completo (usado pelo Xray).
+        texts: Passos não vazios, aparados, na ordem original.
+        keywords: Palavra-chave de cada passo (alinhada a `texts`).
+        sections: Seção efetiva de cada passo (alinhada a `texts`).
+        step_pairs: Linhas (ação, resultado esperado) — cada "Então" é
+            pareado com o "Quando" pendente (layout do Azure Test Plans).
+        expected_results: Resultado esperado alinhado aos passos, com o
+            "Então" preenchendo a posição do passo anterior (TestRail).
+    """
+
+    definition: str
+    texts: tuple[str, ...]
+    keywords: tuple[StepKeyword, ...]
+    sections: tuple[StepKeyword, ...]
+    step_pairs: tuple[tuple[str, str], ...]
+    expected_results: tuple[str, ...]
+
+    @property
+    def steps(self) -> tuple[GherkinStep, ...]:
+        """Passos como `GherkinStep` (montados sob demanda)."""
+        return tuple(map(GherkinStep, self.keywords, self.texts, self.sections))
+
+    def section_text(self, section: StepKeyword) -> str:
+        """Junta (uma por linha) as frases de uma seção, sem a palavra-chave."""
+        return "\n".join(step.body for step in self.steps if step.section is section)
+
+
+EMPTY_CASE = ParsedCase("", (), (), (), (), ())
+
+# Atalhos locais (evitam a busca de atributo do Enum nos laços quentes)
+_DADO = StepKeyword.DADO
+_QUANDO = StepKeyword.QUANDO
+_ENTAO = StepKeyword.ENTAO
+_E = StepKeyword.E
+_OUTRO = StepKeyword.OUTRO
+
+# ==========================================================
+# 🔎 Classificação e pareamento
+# ==========================================================
+
+
+_KEYWORD_RE = re.compile(r"\s*(?:(dado)|(quando)|(ent[aã]o)|(e ))", re.IGNORECASE)
+# Índice do grupo capturado (`lastindex`) → palavra-chave
+_KEYWORD_BY_GROUP = (_OUTRO, _DADO, _QUANDO, _ENTAO, _E)
+
+
+def classify_step(step: str) -> StepKeyword:
+    """Identifica a palavra-chave de uma linha Gherkin (sem diferenciar caixa)."""
+    match = _KEYWORD_RE.match(step)
+    return _KEYWORD_BY_GROUP[match.lastindex] if match else _OUTRO
+
+
+def _build_case(definition: str, lines: list[str]) -> ParsedCase:
+    """Classifica e pareia os passos em uma única passada."""
+    keywords = []
+    sections = []
+    pairs = []
+    expected: list[str] = []
+    section = _OUTRO
+    pending_quando: Optional[str] = None
+
+    for line in lines:
+        keyword = classify_step(line)
+        if keyword is _E:
+            pairs.append((line, "") if pending_quando else ("", line))
+            expected.append("")
+        else:
+            section = keyword
+            if keyword is _DADO:
+                pairs.append((line, ""))
+                expected.append("")
+            elif keyword is _QUANDO:
+                pending_quando = line
+                expected.append("")
+            elif keyword is _ENTAO:
+                pairs.append((pending_quando or "", line))
+                pending_quando = None
+                # Pareia com o passo anterior (normalmente o último "Quando")
+                if expected:
+                    expected[-1] = line
+                else:
+                    expected.append(line)
+            else:
+                expected.append("")
+        keywords.append(keyword)
+        sections.append(section)
+
+    # "Quando" sem "Então" vira uma ação sem resultado esperado
+    if pending_quando:
+        pairs.append((pending_quando, ""))
+
+    return ParsedCase(
+        definition,
+        tuple(lines),
+        tuple(keywords),
+        tuple(sections),
+        tuple(pairs),
+        tuple(expected),
+    )
+
+
+# ==========================================================
+# 🗃️ Cache por hash de conteúdo
+# ==========================================================
+
+# Comporta um plano grande inteiro: exportar em vários formatos seguidos
+# reaproveita o parsing do primeiro formato.
+MAX_CACHE_SIZE = 20_000
+
+# A chave é o próprio conteúdo: o hash de um `str` é calculado uma única vez
+# e fica guardado no objeto, então o mesmo texto vindo do DataFrame é
+# localizado sem recalcular nada. Listas usam uma tupla ("list", texto).
+_cache: "OrderedDict[Hashable, ParsedCase]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def parse_cenario(cenario: Any) -> ParsedCase:
+    """
+    Interpreta o campo `cenario` de um caso de teste.
+
+    Aceita texto (uma linha por passo) ou lista de passos; linhas vazias são
+    descartadas e cada passo é aparado. Outros valores (None/NaN) resultam em
+    um cenário sem passos.
+    """
+    if isinstance(cenario, str):
+        key: Hashable = cenario
+    elif isinstance(cenario, (list, tuple)):
+        # Separador próprio para que ["a\nb"] e ["a", "b"] não colidam
+        key = ("list", "\x1f".join(str(step) for step in cenario))
+    else:
+        return EMPTY_CASE._replace(definition=str(cenario).strip())
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    if isinstance(cenario, str):
+        definition = cenario.strip()
+        lines = [line.strip() for line in cenario.split("\n") if line.strip()]
+    else:
+        definition = "\n".join(str(step) for step in cenario)
+        lines = [str(step).strip() for step in cenario if str(step).strip()]
+    parsed = _build_case(definition, lines)
+
+    with _cache_lock:
+        _cache[key] = parsed
+        # LRU: descarta os cenários usados há mais tempo
+        while len(_cache) > MAX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return parsed
+
+
+def clear_cache() -> None:
+    """Esvazia o cache de cenários interpretados."""
+    with _cache_lock:
+        _cache.clear()
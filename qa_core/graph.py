@@ -6,7 +6,6 @@ import time
 from typing import Any, NotRequired, TypedDict
 
 import streamlit as st
-from langgraph.graph import END, StateGraph
 
 from .config import CONFIG_GERACAO_ANALISE, CONFIG_GERACAO_RELATORIO
 from .text_utils import extract_json_from_text
@@ -539,6 +538,8 @@ def node_gerar_relatorio_plano_de_testes(state: AgentState) -> dict[str, Any]:
 @st.cache_resource
 def get_analysis_graph():
     """Cria, compila e cacheia o grafo para a análise inicial."""
+    from langgraph.graph import END, StateGraph
+
     logger.info("--- ⚙️ COMPILANDO GRAFO DE ANÁLISE (deve aparecer só uma vez) ---")
     workflow_analise = StateGraph(AgentState)
     workflow_analise.add_node("analista_us", node_analisar_historia)
@@ -552,6 +553,8 @@ def get_analysis_graph():
 @st.cache_resource
 def get_test_plan_graph():
     """Cria, compila e cacheia o grafo para o plano de testes."""
+    from langgraph.graph import END, StateGraph
+
     logger.info(
         "--- ⚙️ COMPILANDO GRAFO DE PLANO DE TESTES (deve aparecer só uma vez) ---"
     )
@@ -570,6 +573,20 @@ def get_test_plan_graph():
     return workflow_plano_testes.compile()
 
 
-# --- Instanciação dos Grafos ---
-grafo_analise = get_analysis_graph()
-grafo_plano_testes = get_test_plan_graph()
+class _LazyGraph:
+    """Grafo compilado no primeiro uso (`invoke`, `stream`...), não no import.
+
+    Importar e compilar o LangGraph leva cerca de um segundo; adiar a
+    compilação deixa a primeira renderização da página mais rápida.
+    """
+
+    def __init__(self, build):
+        self._build = build
+
+    def __getattr__(self, name):
+        return getattr(self._build(), name)
+
+
+# --- Instanciação dos Grafos (compilados sob demanda) ---
+grafo_analise = _LazyGraph(get_analysis_graph)
+grafo_plano_testes = _LazyGraph(get_test_plan_graph)
@@ -0,0 +1,116 @@
+# ==========================================================
+# graph_cache.py — Chaves estáveis para o cache dos grafos
+# ==========================================================
+# 📘 `run_test_plan_graph` recebia o `analysis_state` inteiro no
+#    `st.cache_data`: o Streamlit percorria o dicionário aninhado a cada
+#    chamada e, como ele traz um `trace_id` aleatório, análises idênticas
+#    nunca reaproveitavam o cache.
+#
+# 🎯 O cache passa a ser indexado por uma chave de conteúdo:
+#    • user story normalizada (quebras de linha e espaços das pontas);
+#    • JSON canônico da análise (chaves ordenadas), sem os campos
+#      voláteis (`trace_id`) nem os produzidos pelo próprio grafo.
+#    O estado completo segue para a função cacheada em um parâmetro
+#    iniciado por "_", que o Streamlit não inclui no hash.
+#
+# 🧩 Hits e misses são contados por grafo (`graph_cache_stats`), enviados
+#    às métricas Prometheus e registrados no log de observabilidade.
+# ==========================================================
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Mapping, Optional
+
+from .metrics import get_metrics_collector
+from .observability import log_graph_event
+
+# Campos que mudam a cada execução sem alterar o resultado do grafo
+_VOLATILE_FIELDS = frozenset({"trace_id"})
+# Saídas do grafo de plano: não fazem parte da entrada
+_TEST_PLAN_OUTPUT_FIELDS = frozenset(
+    {"plano_e_casos_de_teste", "relatorio_plano_de_testes"}
+)
+
+
+def normalize_user_story(user_story: Optional[str]) -> str:
+    """User story com quebras de linha unificadas e sem espaços nas pontas."""
+    text = (user_story or "").replace("\r\n", "\n").replace("\r", "\n")
+    return text.strip()
+
+
+def normalize_analysis(analysis: Optional[Mapping[str, Any]]) -> str:
+    """JSON canônico da análise, sem campos voláteis, saídas do plano e a US."""
+    fields = {
+        key: value
+        for key, value in (analysis or {}).items()
+        if key not in _VOLATILE_FIELDS
+        and key not in _TEST_PLAN_OUTPUT_FIELDS
+        and key != "user_story"
+    }
+    return json.dumps(
+        fields,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+
+
+def graph_cache_key(
+    graph: str,
+    user_story: Optional[str],
+    analysis: Optional[Mapping[str, Any]] = None,
+) -> str:
+    """
+    Chave de cache de uma execução do grafo `graph`.
+
+    Análises que diferem apenas em campos voláteis geram a mesma chave.
+    """
+    digest = hashlib.sha256()
+    for part in (graph, normalize_user_story(user_story), normalize_analysis(analysis)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return f"{graph}:{digest.hexdigest()}"
+
+
+class GraphCacheStats:
+    """Contadores de hits e misses do cache, por grafo."""
+
+    def __init__(self):
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, graph: str, hit: bool) -> None:
+        counter = self.hits if hit else self.misses
+        with self._lock:
+            counter[graph] = counter.get(graph, 0) + 1
+        result = "hit" if hit else "miss"
+        get_metrics_collector().record_graph_cache(graph=graph, result=result)
+        log_graph_event("graph.cache", payload={"graph": graph, "result": result})
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+graph_cache_stats = GraphCacheStats()
+
+
+def cached_graph_call(
+    graph: str,
+    cached_fn: Callable[..., Any],
+    key: str,
+    *payload: Any,
+) -> Any:
+    """
+    Chama `cached_fn(key, *payload, _on_miss=...)` e contabiliza o resultado.
+
+    `cached_fn` é uma função `st.cache_data` cujo corpo chama `_on_miss()`:
+    o corpo só roda quando a chave não está no cache.
+    """
+    misses: list[bool] = []
+    result = cached_fn(key, *payload, _on_miss=lambda: misses.append(True))
+    graph_cache_stats.record(graph, hit=not misses)
+    return result
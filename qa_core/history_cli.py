@@ -0,0 +1,156 @@
+# ==========================================================
+# history_cli.py — Backup/migração do histórico via NDJSON
+# ==========================================================
+# Uso:
+#   python -m qa_core.history_cli export backup.ndjson
+#   python -m qa_core.history_cli import backup.ndjson --skip-duplicates
+#   python -m qa_core.history_cli prune --max-age-days 180 --archive arq.ndjson.gz
+#   python -m qa_core.history_cli vacuum
+#
+# Use "-" como arquivo para stdout/stdin e a extensão ".gz" para
+# arquivos compactados. O progresso e a vazão (registros/s) são
+# exibidos em stderr.
+# ==========================================================
+import argparse
+import gzip
+import sqlite3
+import sys
+import time
+from contextlib import nullcontext
+from typing import Optional
+
+from . import database
+
+
+def _progress_printer(label: str):
+    """Cria um callback que exibe total processado e vazão em stderr."""
+    started = time.perf_counter()
+
+    def report(count: int) -> None:
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(
+            f"\r{label}: {count:,} registros ({count / elapsed:,.0f}/s)",
+            end="",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    return report
+
+
+def _open(path: str, mode: str):
+    if path == "-":
+        return nullcontext(sys.stdout if "w" in mode else sys.stdin)
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="\n")
+    return open(path, mode, encoding="utf-8", newline="\n")
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m qa_core.history_cli",
+        description="Exporta/importa o histórico de análises em NDJSON.",
+    )
+    parser.add_argument(
+        "--db", help=f"Arquivo SQLite (padrão: {database.DB_NAME})", default=None
+    )
+    parser.add_argument(
+        "--quiet", action="store_true", help="Não exibe progresso em stderr"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Exporta o histórico")
+    export_parser.add_argument("file", help="Arquivo de saída ('-' para stdout)")
+    export_parser.add_argument("--batch-size", type=int, default=500)
+
+    import_parser = subparsers.add_parser("import", help="Importa um NDJSON")
+    import_parser.add_argument("file", help="Arquivo de entrada ('-' para stdin)")
+    import_parser.add_argument("--chunk-size", type=int, default=1000)
+    import_parser.add_argument(
+        "--skip-duplicates",
+        action="store_true",
+        help="Ignora registros cujo hash de conteúdo já exista no banco",
+    )
+
+    prune_parser = subparsers.add_parser(
+        "prune", help="Aplica retenção (lotes pequenos + vacuum incremental)"
+    )
+    prune_parser.add_argument("--max-age-days", type=int, default=None)
+    prune_parser.add_argument("--max-entries", type=int, default=None)
+    prune_parser.add_argument(
+        "--archive", default=None, help="Arquiva os removidos (NDJSON gzip)"
+    )
+    prune_parser.add_argument(
+        "--batch-size", type=int, default=database.HISTORY_DELETE_BATCH_SIZE
+    )
+
+    subparsers.add_parser(
+        "vacuum",
+        help="Ativa o vacuum incremental e devolve ao sistema as páginas livres",
+    )
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    if args.db:
+        database.DB_NAME = args.db
+    database.init_db()
+
+    progress = None if args.quiet else _progress_printer(args.command)
+    started = time.perf_counter()
+    try:
+        if args.command == "export":
+            with _open(args.file, "w") as output:
+                total = database.export_history_ndjson(
+                    output, batch_size=args.batch_size, progress=progress
+                )
+            summary = f"{total:,} análises exportadas"
+        elif args.command == "prune":
+            stats = database.apply_retention_policy(
+                max_age_days=args.max_age_days,
+                max_entries=args.max_entries,
+                archive_path=args.archive,
+                batch_size=args.batch_size,
+            )
+            total = stats["deleted"]
+            summary = (
+                f"{stats['deleted']:,} análises removidas "
+                f"({stats['archived']:,} arquivadas)"
+            )
+        elif args.command == "vacuum":
+            # Conversão única (VACUUM completo) para bancos criados sem o modo
+            # incremental; sem ela o `incremental_vacuum` não libera nada.
+            if not database.enable_incremental_auto_vacuum():
+                print("\n⚠️ auto_vacuum incremental indisponível", file=sys.stderr)
+            total = database.incremental_vacuum()
+            summary = f"{total:,} páginas liberadas"
+        else:
+            with _open(args.file, "r") as source:
+                stats = database.import_history_ndjson(
+                    source,
+                    chunk_size=args.chunk_size,
+                    skip_duplicates=args.skip_duplicates,
+                    progress=progress,
+                )
+            total = sum(stats.values())
+            summary = (
+                f"{stats['imported']:,} importadas, "
+                f"{stats['duplicates']:,} duplicadas, "
+                f"{stats['invalid']:,} inválidas"
+            )
+    except (OSError, sqlite3.Error) as e:
+        print(f"\n❌ Falha: {e}", file=sys.stderr)
+        return 1
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    if not args.quiet:
+        print(
+            f"\n✅ {summary} em {elapsed:.2f}s ({total / elapsed:,.0f}/s)",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Módulo de persistência write-behind do histórico (QA Oráculo).
+
+As atualizações do histórico disparadas por edições (cenário editado,
+cenário excluído, sumário atualizado) não precisam bloquear o script do
+Streamlit. Este módulo mantém uma fila limitada consumida por uma thread
+de escrita que:
+
+- Coalesce atualizações repetidas do mesmo registro (só a última vale).
+- Agrupa várias operações em uma única transação (commit em lote).
+- Garante flush no encerramento do processo (atexit).
+- Guarda os erros por sessão para que a UI possa anunciá-los depois.
+"""
+
+import atexit
+import itertools
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from contextlib import closing
+from typing import Any, Callable, Hashable, Optional
+
+from . import database
+
+logger = logging.getLogger(__name__)
+
+# Operação de escrita: recebe o cursor da transação do lote.
+WriteOperation = Callable[[sqlite3.Cursor], Any]
+
+
+class HistoryWriter:
+    """
+    Fila de escrita em segundo plano para o banco de histórico.
+
+    Args:
+        max_pending: Tamanho máximo da fila. Quando cheia, `submit` bloqueia
+            até haver espaço (backpressure em vez de crescer sem limite).
+        batch_size: Número máximo de operações por transação.
+        flush_interval: Tempo (s) que a thread aguarda para acumular um lote.
+        max_errors: Quantidade máxima de erros guardados por sessão.
+    """
+
+    def __init__(
+        self,
+        max_pending: int = 256,
+        batch_size: int = 50,
+        flush_interval: float = 0.2,
+        max_errors: int = 20,
+    ):
+        self._max_pending = max_pending
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_errors = max_errors
+
+        self._condition = threading.Condition()
+        self._pending: "OrderedDict[int, tuple[WriteOperation, Optional[str]]]" = (
+            OrderedDict()
+        )
+        # Chave de coalescência → posição (sequência) da operação pendente
+        self._coalesce: dict[Hashable, int] = {}
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._errors: dict[Optional[str], deque[str]] = {}
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------
+    def submit(
+        self,
+        operation: WriteOperation,
+        *,
+        key: Optional[Hashable] = None,
+        owner: Optional[str] = None,
+    ) -> None:
+        """
+        Enfileira uma operação de escrita.
+
+        Args:
+            operation: Função que recebe o cursor e executa os comandos SQL.
+            key: Chave de coalescência. Uma operação pendente com a mesma
+                chave é substituída (mantendo sua posição na fila). Operações
+                sem chave funcionam como barreira: nada enfileirado antes
+                delas é coalescido com o que vier depois (ex.: uma exclusão
+                que reposiciona casos de teste).
+            owner: Identificador da sessão que receberá eventuais erros.
+        """
+        with self._condition:
+            if self._stopped:
+                # Após o shutdown, executa de forma síncrona para não perder dados
+                self._run_batch([(operation, owner)])
+                return
+
+            self._ensure_thread()
+
+            if key is not None and self._coalesce.get(key) in self._pending:
+                self._pending[self._coalesce[key]] = (operation, owner)
+                return
+
+            while len(self._pending) >= self._max_pending:
+                self._condition.wait()
+
+            sequence = next(self._sequence)
+            self._pending[sequence] = (operation, owner)
+            if key is None:
+                self._coalesce.clear()
+            else:
+                self._coalesce[key] = sequence
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Aguarda até que todas as operações pendentes sejam gravadas.
+
+        Returns:
+            True se a fila esvaziou dentro do timeout.
+        """
+        with self._condition:
+            if self._thread is None:
+                return not self._pending
+            self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: not self._pending and self._in_flight == 0, timeout
+            )
+
+    def drain_errors(self, owner: Optional[str] = None) -> list[str]:
+        """Retorna (e limpa) os erros de escrita registrados para a sessão."""
+        with self._condition:
+            errors = self._errors.pop(owner, None)
+        return list(errors or [])
+
+    def pending_count(self) -> int:
+        """Número de operações ainda não gravadas."""
+        with self._condition:
+            return len(self._pending) + self._in_flight
+
+    def shutdown(self, timeout: Optional[float] = 10.0) -> None:
+        """Grava o que estiver pendente e encerra a thread de escrita."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # ------------------------------------------------------
+    # Thread de escrita
+    # ------------------------------------------------------
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="qa-oraculo-history-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if not self._pending and self._stopped:
+                    self._condition.notify_all()
+                    return
+                if not self._stopped:
+                    # Janela curta para acumular/coalescer mais edições no lote
+                    self._condition.wait(self._flush_interval)
+
+                batch = []
+                while self._pending and len(batch) < self._batch_size:
+                    _, item = self._pending.popitem(last=False)
+                    batch.append(item)
+                if not self._pending:
+                    self._coalesce.clear()
+                self._in_flight = len(batch)
+                self._condition.notify_all()
+
+            try:
+                self._run_batch(batch)
+            finally:
+                with self._condition:
+                    self._in_flight = 0
+                    self._condition.notify_all()
+
+    def _run_batch(self, batch: list[tuple[WriteOperation, Optional[str]]]) -> None:
+        """Executa o lote em uma transação; em falha, isola a operação culpada."""
+        try:
+            with closing(database.get_db_connection()) as conn:
+                cursor = conn.cursor()
+                for operation, _ in batch:
+                    operation(cursor)
+                conn.commit()
+            return
+        except Exception as e:  # noqa: BLE001 - a thread de escrita nunca pode morrer
+            if len(batch) == 1:
+                self._record_error(batch[0][1], e)
+                return
+            logger.warning(f"Lote de escrita do histórico falhou ({e}); reexecutando")
+
+        for item in batch:
+            self._run_batch([item])
+
+    def _record_error(self, owner: Optional[str], error: Exception) -> None:
+        logger.error(f"❌ Erro ao gravar histórico em segundo plano: {error}")
+        with self._condition:
+            self._errors.setdefault(owner, deque(maxlen=self._max_errors)).append(
+                str(error)
+            )
+
+
+# Instância global do escritor de histórico
+_history_writer: Optional[HistoryWriter] = None
+_history_writer_lock = threading.Lock()
+
+
+def get_history_writer() -> HistoryWriter:
+    """
+    Retorna a instância global do escritor write-behind.
+
+    O flush no encerramento do processo é registrado na primeira chamada.
+    """
+    global _history_writer
+    with _history_writer_lock:
+        if _history_writer is None:
+            _history_writer = HistoryWriter()
+            atexit.register(_history_writer.shutdown)
+        return _history_writer
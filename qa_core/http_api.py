@@ -0,0 +1,639 @@
+# ==========================================================
+# http_api.py — API HTTP (sem interface) para análises e exportações
+# ==========================================================
+# 📘 Integrações precisavam acionar a interface do Streamlit ou importar
+#    funções internas do `qa_core` para analisar uma User Story.
+#
+# 🎯 Serviço HTTP leve, só com a biblioteca padrão (`ThreadingHTTPServer`):
+#    • POST /analyses                      → envia a User Story (job)
+#    • GET  /jobs/<id>                     → consulta o job
+#    • GET  /jobs/<id>/events              → acompanha o job (Server-Sent Events)
+#    • GET  /history[?limit=&offset=]      → lista o histórico
+#    • GET  /history/<id>                  → análise salva, com os casos
+#    • GET  /history/<id>/exports/<formato> → exportação, em streaming
+#    • GET  /health
+#
+#    A análise e o plano rodam nos grafos do `graph.py`, como jobs do
+#    executor compartilhado (`job_runner`): requisições simultâneas usam o
+#    mesmo pool, entradas repetidas reaproveitam o job e o cliente LLM (com
+#    seu cache) é o mesmo do processo. O resultado vai para o histórico
+#    (`database.py`) e as exportações usam os mesmos exportadores da
+#    interface; CSVs e ZIPs são enviados em blocos, sem montar a resposta
+#    inteira em memória.
+#
+# 🧩 Uso:
+#   python -m qa_core.http_api --host 127.0.0.1 --port 8600
+#
+#    Com `HTTP_API_PORT` definida, o app Streamlit também sobe a API no
+#    próprio processo (compartilhando jobs e cache com a interface). Com
+#    `HTTP_API_TOKEN`, toda requisição exige `Authorization: Bearer <token>`.
+# ==========================================================
+import argparse
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import IO, Any, Iterable, Iterator, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from pydantic import ValidationError
+
+from . import database
+from .graph import grafo_analise, grafo_plano_testes
+from .job_runner import DONE, Job, get_job_runner, job_key
+from .metrics import get_metrics_collector, track_analysis
+from .observability import generate_trace_id
+from .plan_state import TestPlan, cases_dataframe, extract_plan_summary
+from .render_pool import RenderTimeoutError, render_pdf_report
+from .schemas import UserStoryInput
+from .text_utils import gerar_nome_arquivo_seguro
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+# Tamanho máximo do corpo JSON de uma requisição
+MAX_BODY_BYTES = 1024 * 1024
+# Intervalo entre as verificações do job no stream de eventos
+EVENTS_POLL_INTERVAL = 0.5
+# Comentário enviado no stream de eventos para manter a conexão aberta
+EVENTS_KEEPALIVE_SECONDS = 15.0
+# Tamanho dos blocos lidos dos ZIPs temporários
+STREAM_CHUNK_BYTES = 64 * 1024
+DEFAULT_HISTORY_LIMIT = 50
+MAX_HISTORY_LIMIT = 500
+
+_PIPELINE_JOB = "api_analysis"
+
+# Formato → (sufixo do arquivo, Content-Type)
+EXPORT_FORMATS = {
+    "markdown": ("md", "text/markdown; charset=utf-8"),
+    "pdf": ("pdf", "application/pdf"),
+    "azure_csv": ("azure.csv", "text/csv; charset=utf-8"),
+    "xray_csv": ("xray.csv", "text/csv; charset=utf-8"),
+    "testrail_csv": ("testrail.csv", "text/csv; charset=utf-8"),
+    "zephyr_xlsx": (
+        "zephyr.xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "cucumber_zip": ("cucumber.zip", "application/zip"),
+    "postman_json": ("postman.json", "application/json"),
+    "bundle_zip": ("pacote.zip", "application/zip"),
+}
+
+# Prefixo dos parâmetros de campos extras do Xray (ex.: `xray.Labels=web`)
+_XRAY_FIELD_PREFIX = "xray."
+
+
+class ApiError(Exception):
+    """Erro devolvido ao cliente como `{"error": ...}` com o status informado."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def api_host() -> str:
+    """Endereço de escuta (`HTTP_API_HOST`, padrão: 127.0.0.1)."""
+    return os.getenv("HTTP_API_HOST", "").strip() or DEFAULT_HOST
+
+
+def api_port() -> Optional[int]:
+    """Porta da API (`HTTP_API_PORT`); None se não definida ou inválida."""
+    raw = os.getenv("HTTP_API_PORT", "").strip()
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        logger.warning(f"HTTP_API_PORT inválido: {raw!r}")
+        return None
+
+
+def api_token() -> Optional[str]:
+    """Token exigido no cabeçalho `Authorization` (`HTTP_API_TOKEN`)."""
+    return os.getenv("HTTP_API_TOKEN", "").strip() or None
+
+
+# ==========================================================
+#  Análise + plano de testes (corpo do job)
+# ==========================================================
+@track_analysis
+def _analyze(user_story: str) -> dict:
+    return grafo_analise.invoke(
+        {"user_story": user_story, "trace_id": generate_trace_id()}
+    )
+
+
+def run_pipeline(user_story: str, with_test_plan: bool = True) -> dict:
+    """
+    Analisa a User Story, gera o plano de testes e salva no histórico.
+
+    Returns:
+        Dicionário com `analysis_id` (registro no histórico), a análise
+        (`analysis`, `analysis_report`) e o plano (`test_plan_report`,
+        `test_cases`).
+
+    Raises:
+        ValueError: Se a IA não devolver casos de teste estruturados.
+    """
+    analysis = _analyze(user_story)
+    analysis_report = analysis.get("relatorio_analise_inicial") or ""
+    test_plan_report, test_plan_summary, test_cases = "", None, []
+
+    if with_test_plan:
+        resultado = grafo_plano_testes.invoke({**analysis})
+        casos = (resultado.get("plano_e_casos_de_teste") or {}).get(
+            "casos_de_teste_gherkin"
+        )
+        if not casos or not isinstance(casos, list):
+            raise ValueError(
+                "O Oráculo não conseguiu gerar um plano de testes estruturado."
+            )
+        plan = TestPlan.from_dataframe(
+            cases_dataframe(casos),
+            summary=resultado.get("relatorio_plano_de_testes") or "",
+        )
+        test_plan_report = plan.markdown
+        test_plan_summary = extract_plan_summary(plan.summary) or None
+        test_cases = plan.records
+
+    analysis_id = database.save_analysis_to_history(
+        user_story,
+        analysis_report,
+        test_plan_report,
+        test_plan_summary=test_plan_summary,
+        test_cases=test_cases,
+    )
+    return {
+        "analysis_id": analysis_id,
+        "user_story": user_story,
+        "analysis": analysis.get("analise_da_us"),
+        "analysis_report": analysis_report,
+        "test_plan_report": test_plan_report,
+        "test_cases": test_cases,
+    }
+
+
+def submit_analysis(user_story: str, with_test_plan: bool = True) -> Job:
+    """Envia `run_pipeline` ao executor de jobs (entradas iguais reaproveitam o job)."""
+    return get_job_runner().submit(
+        _PIPELINE_JOB,
+        run_pipeline,
+        user_story,
+        with_test_plan,
+        key=job_key(_PIPELINE_JOB, user_story, with_test_plan),
+    )
+
+
+def job_payload(job: Job) -> dict:
+    """Representação JSON de um job (com o resultado, quando concluído)."""
+    payload = {
+        "id": job.id,
+        "status": job.status,
+        "elapsed_seconds": round(job.elapsed, 3),
+        "error": job.error,
+        "result": job.result if job.status == DONE else None,
+        "links": {"self": f"/jobs/{job.id}", "events": f"/jobs/{job.id}/events"},
+    }
+    analysis_id = (payload["result"] or {}).get("analysis_id")
+    if analysis_id is not None:
+        payload["links"]["history"] = f"/history/{analysis_id}"
+    return payload
+
+
+# ==========================================================
+#  Exportações (em blocos)
+# ==========================================================
+def _iter_spool(spool: IO[bytes]) -> Iterator[bytes]:
+    """Lê e fecha o arquivo temporário montado por `build_*_zip`."""
+    with spool:
+        spool.seek(0)
+        while chunk := spool.read(STREAM_CHUNK_BYTES):
+            yield chunk
+
+
+def _export_options(params: dict[str, str]) -> dict[str, dict[str, Any]]:
+    """Opções por formato (mesmo formato de `build_export_bundle`)."""
+    custom_fields = {
+        name[len(_XRAY_FIELD_PREFIX) :]: value
+        for name, value in params.items()
+        if name.startswith(_XRAY_FIELD_PREFIX) and value
+    }
+    return {
+        "azure_csv": {
+            "area_path": params.get("area_path", ""),
+            "assigned_to": params.get("assigned_to", ""),
+        },
+        "xray_csv": {
+            "test_repository_folder": params.get("xray_folder", ""),
+            "custom_fields": custom_fields or None,
+        },
+        "testrail_csv": {
+            "section": params.get("testrail_section", ""),
+            "priority": params.get("testrail_priority", "Medium"),
+            "template": params.get("testrail_template", "Test Case (Steps)"),
+            "references": params.get("testrail_references", ""),
+        },
+        "zephyr_xlsx": {
+            "priority": params.get("zephyr_priority", "Medium"),
+            "labels": params.get("zephyr_labels", ""),
+            "description": params.get("zephyr_description", ""),
+        },
+    }
+
+
+def export_chunks(
+    fmt: str, entry: dict[str, Any], params: Optional[dict[str, str]] = None
+) -> Iterable[bytes]:
+    """
+    Conteúdo da exportação `fmt` de uma análise do histórico, em blocos.
+
+    Args:
+        fmt: Um dos formatos de `EXPORT_FORMATS`.
+        entry: Análise salva (`database.get_analysis_by_id`).
+        params: Opções dos exportadores (ver `_export_options`).
+
+    Raises:
+        ValueError: Se o formato for desconhecido.
+    """
+    from . import exports
+    from .utils import exporters
+
+    options = _export_options(params or {})
+    user_story = entry.get("user_story") or ""
+    analysis_report = entry.get("analysis_report") or ""
+    test_plan_report = entry.get("test_plan_report") or ""
+    df = cases_dataframe(entry.get("test_cases") or [])
+
+    if fmt == "markdown":
+        report = exports.gerar_relatorio_md_completo(
+            user_story, analysis_report, test_plan_report
+        )
+        return [report.encode("utf-8")]
+    if fmt == "pdf":
+        return [render_pdf_report(analysis_report, df)]
+    if fmt == "azure_csv":
+        azure = options["azure_csv"]
+        return exports.stream_csv_azure_from_df(
+            df, azure["area_path"], azure["assigned_to"]
+        )
+    if fmt == "xray_csv":
+        xray = options["xray_csv"]
+        return exports.stream_csv_xray_from_df(
+            df, xray["test_repository_folder"], xray["custom_fields"]
+        )
+    if fmt == "testrail_csv":
+        testrail = options["testrail_csv"]
+        return exports.stream_csv_testrail_from_df(
+            df,
+            testrail["section"],
+            testrail["priority"],
+            testrail["template"],
+            testrail["references"],
+        )
+    if fmt == "zephyr_xlsx":
+        zephyr = options["zephyr_xlsx"]
+        zephyr_df = exports.preparar_df_para_zephyr_xlsx(
+            df, zephyr["priority"], zephyr["labels"], zephyr["description"]
+        )
+        return [exports.to_excel(zephyr_df, sheet_name="Zephyr Import")]
+    if fmt == "cucumber_zip":
+        return _iter_spool(exporters.build_cucumber_zip(df))
+    if fmt == "postman_json":
+        return [exporters.export_to_postman_collection(df, user_story).encode("utf-8")]
+    if fmt == "bundle_zip":
+        # PDF pelo pool de processos, como na interface
+        pdf_bytes = render_pdf_report(analysis_report, df) if len(df) else None
+        return _iter_spool(
+            exporters.build_export_bundle(
+                df,
+                user_story=user_story,
+                analysis_report=analysis_report,
+                test_plan_report=test_plan_report,
+                options=options,
+                pdf_bytes=pdf_bytes,
+                include_pdf=False,
+            )
+        )
+    raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+
+# ==========================================================
+#  Servidor HTTP
+# ==========================================================
+def _json_bytes(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _history_entry(raw: str) -> dict[str, Any]:
+    entry = database.get_analysis_by_id(int(raw))
+    if entry is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Análise {raw} não encontrada.")
+    return entry
+
+
+def _int_param(params: dict[str, str], name: str, default: int) -> int:
+    try:
+        return max(int(params.get(name, default)), 0)
+    except ValueError as e:
+        raise ApiError(
+            HTTPStatus.BAD_REQUEST, f"Parâmetro {name} deve ser inteiro."
+        ) from e
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Roteia as requisições para os métodos `handle_*`."""
+
+    server_version = "QAOraculoAPI/1.0"
+
+    # (método, caminho, handler)
+    ROUTES = (
+        ("GET", re.compile(r"/health"), "handle_health"),
+        ("POST", re.compile(r"/analyses"), "handle_submit_analysis"),
+        ("GET", re.compile(r"/jobs/(?P<job_id>[\w-]+)"), "handle_get_job"),
+        ("GET", re.compile(r"/jobs/(?P<job_id>[\w-]+)/events"), "handle_job_events"),
+        ("GET", re.compile(r"/history"), "handle_list_history"),
+        ("GET", re.compile(r"/history/(?P<analysis_id>\d+)"), "handle_get_history"),
+        (
+            "GET",
+            re.compile(r"/history/(?P<analysis_id>\d+)/exports/(?P<fmt>\w+)"),
+            "handle_export",
+        ),
+    )
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+    # ------------------------------------------------------
+    # Roteamento e respostas
+    # ------------------------------------------------------
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+        self.params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        self._streaming = False
+        try:
+            if not self._authorized():
+                raise ApiError(HTTPStatus.UNAUTHORIZED, "Token inválido ou ausente.")
+            handler, kwargs = self._route(method, path)
+            handler(**kwargs)
+        except ApiError as e:
+            self._send_json(e.status, {"error": e.message})
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info(f"Cliente desconectou durante {method} {path}")
+        except Exception:
+            logger.exception(f"❌ Falha em {method} {path}")
+            if not self._streaming:
+                self._send_json(
+                    HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Erro interno."}
+                )
+
+    def _authorized(self) -> bool:
+        token = api_token()
+        if token is None:
+            return True
+        header = self.headers.get("Authorization", "")
+        return hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
+
+    def _route(self, method: str, path: str):
+        allowed = []
+        for route_method, pattern, name in self.ROUTES:
+            match = pattern.fullmatch(path)
+            if match is None:
+                continue
+            if route_method == method:
+                return getattr(self, name), match.groupdict()
+            allowed.append(route_method)
+        if allowed:
+            raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, "Método não permitido.")
+        raise ApiError(HTTPStatus.NOT_FOUND, "Recurso não encontrado.")
+
+    def _send_json(
+        self, status: HTTPStatus, payload: Any, headers: Optional[dict] = None
+    ) -> None:
+        body = _json_bytes(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self, content_type: str, headers: Optional[dict] = None):
+        """Cabeçalhos de uma resposta sem tamanho (termina ao fechar a conexão)."""
+        self._streaming = True
+        self.close_connection = True
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _read_json(self) -> dict:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Content-Length inválido.") from e
+        if length > MAX_BODY_BYTES:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo muito grande.")
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "JSON inválido.") from e
+        if not isinstance(data, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Esperado um objeto JSON.")
+        return data
+
+    def _get_job(self, job_id: str) -> Job:
+        job = get_job_runner().get(job_id)
+        if job is None or job.kind != _PIPELINE_JOB:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Job {job_id} não encontrado.")
+        return job
+
+    # ------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------
+    def handle_health(self) -> None:
+        self._send_json(HTTPStatus.OK, {"status": "ok"})
+
+    def handle_submit_analysis(self) -> None:
+        data = self._read_json()
+        try:
+            user_story = UserStoryInput(content=data.get("user_story") or "").content
+        except ValidationError as e:
+            message = e.errors()[0].get("msg", "User Story inválida.")
+            raise ApiError(HTTPStatus.BAD_REQUEST, message) from e
+
+        job = submit_analysis(user_story, bool(data.get("test_plan", True)))
+        self._send_json(
+            HTTPStatus.ACCEPTED, job_payload(job), {"Location": f"/jobs/{job.id}"}
+        )
+
+    def handle_get_job(self, job_id: str) -> None:
+        self._send_json(HTTPStatus.OK, job_payload(self._get_job(job_id)))
+
+    def handle_job_events(self, job_id: str) -> None:
+        """Eventos `status` a cada mudança e `done` com o job concluído."""
+        job = self._get_job(job_id)
+        self._start_stream("text/event-stream", {"Cache-Control": "no-cache"})
+        last_status, last_write = None, time.monotonic()
+        while True:
+            if job.done:
+                self._write_event("done", job_payload(job))
+                return
+            if job.status != last_status:
+                last_status = job.status
+                self._write_event("status", {"id": job.id, "status": job.status})
+                last_write = time.monotonic()
+            elif time.monotonic() - last_write >= EVENTS_KEEPALIVE_SECONDS:
+                self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+                last_write = time.monotonic()
+            time.sleep(EVENTS_POLL_INTERVAL)
+
+    def _write_event(self, event: str, payload: Any) -> None:
+        self.wfile.write(f"event: {event}\ndata: ".encode() + _json_bytes(payload))
+        self.wfile.write(b"\n\n")
+        self.wfile.flush()
+
+    def handle_list_history(self) -> None:
+        limit = min(
+            _int_param(self.params, "limit", DEFAULT_HISTORY_LIMIT), MAX_HISTORY_LIMIT
+        )
+        offset = _int_param(self.params, "offset", 0)
+        total, rows = database.get_analysis_history_page(limit, offset)
+        items = [
+            {
+                "id": row["id"],
+                "created_at": row["created_at"],
+                "user_story": row["user_story"],
+                "links": {"self": f"/history/{row['id']}"},
+            }
+            for row in rows
+        ]
+        self._send_json(
+            HTTPStatus.OK,
+            {"total": total, "limit": limit, "offset": offset, "items": items},
+        )
+
+    def handle_get_history(self, analysis_id: str) -> None:
+        self._send_json(HTTPStatus.OK, _history_entry(analysis_id))
+
+    def handle_export(self, analysis_id: str, fmt: str) -> None:
+        if fmt not in EXPORT_FORMATS:
+            raise ApiError(
+                HTTPStatus.NOT_FOUND, f"Formato de exportação desconhecido: {fmt}"
+            )
+        entry = _history_entry(analysis_id)
+        suffix, content_type = EXPORT_FORMATS[fmt]
+        filename = gerar_nome_arquivo_seguro(entry.get("user_story") or "", suffix)
+        # Tempo e resultado cobrem todo o envio: nos CSVs e ZIPs o trabalho
+        # acontece enquanto os blocos são consumidos
+        metrics = get_metrics_collector()
+        try:
+            with metrics.time_export(format=fmt):
+                chunks = iter(export_chunks(fmt, entry, self.params))
+                # O primeiro bloco é gerado antes dos cabeçalhos: falhas na
+                # montagem ainda chegam ao cliente como erro JSON
+                first = next(chunks, b"")
+                self._start_stream(
+                    content_type,
+                    {"Content-Disposition": f'attachment; filename="{filename}"'},
+                )
+                self.wfile.write(first)
+                for chunk in chunks:
+                    self.wfile.write(chunk)
+        except Exception as e:
+            metrics.record_export(format=fmt, status="error")
+            metrics.record_error(error_type=type(e).__name__)
+            if isinstance(e, RenderTimeoutError) and not self._streaming:
+                raise ApiError(
+                    HTTPStatus.GATEWAY_TIMEOUT, "Tempo limite ao gerar o PDF."
+                ) from e
+            raise
+        metrics.record_export(format=fmt, status="success")
+
+
+class ApiServer(ThreadingHTTPServer):
+    """Uma thread por requisição; as análises rodam no executor de jobs."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def create_server(host: Optional[str] = None, port: int = DEFAULT_PORT) -> ApiServer:
+    """Cria o servidor (porta 0 escolhe uma porta livre)."""
+    return ApiServer((host or api_host(), port), ApiRequestHandler)
+
+
+_server: Optional[ApiServer] = None
+_server_lock = threading.Lock()
+
+
+def start_api_server_in_background() -> Optional[ApiServer]:
+    """
+    Sobe a API em uma thread do processo, se `HTTP_API_PORT` estiver definida.
+
+    Chamadas seguintes devolvem o servidor já iniciado.
+    """
+    global _server
+    port = api_port()
+    if port is None:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                database.init_db()
+                _server = create_server(port=port)
+            except OSError as e:
+                # Porta em uso (ex.: outro processo do app já subiu a API)
+                logger.warning(f"Não foi possível iniciar a API na porta {port}: {e}")
+                return None
+            threading.Thread(
+                target=_server.serve_forever, name="qa-oraculo-api", daemon=True
+            ).start()
+            logger.info(f"API HTTP iniciada em {api_host()}:{port}")
+        return _server
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m qa_core.http_api",
+        description="API HTTP para análises, plano de testes e exportações.",
+    )
+    parser.add_argument("--host", default=None, help=f"Padrão: {DEFAULT_HOST}")
+    parser.add_argument(
+        "--port", type=int, default=None, help=f"Padrão: {DEFAULT_PORT}"
+    )
+    args = parser.parse_args(argv)
+
+    database.init_db()
+    server = create_server(args.host, args.port or api_port() or DEFAULT_PORT)
+    host, port = server.server_address[:2]
+    print(f"✅ API do QA Oráculo em http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+# ==========================================================
+# job_runner.py — Execuções da IA em segundo plano
+# ==========================================================
+# 📘 `run_analysis_graph` e `run_test_plan_graph` rodavam dentro do
+#    script do Streamlit: um clique em qualquer widget (ou a recarga da
+#    aba) durante os ~30 s da chamada ao LLM interrompia o script e o
+#    resultado se perdia — ou a chamada era refeita.
+#
+# 🎯 As execuções viram jobs de um pool de threads do processo:
+#    • cada job tem id, status, resultado e erro;
+#    • a página guarda o id no `st.session_state` (e na URL) e acompanha
+#      o job a cada rerun — o job continua rodando entre reruns;
+#    • jobs com a mesma chave (mesma entrada) reaproveitam o que já está
+#      em andamento ou concluído, sem chamar o LLM de novo;
+#    • jobs concluídos ficam disponíveis por `ANALYSIS_JOB_TTL_SECONDS`.
+#
+# 🧩 `ANALYSIS_JOB_WORKERS=0` executa o job no próprio script (síncrono).
+#    Nada aqui acessa o `st.session_state`.
+# ==========================================================
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+from .observability import generate_trace_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_WORKERS = 4
+# Mesmo prazo do cache das funções da IA (`st.cache_data(ttl=3600)`)
+DEFAULT_JOB_TTL = 3600.0
+# Jobs concluídos mantidos no processo (os mais antigos são descartados)
+DEFAULT_MAX_FINISHED_JOBS = 256
+
+# Status de um job
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "error"
+
+
+def job_workers() -> int:
+    """Threads do pool (`ANALYSIS_JOB_WORKERS`); 0 executa no próprio script."""
+    raw = os.getenv("ANALYSIS_JOB_WORKERS", "").strip()
+    try:
+        return max(int(raw), 0) if raw else DEFAULT_JOB_WORKERS
+    except ValueError:
+        logger.warning(f"ANALYSIS_JOB_WORKERS inválido: {raw!r}")
+        return DEFAULT_JOB_WORKERS
+
+
+def job_ttl() -> float:
+    """Segundos que um job concluído fica disponível (`ANALYSIS_JOB_TTL_SECONDS`)."""
+    raw = os.getenv("ANALYSIS_JOB_TTL_SECONDS", "").strip()
+    try:
+        return float(raw) if raw else DEFAULT_JOB_TTL
+    except ValueError:
+        logger.warning(f"ANALYSIS_JOB_TTL_SECONDS inválido: {raw!r}")
+        return DEFAULT_JOB_TTL
+
+
+def job_key(kind: str, *args: Any) -> str:
+    """Chave de deduplicação: tipo do job + hash do conteúdo dos argumentos."""
+    payload = json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{kind}:{digest}"
+
+
+class Job:
+    """Execução em segundo plano.
+
+    `result` e `error` só são preenchidos quando o job termina (`done`).
+    O resultado é compartilhado entre as sessões que reaproveitam o job:
+    quem for alterá-lo deve trabalhar sobre uma cópia.
+    """
+
+    def __init__(self, kind: str, args: tuple, key: Optional[Hashable]):
+        self.id = generate_trace_id()
+        self.kind = kind
+        self.args = args
+        self.key = key
+        self.status = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.created_at
+
+
+class JobRunner:
+    """Pool de threads com registro dos jobs por id e por chave.
+
+    Args:
+        max_workers: Quantidade de threads (0 = execução síncrona no `submit`).
+        ttl: Segundos que um job concluído continua disponível.
+        max_finished: Quantidade máxima de jobs concluídos guardados.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        ttl: float = DEFAULT_JOB_TTL,
+        max_finished: int = DEFAULT_MAX_FINISHED_JOBS,
+    ):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.max_finished = max_finished
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._by_key: dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        kind: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        key: Optional[Hashable] = None,
+    ) -> Job:
+        """
+        Agenda `fn(*args)` e devolve o job.
+
+        Com `key`, um job da mesma chave em andamento ou concluído com
+        sucesso é devolvido no lugar de um novo (jobs com erro são refeitos).
+        """
+        with self._lock:
+            self._prune()
+            if key is not None:
+                existing = self._jobs.get(self._by_key.get(key, ""))
+                if existing is not None and existing.status != FAILED:
+                    return existing
+            job = Job(kind, args, key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._by_key[key] = job.id
+            executor = self._get_executor()
+
+        if executor is None:
+            self._run(job, fn)
+        else:
+            executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Job pelo id (None se desconhecido ou já descartado)."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def discard(self, job_id: str) -> None:
+        """Esquece o job (um job em andamento termina, mas some do registro)."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None and self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
+
+    def shutdown(self) -> None:
+        """Descarta os jobs ainda na fila; os em execução terminam sozinhos."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> Optional[ThreadPoolExecutor]:
+        if self.max_workers <= 0:
+            return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="qa-oraculo-job"
+            )
+        return self._executor
+
+    def _run(self, job: Job, fn: Callable[..., Any]) -> None:
+        job.status = RUNNING
+        try:
+            result = fn(*job.args)
+        except Exception as e:  # noqa: BLE001 - o erro vai para o job
+            logger.error(f"❌ Job {job.kind} ({job.id}) falhou: {e}")
+            job.error = str(e) or type(e).__name__
+            job.finished_at = time.monotonic()
+            job.status = FAILED
+        else:
+            job.result = result
+            job.finished_at = time.monotonic()
+            job.status = DONE
+
+    def _prune(self) -> None:
+        """Descarta os jobs concluídos expirados e os excedentes (chamar com o lock)."""
+        now = time.monotonic()
+        finished = [job for job in self._jobs.values() if job.done]
+        excess = len(finished) - self.max_finished
+        for job in finished:
+            if excess > 0 or now - (job.finished_at or now) > self.ttl:
+                excess -= 1
+                del self._jobs[job.id]
+                if self._by_key.get(job.key) == job.id:
+                    del self._by_key[job.key]
+
+
+_runner: Optional[JobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """Executor de jobs compartilhado pelas sessões do processo."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner(job_workers(), ttl=job_ttl())
+        return _runner
+
+
+@atexit.register
+def shutdown_job_runner() -> None:
+    """Encerra o executor compartilhado (um novo é criado no próximo uso)."""
+    global _runner
+    with _runner_lock:
+        runner, _runner = _runner, None
+    if runner is not None:
+        runner.shutdown()
@@ -1,26 +1,33 @@
 from __future__ import annotations
 
+import importlib
 import time
 from typing import Any, Callable, Dict, Tuple
 
 from .config import LLMSettings
 from .providers.base import LLMClient
-from .providers.azure_openai import AzureOpenAILLMClient
-from .providers.google import GoogleLLMClient
-from .providers.llama import LlamaLLMClient
-from .providers.mock import MockLLMClient
-from .providers.openai import OpenAILLMClient
 
 ProviderBuilder = Callable[[LLMSettings], LLMClient]
 
+
+def _lazy_builder(module_name: str, class_name: str) -> ProviderBuilder:
+    """Builder que só importa o módulo do provedor (e seu SDK) ao ser chamado."""
+
+    def build(settings: LLMSettings) -> LLMClient:
+        module = importlib.import_module(f".providers.{module_name}", __package__)
+        return getattr(module, class_name).from_settings(settings)
+
+    return build
+
+
 _PROVIDER_BUILDERS: Dict[str, ProviderBuilder] = {
-    "google": GoogleLLMClient.from_settings,
-    "azure": AzureOpenAILLMClient.from_settings,
-    "azure_openai": AzureOpenAILLMClient.from_settings,
-    "openai": OpenAILLMClient.from_settings,
-    "gpt": OpenAILLMClient.from_settings,
-    "llama": LlamaLLMClient.from_settings,
-    "mock": MockLLMClient.from_settings,
+    "google": _lazy_builder("google", "GoogleLLMClient"),
+    "azure": _lazy_builder("azure_openai", "AzureOpenAILLMClient"),
+    "azure_openai": _lazy_builder("azure_openai", "AzureOpenAILLMClient"),
+    "openai": _lazy_builder("openai", "OpenAILLMClient"),
+    "gpt": _lazy_builder("openai", "OpenAILLMClient"),
+    "llama": _lazy_builder("llama", "LlamaLLMClient"),
+    "mock": _lazy_builder("mock", "MockLLMClient"),
 }
 
 
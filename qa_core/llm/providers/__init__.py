@@ -1,10 +1,21 @@
-"""Provedores concretos de LLM."""
+"""Provedores concretos de LLM.
+
+Os módulos dos provedores importam os SDKs (google-generativeai, openai,
+ollama), que somam alguns segundos de importação; por isso as classes são
+carregadas só quando acessadas (`from qa_core.llm.providers import ...`).
+"""
+
+import importlib
 
 from .base import LLMClient, LLMError, LLMRateLimitError
-from .azure_openai import AzureOpenAILLMClient
-from .google import GoogleLLMClient
-from .llama import LlamaLLMClient
-from .openai import OpenAILLMClient
+
+# Classe → módulo do provedor (importado sob demanda)
+_LAZY_PROVIDERS = {
+    "GoogleLLMClient": "google",
+    "AzureOpenAILLMClient": "azure_openai",
+    "OpenAILLMClient": "openai",
+    "LlamaLLMClient": "llama",
+}
 
 __all__ = [
     "LLMClient",
@@ -15,3 +26,11 @@ __all__ = [
     "OpenAILLMClient",
     "LlamaLLMClient",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_PROVIDERS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{module_name}", __name__)
+    return getattr(module, name)
@@ -94,6 +94,12 @@ class MetricsCollector:
             ["error_type"],  # validation, llm, database, etc.
         )
 
+        self.graph_cache_total = Counter(
+            "qa_oraculo_graph_cache_total",
+            "Consultas ao cache das execuções dos grafos",
+            ["graph", "result"],  # graph: analysis, test_plan; result: hit, miss
+        )
+
         # === Histogramas (para latência) ===
         self.analysis_duration = Histogram(
             "qa_oraculo_analysis_duration_seconds",
@@ -154,6 +160,11 @@ class MetricsCollector:
         if self.enabled:
             self.errors_total.labels(error_type=error_type).inc()
 
+    def record_graph_cache(self, graph: str, result: str):
+        """Registra uma consulta ao cache de um grafo (hit ou miss)."""
+        if self.enabled:
+            self.graph_cache_total.labels(graph=graph, result=result).inc()
+
     def time_analysis(self):
         """Context manager para medir tempo de análise."""
         if self.enabled:
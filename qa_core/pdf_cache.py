@@ -0,0 +1,182 @@
+# ==========================================================
+# pdf_cache.py — PDF do plano gerado sob demanda
+# ==========================================================
+# 📘 O PDF era gerado de novo após o plano inicial e após cada edição ou
+#    exclusão de cenário, embora a maioria dos usuários nunca o baixe.
+#
+# 🎯 Agora o PDF é um artefato preguiçoso:
+#    • cada edição apenas marca o PDF da sessão como desatualizado;
+#    • ele é gerado quando o download é solicitado ou, em segundo plano,
+#      depois de um intervalo sem edições (`PDF_PREBUILD_DELAY_SECONDS`);
+#    • os bytes ficam em cache pelo hash do conteúdo do plano, então
+#      downloads repetidos (e pacotes completos) não geram o PDF de novo.
+#
+# 🧩 O cache é do processo (compartilhado entre sessões e com as threads
+#    de pré-geração); nada aqui acessa o `st.session_state`.
+# ==========================================================
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Limites padrão do cache (quantidade de PDFs e bytes somados)
+DEFAULT_MAX_ENTRIES = 16
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Segundos sem edições antes de gerar o PDF em segundo plano
+DEFAULT_PREBUILD_DELAY = 5.0
+# Intervalo entre as chamadas de `on_wait` ao aguardar outra geração
+_WAIT_INTERVAL = 0.1
+
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+# Gerações em andamento, por chave (quem chega depois aguarda o resultado)
+_inflight: dict[str, threading.Event] = {}
+# Pré-geração agendada, por sessão (uma nova edição reinicia a contagem)
+_timers: dict[str, threading.Timer] = {}
+
+
+def prebuild_delay() -> float:
+    """
+    Intervalo sem edições antes da pré-geração (`PDF_PREBUILD_DELAY_SECONDS`).
+
+    Valores menores ou iguais a zero desativam a geração em segundo plano.
+    """
+    raw = os.getenv("PDF_PREBUILD_DELAY_SECONDS", "").strip()
+    if not raw:
+        return DEFAULT_PREBUILD_DELAY
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning(f"PDF_PREBUILD_DELAY_SECONDS inválido: {raw!r}")
+        return DEFAULT_PREBUILD_DELAY
+
+
+def get_cached_pdf(key: str) -> Optional[bytes]:
+    """Devolve o PDF já gerado para o conteúdo `key` (ou None)."""
+    with _lock:
+        pdf_bytes = _cache.get(key)
+        if pdf_bytes is not None:
+            _cache.move_to_end(key)
+        return pdf_bytes
+
+
+def _store(key: str, pdf_bytes: bytes) -> None:
+    global _cache_bytes
+    if len(pdf_bytes) > DEFAULT_MAX_BYTES:
+        return
+    with _lock:
+        previous = _cache.pop(key, None)
+        if previous is not None:
+            _cache_bytes -= len(previous)
+        _cache[key] = pdf_bytes
+        _cache_bytes += len(pdf_bytes)
+        # Descarta os PDFs usados há mais tempo até respeitar os limites
+        while _cache and (
+            len(_cache) > DEFAULT_MAX_ENTRIES or _cache_bytes > DEFAULT_MAX_BYTES
+        ):
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+
+
+def build_pdf(
+    key: str,
+    builder: Callable[[], bytes],
+    on_wait: Optional[Callable[[], None]] = None,
+) -> bytes:
+    """
+    Devolve o PDF do conteúdo `key`, gerando-o com `builder` se necessário.
+
+    Se outra thread já estiver gerando o mesmo PDF (ex.: a pré-geração),
+    aguarda o resultado em vez de gerar de novo, chamando `on_wait`
+    periodicamente. Exceções do `builder` são propagadas e nada é guardado.
+    """
+    while True:
+        cached = get_cached_pdf(key)
+        if cached is not None:
+            return cached
+        with _lock:
+            event = _inflight.get(key)
+            owner = event is None
+            if owner:
+                event = _inflight[key] = threading.Event()
+        if owner:
+            break
+        # Se a outra geração falhar, a próxima volta do laço tenta de novo
+        while not event.wait(_WAIT_INTERVAL):
+            if on_wait is not None:
+                on_wait()
+
+    try:
+        pdf_bytes = builder()
+        if pdf_bytes:
+            _store(key, pdf_bytes)
+        return pdf_bytes
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        event.set()
+
+
+def _prebuild(slot: str, key: str, builder: Callable[[], bytes]) -> None:
+    with _lock:
+        if _timers.get(slot) is threading.current_thread():
+            del _timers[slot]
+    try:
+        build_pdf(key, builder)
+    except Exception as e:
+        logger.warning(f"Falha ao pré-gerar o PDF em segundo plano: {e}")
+
+
+def schedule_pdf_build(
+    slot: str,
+    key: str,
+    builder: Callable[[], bytes],
+    delay: Optional[float] = None,
+) -> bool:
+    """
+    Agenda a geração do PDF `key` após `delay` segundos sem novas edições.
+
+    Args:
+        slot: Identificador da sessão; um novo agendamento cancela o anterior.
+        key: Hash do conteúdo do plano.
+        builder: Gera os bytes do PDF (não deve acessar o `session_state`).
+        delay: Intervalo em segundos (padrão: `prebuild_delay()`).
+
+    Returns:
+        True se a geração foi agendada.
+    """
+    delay = prebuild_delay() if delay is None else delay
+    cancel_pdf_build(slot)
+    if delay <= 0 or get_cached_pdf(key) is not None:
+        return False
+
+    timer = threading.Timer(delay, _prebuild, args=(slot, key, builder))
+    timer.daemon = True
+    with _lock:
+        _timers[slot] = timer
+    timer.start()
+    return True
+
+
+def cancel_pdf_build(slot: str) -> None:
+    """Cancela a pré-geração agendada para a sessão, se ainda não começou."""
+    with _lock:
+        timer = _timers.pop(slot, None)
+    if timer is not None:
+        timer.cancel()
+
+
+def clear_pdf_cache() -> None:
+    """Esvazia o cache e cancela as pré-gerações agendadas."""
+    global _cache_bytes
+    with _lock:
+        timers = list(_timers.values())
+        _timers.clear()
+        _cache.clear()
+        _cache_bytes = 0
+    for timer in timers:
+        timer.cancel()
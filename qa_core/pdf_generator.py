@@ -9,15 +9,25 @@
 #  • Padrão QA Oráculo: acessível, limpo e automatizável
 # ==========================================================
 
+import copy
+import functools
+import importlib.util
+import io
+import logging
 import math
+import os
+import shutil
+import subprocess
+import threading
 from datetime import datetime
-from typing import Any
+from typing import Any, NamedTuple, Optional
 
-import matplotlib.font_manager as fm
 import pandas as pd
 from fpdf import FPDF
 from fpdf.enums import XPos, YPos
 
+logger = logging.getLogger(__name__)
+
 # ==========================================================
 # Constantes internas
 # ==========================================================
@@ -25,10 +35,240 @@ from fpdf.enums import XPos, YPos
 _ANALYSIS_FALLBACK_MESSAGE = "⚠️ Relatório de análise não disponível."
 
 
+# ==========================================================
+# Fonte Unicode (DejaVu Sans)
+# ==========================================================
+# O caminho da fonte é resolvido uma vez por processo, sem importar o
+# matplotlib (centenas de ms e dezenas de MB só para achar um arquivo):
+#   1. variável de ambiente PDF_FONT_PATH;
+#   2. diretórios de fontes conhecidos do sistema;
+#   3. fontconfig (`fc-list`), quando disponível;
+#   4. cópia da DejaVu Sans distribuída com o matplotlib (localizada pelo
+#      pacote instalado, sem importá-lo).
+# A fonte interpretada pelo fpdf2 também é reaproveitada entre os PDFs,
+# assim como um "programa de fonte base" (ver `_base_font_program`).
+
+_FONT_FAMILY = "DejaVu"
+_FONT_STYLES = ("", "B", "I")
+_FONT_FILE = "DejaVuSans.ttf"
+
+_SYSTEM_FONT_DIRS = (
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/dejavu",
+    "/usr/share/fonts/TTF",
+    "/usr/share/fonts/truetype",
+    "/usr/local/share/fonts",
+    "/opt/homebrew/share/fonts",
+    "/Library/Fonts",
+    os.path.expanduser("~/Library/Fonts"),
+    os.path.expanduser("~/.local/share/fonts"),
+    os.path.expanduser("~/.fonts"),
+    os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+)
+
+
+def _fontconfig_font_path() -> Optional[str]:
+    """Caminho da DejaVu Sans segundo o fontconfig (só correspondência exata)."""
+    fc_list = shutil.which("fc-list")
+    if not fc_list:
+        return None
+    try:
+        result = subprocess.run(
+            [fc_list, ":family=DejaVu Sans:style=Book", "file"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            check=False,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    for line in result.stdout.splitlines():
+        path = line.strip().rstrip(":")
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+def _matplotlib_font_path() -> Optional[str]:
+    """DejaVu Sans distribuída com o matplotlib, sem importar o pacote."""
+    try:
+        spec = importlib.util.find_spec("matplotlib")
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    for location in spec.submodule_search_locations:
+        path = os.path.join(location, "mpl-data", "fonts", "ttf", _FONT_FILE)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def resolve_font_path() -> str:
+    """
+    Localiza o arquivo da fonte DejaVu Sans (resultado em cache no processo).
+
+    Raises:
+        RuntimeError: Se a fonte não for encontrada.
+    """
+    configured = os.getenv("PDF_FONT_PATH", "").strip()
+    if configured and os.path.isfile(configured):
+        return configured
+
+    for directory in _SYSTEM_FONT_DIRS:
+        path = os.path.join(directory, _FONT_FILE)
+        if os.path.isfile(path):
+            return path
+
+    path = _fontconfig_font_path() or _matplotlib_font_path()
+    if path:
+        return path
+    raise RuntimeError("Fonte 'DejaVu Sans' não encontrada.")
+
+
+# Caracteres do programa de fonte base: Latin-1, Latin Extended-A e a
+# pontuação tipográfica comum (cobrem o português dos relatórios)
+_BASE_FONT_CHARS = (
+    "".join(map(chr, range(0x20, 0x7F)))
+    + "".join(map(chr, range(0xA0, 0x180)))
+    + "–—‘’“”…•€"
+)
+# Tabelas que o fpdf2 descarta ao embutir a fonte
+_BASE_FONT_DROP_TABLES = ("FFTM", "GDEF", "GPOS", "GSUB", "MATH", "hdmx", "meta")
+
+
+@functools.lru_cache(maxsize=4)
+def _base_font_program(font_path: str) -> Optional[bytes]:
+    """
+    Subconjunto da fonte com `_BASE_FONT_CHARS`, gerado uma vez por processo.
+
+    Ao salvar, o fpdf2 lê e recorta a fonte de cada documento para embutir
+    só os glifos usados; a partir do arquivo completo da DejaVu Sans isso
+    era a maior parte do custo de um PDF pequeno (ex.: exportação em lote).
+    Os documentos partem deste subconjunto já pronto, com os nomes dos
+    glifos preservados para o recorte final do fpdf2.
+    """
+    from fontTools import subset, ttLib
+
+    try:
+        options = subset.Options(
+            notdef_outline=True, recommended_glyphs=True, glyph_names=True
+        )
+        options.drop_tables += list(_BASE_FONT_DROP_TABLES)
+        ttfont = ttLib.TTFont(font_path, recalcTimestamp=False, lazy=True)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(text=_BASE_FONT_CHARS)
+        subsetter.subset(ttfont)
+        buffer = io.BytesIO()
+        ttfont.save(buffer)
+        return buffer.getvalue()
+    except Exception as e:  # noqa: BLE001 - fontes fora do padrão usam o arquivo
+        logger.warning(f"Programa de fonte base indisponível: {e}")
+        return None
+
+
+def _ensure_font_programs(pdf: FPDF) -> None:
+    """
+    Reabre o arquivo completo da fonte para os documentos que usaram glifos
+    fora do programa de fonte base (ex.: alfabetos não latinos).
+    """
+    from fontTools import ttLib
+    from fpdf.fonts import TTFFont
+
+    for font in pdf.fonts.values():
+        if not isinstance(font, TTFFont):
+            continue
+        available = set(font.ttfont.getGlyphOrder())
+        if all(name in available for name in font.subset.get_all_glyph_names()):
+            continue
+        font.ttfont = ttLib.TTFont(
+            font.ttffile,
+            recalcTimestamp=False,
+            fontNumber=font.collection_font_number,
+            lazy=True,
+        )
+
+
+# Fonte já interpretada pelo fpdf2, por arquivo (modelo para os próximos
+# PDFs); `None` desativa o reaproveitamento se a cópia falhar
+_font_templates: dict[str, Any] = {}
+_font_templates_lock = threading.Lock()
+
+
+def _fresh_pdf_object(obj: Any) -> Any:
+    """Cópia de um objeto PDF ainda sem número (atribuído ao salvar)."""
+    obj = copy.copy(obj)
+    obj.id = None
+    return obj
+
+
+def _clone_font(template: Any, pdf: FPDF, fontkey: str, style: str) -> Any:
+    """
+    Cópia da fonte interpretada para outro documento/estilo.
+
+    Métricas, cmap e larguras (a parte cara de `add_font`) são compartilhadas;
+    o estado de cada documento (índice, descritor, subconjunto de glifos e a
+    tabela fontTools, que é recortada ao salvar o PDF) é novo. A tabela
+    fontTools parte do programa de fonte base, quando disponível.
+    """
+    from fontTools import ttLib
+
+    program = _base_font_program(str(template.ttffile))
+    font = copy.copy(template)
+    font.desc = _fresh_pdf_object(template.desc)
+    font.i = len(pdf.fonts) + 1
+    font.fontkey = fontkey
+    font.emphasis = type(template.emphasis).coerce(style)
+    font.biggest_size_pt = 0
+    font.missing_glyphs = []
+    font._hbfont = None
+    font.ttfont = ttLib.TTFont(
+        io.BytesIO(program) if program else font.ttffile,
+        recalcTimestamp=False,
+        fontNumber=font.collection_font_number,
+        lazy=True,
+    )
+    font.subset = type(template.subset)(font)
+    return font
+
+
+def _register_fonts(pdf: FPDF) -> None:
+    """Registra a DejaVu Sans (normal, negrito e itálico) no documento."""
+    from fpdf.fonts import TTFFont
+
+    font_path = resolve_font_path()
+    for style in _FONT_STYLES:
+        fontkey = f"{_FONT_FAMILY.lower()}{style}"
+        template = _font_templates.get(font_path)
+        if template is not None:
+            try:
+                pdf.fonts[fontkey] = _clone_font(template, pdf, fontkey, style)
+                continue
+            except Exception as e:  # noqa: BLE001 - depende de internos do fpdf2
+                logger.warning(f"Reaproveitamento da fonte desativado: {e}")
+                _font_templates[font_path] = None
+
+        pdf.add_font(_FONT_FAMILY, style, font_path)
+        font = pdf.fonts.get(fontkey) if isinstance(pdf.fonts, dict) else None
+        # Fontes coloridas/CFF seguem sempre pelo caminho padrão do fpdf2
+        if isinstance(font, TTFFont) and not font.is_cff and font.color_font is None:
+            # O modelo não pode compartilhar o descritor com este documento
+            template = copy.copy(font)
+            template.desc = _fresh_pdf_object(font.desc)
+            with _font_templates_lock:
+                _font_templates.setdefault(font_path, template)
+
+
 # ==========================================================
 # Classe base do PDF
 # ==========================================================
 class PDF(FPDF):
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # Data carimbada na capa e em todos os rodapés (uma por documento)
+        self.generated_at = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
     def header(self):
         if self.page_no() > 1:
             self.set_font("DejaVu", "B", 12)
@@ -48,11 +288,10 @@ class PDF(FPDF):
             self.set_y(-15)
             self.set_font("DejaVu", "I", 8)
             self.set_text_color(100, 100, 100)
-            generation_date = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
             self.cell(
                 0,
                 10,
-                f"Gerado em: {generation_date}",
+                f"Gerado em: {self.generated_at}",
                 border=0,
                 align="L",
                 new_x=XPos.RIGHT,
@@ -81,8 +320,26 @@ class PDF(FPDF):
 # ==========================================================
 # Funções auxiliares
 # ==========================================================
+# Emojis sem glifo na DejaVu Sans, trocados em uma única passada (`str.translate`)
+_PDF_TEXT_TRANSLATION = str.maketrans(
+    {
+        "📌": "- ",
+        "✅": "[OK] ",
+        "🎯": "-> ",
+        "•": "-",
+        "🔍": "[Análise] ",
+        "❓": "[?] ",
+        "🚩": "[Alerta] ",
+    }
+)
+
+
 def clean_text_for_pdf(text: Any) -> str:
     """Limpa emojis, trata valores ausentes e garante que o texto seja uma string."""
+    # Caminho rápido: quase todos os valores do plano já são textos
+    if type(text) is str:
+        return text.translate(_PDF_TEXT_TRANSLATION)
+
     if text is None:
         return ""
 
@@ -97,19 +354,24 @@ def clean_text_for_pdf(text: Any) -> str:
         # Tipos não suportados por pd.isna seguem o fluxo normal
         pass
 
-    text = str(text)
-    replacements = {
-        "📌": "- ",
-        "✅": "[OK] ",
-        "🎯": "-> ",
-        "•": "-",
-        "🔍": "[Análise] ",
-        "❓": "[?] ",
-        "🚩": "[Alerta] ",
-    }
-    for emoji, replacement in replacements.items():
-        text = text.replace(emoji, replacement)
-    return text
+    return str(text).translate(_PDF_TEXT_TRANSLATION)
+
+
+def write_text(pdf: FPDF, h: float, text: str) -> None:
+    """
+    Escreve `text` como `multi_cell(0, h, text)`, linha a linha.
+
+    A quebra de linha do fpdf2 mede a largura caractere a caractere e custa
+    várias vezes mais que uma `cell`; linhas que cabem na largura útil (a
+    grande maioria nos planos de teste) são escritas com `cell` e só as
+    longas passam pelo `multi_cell`.
+    """
+    available = pdf.w - pdf.r_margin - pdf.x - 2 * pdf.c_margin
+    for line in text.split("\n"):
+        if pdf.get_string_width(line) <= available:
+            pdf.cell(0, h, line, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        else:
+            pdf.multi_cell(0, h, line, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
 
 def add_cover(pdf: FPDF):
@@ -125,13 +387,10 @@ def add_cover(pdf: FPDF):
     pdf.ln(20)
     pdf.set_font("DejaVu", "I", 12)
     pdf.set_text_color(120, 120, 120)
-    pdf.cell(
-        0,
-        10,
-        f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}",
-        border=0,
-        align="C",
+    generated_at = getattr(pdf, "generated_at", None) or datetime.now().strftime(
+        "%d/%m/%Y %H:%M:%S"
     )
+    pdf.cell(0, 10, f"Gerado em: {generated_at}", border=0, align="C")
     pdf.set_text_color(0, 0, 0)
 
 
@@ -147,13 +406,119 @@ def add_section_title(pdf: FPDF, text: str):
 # ==========================================================
 # Seção — Casos de teste formatados
 # ==========================================================
-def add_test_case_table(pdf: "PDF", df: pd.DataFrame):
-    """Adiciona os casos de teste em um formato semelhante à interface web."""
+# Planos muito grandes são divididos em capítulos (nova página + marcador
+# no sumário do leitor de PDF) a cada `PDF_CHAPTER_SIZE` casos.
+DEFAULT_CHAPTER_SIZE = 500
+
+_CASE_DETAILS = (
+    ("Critério de Aceitação Relacionado", "criterio_de_aceitacao_relacionado"),
+    ("Justificativa de Acessibilidade", "justificativa_acessibilidade"),
+)
+
+
+class PdfCaseRow(NamedTuple):
+    """Textos de um caso de teste, já limpos e formatados para o PDF."""
+
+    summary: str
+    heading: str
+    priority: str
+    details: tuple[tuple[str, str], ...]
+    scenario: str
+
+
+def default_chapter_size() -> Optional[int]:
+    """Casos por capítulo (`PDF_CHAPTER_SIZE`); <= 0 desativa os capítulos."""
+    raw = os.getenv("PDF_CHAPTER_SIZE", "").strip()
+    try:
+        size = int(raw) if raw else DEFAULT_CHAPTER_SIZE
+    except ValueError:
+        logger.warning(f"PDF_CHAPTER_SIZE inválido: {raw!r}")
+        size = DEFAULT_CHAPTER_SIZE
+    return size if size > 0 else None
+
+
+def _detail_text(value: Any) -> str:
+    return clean_text_for_pdf(value if value not in (None, "") else "-")
+
+
+def prepare_case_rows(df: pd.DataFrame) -> list[PdfCaseRow]:
+    """
+    Monta, em um único percurso, os textos de cada caso para o resumo e o
+    detalhamento (antes eram dois `iterrows` com limpeza repetida).
+    """
+    # Remove possíveis duplicatas ou cabeçalhos residuais vindos do Markdown da IA
+    if df.columns.has_duplicates:
+        df = df.loc[:, ~df.columns.duplicated()]
+
+    rows = []
+    for number, record in enumerate(df.to_dict("records"), 1):
+        # Colunas ausentes em parte dos casos chegam como NaN
+        test_id = clean_text_for_pdf(record.get("id")) or f"CT-{number:03d}"
+        titulo = clean_text_for_pdf(record.get("titulo", "-")) or "-"
+        prioridade = record.get("prioridade", "-")
+        prioridade_resumo = clean_text_for_pdf(prioridade) or "-"
+
+        cenario = record.get("cenario", "")
+        if isinstance(cenario, list):
+            cenario = "\n".join(str(item) for item in cenario)
+
+        rows.append(
+            PdfCaseRow(
+                summary=f"- {test_id}: {titulo} (Prioridade: {prioridade_resumo})",
+                heading=clean_text_for_pdf(
+                    f"Caso de Teste {number} - {record.get('titulo', 'Sem Título')}"
+                ),
+                priority=clean_text_for_pdf(
+                    f"Prioridade: {record.get('prioridade', 'Normal')}"
+                ),
+                details=(("Prioridade", _detail_text(prioridade)),)
+                + tuple(
+                    (label, _detail_text(record.get(column, "-")))
+                    for label, column in _CASE_DETAILS
+                ),
+                scenario=clean_text_for_pdf(cenario),
+            )
+        )
+    return rows
+
+
+def _add_case_details(pdf: "PDF", row: PdfCaseRow) -> None:
+    pdf.set_font("DejaVu", "B", 11)
+    pdf.cell(0, 10, row.heading, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.set_font("DejaVu", "", 10)
+    write_text(pdf, 10, row.priority)
+
+    for label, texto in row.details:
+        pdf.set_font("DejaVu", "B", 10)
+        pdf.cell(0, 6, f"{label}:", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_font("DejaVu", "", 10)
+        write_text(pdf, 6, texto)
+        pdf.ln(1)
+
+    if row.scenario.strip():
+        pdf.set_font("DejaVu", "B", 10)
+        pdf.cell(0, 6, "Cenário Gherkin:", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_font("DejaVu", "", 10)
+        write_text(pdf, 6, row.scenario)
+
+
+def add_test_case_table(
+    pdf: "PDF", df: pd.DataFrame, *, chapter_size: Optional[int] = None
+):
+    """
+    Adiciona os casos de teste em um formato semelhante à interface web.
+
+    Args:
+        pdf: Documento em construção.
+        df: Casos de teste.
+        chapter_size: Com mais casos que isso, o detalhamento é dividido em
+            capítulos (nova página e marcador de navegação a cada bloco).
+    """
     if df.empty:
         return
 
-    #  Remove possíveis duplicatas ou cabeçalhos residuais vindos do Markdown da IA
-    df = df.loc[:, ~df.columns.duplicated()].copy()
+    rows = prepare_case_rows(df)
+    total = len(rows)
 
     add_section_title(pdf, "2. Casos de Teste")
 
@@ -163,17 +528,8 @@ def add_test_case_table(pdf: "PDF", df: pd.DataFrame):
     pdf.ln(2)
 
     pdf.set_font("DejaVu", "", 10)
-    for index, row in df.iterrows():
-        test_id = row.get("id") or f"CT-{int(index) + 1:03d}"  # type: ignore
-        titulo = clean_text_for_pdf(row.get("titulo", "-")) or "-"
-        prioridade = clean_text_for_pdf(row.get("prioridade", "-")) or "-"
-        pdf.multi_cell(
-            0,
-            6,
-            f"- {test_id}: {titulo} (Prioridade: {prioridade})",
-            new_x=XPos.LMARGIN,
-            new_y=YPos.NEXT,
-        )
+    for row in rows:
+        write_text(pdf, 6, row.summary)
 
     pdf.ln(6)
 
@@ -188,55 +544,19 @@ def add_test_case_table(pdf: "PDF", df: pd.DataFrame):
     )
     pdf.ln(2)
 
-    for index, row in df.iterrows():
-        test_id = row.get("id") or f"CT-{int(index) + 1:03d}"  # type: ignore
-        titulo = clean_text_for_pdf(row.get("titulo", "-")) or "-"
-
-        pdf.set_font("DejaVu", "B", 11)
-        pdf.cell(
-            0,
-            10,
-            f"Caso de Teste {int(index) + 1} - {row.get('titulo', 'Sem Título')}",  # type: ignore
-            new_x=XPos.LMARGIN,
-            new_y=YPos.NEXT,
-        )
-        pdf.set_font("DejaVu", "", 10)
-        pdf.multi_cell(
-            0, 10, f"Prioridade: {row.get('prioridade', 'Normal')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT  # type: ignore
-        )
+    chapters = chapter_size is not None and total > chapter_size
+    for position, row in enumerate(rows):
+        if chapters and position % chapter_size == 0:
+            last = min(position + chapter_size, total)
+            title = f"Casos {position + 1} a {last}"
+            if position:
+                pdf.add_page()
+            pdf.start_section(title)
+            add_section_title(pdf, title)
 
-        detalhes = [
-            ("Prioridade", row.get("prioridade", "-")),
-            (
-                "Critério de Aceitação Relacionado",
-                row.get("criterio_de_aceitacao_relacionado", "-"),
-            ),
-            (
-                "Justificativa de Acessibilidade",
-                row.get("justificativa_acessibilidade", "-"),
-            ),
-        ]
-
-        for label, value in detalhes:
-            texto = clean_text_for_pdf(value if value not in (None, "") else "-")
-            pdf.set_font("DejaVu", "B", 10)
-            pdf.cell(0, 6, f"{label}:", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-            pdf.set_font("DejaVu", "", 10)
-            pdf.multi_cell(0, 6, texto, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-            pdf.ln(1)
-
-        cenario = row.get("cenario", "")
-        if isinstance(cenario, list):
-            cenario = "\n".join(str(item) for item in cenario)
-        cenario = clean_text_for_pdf(cenario)
+        _add_case_details(pdf, row)
 
-        if cenario.strip():
-            pdf.set_font("DejaVu", "B", 10)
-            pdf.cell(0, 6, "Cenário Gherkin:", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-            pdf.set_font("DejaVu", "", 10)
-            pdf.multi_cell(0, 6, cenario, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-
-        if int(index) < len(df) - 1:  # type: ignore
+        if position < total - 1:
             pdf.divider()
 
 
@@ -271,15 +591,18 @@ def _normalize_test_plan_df(test_plan_df: Any) -> pd.DataFrame:
 def generate_pdf_report(
     analysis_report: str | None,
     test_plan_df: pd.DataFrame | list[dict[str, Any]] | dict[str, Any] | None,
+    *,
+    chapter_size: Optional[int] = None,
 ) -> bytes:
-    """Gera o relatório PDF completo (Análise + Casos de Teste)."""
+    """
+    Gera o relatório PDF completo (Análise + Casos de Teste).
+
+    `chapter_size` limita os casos por capítulo (padrão: `PDF_CHAPTER_SIZE`).
+    """
     pdf = PDF()
 
     try:
-        font_path = fm.findfont("DejaVu Sans")
-        pdf.add_font("DejaVu", "", font_path)
-        pdf.add_font("DejaVu", "B", font_path)
-        pdf.add_font("DejaVu", "I", font_path)
+        _register_fonts(pdf)
     except Exception as e:
         raise RuntimeError("Fonte 'DejaVu Sans' não encontrada.") from e
 
@@ -302,6 +625,13 @@ def generate_pdf_report(
     # --- Seção 2: Casos de Teste ---
     normalized_df = _normalize_test_plan_df(test_plan_df)
     if not normalized_df.empty:
-        add_test_case_table(pdf, normalized_df)
+        add_test_case_table(
+            pdf,
+            normalized_df,
+            chapter_size=(
+                default_chapter_size() if chapter_size is None else chapter_size
+            ),
+        )
 
+    _ensure_font_programs(pdf)
     return bytes(pdf.output())
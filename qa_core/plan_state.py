@@ -0,0 +1,225 @@
+# ==========================================================
+# plan_state.py — Representação única do plano de testes na sessão
+# ==========================================================
+# 📘 A sessão guardava quatro cópias do mesmo plano — `test_plan_df`,
+#    `test_plan_df_records`, `test_plan_df_json` e o `test_plan_report`
+#    montado — além do `pdf_report_bytes`. Cada edição refazia todas elas.
+#
+# 🎯 `TestPlan` guarda só os casos (registros) e o sumário da IA. As
+#    demais formas são visões derivadas sob demanda e memorizadas:
+#    • `df`        — DataFrame para a tela e as exportações;
+#    • `json`      — JSON dos casos (fragmentos por caso em cache);
+#    • `markdown`  — sumário + cenários (o antigo `test_plan_report`);
+#    • `pdf`       — bytes do PDF, quando já gerado;
+#    • `content_hash` — hash do conteúdo, sem montar o JSON inteiro.
+#    Toda alteração passa pelos métodos do plano, que descartam as visões
+#    juntas; só o que for consultado depois é calculado de novo.
+#
+# 🧩 O plano fica em `st.session_state["test_plan"]`; nada aqui acessa o
+#    `st.session_state`.
+# ==========================================================
+import json
+from typing import Any, Optional
+
+import pandas as pd
+
+from .export_cache import CaseFragmentCache, plan_fingerprint, render_fragment
+from .text_utils import gerar_relatorio_md_dos_cenarios
+
+# Cabeçalho dos blocos de cenário no Markdown do plano
+SCENARIO_MARKER = "### 🧩"
+
+
+def extract_plan_summary(report_text: Optional[str]) -> str:
+    """
+    Extrai apenas o cabeçalho/introdução do plano de testes.
+
+    Evita que os cenários apareçam duplicados no resumo e permite salvar o
+    sumário gerado pela IA separadamente no banco (`test_plan_summary`).
+    """
+    if not report_text:
+        return ""
+    if SCENARIO_MARKER in report_text:
+        return report_text.split(SCENARIO_MARKER, 1)[0].rstrip()
+    return report_text.strip()
+
+
+def compose_test_plan_report(summary_text: str, scenarios_md: str) -> str:
+    """
+    Combina o sumário original do plano com o Markdown dos cenários atuais,
+    sem perder as partes redigidas pela IA (objetivo, escopo, estratégia).
+    """
+    summary = (summary_text or "").strip()
+    scenarios_md = (scenarios_md or "").strip()
+
+    if not summary:
+        return scenarios_md
+    if not scenarios_md:
+        return summary
+
+    if SCENARIO_MARKER in summary:
+        header = summary.split(SCENARIO_MARKER, 1)[0].rstrip()
+        if header:
+            return f"{header}\n\n{scenarios_md}"
+        return scenarios_md
+
+    return f"{summary}\n\n---\n\n{scenarios_md}"
+
+
+def cases_dataframe(cases: list[dict]) -> pd.DataFrame:
+    """
+    DataFrame dos casos gerados pela IA, pronto para a tela e as exportações:
+    campos em lista viram texto (um item por linha) e nulos viram "".
+    """
+    df = pd.DataFrame(cases)
+    df = df.apply(
+        lambda col: col.apply(
+            lambda x: ("\n".join(map(str, x)) if isinstance(x, list) else x)
+        )
+    )
+    return df.fillna("")
+
+
+def _clean_records(df: pd.DataFrame) -> list[dict]:
+    return df.fillna("").to_dict(orient="records")
+
+
+class TestPlan:
+    """Plano de testes da sessão: casos + sumário, com visões derivadas.
+
+    Args:
+        records: Casos de teste (registros coluna → valor). Tratados como
+            somente leitura: altere o plano pelos métodos abaixo.
+        summary: Sumário/introdução redigido pela IA.
+        fragments: Cache de fragmentos por caso da sessão (opcional).
+    """
+
+    __test__ = False  # não é uma classe de testes do pytest
+
+    def __init__(
+        self,
+        records: list[dict],
+        summary: str = "",
+        fragments: Optional[CaseFragmentCache] = None,
+    ):
+        self._records = records
+        self.summary = summary or ""
+        self._fragments = fragments
+        self._views: dict[str, Any] = {}
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        summary: str = "",
+        fragments: Optional[CaseFragmentCache] = None,
+    ) -> "TestPlan":
+        """Plano a partir de um DataFrame (que vira a visão `df` memorizada)."""
+        plan = cls(_clean_records(df), summary, fragments)
+        plan._views["df"] = df
+        return plan
+
+    # ------------------------------------------------------
+    # Visões derivadas (memorizadas até a próxima alteração)
+    # ------------------------------------------------------
+    @property
+    def records(self) -> list[dict]:
+        return self._records
+
+    @property
+    def empty(self) -> bool:
+        return not self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        df = self._views.get("df")
+        if df is None:
+            df = pd.DataFrame(self._records)
+            self._views["df"] = df
+        return df
+
+    def _record_json(self, record: dict) -> str:
+        return render_fragment(
+            self._fragments,
+            "json",
+            record,
+            lambda: json.dumps(record, ensure_ascii=False),
+        )
+
+    @property
+    def json(self) -> Optional[str]:
+        """Mesmo texto de `json.dumps(records, ensure_ascii=False)`."""
+        if "json" not in self._views:
+            self._views["json"] = (
+                "[" + ", ".join(map(self._record_json, self._records)) + "]"
+                if self._records
+                else None
+            )
+        return self._views["json"]
+
+    @property
+    def markdown(self) -> str:
+        """Relatório do plano: sumário da IA + cenários atuais."""
+        if "markdown" not in self._views:
+            scenarios_md = gerar_relatorio_md_dos_cenarios(
+                self._records, fragments=self._fragments
+            )
+            self._views["markdown"] = compose_test_plan_report(
+                self.summary, scenarios_md
+            )
+        return self._views["markdown"]
+
+    @property
+    def content_hash(self) -> str:
+        """Hash do sumário e dos casos (JSON de cada caso, sem concatenar)."""
+        if "content_hash" not in self._views:
+            self._views["content_hash"] = plan_fingerprint(
+                self.summary, *map(self._record_json, self._records)
+            )
+        return self._views["content_hash"]
+
+    @property
+    def pdf(self) -> Optional[bytes]:
+        """PDF do conteúdo atual, se já gerado (None após qualquer alteração)."""
+        return self._views.get("pdf")
+
+    @pdf.setter
+    def pdf(self, pdf_bytes: Optional[bytes]) -> None:
+        self._views["pdf"] = pdf_bytes
+
+    # ------------------------------------------------------
+    # Alterações (descartam as visões derivadas juntas)
+    # ------------------------------------------------------
+    def replace_cases(self, df: pd.DataFrame) -> None:
+        """Troca todos os casos (ex.: após excluir uma linha)."""
+        self._records = _clean_records(df)
+        self._views = {"df": df}
+
+    def update_case(self, position: int, field: str, value: Any) -> dict:
+        """
+        Altera um campo de um caso e devolve o registro atualizado.
+
+        Um campo novo entra em todos os casos (vazio nos demais), como uma
+        coluna do DataFrame. O DataFrame já montado é copiado e ajustado só
+        na célula alterada — quem guardou o `df` anterior não o vê mudar —;
+        as outras visões são descartadas.
+        """
+        if field in self._records[position]:
+            self._records = [*self._records]
+        else:
+            self._records = [{**case, field: ""} for case in self._records]
+        record = {**self._records[position], field: value}
+        self._records[position] = record
+
+        df = self._views.get("df")
+        self._views = {}
+        if df is not None:
+            df = df.copy()
+            if field not in df.columns:
+                df[field] = ""
+            df.iat[position, df.columns.get_loc(field)] = value
+            self._views["df"] = df
+        return record
@@ -0,0 +1,286 @@
+# ==========================================================
+# render_pool.py — Pool de processos para renderização de PDFs
+# ==========================================================
+# 📘 `generate_pdf_report` é Python puro e limitado pela CPU; rodando na
+#    thread do script do Streamlit, um plano com 300 casos congelava a
+#    página até o PDF ficar pronto.
+#
+# 🎯 Os jobs de PDF vão para um pool de processos compartilhado pelo
+#    download da sessão, pela pré-geração e pela exportação em lote:
+#    • cada job tem tempo limite (`PDF_RENDER_TIMEOUT_SECONDS`);
+#    • um job pode ser cancelado mesmo em execução — os processos do pool
+#      são encerrados e recriados, e os demais jobs em andamento são
+#      reenviados automaticamente;
+#    • quem aguarda recebe chamadas periódicas (`on_progress`) para
+#      atualizar a interface e, se for interrompido, cancela o job.
+#
+# 🧩 `PDF_RENDER_WORKERS=0` desativa o pool (renderização no próprio
+#    processo, sem tempo limite).
+# ==========================================================
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RENDER_TIMEOUT = 120.0
+# Intervalo entre as chamadas de `on_progress` enquanto o job roda
+DEFAULT_POLL_INTERVAL = 0.1
+
+
+class RenderTimeoutError(TimeoutError):
+    """O job excedeu o tempo limite e foi cancelado."""
+
+
+def render_workers() -> int:
+    """Processos do pool (`PDF_RENDER_WORKERS`, padrão: CPUs disponíveis)."""
+    raw = os.getenv("PDF_RENDER_WORKERS", "").strip()
+    try:
+        return max(int(raw), 0) if raw else os.cpu_count() or 1
+    except ValueError:
+        logger.warning(f"PDF_RENDER_WORKERS inválido: {raw!r}")
+        return os.cpu_count() or 1
+
+
+def render_timeout() -> Optional[float]:
+    """Tempo limite por job (`PDF_RENDER_TIMEOUT_SECONDS`); <= 0 desativa."""
+    raw = os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "").strip()
+    try:
+        timeout = float(raw) if raw else DEFAULT_RENDER_TIMEOUT
+    except ValueError:
+        logger.warning(f"PDF_RENDER_TIMEOUT_SECONDS inválido: {raw!r}")
+        timeout = DEFAULT_RENDER_TIMEOUT
+    return timeout if timeout > 0 else None
+
+
+def _terminate_workers(executor: ProcessPoolExecutor) -> None:
+    """Encerra os processos do pool, inclusive os que estão rodando jobs."""
+    terminate = getattr(executor, "terminate_workers", None)  # Python 3.14+
+    if terminate is not None:
+        terminate()
+        return
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+class RenderJob:
+    """Job submetido ao pool, com tempo limite e cancelamento.
+
+    O tempo limite conta a partir do envio (inclui a espera na fila).
+    """
+
+    def __init__(
+        self,
+        pool: "RenderPool",
+        fn: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+        timeout: Optional[float],
+    ):
+        self._pool = pool
+        self._call = (fn, args, kwargs)
+        self.timeout = timeout
+        self.started_at = time.monotonic()
+        self._cancelled = False
+        self._resubmitted = False
+        self._executor, self._future = pool._submit(fn, args, kwargs)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancel(self) -> None:
+        """Cancela o job; se já estiver rodando, encerra os processos do pool."""
+        if self._cancelled:
+            return
+        self._cancelled = True
+        if not self._future.cancel() and not self._future.done():
+            self._pool._restart(self._executor)
+
+    def result(
+        self,
+        on_progress: Optional[Callable[[], None]] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> Any:
+        """
+        Aguarda o resultado do job.
+
+        Args:
+            on_progress: Chamado a cada `poll_interval` segundos enquanto o
+                job não termina. Uma exceção levantada aqui cancela o job.
+            poll_interval: Intervalo entre as chamadas de `on_progress`.
+
+        Raises:
+            RenderTimeoutError: Se o tempo limite foi excedido.
+            CancelledError: Se o job foi cancelado.
+        """
+        try:
+            while True:
+                wait = poll_interval if on_progress else None
+                if self.timeout is not None:
+                    remaining = self.timeout - self.elapsed
+                    if remaining <= 0:
+                        self.cancel()
+                        raise RenderTimeoutError(
+                            f"Renderização excedeu {self.timeout:g}s e foi cancelada."
+                        )
+                    wait = remaining if wait is None else min(wait, remaining)
+                try:
+                    return self._future.result(timeout=wait)
+                except FuturesTimeoutError:
+                    if on_progress is not None:
+                        on_progress()
+                except BrokenProcessPool as e:
+                    if self._cancelled:
+                        raise CancelledError() from e
+                    if self._resubmitted:
+                        raise
+                    # O pool foi recriado por causa de outro job: reenvia uma vez
+                    self._resubmitted = True
+                    fn, args, kwargs = self._call
+                    self._executor, self._future = self._pool._submit(fn, args, kwargs)
+                except CancelledError:
+                    if self._cancelled:
+                        raise
+                    # Ainda na fila quando outro job recriou o pool (nunca
+                    # rodou): reenvia sempre — o tempo limite segue valendo
+                    fn, args, kwargs = self._call
+                    self._executor, self._future = self._pool._submit(fn, args, kwargs)
+        except BaseException:
+            if not self._future.done():
+                self.cancel()
+            raise
+
+
+class RenderPool:
+    """Pool de processos (contexto "spawn") criado sob demanda.
+
+    Args:
+        max_workers: Quantidade de processos.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # "spawn": o app roda com threads (Streamlit, fila do histórico)
+                # e um fork nesse cenário pode herdar locks travados.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _submit(
+        self, fn: Callable[..., Any], args: tuple, kwargs: dict
+    ) -> tuple[ProcessPoolExecutor, Future]:
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(fn, *args, **kwargs)
+        except (BrokenProcessPool, RuntimeError):
+            # Pool quebrado ou encerrado por outra thread: recria e tenta de novo
+            self._restart(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(fn, *args, **kwargs)
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        """Descarta `executor` (se ainda for o atual) e encerra seus processos."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        _terminate_workers(executor)
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> RenderJob:
+        """Envia `fn(*args, **kwargs)` ao pool (`fn` e argumentos serializáveis)."""
+        return RenderJob(self, fn, args, kwargs, timeout)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[RenderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> Optional[RenderPool]:
+    """Pool compartilhado do processo (None com `PDF_RENDER_WORKERS=0`)."""
+    global _pool
+    workers = render_workers()
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool(workers)
+        return _pool
+
+
+@atexit.register
+def shutdown_render_pool() -> None:
+    """Encerra o pool compartilhado (um novo é criado no próximo uso)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def render_pdf_report(
+    analysis_report: str,
+    test_plan_df: Any,
+    *,
+    generator: Optional[Callable[..., bytes]] = None,
+    timeout: Optional[float] = None,
+    on_progress: Optional[Callable[[], None]] = None,
+) -> bytes:
+    """
+    Gera o PDF do plano no pool de processos e aguarda o resultado.
+
+    Args:
+        analysis_report: Relatório de análise.
+        test_plan_df: Casos de teste (DataFrame ou registros).
+        generator: Função geradora (padrão: `generate_pdf_report`); precisa
+            ser serializável para rodar no pool.
+        timeout: Tempo limite em segundos (padrão: `render_timeout()`).
+        on_progress: Chamado periodicamente enquanto o PDF é gerado.
+
+    Raises:
+        RenderTimeoutError: Se o tempo limite foi excedido.
+    """
+    if generator is None:
+        from .pdf_generator import generate_pdf_report as generator
+
+    pool = get_render_pool()
+    if pool is None:
+        return generator(analysis_report, test_plan_df)
+
+    job = pool.submit(
+        generator,
+        analysis_report,
+        test_plan_df,
+        timeout=render_timeout() if timeout is None else timeout,
+    )
+    return job.result(on_progress=on_progress)
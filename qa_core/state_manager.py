@@ -17,9 +17,9 @@ def initialize_state():
     defaults = {
         "analysis_finished": False,
         "analysis_state": None,
-        "test_plan_report": None,
-        "test_plan_df": None,
-        "pdf_report_bytes": None,
+        # Plano de testes (`plan_state.TestPlan`): DataFrame, Markdown e PDF
+        # são visões derivadas do próprio plano
+        "test_plan": None,
         "show_generate_plan_button": False,
         "user_story_input": "",
         "area_path_input": "",
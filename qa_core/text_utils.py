@@ -3,6 +3,8 @@ import json
 import re
 import unicodedata
 
+from .export_cache import render_fragment
+
 
 # ==========================================================
 # NORMALIZAÇÃO E NOMES DE ARQUIVOS
@@ -98,6 +100,23 @@ def get_flexible(data_dict: dict, keys: list, default_value):
     return default_value
 
 
+def iter_case_records(df):
+    """Itera sobre os casos de teste de um DataFrame como `(índice, dict)`.
+
+    Substitui `df.iterrows()` nos exportadores: em vez de montar uma
+    `pandas.Series` por linha, converte o DataFrame de uma só vez em
+    registros Python (`to_dict("records")`). `registro.get(coluna, padrão)`
+    tem a mesma semântica de `row.get(coluna, padrão)`.
+
+    Args:
+        df: DataFrame de cenários.
+
+    Returns:
+        Iterador de tuplas (rótulo do índice, registro da linha).
+    """
+    return zip(df.index, df.to_dict("records"))
+
+
 def clean_markdown_report(report_text: str) -> str:
     """
     Remove blocos de código Markdown do texto.
@@ -170,7 +189,7 @@ def parse_json_strict(s: str):
 # ==========================================================
 
 
-def gerar_relatorio_md_dos_cenarios(df):
+def gerar_relatorio_md_dos_cenarios(df, *, fragments=None):
     """
     Gera texto Markdown consolidado com os cenários Gherkin atuais.
 
@@ -179,22 +198,32 @@ def gerar_relatorio_md_dos_cenarios(df):
     e o próprio cenário Gherkin em um bloco de código.
 
     Args:
-        df: DataFrame contendo colunas 'titulo', 'prioridade', 'criterio_de_aceitacao_relacionado', 'cenario'.
+        df: DataFrame (ou lista de registros) com as colunas 'titulo', 'prioridade', 'criterio_de_aceitacao_relacionado', 'cenario'.
+        fragments: Cache de fragmentos por caso (`CaseFragmentCache`), opcional;
+            com ele, só os casos alterados são renderizados de novo.
 
     Returns:
         String contendo o relatório Markdown completo.
     """
-    if df is None or df.empty:
+    if df is None or len(df) == 0:
         return "⚠️ Nenhum cenário disponível para gerar relatório."
 
-    blocos = []
-    for _, row in df.iterrows():
-        titulo = row.get("titulo", "Sem título")
-        prioridade = row.get("prioridade", "-")
-        criterio = row.get("criterio_de_aceitacao_relacionado", "")
-        cenario = row.get("cenario", "")
+    records = df if isinstance(df, list) else df.to_dict("records")
+    blocos = [
+        render_fragment(fragments, "markdown", row, lambda row=row: _bloco_md(row))
+        for row in records
+    ]
+    return "\n".join(blocos)
+
+
+def _bloco_md(row: dict) -> str:
+    """Bloco Markdown de um cenário."""
+    titulo = row.get("titulo", "Sem título")
+    prioridade = row.get("prioridade", "-")
+    criterio = row.get("criterio_de_aceitacao_relacionado", "")
+    cenario = row.get("cenario", "")
 
-        bloco = f"""### 🧩 {titulo}
+    return f"""### 🧩 {titulo}
 **Prioridade:** {prioridade}  
 **Critério de Aceitação:** {criterio}
 
@@ -202,5 +231,3 @@ def gerar_relatorio_md_dos_cenarios(df):
 {cenario.strip()}
 ```
 """
-        blocos.append(bloco)
-    return "\n".join(blocos)
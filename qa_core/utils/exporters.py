@@ -6,48 +6,173 @@ Utilitários para exportação em formatos avançados:
 - Cucumber Studio (ZIP de arquivos .feature)
 - Postman Collections (JSON)
 - Batch Export (ZIP de múltiplas análises)
+- Pacote completo (todos os formatos de um plano + manifest)
 """
-import io
+
 import json
+import logging
+import os
+import tempfile
 import zipfile
+from collections import deque
 from datetime import datetime
+from typing import IO, Any, Iterator, Mapping, Optional
 
 import pandas as pd
 
+from ..export_cache import CaseFragmentCache, render_fragment
+from ..gherkin import ParsedCase, StepKeyword, parse_cenario
+from ..render_pool import (
+    RenderJob,
+    RenderTimeoutError,
+    get_render_pool,
+    render_pdf_report,
+    render_timeout,
+)
+from ..text_utils import iter_case_records
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================================
+#  Montagem dos arquivos ZIP
+# ==========================================================
+# O ZIP é escrito em um SpooledTemporaryFile: fica em memória enquanto for
+# pequeno e passa para um arquivo temporário em disco ao ultrapassar
+# `ZIP_SPOOL_MAX_MEMORY`. Assim um lote grande não mantém duas cópias do
+# arquivo (buffer + getvalue) no processo do Streamlit.
+ZIP_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+def _zip_compression(store_only: Optional[bool] = None) -> int:
+    """
+    Compressão dos ZIPs exportados.
+
+    `store_only=None` segue a variável de ambiente `EXPORT_ZIP_STORE_ONLY`:
+    sem compressão o lote é gerado mais rápido, ao custo de um arquivo maior.
+    """
+    if store_only is None:
+        store_only = os.getenv("EXPORT_ZIP_STORE_ONLY", "").strip().lower() in (
+            "1",
+            "true",
+            "yes",
+            "sim",
+        )
+    return zipfile.ZIP_STORED if store_only else zipfile.ZIP_DEFLATED
+
+
+def _new_zip_spool() -> IO[bytes]:
+    return tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_MEMORY, mode="w+b")
+
 
-def export_to_cucumber_zip(df: pd.DataFrame) -> bytes:
+def read_zip_spool(spool: IO[bytes]) -> bytes:
+    """Lê (uma única cópia) e fecha o ZIP montado por `build_*_zip`."""
+    with spool:
+        spool.seek(0)
+        return spool.read()
+
+
+def build_cucumber_zip(
+    df: pd.DataFrame,
+    *,
+    store_only: Optional[bool] = None,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> IO[bytes]:
+    """
+    Monta o ZIP de arquivos .feature em um arquivo temporário.
+
+    Com `fragments`, o .feature dos casos não alterados vem do cache.
+
+    Returns:
+        Arquivo binário posicionado no início; o chamador deve fechá-lo.
+    """
+    spool = _new_zip_spool()
+    try:
+        with zipfile.ZipFile(spool, "w", _zip_compression(store_only)) as zip_file:
+            for idx, row in iter_case_records(df):
+                # Gera o conteúdo do arquivo .feature
+                feature_content = render_fragment(
+                    fragments,
+                    "feature",
+                    row,
+                    lambda row=row: _generate_feature_file(row),
+                )
+
+                # Nome do arquivo baseado no título do cenário
+                filename = _sanitize_filename(row.get("titulo", f"cenario_{idx}"))
+                feature_filename = f"{filename}.feature"
+
+                # Adiciona ao ZIP
+                zip_file.writestr(feature_filename, feature_content)
+    except BaseException:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return spool
+
+
+def export_to_cucumber_zip(
+    df: pd.DataFrame, *, fragments: Optional[CaseFragmentCache] = None
+) -> bytes:
     """
     Gera um arquivo ZIP contendo arquivos .feature para Cucumber Studio.
 
     Args:
         df: DataFrame com os cenários de teste (deve ter colunas: titulo, cenario, dado, quando, entao)
+        fragments: Cache de fragmentos por caso, opcional.
 
     Returns:
         Bytes do arquivo ZIP.
     """
-    zip_buffer = io.BytesIO()
+    return read_zip_spool(build_cucumber_zip(df, fragments=fragments))
+
 
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for idx, row in df.iterrows():
-            # Gera o conteúdo do arquivo .feature
-            feature_content = _generate_feature_file(row)
+_SECTION_COLUMNS = {
+    "dado": StepKeyword.DADO,
+    "quando": StepKeyword.QUANDO,
+    "entao": StepKeyword.ENTAO,
+}
 
-            # Nome do arquivo baseado no título do cenário
-            filename = _sanitize_filename(row.get("titulo", f"cenario_{idx}"))
-            feature_filename = f"{filename}.feature"
 
-            # Adiciona ao ZIP
-            zip_file.writestr(feature_filename, feature_content)
+def _has_section_columns(row: Mapping[str, Any]) -> bool:
+    """Indica se o caso traz os passos em colunas próprias (dado/quando/entao)."""
+    return any(
+        isinstance(row.get(column), str) and row.get(column).strip()
+        for column in _SECTION_COLUMNS
+    )
 
-    zip_buffer.seek(0)
-    return zip_buffer.getvalue()
 
+def _section_values(row: Mapping[str, Any], parsed: ParsedCase) -> dict[str, Any]:
+    """
+    Passos por seção: usa as colunas dado/quando/entao quando presentes;
+    caso contrário, extrai as seções do cenário Gherkin já interpretado.
+    """
+    if _has_section_columns(row):
+        return {column: row.get(column, "") for column in _SECTION_COLUMNS}
+    return {
+        column: parsed.section_text(section)
+        for column, section in _SECTION_COLUMNS.items()
+    }
 
-def _generate_feature_file(row: pd.Series) -> str:
-    """Gera o conteúdo de um arquivo .feature a partir de uma linha do DataFrame."""
+
+def _generate_feature_file(row: Mapping[str, Any]) -> str:
+    """Gera o conteúdo de um arquivo .feature a partir de um caso de teste."""
     titulo = row.get("titulo", "Cenário sem título")
     cenario = row.get("cenario", "")
 
+    parsed = parse_cenario(cenario)
+    if not _has_section_columns(row) and any(
+        keyword is not StepKeyword.OUTRO for keyword in parsed.keywords
+    ):
+        # Cenário Gherkin completo: os passos já trazem as palavras-chave
+        steps = "".join(f"    {text}\n" for text in parsed.texts)
+        return f"""# language: pt
+Funcionalidade: {titulo}
+
+  Cenário: {titulo}
+{steps}"""
+
     # Extrai os steps
     dado = row.get("dado", "")
     quando = row.get("quando", "")
@@ -79,13 +204,23 @@ Funcionalidade: {titulo}
     return content
 
 
-def export_to_postman_collection(df: pd.DataFrame, user_story: str = "") -> str:
+def export_to_postman_collection(
+    df: pd.DataFrame,
+    user_story: str = "",
+    *,
+    fragments: Optional[CaseFragmentCache] = None,
+) -> str:
     """
     Gera uma Postman Collection (JSON) a partir dos cenários de teste.
 
+    Cada item é serializado separadamente e a collection é montada por
+    concatenação, com o mesmo texto de `json.dumps(..., indent=2)`; com
+    `fragments`, os itens dos casos não alterados vêm do cache.
+
     Args:
         df: DataFrame com os cenários de teste.
         user_story: User Story original (para incluir na descrição).
+        fragments: Cache de fragmentos por caso, opcional.
 
     Returns:
         String JSON da Postman Collection.
@@ -98,115 +233,428 @@ def export_to_postman_collection(df: pd.DataFrame, user_story: str = "") -> str:
         },
         "item": [],
     }
+    header = json.dumps(collection, ensure_ascii=False, indent=2)
 
-    for idx, row in df.iterrows():
+    items = []
+    for idx, row in iter_case_records(df):
         titulo = row.get("titulo", f"Cenário {idx + 1}")  # type: ignore
-        cenario = row.get("cenario", "")
-        dado = row.get("dado", "")
-        quando = row.get("quando", "")
-        entao = row.get("entao", "")
-
-        # Cria um item de request para cada cenário
-        # Nota: Como não temos endpoints reais, criamos requests de exemplo
-        request_item = {
-            "name": titulo,
-            "request": {
-                "method": "POST",
-                "header": [{"key": "Content-Type", "value": "application/json"}],
-                "body": {
-                    "mode": "raw",
-                    "raw": json.dumps(
-                        {
-                            "cenario": cenario,
-                            "dado": dado,
-                            "quando": quando,
-                            "entao": entao,
-                        },
-                        ensure_ascii=False,
-                        indent=2,
-                    ),
-                },
-                "url": {
-                    "raw": "{{base_url}}/api/test-scenario",
-                    "host": ["{{base_url}}"],
-                    "path": ["api", "test-scenario"],
-                },
-                "description": f"**Cenário:** {cenario}\n\n**Dado:** {dado}\n\n**Quando:** {quando}\n\n**Então:** {entao}",
+        items.append(
+            render_fragment(
+                fragments,
+                "postman",
+                row,
+                lambda row=row, titulo=titulo: _postman_item_json(row, titulo),
+                titulo,
+            )
+        )
+
+    if not items:
+        return header
+    # `"item": []` é a última chave: troca a lista vazia pelos itens
+    return header[: -len("[]\n}")] + "[\n" + ",\n".join(items) + "\n  ]\n}"
+
+
+def _postman_item_json(row: Mapping[str, Any], titulo: str) -> str:
+    """Item de request de um cenário, já indentado para a lista `item`."""
+    cenario = row.get("cenario", "")
+    sections = _section_values(row, parse_cenario(cenario))
+    dado = sections["dado"]
+    quando = sections["quando"]
+    entao = sections["entao"]
+
+    # Cria um item de request para cada cenário
+    # Nota: Como não temos endpoints reais, criamos requests de exemplo
+    request_item = {
+        "name": titulo,
+        "request": {
+            "method": "POST",
+            "header": [{"key": "Content-Type", "value": "application/json"}],
+            "body": {
+                "mode": "raw",
+                "raw": json.dumps(
+                    {
+                        "cenario": cenario,
+                        "dado": dado,
+                        "quando": quando,
+                        "entao": entao,
+                    },
+                    ensure_ascii=False,
+                    indent=2,
+                ),
+            },
+            "url": {
+                "raw": "{{base_url}}/api/test-scenario",
+                "host": ["{{base_url}}"],
+                "path": ["api", "test-scenario"],
             },
-            "response": [],
-        }
+            "description": f"**Cenário:** {cenario}\n\n**Dado:** {dado}\n\n**Quando:** {quando}\n\n**Então:** {entao}",
+        },
+        "response": [],
+    }
+    # O JSON não tem quebras de linha dentro de strings (viram "\n"), então
+    # indentar linha a linha equivale a serializar o item dentro da lista
+    item_json = json.dumps(request_item, ensure_ascii=False, indent=2)
+    return "    " + item_json.replace("\n", "\n    ")
+
 
-        collection["item"].append(request_item)  # type: ignore
+# Análises em processamento simultâneo por worker (limita a memória)
+_BATCH_WINDOW_PER_WORKER = 2
 
-    return json.dumps(collection, ensure_ascii=False, indent=2)
+# Abaixo deste tamanho de lote, subir os processos custa mais que o ganho
+BATCH_PARALLEL_MIN_ANALYSES = 8
 
 
-def export_batch_zip(analysis_ids: list[int], progress_callback=None) -> bytes:
+def _render_batch_artifacts(
+    user_story: str,
+    analysis_report: str,
+    test_plan_report: str,
+    test_cases: list[dict[str, Any]],
+) -> tuple[str, Optional[bytes]]:
     """
-    Gera um arquivo ZIP contendo exportações de múltiplas análises.
+    Gera o Markdown e o PDF de uma análise (executado nos workers do lote).
+
+    Returns:
+        Tupla (markdown, bytes do PDF ou None se não houver casos/falhar).
+    """
+    from ..exports import gerar_relatorio_md_completo
+    from ..pdf_generator import generate_pdf_report
+
+    md_content = gerar_relatorio_md_completo(
+        user_story, analysis_report, test_plan_report
+    )
+    pdf_bytes = None
+    if test_cases:
+        try:
+            pdf_bytes = generate_pdf_report(analysis_report, pd.DataFrame(test_cases))
+        except Exception:
+            pass  # Se falhar, apenas não inclui o PDF
+    return md_content, pdf_bytes
+
+
+def _batch_render_args(analysis: dict[str, Any]) -> tuple:
+    from ..database import parse_legacy_test_plan_json
+
+    test_cases = analysis.get("test_cases") or parse_legacy_test_plan_json(
+        analysis.get("test_plan_df_json")
+    )
+    return (
+        analysis.get("user_story", ""),
+        analysis.get("analysis_report", ""),
+        analysis.get("test_plan_report", ""),
+        test_cases,
+    )
+
+
+def _batch_job_result(job: Optional[RenderJob], args: tuple) -> Optional[tuple]:
+    """
+    Resultado de um job do lote. Se o job falhar (tempo limite, pool
+    quebrado, cancelamento, erro de serialização), a análise segue só com o
+    Markdown — como quando o PDF falha no próprio worker.
+    """
+    if job is None:
+        return None
+    try:
+        return job.result()
+    except Exception as e:
+        from ..exports import gerar_relatorio_md_completo
+
+        user_story, analysis_report, test_plan_report, _ = args
+        logger.warning(f"PDF omitido do lote: {e!r}")
+        return (
+            gerar_relatorio_md_completo(user_story, analysis_report, test_plan_report),
+            None,
+        )
+
+
+def _iter_rendered_batch(
+    analyses: Iterator[tuple[Any, Optional[dict[str, Any]]]], max_workers: int
+) -> Iterator[tuple[Any, Optional[dict[str, Any]], Optional[tuple]]]:
+    """
+    Renderiza as análises no pool de processos compartilhado (o mesmo dos
+    PDFs da interface), devolvendo os resultados na ordem de entrada assim
+    que cada um (e os anteriores) fica pronto.
+
+    No máximo `max_workers * _BATCH_WINDOW_PER_WORKER` análises ficam em
+    voo, então o lote é lido do banco e gravado no ZIP de forma contínua.
+    Cada análise respeita o tempo limite de renderização do pool.
+    """
+    pool = get_render_pool() if max_workers > 1 else None
+    if pool is None:
+        for analysis_id, analysis in analyses:
+            rendered = (
+                _render_batch_artifacts(*_batch_render_args(analysis))
+                if analysis
+                else None
+            )
+            yield analysis_id, analysis, rendered
+        return
+
+    window: deque = deque()
+    timeout = render_timeout()
+    try:
+        for analysis_id, analysis in analyses:
+            args = _batch_render_args(analysis) if analysis else ()
+            job = (
+                pool.submit(_render_batch_artifacts, *args, timeout=timeout)
+                if analysis
+                else None
+            )
+            window.append((analysis_id, analysis, job, args))
+            if len(window) >= max_workers * _BATCH_WINDOW_PER_WORKER:
+                done_id, done_analysis, done_job, done_args = window.popleft()
+                yield done_id, done_analysis, _batch_job_result(done_job, done_args)
+
+        while window:
+            done_id, done_analysis, done_job, done_args = window.popleft()
+            yield done_id, done_analysis, _batch_job_result(done_job, done_args)
+    finally:
+        # Lote interrompido: descarta o que ainda não começou
+        for _, _, job, _ in window:
+            if job is not None and not job.done():
+                job.cancel()
+
+
+def _batch_prefix(analysis: dict[str, Any], analysis_id: Any) -> str:
+    """Prefixo dos arquivos de uma análise (data de criação AAAAMMDD)."""
+    timestamp = analysis.get("created_at", datetime.now())
+    if isinstance(timestamp, str):
+        return timestamp.split()[0].replace("-", "")
+    if hasattr(timestamp, "strftime"):
+        return timestamp.strftime("%Y%m%d")
+    return f"analysis_{analysis_id}"
+
+
+def build_batch_zip(
+    analysis_ids: list[int],
+    progress_callback=None,
+    max_workers: Optional[int] = None,
+    *,
+    store_only: Optional[bool] = None,
+) -> IO[bytes]:
+    """
+    Monta, em um arquivo temporário, o ZIP com as exportações de várias análises.
+
+    As análises são lidas em blocos (`WHERE id IN (...)`, uma conexão) e o
+    Markdown/PDF de cada uma é gerado em um pool de processos. As entradas
+    são gravadas no ZIP na ordem de `analysis_ids`, à medida que ficam prontas.
 
     Args:
         analysis_ids: Lista de IDs de análises para exportar.
         progress_callback: Função opcional para atualizar progresso (recebe step_name).
+        max_workers: Paralelismo do lote no pool de renderização
+            compartilhado (padrão: CPUs disponíveis, limitado ao tamanho do
+            lote; lotes pequenos são sequenciais). Com 1, a geração é
+            sequencial, no próprio processo.
+        store_only: Grava sem compressão (padrão: `EXPORT_ZIP_STORE_ONLY`).
 
     Returns:
-        Bytes do arquivo ZIP.
+        Arquivo binário posicionado no início; o chamador deve fechá-lo.
     """
-    from ..database import get_analysis_by_id
-    from ..exports import gerar_relatorio_md_completo
-    from ..pdf_generator import generate_pdf_report
+    from ..database import iter_analyses_by_ids
 
-    zip_buffer = io.BytesIO()
     total = len(analysis_ids)
+    if max_workers is None:
+        max_workers = (
+            min(os.cpu_count() or 1, total)
+            if total >= BATCH_PARALLEL_MIN_ANALYSES
+            else 1
+        )
+
+    rendered = _iter_rendered_batch(iter_analyses_by_ids(analysis_ids), max_workers)
+
+    spool = _new_zip_spool()
+    try:
+        with zipfile.ZipFile(spool, "w", _zip_compression(store_only)) as zip_file:
+            for i, (analysis_id, analysis, artifacts) in enumerate(rendered, 1):
+                # Atualiza progresso se callback fornecido
+                if progress_callback:
+                    progress_callback(f"Exportando análise {i}/{total}")
+
+                if not analysis or artifacts is None:
+                    continue
+
+                # Cria um prefixo para os arquivos desta análise
+                prefix = _batch_prefix(analysis, analysis_id)
+                md_content, pdf_bytes = artifacts
+
+                # 1. Exporta Markdown completo
+                zip_file.writestr(f"{prefix}_analise_{analysis_id}.md", md_content)
+
+                # 2. Exporta PDF (se houver casos de teste)
+                if pdf_bytes:
+                    zip_file.writestr(f"{prefix}_analise_{analysis_id}.pdf", pdf_bytes)
+    except BaseException:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return spool
+
+
+def export_batch_zip(
+    analysis_ids: list[int],
+    progress_callback=None,
+    max_workers: Optional[int] = None,
+) -> bytes:
+    """
+    Gera um arquivo ZIP contendo exportações de múltiplas análises.
+
+    Versão em `bytes` de `build_batch_zip` (mesmos parâmetros).
+    """
+    return read_zip_spool(build_batch_zip(analysis_ids, progress_callback, max_workers))
 
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for i, analysis_id in enumerate(analysis_ids, 1):
-            # Atualiza progresso se callback fornecido
-            if progress_callback:
-                progress_callback(f"Exportando análise {i}/{total}")
-
-            analysis = get_analysis_by_id(analysis_id)
-
-            if not analysis:
-                continue
-
-            # Converte para dict se necessário
-            if not isinstance(analysis, dict):
-                analysis = dict(analysis)
-
-            # Extrai dados
-            user_story = analysis.get("user_story", "")
-            analysis_report = analysis.get("analysis_report", "")
-            test_plan_report = analysis.get("test_plan_report", "")
-            test_plan_df_json = analysis.get("test_plan_df_json")
-
-            # Cria um prefixo para os arquivos desta análise
-            timestamp = analysis.get("created_at", datetime.now())
-            if isinstance(timestamp, str):
-                prefix = timestamp.split()[0].replace("-", "")
-            elif hasattr(timestamp, "strftime"):
-                prefix = timestamp.strftime("%Y%m%d")
-            else:
-                prefix = f"analysis_{analysis_id}"
-
-            # 1. Exporta Markdown completo
-            md_content = gerar_relatorio_md_completo(
-                user_story, analysis_report, test_plan_report
+
+# ==========================================================
+#  Pacote completo ("exportar tudo")
+# ==========================================================
+# Arquivo de cada formato dentro do pacote
+BUNDLE_FILES = {
+    "markdown": "relatorio.md",
+    "pdf": "relatorio.pdf",
+    "azure_csv": "azure.csv",
+    "xray_csv": "xray.csv",
+    "testrail_csv": "testrail.csv",
+    "zephyr_xlsx": "zephyr.xlsx",
+}
+BUNDLE_MANIFEST = "manifest.json"
+
+
+def build_export_bundle(
+    df: pd.DataFrame,
+    *,
+    user_story: str = "",
+    analysis_report: str = "",
+    test_plan_report: str = "",
+    options: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    pdf_bytes: Optional[bytes] = None,
+    include_pdf: bool = True,
+    store_only: Optional[bool] = None,
+) -> IO[bytes]:
+    """
+    Monta, em um arquivo temporário, o ZIP com todos os formatos do plano.
+
+    O DataFrame é percorrido uma única vez (`iter_prepared_cases`): os
+    mesmos casos interpretados alimentam os CSVs (gravados em streaming
+    direto no ZIP) e a planilha do Zephyr. Um `manifest.json` descreve o
+    conteúdo do pacote.
+
+    Args:
+        df: DataFrame com os cenários de teste.
+        user_story: User Story original (relatório Markdown).
+        analysis_report: Relatório de análise (Markdown e PDF).
+        test_plan_report: Relatório do plano de testes (Markdown).
+        options: Opções por formato, repassadas aos exportadores:
+            "azure_csv" (area_path, assigned_to), "xray_csv"
+            (test_repository_folder, custom_fields), "testrail_csv"
+            (section, priority, template, references) e "zephyr_xlsx"
+            (priority, labels, description).
+        pdf_bytes: PDF já gerado (ex.: em cache na sessão), reaproveitado.
+        include_pdf: Gera o PDF (no pool de renderização) quando `pdf_bytes`
+            não é informado; se exceder o tempo limite, o pacote segue sem ele.
+        store_only: Grava sem compressão (padrão: `EXPORT_ZIP_STORE_ONLY`).
+
+    Returns:
+        Arquivo binário posicionado no início; o chamador deve fechá-lo.
+    """
+    from .. import exports
+
+    options = options or {}
+    azure = options.get("azure_csv", {})
+    xray = options.get("xray_csv", {})
+    testrail = options.get("testrail_csv", {})
+    zephyr = options.get("zephyr_xlsx", {})
+
+    # Percurso único do plano, compartilhado por todos os formatos
+    cases = list(exports.iter_prepared_cases(df))
+
+    csv_files = {
+        "azure_csv": exports.stream_csv_azure_from_df(
+            cases,
+            azure.get("area_path", ""),
+            azure.get("assigned_to", ""),
+            azure.get("default_priority", "2"),
+            azure.get("default_state", "Design"),
+        ),
+        "xray_csv": exports.stream_csv_xray_from_df(
+            cases,
+            xray.get("test_repository_folder", ""),
+            xray.get("custom_fields"),
+        ),
+        "testrail_csv": exports.stream_csv_testrail_from_df(
+            cases,
+            testrail.get("section", ""),
+            testrail.get("priority", "Medium"),
+            testrail.get("template", "Test Case (Steps)"),
+            testrail.get("references", ""),
+        ),
+    }
+
+    manifest_files = []
+    spool = _new_zip_spool()
+    try:
+        with zipfile.ZipFile(spool, "w", _zip_compression(store_only)) as zip_file:
+
+            def add_file(kind: str, content: bytes) -> None:
+                zip_file.writestr(BUNDLE_FILES[kind], content)
+                manifest_files.append(
+                    {"format": kind, "file": BUNDLE_FILES[kind], "bytes": len(content)}
+                )
+
+            add_file(
+                "markdown",
+                exports.gerar_relatorio_md_completo(
+                    user_story, analysis_report, test_plan_report
+                ).encode("utf-8"),
             )
-            zip_file.writestr(f"{prefix}_analise_{analysis_id}.md", md_content)
 
-            # 2. Exporta PDF (se houver DataFrame)
-            if test_plan_df_json:
+            if pdf_bytes is None and include_pdf and cases:
                 try:
-                    records = json.loads(test_plan_df_json)
-                    df = pd.DataFrame(records)
-                    pdf_bytes = generate_pdf_report(analysis_report, df)
-                    zip_file.writestr(f"{prefix}_analise_{analysis_id}.pdf", pdf_bytes)
-                except Exception:
-                    pass  # Se falhar, apenas não inclui o PDF
+                    pdf_bytes = render_pdf_report(analysis_report, df)
+                except RenderTimeoutError as e:
+                    logger.warning(f"PDF omitido do pacote: {e}")
+            if pdf_bytes:
+                add_file("pdf", pdf_bytes)
+
+            for kind, chunks in csv_files.items():
+                with zip_file.open(BUNDLE_FILES[kind], "w") as entry:
+                    size = exports.write_stream(chunks, entry)
+                manifest_files.append(
+                    {"format": kind, "file": BUNDLE_FILES[kind], "bytes": size}
+                )
+
+            zephyr_df = exports.preparar_df_para_zephyr_xlsx(
+                cases,
+                zephyr.get("priority", "Medium"),
+                zephyr.get("labels", ""),
+                zephyr.get("description", ""),
+            )
+            add_file("zephyr_xlsx", exports.to_excel(zephyr_df, "Zephyr Import"))
+
+            manifest = {
+                "generator": "QA Oráculo",
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "user_story": user_story,
+                "test_cases": len(cases),
+                "files": manifest_files,
+            }
+            zip_file.writestr(
+                BUNDLE_MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=2)
+            )
+    except BaseException:
+        spool.close()
+        raise
 
-    zip_buffer.seek(0)
-    return zip_buffer.getvalue()
+    spool.seek(0)
+    return spool
+
+
+def export_bundle_zip(df: pd.DataFrame, **kwargs: Any) -> bytes:
+    """
+    Gera o ZIP com todos os formatos do plano e o `manifest.json`.
+
+    Versão em `bytes` de `build_export_bundle` (mesmos parâmetros).
+    """
+    return read_zip_spool(build_export_bundle(df, **kwargs))
 
 
 def _sanitize_filename(name: str) -> str:
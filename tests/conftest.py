@@ -35,6 +35,43 @@ def cleanup_after_tests():
             print(f"[CLEANUP] Banco {DB_NAME} removido.")
 
 
+# --------------------------
+# FIXTURE: PDF SOB DEMANDA
+# --------------------------
+@pytest.fixture(autouse=True)
+def pdf_cache_isolado(monkeypatch):
+    """
+    Sem pré-geração do PDF em segundo plano e com cache vazio por teste.
+
+    O PDF é renderizado no próprio processo (mocks não atravessam o pool);
+    os testes do pool o ativam explicitamente.
+    """
+    from qa_core.pdf_cache import clear_pdf_cache
+
+    monkeypatch.setenv("PDF_PREBUILD_DELAY_SECONDS", "0")
+    monkeypatch.setenv("PDF_RENDER_WORKERS", "0")
+    clear_pdf_cache()
+    yield
+    clear_pdf_cache()
+
+
+# --------------------------
+# FIXTURE: JOBS DA IA SÍNCRONOS
+# --------------------------
+@pytest.fixture(autouse=True)
+def jobs_isolados(monkeypatch):
+    """
+    Jobs da IA executados no próprio teste e sem reaproveitamento entre
+    testes (cada teste começa com um executor de jobs novo).
+    """
+    from qa_core.job_runner import shutdown_job_runner
+
+    monkeypatch.setenv("ANALYSIS_JOB_WORKERS", "0")
+    shutdown_job_runner()
+    yield
+    shutdown_job_runner()
+
+
 # --------------------------
 # FIXTURE: STUB DO STREAMLIT
 # --------------------------
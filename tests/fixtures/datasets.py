@@ -32,9 +32,7 @@ TEST_SESSION_STATE_BASIC = {
 TEST_SESSION_STATE_FINISHED = {
     "analysis_finished": True,
     "analysis_state": TEST_ANALYSIS_STATE,
-    "test_plan_report": TEST_PLAN_REPORT,
-    "test_plan_df": None,
-    "pdf_report_bytes": TEST_PDF_BYTES,
+    "test_plan": None,
     "user_story_input": TEST_USER_STORY,
     "area_path_input": "Área QA",
     "assigned_to_input": "Joelma",
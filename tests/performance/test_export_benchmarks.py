@@ -0,0 +1,167 @@
+"""
+Benchmarks dos exportadores de cenários com 1k e 10k casos gerados.
+
+Compare com `pytest tests/performance/test_export_benchmarks.py --benchmark-only`.
+O grupo "percurso" mostra o ganho da troca de `df.iterrows()` pela conversão
+em registros (`iter_case_records`) usada por todos os exportadores e o
+grupo "zephyr-xlsx" compara o `to_excel` padrão (pandas) com o backend de
+streaming usado para planilhas grandes. O grupo "pacote" compara os
+exportadores chamados um a um com o pacote "exportar tudo" (percurso único).
+"""
+
+import pandas as pd
+import pytest
+
+from qa_core import gherkin
+from qa_core.exports import (
+    gerar_csv_azure_from_df,
+    gerar_csv_testrail_from_df,
+    gerar_csv_xray_from_df,
+    gerar_relatorio_md_completo,
+    preparar_df_para_zephyr_xlsx,
+    to_excel,
+)
+from qa_core.text_utils import gerar_relatorio_md_dos_cenarios, iter_case_records
+from qa_core.utils.exporters import export_bundle_zip
+
+SIZES = [1_000, 10_000]
+
+_PRIORIDADES = ["Alta", "Média", "Baixa"]
+
+
+def _gerar_casos(total: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "titulo": f"Caso de teste {i}",
+                "prioridade": _PRIORIDADES[i % 3],
+                "criterio_de_aceitacao_relacionado": f"Critério {i % 7}",
+                "justificativa_acessibilidade": "Navegação por teclado",
+                "cenario": (
+                    "Dado que estou autenticado\n"
+                    f"Quando salvo o registro {i}\n"
+                    "E confirmo a operação\n"
+                    "Então vejo a mensagem de sucesso\n"
+                    "E recebo um e-mail de confirmação"
+                ),
+            }
+            for i in range(total)
+        ]
+    )
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda n: f"{n}-casos")
+def casos_df(request):
+    return _gerar_casos(request.param)
+
+
+class TestPercursoPerformance:
+    """Custo de percorrer as linhas: iterrows (antigo) x registros (atual)."""
+
+    def test_percurso_iterrows(self, benchmark, casos_df):
+        benchmark.group = f"percurso-{len(casos_df)}"
+        result = benchmark(lambda: sum(1 for _ in casos_df.iterrows()))
+        assert result == len(casos_df)
+
+    def test_percurso_registros(self, benchmark, casos_df):
+        benchmark.group = f"percurso-{len(casos_df)}"
+        result = benchmark(lambda: sum(1 for _ in iter_case_records(casos_df)))
+        assert result == len(casos_df)
+
+
+class TestExportadoresPerformance:
+    """Benchmarks de cada formato de exportação."""
+
+    def test_azure_csv(self, benchmark, casos_df):
+        benchmark.group = f"azure-{len(casos_df)}"
+        result = benchmark(gerar_csv_azure_from_df, casos_df, "Area/Path", "QA")
+        assert result.startswith(b"\xef\xbb\xbf")
+
+    def test_xray_csv(self, benchmark, casos_df):
+        benchmark.group = f"xray-{len(casos_df)}"
+        result = benchmark(gerar_csv_xray_from_df, casos_df, "Pasta/Testes")
+        assert result.count(b'"Cucumber"') == len(casos_df)
+
+    def test_testrail_csv(self, benchmark, casos_df):
+        benchmark.group = f"testrail-{len(casos_df)}"
+        result = benchmark(gerar_csv_testrail_from_df, casos_df, "Seção")
+        assert result.count(b'"Functional"') == len(casos_df)
+
+    def test_zephyr_df(self, benchmark, casos_df):
+        benchmark.group = f"zephyr-{len(casos_df)}"
+        result = benchmark(
+            preparar_df_para_zephyr_xlsx, casos_df, "High", "qa", "Descrição"
+        )
+        assert len(result) == len(casos_df) * 5
+
+    def test_relatorio_markdown(self, benchmark, casos_df):
+        benchmark.group = f"markdown-{len(casos_df)}"
+        result = benchmark(gerar_relatorio_md_dos_cenarios, casos_df)
+        assert result.count("### 🧩") == len(casos_df)
+
+
+@pytest.fixture(scope="module")
+def zephyr_df():
+    # 2k casos x 5 passos = 10k linhas de passos
+    return preparar_df_para_zephyr_xlsx(_gerar_casos(2_000), "High", "qa", "Descrição")
+
+
+class TestZephyrXlsxPerformance:
+    """Geração do .xlsx do Zephyr: pandas x backend de streaming."""
+
+    @pytest.mark.parametrize("streaming", [False, True], ids=["pandas", "streaming"])
+    def test_zephyr_xlsx(self, benchmark, zephyr_df, streaming):
+        benchmark.group = f"zephyr-xlsx-{len(zephyr_df)}"
+        result = benchmark.pedantic(
+            to_excel,
+            args=(zephyr_df, "Zephyr Import"),
+            kwargs={"streaming": streaming},
+            rounds=3,
+            iterations=1,
+        )
+        assert result.startswith(b"PK")
+
+
+def _exportar_individualmente(df: pd.DataFrame) -> int:
+    """Os formatos do pacote gerados um a um, como nos botões de download."""
+    artefatos = [
+        gerar_relatorio_md_completo("US", "Análise", "Plano").encode("utf-8"),
+        gerar_csv_azure_from_df(df, "Area/Path", "QA"),
+        gerar_csv_xray_from_df(df, "Pasta/Testes"),
+        gerar_csv_testrail_from_df(df, "Seção"),
+        to_excel(
+            preparar_df_para_zephyr_xlsx(df, "High", "qa", "Descrição"),
+            "Zephyr Import",
+        ),
+    ]
+    return sum(len(artefato) for artefato in artefatos)
+
+
+class TestPacoteCompletoPerformance:
+    """Exportadores individuais x pacote com percurso único.
+
+    O PDF fica de fora dos dois lados: é o mesmo trabalho nos dois caminhos
+    e dominaria a medição. O cache do Gherkin é limpo a cada rodada para
+    medir o parsing dos cenários.
+    """
+
+    def test_exportadores_individuais(self, benchmark, casos_df):
+        benchmark.group = f"pacote-{len(casos_df)}"
+        result = benchmark.pedantic(
+            _exportar_individualmente,
+            args=(casos_df,),
+            setup=gherkin.clear_cache,
+            rounds=3,
+        )
+        assert result > 0
+
+    def test_pacote_completo(self, benchmark, casos_df):
+        benchmark.group = f"pacote-{len(casos_df)}"
+        result = benchmark.pedantic(
+            export_bundle_zip,
+            args=(casos_df,),
+            kwargs={"include_pdf": False, "store_only": True},
+            setup=gherkin.clear_cache,
+            rounds=3,
+        )
+        assert result.startswith(b"PK")
@@ -0,0 +1,70 @@
+"""
+Orçamento de tempo de importação (partida a frio) do app.
+
+Cada medição roda `python -X importtime` em um subprocesso e lê o tempo
+acumulado de cada módulo. Importar `qa_core.app` não deve carregar os SDKs
+dos provedores de LLM, o LangGraph, o fpdf nem o PyGithub: eles são
+importados no primeiro uso (cliente LLM, execução do grafo, geração do PDF).
+
+Veja o perfil completo com `python -X importtime -c "import qa_core.app"`.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+# Antes das importações sob demanda, `qa_core.app` levava ~3,4 s
+IMPORT_BUDGET_SECONDS = 2.5
+
+# Pacotes pesados que só devem ser importados quando usados
+DEFERRED_MODULES = [
+    "fpdf",
+    "github",
+    "google.generativeai",
+    "langchain_core",
+    "langgraph",
+    "matplotlib",
+    "ollama",
+    "openai",
+]
+
+
+def _import_times(module: str) -> dict[str, float]:
+    """Tempo acumulado de importação (s) de cada módulo carregado por `module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+@pytest.fixture(scope="module")
+def app_import_times():
+    return _import_times("qa_core.app")
+
+
+@pytest.mark.parametrize("package", DEFERRED_MODULES)
+def test_importar_o_app_nao_carrega_pacotes_pesados(app_import_times, package):
+    assert package not in app_import_times
+
+
+def test_importar_o_app_fica_dentro_do_orcamento(app_import_times):
+    assert app_import_times["qa_core.app"] < IMPORT_BUDGET_SECONDS
+
+
+def test_provedores_de_llm_sao_importados_sob_demanda():
+    times = _import_times("qa_core.llm.providers")
+
+    assert "qa_core.llm.providers.google" not in times
+    assert "qa_core.llm.providers.openai" not in times
+    assert "qa_core.llm.providers.llama" not in times
@@ -0,0 +1,108 @@
+"""
+Benchmarks do PDF: planos com 100, 1k e 5k casos (tempo e pico de memória)
+e um lote de análises pequenas, como na exportação em lote.
+
+O tempo é medido pelo pytest-benchmark; o pico de memória, em um
+subprocesso, pelo pico de RSS (`VmHWM`) durante a geração acima do RSS
+anterior a ela — o pico é zerado via `/proc/self/clear_refs` depois da
+importação do pacote e do aquecimento da fonte (somente Linux; nos demais
+sistemas `peak_rss_mb` fica vazio).
+
+Rode com `pytest tests/performance/test_pdf_benchmarks.py --benchmark-only`
+e veja `peak_rss_mb` em `extra_info`.
+"""
+
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from qa_core.pdf_generator import generate_pdf_report
+
+SIZES = [
+    100,
+    1_000,
+    pytest.param(5_000, marks=pytest.mark.slow),
+]
+
+_PROBE = """
+import re, sys
+from qa_core.pdf_generator import generate_pdf_report
+from tests.performance.test_pdf_benchmarks import _gerar_casos
+
+def status_kb(campo):
+    with open("/proc/self/status") as f:
+        return int(re.search(campo + r":\\s+(\\d+)", f.read()).group(1))
+
+df = _gerar_casos(int(sys.argv[1]))
+generate_pdf_report("Relatório", df.head(1))  # fonte e módulos já carregados
+with open("/proc/self/clear_refs", "w") as f:
+    f.write("5")  # zera o VmHWM
+before = status_kb("VmRSS")
+pdf_bytes = generate_pdf_report("Relatório", df)
+print(len(pdf_bytes), status_kb("VmHWM") - before)
+"""
+
+
+def _gerar_casos(total: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "id": f"CT-{i + 1:04d}",
+                "titulo": f"Caso de teste {i} ✅",
+                "prioridade": ("Alta", "Média", "Baixa")[i % 3],
+                "criterio_de_aceitacao_relacionado": f"Critério {i % 7} 📌",
+                "justificativa_acessibilidade": "Navegação por teclado",
+                "cenario": (
+                    "Dado que estou autenticado\n"
+                    f"Quando salvo o registro {i}\n"
+                    "E confirmo a operação\n"
+                    "Então vejo a mensagem de sucesso"
+                ),
+            }
+            for i in range(total)
+        ]
+    )
+
+
+def _pico_rss_mb(total: int) -> float | None:
+    if not os.access("/proc/self/clear_refs", os.W_OK):
+        return None
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, str(total)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    size, growth_kb = map(int, result.stdout.split())
+    assert size > 0
+    return growth_kb / 1024
+
+
+@pytest.mark.parametrize("total", SIZES, ids=lambda n: f"{n}-casos")
+def test_pdf_plano_grande(benchmark, total):
+    benchmark.group = "pdf-plano"
+    df = _gerar_casos(total)
+
+    pdf_bytes = benchmark.pedantic(
+        generate_pdf_report, args=("Relatório", df), rounds=1, iterations=1
+    )
+
+    assert pdf_bytes.startswith(b"%PDF")
+    benchmark.extra_info["cases"] = total
+    benchmark.extra_info["pdf_kb"] = round(len(pdf_bytes) / 1024)
+    peak = _pico_rss_mb(total)
+    benchmark.extra_info["peak_rss_mb"] = None if peak is None else round(peak, 1)
+
+
+def test_pdf_lote_de_analises_pequenas(benchmark):
+    """20 PDFs de 10 casos: o custo fixo por arquivo (capa, fontes) domina."""
+    benchmark.group = "pdf-lote"
+    df = _gerar_casos(10)
+    generate_pdf_report("Relatório", df)  # fonte já interpretada no processo
+
+    lote = benchmark(lambda: [generate_pdf_report("Relatório", df) for _ in range(20)])
+
+    assert all(pdf_bytes.startswith(b"%PDF") for pdf_bytes in lote)
@@ -4,6 +4,8 @@ Testes de performance para operações críticas do QA Oráculo.
 Usa pytest-benchmark para medir e comparar performance de operações importantes.
 """
 
+import json
+
 import pytest
 import pandas as pd
 from unittest.mock import patch
@@ -149,3 +151,59 @@ class TestCachePerformance:
 
         result = benchmark(uncached_call)
         assert result is not None
+
+
+class TestHistoryBulkPerformance:
+    """Benchmarks de exportação/importação NDJSON do histórico."""
+
+    ROWS = 2_000
+
+    @pytest.fixture
+    def history_db(self, tmp_path, monkeypatch):
+        import io
+
+        from qa_core import database
+
+        monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "bulk.db"))
+        database.init_db()
+        lines = "".join(
+            json.dumps(
+                {
+                    "created_at": "2024-01-01T10:00:00",
+                    "user_story": f"Como usuário {i}, quero fazer login",
+                    "analysis_report": "# Relatório\n" * 20,
+                    "test_plan_report": "# Plano\n" * 20,
+                    "test_cases": [
+                        {"titulo": f"Caso {j}", "cenario": "Dado X\nQuando Y\nEntão Z"}
+                        for j in range(3)
+                    ],
+                }
+            )
+            + "\n"
+            for i in range(self.ROWS)
+        )
+        database.import_history_ndjson(io.StringIO(lines))
+        return database, lines
+
+    def test_ndjson_export_performance(self, benchmark, history_db):
+        """Benchmark para exportação NDJSON em streaming."""
+        import io
+
+        database, _ = history_db
+
+        result = benchmark(lambda: database.export_history_ndjson(io.StringIO()))
+        assert result == self.ROWS
+
+    def test_ndjson_import_performance(self, benchmark, history_db):
+        """Benchmark para importação NDJSON com detecção de duplicatas."""
+        import io
+
+        database, lines = history_db
+
+        def import_duplicates():
+            return database.import_history_ndjson(
+                io.StringIO(lines), skip_duplicates=True
+            )
+
+        result = benchmark(import_duplicates)
+        assert result["duplicates"] == self.ROWS
@@ -0,0 +1,91 @@
+"""
+Pico de memória na montagem de ZIPs grandes de exportação.
+
+Cada estratégia roda em um subprocesso e informa, para um ZIP de ~32 MB, o
+pico de alocações Python (`tracemalloc`) e o pico de RSS (`ru_maxrss`) do
+processo. O RSS inclui o pico de importação do pacote, por isso a
+comparação entre estratégias usa o `tracemalloc`:
+
+- "bytesio": montagem antiga (`io.BytesIO` + `getvalue()`);
+- "spool-bytes": `SpooledTemporaryFile` lido para `bytes` (uso no Streamlit);
+- "spool-stream": `SpooledTemporaryFile` copiado em blocos para um arquivo
+  (uso em downloads/HTTP em streaming).
+
+Rode com `pytest tests/performance/test_zip_memory.py --benchmark-only` e
+veja `peak_mb`/`peak_rss_mb` em `extra_info`.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+resource = pytest.importorskip("resource")
+
+ZIP_MB = 32
+
+_PROBE = """
+import io, os, resource, shutil, sys, tempfile, tracemalloc, zipfile
+from qa_core.utils import exporters
+
+MB = 1024 * 1024
+strategy, total = sys.argv[1], int(sys.argv[2])
+tracemalloc.start()
+
+
+def fill(target):
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_STORED) as zip_file:
+        for i in range(total):
+            zip_file.writestr(f"analise_{i}.pdf", os.urandom(MB))
+
+
+if strategy == "bytesio":
+    buffer = io.BytesIO()
+    fill(buffer)
+    buffer.seek(0)
+    size = len(buffer.getvalue())
+else:
+    spool = exporters._new_zip_spool()
+    fill(spool)
+    spool.seek(0)
+    if strategy == "spool-bytes":
+        size = len(exporters.read_zip_spool(spool))
+    else:
+        with spool, tempfile.TemporaryFile() as destination:
+            shutil.copyfileobj(spool, destination, 1024 * 1024)
+            size = destination.tell()
+
+peak = tracemalloc.get_traced_memory()[1]
+print(size, peak, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def _peak_memory_mb(strategy: str) -> tuple[float, float]:
+    """Retorna (pico de alocações em MB, pico de RSS do processo em MB)."""
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, strategy, str(ZIP_MB)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    size, peak, max_rss_kb = map(int, result.stdout.split())
+    assert size > ZIP_MB * 1024 * 1024
+    return peak / (1024 * 1024), max_rss_kb / 1024
+
+
+@pytest.mark.parametrize("strategy", ["bytesio", "spool-bytes", "spool-stream"])
+def test_pico_memoria_montagem_zip(benchmark, strategy):
+    benchmark.group = "zip-peak-memory"
+    peak, max_rss = benchmark.pedantic(
+        _peak_memory_mb, args=(strategy,), rounds=1, iterations=1
+    )
+    benchmark.extra_info["peak_mb"] = round(peak, 1)
+    benchmark.extra_info["peak_rss_mb"] = round(max_rss, 1)
+
+
+def test_zip_em_disco_nao_mantem_o_arquivo_inteiro_em_memoria():
+    legacy, _ = _peak_memory_mb("bytesio")
+    streamed, _ = _peak_memory_mb("spool-stream")
+
+    assert legacy >= ZIP_MB
+    assert streamed < legacy / 2
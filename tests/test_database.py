@@ -2,11 +2,18 @@
 # test_database.py
 # =========================================================
 
+import datetime
+import gzip
+import io
+import json
 import os
 import sqlite3
 import unittest
+from contextlib import closing
 from unittest.mock import patch
 
+import pytest
+
 from qa_core import database
 from qa_core.database import (
     DB_NAME,
@@ -73,6 +80,8 @@ class TestDatabaseLogic(unittest.TestCase):
             "CREATE TABLE analysis_history (id INTEGER PRIMARY KEY, created_at TIMESTAMP, user_story TEXT, analysis_report TEXT, test_plan_report TEXT);"
         )
         self.conn.commit()
+        # Base antiga (schema mínimo) atualizada pelas migrações
+        database.run_migrations(self.conn)
 
     def tearDown(self):
         self.conn.close()
@@ -95,6 +104,18 @@ class TestDatabaseLogic(unittest.TestCase):
 
         self.assertEqual(all_entries[0]["id"], 2)
 
+    @patch("qa_core.database.get_db_connection")
+    def test_get_analysis_history_page(self, mock_get_conn):
+        mock_get_conn.return_value = self.conn_wrapper
+        for i in range(1, 4):
+            self.assertEqual(save_analysis_to_history(f"US {i}", "A", "P"), i)
+
+        total, rows = database.get_analysis_history_page(limit=2, offset=1)
+
+        self.assertEqual(total, 3)
+        self.assertEqual([row["id"] for row in rows], [2, 1])
+        self.assertEqual(set(rows[0]), {"id", "created_at", "user_story"})
+
     @patch("qa_core.database.get_db_connection")
     def test_get_all_history_on_empty_db(self, mock_get_conn):
         mock_get_conn.return_value = self.conn_wrapper
@@ -115,8 +136,7 @@ class TestDatabaseLogic(unittest.TestCase):
         )
         connection.row_factory = sqlite3.Row
         cursor = connection.cursor()
-        cursor.execute(
-            """
+        cursor.execute("""
             CREATE TABLE analysis_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 created_at TIMESTAMP NOT NULL,
@@ -124,9 +144,9 @@ class TestDatabaseLogic(unittest.TestCase):
                 analysis_report TEXT,
                 test_plan_report TEXT
             );
-            """
-        )
+            """)
         connection.commit()
+        database.run_migrations(connection)
 
         mock_get_conn.return_value = _NoCloseConnection(connection)
 
@@ -157,6 +177,8 @@ class TestDatabaseDelete(unittest.TestCase):
             "CREATE TABLE analysis_history (id INTEGER PRIMARY KEY, created_at TIMESTAMP, user_story TEXT, analysis_report TEXT, test_plan_report TEXT);"
         )
         self.conn.commit()
+        # Base antiga (schema mínimo) atualizada pelas migrações
+        database.run_migrations(self.conn)
 
     def tearDown(self):
         self.conn.close()
@@ -256,8 +278,7 @@ def test_get_all_analysis_history_vazio(monkeypatch):
 
     # Inicializa schema mas não insere nada
     conn = database.get_db_connection()
-    conn.execute(
-        """
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS analysis_history (
             id INTEGER PRIMARY KEY,
             created_at TEXT,
@@ -265,8 +286,7 @@ def test_get_all_analysis_history_vazio(monkeypatch):
             analysis_report TEXT,
             test_plan_report TEXT
         )
-    """
-    )
+    """)
     conn.commit()
     conn.close()
 
@@ -274,24 +294,417 @@ def test_get_all_analysis_history_vazio(monkeypatch):
     assert history == []
 
 
-def test_ensure_analysis_history_columns_with_error(monkeypatch, caplog):
-    """Testa que _ensure_analysis_history_columns trata erro sqlite3.Error."""
-    from qa_core.database import _ensure_analysis_history_columns
-    import sqlite3
-    from unittest.mock import MagicMock
+def test_run_migrations_upgrades_legacy_schema_once():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE analysis_history (id INTEGER PRIMARY KEY, created_at TIMESTAMP, user_story TEXT, analysis_report TEXT, test_plan_report TEXT);"
+    )
+    conn.commit()
+
+    assert database.run_migrations(conn) == database.SCHEMA_VERSION
+    assert database.get_schema_version(conn) == database.SCHEMA_VERSION
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(analysis_history)")}
+    assert {"test_plan_summary", "test_plan_df_json"} <= columns
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    assert "test_cases" in tables
+
+    # Segunda execução não reaplica nenhuma migração
+    with patch.object(database, "MIGRATIONS", [(1, "falharia", lambda cursor: 1 / 0)]):
+        assert database.run_migrations(conn) == database.SCHEMA_VERSION
+    conn.close()
+
+
+def test_run_migrations_rolls_back_failed_migration():
+    conn = sqlite3.connect(":memory:")
+
+    def broken(cursor):
+        cursor.execute("CREATE TABLE parcial (id INTEGER);")
+        cursor.execute("SELECT * FROM tabela_inexistente;")
+
+    migrations = [
+        (1, "ok", lambda cursor: cursor.execute("CREATE TABLE t1 (id INTEGER);")),
+        (2, "quebrada", broken),
+    ]
+    with patch.object(database, "MIGRATIONS", migrations):
+        with pytest.raises(sqlite3.OperationalError):
+            database.run_migrations(conn)
+
+    assert database.get_schema_version(conn) == 1
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    assert tables == {"t1"}
+    conn.close()
+
+
+class TestTestCasesTable(unittest.TestCase):
+    DB_TEST_FILE = "data/test_cases_qa_oraculo.db"
+
+    def setUp(self):
+        if os.path.exists(self.DB_TEST_FILE):
+            os.remove(self.DB_TEST_FILE)
+        self.patcher = patch("qa_core.database.DB_NAME", self.DB_TEST_FILE)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        if os.path.exists(self.DB_TEST_FILE):
+            os.remove(self.DB_TEST_FILE)
+
+    def _cases(self):
+        return [
+            {"id": "CT-1", "titulo": "Login", "cenario": "Dado A\nEntão B"},
+            {"id": "CT-2", "titulo": "Logout", "cenario": "Dado C\nEntão D"},
+            {"id": "CT-3", "titulo": "Reset", "cenario": "Dado E\nEntão F"},
+        ]
+
+    def test_save_and_load_test_cases_in_order(self):
+        init_db()
+        save_analysis_to_history("us", "a", "p", test_cases=self._cases())
+
+        entry = get_analysis_by_id(1)
+        self.assertEqual(entry["test_cases"], self._cases())
+        self.assertIsNone(entry["test_plan_df_json"])
+        self.assertEqual(database.get_test_cases(1), self._cases())
+
+    def test_update_single_test_case(self):
+        init_db()
+        save_analysis_to_history("us", "a", "p", test_cases=self._cases())
+
+        edited = {**self._cases()[1], "cenario": "Dado X\nEntão Y"}
+        self.assertTrue(database.update_test_case(1, 1, edited))
+
+        cases = database.get_test_cases(1)
+        self.assertEqual(cases[1], edited)
+        self.assertEqual(cases[0], self._cases()[0])
+        self.assertFalse(database.update_test_case(1, 99, edited))
+
+    def test_delete_test_case_shifts_positions(self):
+        init_db()
+        save_analysis_to_history("us", "a", "p", test_cases=self._cases())
+
+        self.assertTrue(database.delete_test_case(1, 0))
+
+        cases = database.get_test_cases(1)
+        self.assertEqual([c["id"] for c in cases], ["CT-2", "CT-3"])
+        edited = {**cases[0], "titulo": "Logout 2"}
+        self.assertTrue(database.update_test_case(1, 0, edited))
+        self.assertEqual(database.get_test_cases(1)[0]["titulo"], "Logout 2")
+
+    def test_delete_analysis_cascades_test_cases(self):
+        init_db()
+        save_analysis_to_history("us", "a", "p", test_cases=self._cases())
+
+        self.assertTrue(delete_analysis_by_id(1))
+
+        with closing(get_db_connection()) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM test_cases").fetchone()[0]
+        self.assertEqual(count, 0)
+
+    def test_init_db_migrates_legacy_json(self):
+        init_db()
+        legacy_json = json.dumps(self._cases(), ensure_ascii=False)
+        with closing(get_db_connection()) as conn:
+            conn.execute(
+                "INSERT INTO analysis_history (created_at, user_story, test_plan_df_json) "
+                "VALUES (?, ?, ?)",
+                (datetime.datetime.now(), "legado", legacy_json),
+            )
+            conn.commit()
+
+        # Antes da migração o leitor de compatibilidade usa o blob antigo
+        self.assertEqual(get_analysis_by_id(1)["test_cases"], self._cases())
+
+        # Simula uma base anterior à migração de test_cases
+        with closing(get_db_connection()) as conn:
+            conn.execute("PRAGMA user_version = 2")
+        init_db()
+
+        entry = get_analysis_by_id(1)
+        self.assertIsNone(entry["test_plan_df_json"])
+        self.assertEqual(entry["test_cases"], self._cases())
+
+    def test_iter_analyses_by_ids_keeps_requested_order(self):
+        init_db()
+        for i in range(5):
+            save_analysis_to_history(f"us {i}", "a", "p", test_cases=self._cases()[:i])
+
+        with patch(
+            "qa_core.database.get_db_connection", wraps=get_db_connection
+        ) as mock_connect:
+            result = list(
+                database.iter_analyses_by_ids([4, 99, 1, "x", 2], chunk_size=2)
+            )
+
+        mock_connect.assert_called_once()
+        self.assertEqual([analysis_id for analysis_id, _ in result], [4, 99, 1, "x", 2])
+        self.assertIsNone(result[1][1])
+        self.assertIsNone(result[3][1])
+        self.assertEqual(result[0][1]["user_story"], "us 3")
+        self.assertEqual(result[0][1]["test_cases"], self._cases()[:3])
+        self.assertIsInstance(result[2][1]["created_at"], datetime.datetime)
+        self.assertEqual(result[2][1]["test_cases"], [])
+
+
+def test_parse_legacy_test_plan_json_invalid_values():
+    assert database.parse_legacy_test_plan_json(None) == []
+    assert database.parse_legacy_test_plan_json("não é json") == []
+    assert database.parse_legacy_test_plan_json('{"a": 1}') == []
+    assert database.parse_legacy_test_plan_json('[{"a": 1}, 2]') == [{"a": 1}]
+
+
+class TestHistoryNdjson(unittest.TestCase):
+    DB_TEST_FILE = "data/ndjson_qa_oraculo.db"
+
+    def setUp(self):
+        if os.path.exists(self.DB_TEST_FILE):
+            os.remove(self.DB_TEST_FILE)
+        self.patcher = patch("qa_core.database.DB_NAME", self.DB_TEST_FILE)
+        self.patcher.start()
+        init_db()
+
+    def tearDown(self):
+        self.patcher.stop()
+        if os.path.exists(self.DB_TEST_FILE):
+            os.remove(self.DB_TEST_FILE)
+
+    def _export(self, **kwargs):
+        buffer = io.StringIO()
+        total = database.export_history_ndjson(buffer, **kwargs)
+        return total, buffer.getvalue()
+
+    def test_export_import_roundtrip(self):
+        cases = [{"id": "CT-1", "titulo": "Ação", "cenario": "Dado A\nEntão B"}]
+        save_analysis_to_history("us 1", "a1", "p1", test_cases=cases)
+        save_analysis_to_history("us 2", "a2", "p2")
+
+        total, content = self._export()
+        self.assertEqual(total, 2)
+        lines = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([line["user_story"] for line in lines], ["us 1", "us 2"])
+        self.assertEqual(lines[0]["test_cases"], cases)
+        self.assertEqual(lines[1]["test_cases"], [])
+        self.assertEqual(
+            lines[0]["content_hash"], database.history_content_hash(lines[0])
+        )
+
+        clear_history()
+        stats = database.import_history_ndjson(io.StringIO(content), chunk_size=1)
+        self.assertEqual(stats, {"imported": 2, "duplicates": 0, "invalid": 0})
+
+        _, reexported = self._export()
+        for before, after in zip(content.splitlines(), reexported.splitlines()):
+            before, after = json.loads(before), json.loads(after)
+            self.assertEqual(before["content_hash"], after["content_hash"])
+            self.assertEqual(before["test_cases"], after["test_cases"])
+
+    def test_import_skip_duplicates_and_invalid_lines(self):
+        save_analysis_to_history("us 1", "a1", "p1", test_cases=[{"titulo": "T"}])
+        _, content = self._export()
+        new_record = json.dumps(
+            {
+                "created_at": "2024-01-01T10:00:00",
+                "user_story": "nova",
+                "test_cases": [],
+            }
+        )
+        source = io.StringIO(
+            content + new_record + "\n" + new_record + "\n" + "{quebrado\n\n"
+        )
+
+        progress = []
+        stats = database.import_history_ndjson(
+            source, chunk_size=2, skip_duplicates=True, progress=progress.append
+        )
+
+        self.assertEqual(stats, {"imported": 1, "duplicates": 2, "invalid": 1})
+        self.assertEqual(progress, [2, 4, 4])
+        self.assertEqual(len(get_all_analysis_history()), 2)
+
+    def test_export_progress_callback(self):
+        for i in range(5):
+            save_analysis_to_history(f"us {i}", "a", "p")
+
+        progress = []
+        total, _ = self._export(batch_size=2, progress=progress.append)
+
+        self.assertEqual(total, 5)
+        self.assertEqual(progress, [2, 4, 5])
+
+    def test_import_links_cases_to_generated_ids_without_autoincrement(self):
+        # Bases antigas podem ter ids fora de sequência e nenhum sqlite_sequence
+        conn = sqlite3.connect(":memory:")
+        cursor = conn.cursor()
+        cursor.execute(
+            "CREATE TABLE analysis_history (id INTEGER PRIMARY KEY, "
+            "created_at TIMESTAMP, user_story TEXT, analysis_report TEXT, "
+            "test_plan_report TEXT, test_plan_summary TEXT, test_plan_df_json TEXT);"
+        )
+        cursor.execute("INSERT INTO analysis_history (id, user_story) VALUES (40, 'x')")
+        database._create_test_cases_table(cursor)
+        records = [
+            {
+                "created_at": "2024-01-01T10:00:00",
+                "user_story": f"us {i}",
+                "analysis_report": "",
+                "test_plan_report": "",
+                "test_plan_summary": None,
+                "test_cases": [{"titulo": f"caso {i}"}],
+            }
+            for i in range(2)
+        ]
+
+        database._insert_history_chunk(cursor, records)
+
+        rows = cursor.execute(
+            "SELECT h.user_story, t.case_json FROM test_cases t "
+            "JOIN analysis_history h ON h.id = t.analysis_id ORDER BY h.id"
+        ).fetchall()
+        conn.close()
+        self.assertEqual(
+            [(story, json.loads(case)["titulo"]) for story, case in rows],
+            [("us 0", "caso 0"), ("us 1", "caso 1")],
+        )
+
+    def test_import_propagates_sqlite_errors(self):
+        record = json.dumps({"created_at": "2024-01-01T10:00:00", "user_story": "x"})
+        with patch(
+            "qa_core.database.get_db_connection",
+            side_effect=sqlite3.OperationalError("database is locked"),
+        ):
+            with self.assertRaises(sqlite3.OperationalError):
+                database.import_history_ndjson(io.StringIO(record + "\n"))
+
+
+class TestHistoryRetention(unittest.TestCase):
+    DB_TEST_FILE = "data/retention_qa_oraculo.db"
+    ARCHIVE_FILE = "data/retention_archive.ndjson.gz"
+
+    def setUp(self):
+        for path in (self.DB_TEST_FILE, self.ARCHIVE_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+        self.patcher = patch("qa_core.database.DB_NAME", self.DB_TEST_FILE)
+        self.patcher.start()
+        init_db()
+
+    def tearDown(self):
+        self.patcher.stop()
+        for path in (self.DB_TEST_FILE, self.ARCHIVE_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _insert(self, user_story, days_ago):
+        created_at = datetime.datetime.now() - datetime.timedelta(days=days_ago)
+        with closing(get_db_connection()) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO analysis_history (created_at, user_story) VALUES (?, ?)",
+                (created_at, user_story),
+            )
+            database.replace_test_cases(
+                cursor, cursor.lastrowid, [{"titulo": f"caso {user_story}"}]
+            )
+            conn.commit()
+
+    def _stories(self):
+        return sorted(row["user_story"] for row in get_all_analysis_history())
+
+    def test_incremental_auto_vacuum_is_enabled_outside_init_db(self):
+        self._insert("us", days_ago=1)
+        with closing(get_db_connection()) as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+
+        self.assertTrue(database.enable_incremental_auto_vacuum())
+        self.assertTrue(database.enable_incremental_auto_vacuum())
+
+        with closing(get_db_connection()) as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        self.assertEqual(self._stories(), ["us"])
+
+    def test_enable_incremental_auto_vacuum_failure_is_not_fatal(self):
+        with patch(
+            "qa_core.database.get_db_connection",
+            side_effect=sqlite3.OperationalError("database is locked"),
+        ):
+            self.assertFalse(database.enable_incremental_auto_vacuum())
+
+    def test_retention_by_age_archives_removed_rows(self):
+        self._insert("antiga", days_ago=400)
+        self._insert("recente", days_ago=1)
+
+        stats = database.apply_retention_policy(
+            max_age_days=30, archive_path=self.ARCHIVE_FILE
+        )
+
+        self.assertEqual(stats, {"deleted": 1, "archived": 1})
+        self.assertEqual(self._stories(), ["recente"])
+        with closing(get_db_connection()) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM test_cases").fetchone()[0]
+        self.assertEqual(count, 1)
+
+        with gzip.open(self.ARCHIVE_FILE, "rt", encoding="utf-8") as archive:
+            archived = [json.loads(line) for line in archive]
+        self.assertEqual(archived[0]["user_story"], "antiga")
+        self.assertEqual(archived[0]["test_cases"], [{"titulo": "caso antiga"}])
+
+        # O arquivo é restaurável pelo importador NDJSON
+        with gzip.open(self.ARCHIVE_FILE, "rt", encoding="utf-8") as archive:
+            database.import_history_ndjson(archive)
+        self.assertEqual(self._stories(), ["antiga", "recente"])
+
+    def test_retention_by_count_in_small_batches(self):
+        for i in range(7):
+            self._insert(f"us {i}", days_ago=10 - i)
+
+        stats = database.apply_retention_policy(max_entries=3, batch_size=2)
+
+        self.assertEqual(stats, {"deleted": 4, "archived": 0})
+        self.assertEqual(self._stories(), ["us 4", "us 5", "us 6"])
+
+    def test_retention_without_rules_is_noop(self):
+        self._insert("us", days_ago=1000)
+        self.assertEqual(
+            database.apply_retention_policy(), {"deleted": 0, "archived": 0}
+        )
+        self.assertEqual(self._stories(), ["us"])
+
+    def test_delete_batches_commit_small_transactions(self):
+        for i in range(8):
+            self._insert(f"us {i}", days_ago=1)
+
+        with closing(get_db_connection()) as conn:
+            batches = list(
+                database._delete_history_batches(conn, "1 = 1", (), batch_size=3)
+            )
+
+        self.assertEqual(batches, [3, 3, 2])
+        self.assertEqual(self._stories(), [])
+
+    def test_clear_history_reclaims_space(self):
+        self.assertTrue(database.enable_incremental_auto_vacuum())
+        for i in range(20):
+            save_analysis_to_history(f"us {i}", "a" * 5000, "p" * 5000)
+        with closing(get_db_connection()) as conn:
+            pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
+
+        self.assertEqual(clear_history(), 20)
+        database.incremental_vacuum()
+
+        with closing(get_db_connection()) as conn:
+            self.assertEqual(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+            pages_after = conn.execute("PRAGMA page_count").fetchone()[0]
+        self.assertLess(pages_after, pages_before)
 
-    # Cria um mock cursor que simula erro
-    mock_cursor = MagicMock(spec=sqlite3.Cursor)
 
-    def failing_execute(query, *args):
-        if "PRAGMA" in query or "ALTER TABLE" in query:
-            raise sqlite3.Error("Database locked")
-        # Para outras queries, retorna normalmente
-        return None
+@patch("qa_core.database._run_history_maintenance")
+def test_run_history_maintenance_is_throttled(mock_run, monkeypatch):
+    monkeypatch.setattr(database, "_last_maintenance_at", None)
+    monkeypatch.delenv("HISTORY_MAINTENANCE_INTERVAL", raising=False)
 
-    mock_cursor.execute.side_effect = failing_execute
-    mock_cursor.fetchall.return_value = []
+    first = database.run_history_maintenance()
+    first.join(timeout=5)
+    second = database.run_history_maintenance()
+    forced = database.run_history_maintenance(force=True)
+    forced.join(timeout=5)
 
-    # Não deve levantar exceção, apenas logar
-    _ensure_analysis_history_columns(mock_cursor)
-    assert "Falha ao ajustar colunas" in caplog.text
+    assert second is None
+    assert mock_run.call_count == 2
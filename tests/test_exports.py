@@ -2,17 +2,24 @@ import csv
 import io
 import locale
 import unittest
+import zipfile
 from io import BytesIO
 
 import pandas as pd
 import pytest
 
+from qa_core import exports
 from qa_core.app import _ensure_bytes
 from qa_core.exports import (
     gerar_csv_azure_from_df,
     gerar_csv_testrail_from_df,
+    gerar_csv_xray_from_df,
     preparar_df_para_zephyr_xlsx,
+    stream_csv_azure_from_df,
+    stream_csv_testrail_from_df,
+    stream_csv_xray_from_df,
     to_excel,
+    write_stream,
 )
 
 EXPECTED_COLUMNS_COUNT = 10
@@ -268,6 +275,49 @@ def test_to_excel_dataframe_vazio():
     assert isinstance(buf, (bytes | bytearray))
 
 
+def test_to_excel_streaming_equivale_ao_pandas():
+    """
+     O backend de streaming (planilhas grandes) deve gerar a mesma planilha
+    que o caminho padrão do pandas: mesmos valores, vazios e cabeçalho em negrito.
+    """
+    from openpyxl import load_workbook
+
+    df = pd.DataFrame(
+        {
+            "Summary": ["CT 1", "CT 1", "CT 2"],
+            "Test Step": ["Dado algo", "Quando faço algo", None],
+            "Ordem": [1, 2, 3],
+            "Nota": [1.5, float("nan"), 2.0],
+        }
+    )
+
+    padrao = to_excel(df, "Zephyr", streaming=False)
+    streaming = to_excel(df, "Zephyr", streaming=True)
+
+    pd.testing.assert_frame_equal(
+        pd.read_excel(BytesIO(streaming), sheet_name="Zephyr"),
+        pd.read_excel(BytesIO(padrao), sheet_name="Zephyr"),
+    )
+    cabecalho = load_workbook(BytesIO(streaming))["Zephyr"]["A1"]
+    assert cabecalho.font.b
+    assert cabecalho.border.left.style == "thin"
+
+
+def test_to_excel_escolhe_streaming_pelo_tamanho(monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(exports, "EXCEL_STREAMING_MIN_ROWS", 2)
+    monkeypatch.setattr(exports, "_import_xlsxwriter", lambda: None)
+    monkeypatch.setattr(
+        exports,
+        "_to_excel_openpyxl_write_only",
+        lambda df, sheet_name: chamadas.append(len(df)) or b"xlsx",
+    )
+
+    to_excel(pd.DataFrame({"A": [1]}), "Sheet1")
+    assert to_excel(pd.DataFrame({"A": [1, 2]}), "Sheet1") == b"xlsx"
+    assert chamadas == [2]
+
+
 def test_ensure_bytes_com_getvalue():
     """
      Testa a função `_ensure_bytes` com objetos que possuem
@@ -446,3 +496,104 @@ def test_gerar_csv_azure_com_passos_com_e_cobre_279_288():
     #  Ambos os passos com 'E' devem estar presentes
     assert "E vê a tela inicial" in text
     assert "E outro passo" in text
+
+
+def test_exportadores_sem_titulo_usam_rotulo_do_indice(monkeypatch):
+    """O título padrão usa o rótulo do índice, como no percurso por iterrows."""
+    monkeypatch.setattr(locale, "getlocale", lambda: ("en_US", "UTF-8"))
+    df = pd.DataFrame([{"cenario": "Dado A\nQuando B\nEntão C"}], index=[41])
+
+    azure = gerar_csv_azure_from_df(df, "Area", "QA").decode("utf-8-sig")
+    testrail = gerar_csv_testrail_from_df(df).decode("utf-8")
+    zephyr = preparar_df_para_zephyr_xlsx(df, "High", "qa", "Desc")
+
+    assert azure.splitlines()[1:5] == [
+        ",Test Case,Caso de Teste 42,1,,,2,Area,QA,Design",
+        ",,,2,Dado A,,,,,",
+        ",,,3,Quando B,Então C,,,,",
+        "",
+    ]
+    assert '"Caso de Teste 42"' in testrail
+    assert zephyr["Summary"].tolist() == ["Caso de Teste 42"] * 3
+
+
+def _df_varios_casos(total):
+    return pd.DataFrame(
+        [
+            {
+                "titulo": f"Caso {i}",
+                "prioridade": "Alta",
+                "cenario": f"Dado o passo {i}\nQuando ajo\nEntão confiro",
+            }
+            for i in range(total)
+        ]
+    )
+
+
+def test_stream_csv_azure_emite_bom_uma_unica_vez(monkeypatch):
+    monkeypatch.setattr(locale, "getlocale", lambda: ("pt_BR", "UTF-8"))
+    df = _df_varios_casos(20)
+
+    chunks = list(stream_csv_azure_from_df(df, "Area", "QA", chunk_rows=7))
+
+    assert len(chunks) > 3
+    assert chunks[0] == b"\xef\xbb\xbf"
+    assert sum(chunk.count(b"\xef\xbb\xbf") for chunk in chunks) == 1
+    assert b"".join(chunks) == gerar_csv_azure_from_df(df, "Area", "QA")
+
+
+@pytest.mark.parametrize(
+    "stream, gerar, args",
+    [
+        (stream_csv_xray_from_df, gerar_csv_xray_from_df, ("Pasta",)),
+        (stream_csv_testrail_from_df, gerar_csv_testrail_from_df, ("Seção",)),
+    ],
+)
+def test_stream_csv_equivale_a_versao_em_memoria(stream, gerar, args):
+    df = _df_varios_casos(12)
+
+    chunks = list(stream(df, *args, chunk_rows=5))
+
+    assert len(chunks) == 3  # 13 linhas (cabeçalho + 12) em blocos de 5
+    assert all(chunk.endswith(b"\r\n") for chunk in chunks)
+    assert b"".join(chunks) == gerar(df, *args)
+
+
+def test_write_stream_grava_em_entrada_de_zip():
+    df = _df_varios_casos(3)
+    buffer = BytesIO()
+
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        with zip_file.open("testrail.csv", "w") as entry:
+            total = write_stream(stream_csv_testrail_from_df(df), entry)
+
+    with zipfile.ZipFile(buffer) as zip_file:
+        content = zip_file.read("testrail.csv")
+    assert content == gerar_csv_testrail_from_df(df)
+    assert total == len(content)
+
+
+def test_exportadores_com_fragmentos_renderizam_so_o_caso_alterado():
+    from qa_core.export_cache import CaseFragmentCache
+
+    df = _df_varios_casos(5)
+    fragments = CaseFragmentCache()
+    exportar = [
+        lambda d, **kw: gerar_csv_azure_from_df(d, "Area", "QA", **kw),
+        lambda d, **kw: gerar_csv_xray_from_df(d, "Pasta", {"Labels": "qa"}, **kw),
+        lambda d, **kw: gerar_csv_testrail_from_df(d, "Seção", **kw),
+        lambda d, **kw: preparar_df_para_zephyr_xlsx(d, "High", "qa", "d", **kw),
+    ]
+
+    def conteudos(d, **kw):
+        return [
+            r.to_csv() if isinstance(r, pd.DataFrame) else r
+            for r in (gerar(d, **kw) for gerar in exportar)
+        ]
+
+    assert conteudos(df, fragments=fragments) == conteudos(df)
+    assert fragments.misses == 4 * len(df)
+
+    df.at[2, "cenario"] = "Dado algo novo\nEntão outro resultado"
+    assert conteudos(df, fragments=fragments) == conteudos(df)
+    assert fragments.misses == 4 * len(df) + 4  # só o caso editado, por formato
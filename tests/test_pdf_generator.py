@@ -2,6 +2,8 @@
 # tests/test_pdf_generator.py
 # =========================================================
 
+import subprocess
+import sys
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
@@ -18,6 +20,15 @@ from qa_core.pdf_generator import (
     generate_pdf_report,
 )
 
+
+def _mock_pdf():
+    """PDF mockado com as medidas usadas por `write_text` (A4, margens de 10 mm)."""
+    mock_pdf = MagicMock()
+    mock_pdf.w, mock_pdf.r_margin, mock_pdf.x, mock_pdf.c_margin = 210, 10, 10, 1
+    mock_pdf.get_string_width.side_effect = lambda text: len(text) * 2
+    return mock_pdf
+
+
 # ===================================================================
 # 1. Testes para Funções Simples
 # ===================================================================
@@ -113,7 +124,7 @@ def test_add_test_case_table_com_dataframe_vazio():
 def test_add_test_case_table_normaliza_cenario_lista():
     """Listas de passos devem ser convertidas em texto contínuo no relatório."""
 
-    mock_pdf = MagicMock()
+    mock_pdf = _mock_pdf()
     df = pd.DataFrame(
         [
             {
@@ -129,11 +140,10 @@ def test_add_test_case_table_normaliza_cenario_lista():
 
     add_test_case_table(mock_pdf, df)
 
-    # O multi_cell final deve conter a junção dos passos separados por quebras de linha
-    assert any(
-        "Dado\nQuando\nEntão" in str(call.args[2])
-        for call in mock_pdf.multi_cell.call_args_list
-    )
+    # Os passos viram linhas consecutivas do cenário
+    linhas = [call.args[2] for call in mock_pdf.cell.call_args_list]
+    inicio = linhas.index("Cenário Gherkin:") + 1
+    assert linhas[inicio : inicio + 3] == ["Dado", "Quando", "Então"]
 
 
 # ===================================================================
@@ -187,9 +197,9 @@ def test_pdf_divider():
 
 
 @patch("qa_core.pdf_generator.PDF")
-@patch("matplotlib.font_manager.findfont", return_value="dummy_path.ttf")
-def test_generate_pdf_report_fluxo_completo(mock_findfont, mock_PDF):
-    mock_pdf_instance = MagicMock()
+@patch("qa_core.pdf_generator.resolve_font_path", return_value="dummy_path.ttf")
+def test_generate_pdf_report_fluxo_completo(mock_font_path, mock_PDF):
+    mock_pdf_instance = _mock_pdf()
     mock_PDF.return_value = mock_pdf_instance
     analysis_report = "Relatório"
     test_plan_df = pd.DataFrame([{"id": "CT-001"}])
@@ -205,9 +215,9 @@ def test_generate_pdf_report_fluxo_completo(mock_findfont, mock_PDF):
 
 
 @patch("qa_core.pdf_generator.PDF")
-@patch("matplotlib.font_manager.findfont", return_value="dummy_path.ttf")
-def test_generate_pdf_report_df_vazio(mock_findfont, mock_PDF):
-    mock_pdf_instance = MagicMock()
+@patch("qa_core.pdf_generator.resolve_font_path", return_value="dummy_path.ttf")
+def test_generate_pdf_report_df_vazio(mock_font_path, mock_PDF):
+    mock_pdf_instance = _mock_pdf()
     mock_PDF.return_value = mock_pdf_instance
 
     mock_pdf_instance.output.return_value = b"pdf"
@@ -220,20 +230,20 @@ def test_generate_pdf_report_df_vazio(mock_findfont, mock_PDF):
 
 
 def test_generate_pdf_report_sem_fonte(monkeypatch):
-    def _raise_font_error(_):
-        raise ValueError("Fonte não encontrada")
+    def _raise_font_error():
+        raise RuntimeError("Fonte 'DejaVu Sans' não encontrada.")
 
-    monkeypatch.setattr(pdf_generator.fm, "findfont", _raise_font_error)
+    monkeypatch.setattr(pdf_generator, "resolve_font_path", _raise_font_error)
 
     with pytest.raises(RuntimeError, match=r"Fonte 'DejaVu Sans' não encontrada\."):
         generate_pdf_report("Relatório", pd.DataFrame())
 
 
 def test_pdf_falha_fonte(monkeypatch):
-    def _raise_generic_error(_):
-        raise Exception("Fonte não encontrada")
+    def _raise_generic_error(_pdf):
+        raise Exception("Fonte corrompida")
 
-    monkeypatch.setattr(pdf_generator.fm, "findfont", _raise_generic_error)
+    monkeypatch.setattr(pdf_generator, "_register_fonts", _raise_generic_error)
 
     with pytest.raises(RuntimeError, match=r"Fonte 'DejaVu Sans' não encontrada\."):
         generate_pdf_report("texto", pd.DataFrame())
@@ -241,9 +251,9 @@ def test_pdf_falha_fonte(monkeypatch):
 
 @patch("qa_core.pdf_generator.add_test_case_table")
 @patch("qa_core.pdf_generator.PDF")
-@patch("matplotlib.font_manager.findfont", return_value="dummy_path.ttf")
+@patch("qa_core.pdf_generator.resolve_font_path", return_value="dummy_path.ttf")
 def test_generate_pdf_report_trata_entradas_vazias(
-    mock_findfont, mock_PDF, mock_add_table
+    mock_font_path, mock_PDF, mock_add_table
 ):
     mock_pdf_instance = MagicMock()
     mock_pdf_instance.output.return_value = b"pdf"
@@ -266,9 +276,9 @@ def test_normalize_test_plan_df_tipo_invalido(invalid_input):
 
 @patch("qa_core.pdf_generator.add_test_case_table")
 @patch("qa_core.pdf_generator.PDF")
-@patch("matplotlib.font_manager.findfont", return_value="dummy_path.ttf")
+@patch("qa_core.pdf_generator.resolve_font_path", return_value="dummy_path.ttf")
 def test_generate_pdf_report_normaliza_iteraveis(
-    mock_findfont, mock_PDF, mock_add_table
+    mock_font_path, mock_PDF, mock_add_table
 ):
     mock_pdf_instance = MagicMock()
     mock_pdf_instance.output.return_value = b"pdf"
@@ -283,11 +293,11 @@ def test_generate_pdf_report_normaliza_iteraveis(
 
 
 @patch("qa_core.pdf_generator.PDF")
-@patch("matplotlib.font_manager.findfont", return_value="dummy_path.ttf")
+@patch("qa_core.pdf_generator.resolve_font_path", return_value="dummy_path.ttf")
 def test_generate_pdf_report_usa_mensagem_padrao_quando_relatorio_vazio(
-    mock_findfont, mock_PDF
+    mock_font_path, mock_PDF
 ):
-    mock_pdf_instance = MagicMock()
+    mock_pdf_instance = _mock_pdf()
     mock_pdf_instance.output.return_value = b"pdf"
     mock_PDF.return_value = mock_pdf_instance
 
@@ -298,3 +308,234 @@ def test_generate_pdf_report_usa_mensagem_padrao_quando_relatorio_vazio(
         "⚠️ Relatório de análise não disponível." in str(call.args[2])
         for call in mock_pdf_instance.multi_cell.call_args_list
     )
+
+
+# ===================================================================
+# 5. Resolução e reaproveitamento da fonte
+# ===================================================================
+
+
+@pytest.fixture
+def _resolver_limpo():
+    pdf_generator.resolve_font_path.cache_clear()
+    yield
+    pdf_generator.resolve_font_path.cache_clear()
+
+
+def test_resolve_font_path_prioriza_variavel_de_ambiente(
+    tmp_path, monkeypatch, _resolver_limpo
+):
+    fonte = tmp_path / "MinhaFonte.ttf"
+    fonte.write_bytes(b"ttf")
+    monkeypatch.setenv("PDF_FONT_PATH", str(fonte))
+
+    assert pdf_generator.resolve_font_path() == str(fonte)
+
+
+def test_resolve_font_path_usa_fallbacks_e_guarda_em_cache(
+    tmp_path, monkeypatch, _resolver_limpo
+):
+    monkeypatch.delenv("PDF_FONT_PATH", raising=False)
+    monkeypatch.setattr(pdf_generator, "_SYSTEM_FONT_DIRS", (str(tmp_path),))
+    monkeypatch.setattr(pdf_generator, "_fontconfig_font_path", lambda: None)
+    chamadas = []
+
+    def _fonte_matplotlib():
+        chamadas.append(1)
+        return "/mpl/DejaVuSans.ttf"
+
+    monkeypatch.setattr(pdf_generator, "_matplotlib_font_path", _fonte_matplotlib)
+
+    assert pdf_generator.resolve_font_path() == "/mpl/DejaVuSans.ttf"
+    assert pdf_generator.resolve_font_path() == "/mpl/DejaVuSans.ttf"
+    assert len(chamadas) == 1
+
+
+def test_resolve_font_path_sem_fonte(tmp_path, monkeypatch, _resolver_limpo):
+    monkeypatch.delenv("PDF_FONT_PATH", raising=False)
+    monkeypatch.setattr(pdf_generator, "_SYSTEM_FONT_DIRS", (str(tmp_path),))
+    monkeypatch.setattr(pdf_generator, "_fontconfig_font_path", lambda: None)
+    monkeypatch.setattr(pdf_generator, "_matplotlib_font_path", lambda: None)
+
+    with pytest.raises(RuntimeError, match=r"Fonte 'DejaVu Sans' não encontrada\."):
+        pdf_generator.resolve_font_path()
+
+
+def test_importar_o_modulo_nao_carrega_matplotlib():
+    codigo = (
+        "import sys; import qa_core.pdf_generator; "
+        "print('matplotlib' in sys.modules)"
+    )
+    resultado = subprocess.run(
+        [sys.executable, "-c", codigo], capture_output=True, text=True, check=True
+    )
+
+    assert resultado.stdout.strip() == "False"
+
+
+def test_pdfs_seguidos_reaproveitam_a_fonte_interpretada(monkeypatch):
+    monkeypatch.setattr(pdf_generator, "_font_templates", {})
+    df = pd.DataFrame(
+        [{"titulo": "Caso ção", "prioridade": "Alta", "cenario": "Dado ✅ x"}]
+    )
+
+    primeiro = generate_pdf_report("Relatório 🔍", df)
+    (modelo,) = pdf_generator._font_templates.values()
+    with patch.object(pdf_generator.PDF, "add_font") as mock_add_font:
+        segundo = generate_pdf_report("Relatório 🔍", df)
+
+    mock_add_font.assert_not_called()
+    assert modelo is not None
+    for pdf_bytes in (primeiro, segundo):
+        assert pdf_bytes.startswith(b"%PDF")
+        assert pdf_bytes.rstrip().endswith(b"%%EOF")
+
+
+def test_fonte_clonada_tem_estado_proprio_por_documento(monkeypatch):
+    monkeypatch.setattr(pdf_generator, "_font_templates", {})
+    primeiro, segundo = PDF(), PDF()
+
+    pdf_generator._register_fonts(primeiro)
+    pdf_generator._register_fonts(segundo)
+
+    modelo = next(iter(pdf_generator._font_templates.values()))
+    for chave in ("dejavu", "dejavuB", "dejavuI"):
+        fonte = segundo.fonts[chave]
+        assert fonte is not modelo
+        assert fonte.desc is not modelo.desc
+        assert fonte.subset is not modelo.subset
+        assert fonte.ttfont is not primeiro.fonts[chave].ttfont
+    assert [f.i for f in segundo.fonts.values()] == [1, 2, 3]
+    assert segundo.fonts["dejavuB"].emphasis.name == "B"
+
+
+# ===================================================================
+# 6. Layout escalável para planos grandes
+# ===================================================================
+
+
+def test_clean_text_for_pdf_troca_todos_os_emojis_em_uma_passada():
+    texto = "📌 a ✅ b 🎯 c • d 🔍 e ❓ f 🚩 g"
+
+    assert clean_text_for_pdf(texto) == (
+        "-  a [OK]  b ->  c - d [Análise]  e [?]  f [Alerta]  g"
+    )
+    assert clean_text_for_pdf(pd.NA) == ""
+    assert clean_text_for_pdf(pd.NaT) == ""
+
+
+def _pdf_real():
+    pdf = PDF()
+    pdf_generator._register_fonts(pdf)
+    pdf.add_page()
+    pdf.set_font("DejaVu", "", 10)
+    return pdf
+
+
+def test_write_text_equivale_ao_multi_cell():
+    texto = "Dado algo\n\nQuando " + "muito longo " * 30 + "\nEntão ok"
+    com_multi_cell, com_write_text = _pdf_real(), _pdf_real()
+
+    com_multi_cell.multi_cell(0, 6, texto, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    with patch.object(
+        com_write_text, "multi_cell", wraps=com_write_text.multi_cell
+    ) as spy:
+        pdf_generator.write_text(com_write_text, 6, texto)
+
+    assert com_write_text.get_y() == com_multi_cell.get_y()
+    assert com_write_text.get_x() == com_multi_cell.get_x()
+    # Só a linha que não cabe na largura passa pela quebra de linha do fpdf2
+    spy.assert_called_once()
+
+
+def test_prepare_case_rows_numera_pela_posicao_e_limpa_textos():
+    df = pd.DataFrame(
+        [
+            {"titulo": "Login ✅", "prioridade": None, "cenario": ["Dado", "Então"]},
+            {"id": "CT-9", "titulo": "Saída", "prioridade": "Alta", "cenario": ""},
+        ],
+        index=[40, 7],
+    )
+
+    primeiro, segundo = pdf_generator.prepare_case_rows(df)
+
+    assert primeiro.summary == "- CT-001: Login [OK]  (Prioridade: -)"
+    assert primeiro.heading == "Caso de Teste 1 - Login [OK] "
+    assert primeiro.details[0] == ("Prioridade", "-")
+    assert primeiro.scenario == "Dado\nEntão"
+    assert segundo.summary == "- CT-9: Saída (Prioridade: Alta)"
+    assert segundo.priority == "Prioridade: Alta"
+
+
+def test_plano_grande_e_dividido_em_capitulos():
+    pdf = _pdf_real()
+    df = pd.DataFrame(
+        [{"titulo": f"Caso {i}", "cenario": "Dado algo"} for i in range(25)]
+    )
+
+    add_test_case_table(pdf, df, chapter_size=10)
+
+    capitulos = [section.name for section in pdf._outline]
+    assert capitulos == ["Casos 1 a 10", "Casos 11 a 20", "Casos 21 a 25"]
+
+
+def test_generate_pdf_report_capitulos_pela_variavel_de_ambiente(monkeypatch):
+    monkeypatch.setenv("PDF_CHAPTER_SIZE", "0")
+    assert pdf_generator.default_chapter_size() is None
+
+    monkeypatch.setenv("PDF_CHAPTER_SIZE", "2")
+    with patch.object(pdf_generator, "add_test_case_table") as mock_add_table:
+        generate_pdf_report("Relatório", [{"titulo": "Caso"}])
+
+    assert mock_add_table.call_args.kwargs["chapter_size"] == 2
+
+
+# ===================================================================
+# 7. Capa/rodapés carimbados e programa de fonte base
+# ===================================================================
+
+
+def test_capa_e_rodapes_usam_a_mesma_data_de_geracao():
+    mock_pdf = MagicMock()
+    mock_pdf.generated_at = "01/02/2026 10:20:30"
+    mock_pdf.page_no.return_value = 3
+
+    add_cover(mock_pdf)
+    PDF.footer(mock_pdf)
+
+    textos = [call.args[2] for call in mock_pdf.cell.call_args_list]
+    assert textos.count("Gerado em: 01/02/2026 10:20:30") == 2  # noqa: PLR2004
+
+
+def test_fontes_clonadas_partem_do_programa_de_fonte_base(monkeypatch):
+    monkeypatch.setattr(pdf_generator, "_font_templates", {})
+    primeiro, segundo = PDF(), PDF()
+
+    pdf_generator._register_fonts(primeiro)
+    pdf_generator._register_fonts(segundo)
+
+    completa = primeiro.fonts["dejavu"].ttfont.getGlyphOrder()
+    base = segundo.fonts["dejavu"].ttfont.getGlyphOrder()
+    assert len(base) < len(completa)
+    cmap = segundo.fonts["dejavu"].ttfont.getBestCmap()
+    assert all(ord(char) in cmap for char in "Ação é €—“”")
+
+
+def test_glifos_fora_do_programa_base_usam_a_fonte_completa(monkeypatch):
+    monkeypatch.setattr(pdf_generator, "_font_templates", {})
+    pdf_generator._register_fonts(PDF())
+    pdf = PDF()
+    pdf_generator._register_fonts(pdf)
+    pdf.add_page()
+    pdf.set_font("DejaVu", "", 12)
+    pdf.cell(0, 10, "Кириллица")
+
+    pdf_generator._ensure_font_programs(pdf)
+
+    regular = pdf.fonts["dejavu"].ttfont.getGlyphOrder()
+    assert all(
+        name in regular for name in pdf.fonts["dejavu"].subset.get_all_glyph_names()
+    )
+    # Os estilos que não usaram esses glifos continuam no programa base
+    assert len(pdf.fonts["dejavuB"].ttfont.getGlyphOrder()) < len(regular)
+    assert bytes(pdf.output()).startswith(b"%PDF")
@@ -20,9 +20,7 @@ class TestStateManager(unittest.TestCase):
         expected_keys = {
             "analysis_finished": False,
             "analysis_state": None,
-            "test_plan_report": None,
-            "test_plan_df": None,
-            "pdf_report_bytes": None,
+            "test_plan": None,
             "show_generate_plan_button": False,
             "user_story_input": "",
             "area_path_input": "",
@@ -271,3 +271,18 @@ def test_gerar_nome_arquivo_seguro_truncamento():
     assert nome.endswith(".csv")
     # o nome base deve ter no máximo 50 caracteres antes do timestamp
     assert len(nome.split("_")[0]) <= MAX_FILENAME_BASE
+
+
+def test_iter_case_records_preserva_indice_e_semantica_de_get():
+    df = pd.DataFrame(
+        [{"titulo": "A", "prioridade": 1}, {"titulo": None, "prioridade": 2}],
+        index=[10, 20],
+    )
+
+    registros = list(text_utils.iter_case_records(df))
+
+    assert [indice for indice, _ in registros] == [10, 20]
+    assert registros[0][1] == {"titulo": "A", "prioridade": 1}
+    # Coluna existente com valor nulo não usa o padrão (igual a Series.get)
+    assert registros[1][1].get("titulo", "padrão") is None
+    assert registros[1][1].get("cenario", "padrão") == "padrão"
@@ -4,6 +4,7 @@ from unittest.mock import MagicMock, patch
 
 
 from qa_core import app
+from qa_core.plan_state import TestPlan
 
 
 def _build_session_state_para_historia_valida():
@@ -16,10 +17,7 @@ def _build_session_state_para_historia_valida():
             "user_story": "História original",
             "relatorio_analise_inicial": "  Relatório inicial  ",
         },
-        "test_plan_report": "  Plano completo  ",
-        "test_plan_report_intro": "Plano completo",
-        "test_plan_df_records": registros,
-        "test_plan_df_json": json.dumps(registros, ensure_ascii=False),
+        "test_plan": TestPlan(registros, summary="Plano completo"),
         "history_saved": False,
     }
 
@@ -33,7 +31,7 @@ def test_save_current_analysis_to_history_sem_dados_suficientes(
     mock_st.session_state = {
         "user_story_input": "",
         "analysis_state": {},
-        "test_plan_report": None,
+        "test_plan": None,
     }
 
     app._save_current_analysis_to_history()
@@ -56,6 +54,8 @@ def test_save_current_analysis_to_history_atualiza_existente(mock_st, mock_get_c
     mock_st.session_state = session_state
 
     app._save_current_analysis_to_history(update_existing=True)
+    # A atualização é gravada pela fila write-behind
+    assert app.get_history_writer().flush(timeout=5)
 
     update_calls = [
         mock_call
@@ -67,14 +67,17 @@ def test_save_current_analysis_to_history_atualiza_existente(mock_st, mock_get_c
     _, params = update_calls[0].args
     assert params[1] == "Como tester quero validar"
     assert params[2] == "Relatório inicial"
-    assert params[3] == "Plano completo"
+    # Relatório = sumário + cenários (visão Markdown do plano); sumário à parte
+    assert params[3].startswith("Plano completo\n\n---\n\n### 🧩 Caso padrão")
     assert params[4] == "Plano completo"
-    assert params[5] == session_state["test_plan_df_json"]
+    assert params[5] == 42
 
+    # Casos de teste não são regravados no update (edições são por linha)
     assert all(
-        "INSERT" not in mock_call.args[0]
+        "INSERT" not in mock_call.args[0] and "test_cases" not in mock_call.args[0]
         for mock_call in mock_cursor.execute.call_args_list
     )
+    mock_cursor.executemany.assert_not_called()
     mock_conn.commit.assert_called_once()
 
 
@@ -119,6 +122,77 @@ def test_save_current_analysis_to_history_erro_generico(
     assert kwargs["st_api"] is mock_st
 
 
+@patch("qa_core.database.get_db_connection")
+@patch("qa_core.app.st")
+def test_save_current_analysis_to_history_insere_casos_normalizados(
+    mock_st, mock_get_conn
+):
+    mock_cursor = MagicMock()
+    mock_cursor.lastrowid = 7
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_get_conn.return_value = mock_conn
+
+    session_state = _build_session_state_para_historia_valida()
+    mock_st.session_state = session_state
+
+    app._save_current_analysis_to_history()
+
+    sql, rows = mock_cursor.executemany.call_args.args
+    assert "INSERT INTO test_cases" in sql
+    assert rows == [
+        (7, 0, json.dumps(session_state["test_plan"].records[0], ensure_ascii=False))
+    ]
+    assert session_state["last_saved_id"] == 7
+
+
+@patch("qa_core.app.update_test_case_row")
+@patch("qa_core.app._submit_history_write")
+@patch("qa_core.app._save_current_analysis_to_history")
+@patch("qa_core.app.st")
+def test_save_scenario_edit_atualiza_somente_o_caso(
+    mock_st, mock_save, mock_submit, mock_update_row
+):
+    import pandas as pd
+
+    mock_st.session_state = {
+        "last_saved_id": 3,
+        "test_plan": TestPlan.from_dataframe(
+            pd.DataFrame(
+                [
+                    {"titulo": "A", "cenario": "Dado A"},
+                    {"titulo": "B", "cenario": "Dado B"},
+                ]
+            ),
+            summary="Resumo",
+        ),
+    }
+
+    app._save_scenario_edit(1, "Dado B editado")
+
+    operation = mock_submit.call_args.args[0]
+    assert mock_submit.call_args.kwargs["key"] == ("test_cases", 3, 1)
+    cursor = MagicMock()
+    operation(cursor)
+    mock_update_row.assert_called_once_with(
+        cursor, 3, 1, {"titulo": "B", "cenario": "Dado B editado"}
+    )
+    mock_save.assert_called_once_with(update_existing=True)
+
+
+@patch("qa_core.app.announce")
+@patch("qa_core.app.get_history_writer")
+@patch("qa_core.app.st")
+def test_announce_history_write_errors_da_sessao(mock_st, mock_writer, mock_announce):
+    mock_st.session_state = {"history_writer_owner": "sessao-1"}
+    mock_writer.return_value.drain_errors.return_value = ["database is locked"]
+
+    app._announce_history_write_errors()
+
+    mock_writer.return_value.drain_errors.assert_called_once_with("sessao-1")
+    assert mock_announce.call_args.args[1] == "error"
+
+
 @patch("qa_core.app._save_current_analysis_to_history", return_value="ok")
 def test_save_analysis_to_history_wrapper_chama_privado(mock_save):
     assert app.save_analysis_to_history(update_existing=True) == "ok"
@@ -155,9 +229,7 @@ def test_save_current_analysis_to_history_with_invalid_json_records(
             "user_story": "História",
             "relatorio_analise_inicial": "Relatório",
         },
-        "test_plan_report": "Plano",
-        "test_plan_df_records": invalid_records,
-        # Não define test_plan_df_json para forçar tentativa de conversão
+        "test_plan": TestPlan(invalid_records, summary="Plano"),
     }
 
     mock_st.session_state = session_state
@@ -0,0 +1,160 @@
+"""
+Chamadas à IA como jobs em segundo plano: acompanhamento entre reruns,
+retomada após a recarga da aba e reaproveitamento de resultados.
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from qa_core import app
+from qa_core.job_runner import get_job_runner
+
+USER_STORY = "Como tester, quero validar o fluxo para garantir a qualidade do produto"
+ANALISE = {"analise_da_us": {"avaliacao": "ok"}, "relatorio_analise_inicial": "R"}
+
+
+@pytest.fixture
+def st_com_url(mocked_st):
+    """Streamlit mockado com `query_params` de verdade (um dicionário)."""
+    mocked_st.query_params = {}
+    return mocked_st
+
+
+@pytest.fixture
+def jobs_em_thread(monkeypatch):
+    """Executor de jobs com threads (a fixture global o deixa síncrono)."""
+    monkeypatch.setenv("ANALYSIS_JOB_WORKERS", "1")
+
+
+def _aguardar(job_id, timeout=5.0):
+    job = get_job_runner().get(job_id)
+    limite = time.monotonic() + timeout
+    while not job.done and time.monotonic() < limite:
+        time.sleep(0.01)
+    return job
+
+
+def test_analise_em_andamento_sobrevive_aos_reruns(st_com_url, jobs_em_thread):
+    liberar = threading.Event()
+
+    def grafo_lento(user_story):
+        liberar.wait(5)
+        return ANALISE
+
+    st_com_url.session_state["user_story_input"] = USER_STORY
+    with (
+        patch("qa_core.app.accessible_button", return_value=True),
+        patch("qa_core.app.run_analysis_graph", side_effect=grafo_lento),
+    ):
+        app._render_user_story_input()
+
+    job_id = st_com_url.session_state["ai_job_id"]
+    assert st_com_url.query_params["job"] == job_id
+    assert "analysis_state" not in st_com_url.session_state
+    st_com_url.rerun.assert_called_once()
+
+    # Rerun durante a chamada: mostra o progresso no lugar do formulário
+    st_com_url.text_area.reset_mock()
+    app.render_main_analysis_page()
+    st_com_url.status.assert_called_with(
+        "🔮 O Oráculo está trabalhando...", expanded=True
+    )
+    st_com_url.fragment.assert_called_with(run_every=app._AI_JOB_POLL_INTERVAL)
+    st_com_url.text_area.assert_not_called()
+
+    liberar.set()
+    _aguardar(job_id)
+    app.render_main_analysis_page()
+
+    assert st_com_url.session_state["analysis_state"] == ANALISE
+    assert "ai_job_id" not in st_com_url.session_state
+    assert "job" not in st_com_url.query_params
+
+
+def test_recarga_da_aba_retoma_o_job_pela_url(st_com_url):
+    job = get_job_runner().submit("analysis", lambda us: ANALISE, USER_STORY)
+    st_com_url.query_params["job"] = job.id
+
+    app.render_main_analysis_page()
+
+    assert st_com_url.session_state["analysis_state"] == ANALISE
+    assert st_com_url.session_state["user_story_input"] == USER_STORY
+    assert st_com_url.session_state["show_generate_plan_button"] is False
+
+
+def test_resultado_concluido_nao_chama_a_ia_de_novo(st_com_url):
+    st_com_url.session_state["user_story_input"] = USER_STORY
+    with (
+        patch("qa_core.app.accessible_button", return_value=True),
+        patch("qa_core.app.run_analysis_graph", return_value=ANALISE) as mock_grafo,
+    ):
+        app._render_user_story_input()
+        # A sessão edita a análise; o resultado guardado no job não muda
+        st_com_url.session_state["analysis_state"]["analise_da_us"]["avaliacao"] = "x"
+        st_com_url.session_state.pop("analysis_state")
+        app._render_user_story_input()
+
+    mock_grafo.assert_called_once_with(USER_STORY)
+    assert st_com_url.session_state["analysis_state"] == ANALISE
+
+
+def test_falha_na_analise_e_anunciada(st_com_url):
+    st_com_url.session_state["user_story_input"] = USER_STORY
+    with (
+        patch("qa_core.app.accessible_button", return_value=True),
+        patch("qa_core.app.run_analysis_graph", side_effect=RuntimeError("timeout")),
+    ):
+        app._render_user_story_input()
+
+    st_com_url.error.assert_called_with(
+        "O Oráculo não conseguiu analisar a User Story. Tente novamente."
+    )
+    assert "analysis_state" not in st_com_url.session_state
+    assert "job" not in st_com_url.query_params
+
+
+def test_plano_concluido_apos_recarga_restaura_a_analise(st_com_url):
+    analysis_state = {**ANALISE, "user_story": USER_STORY}
+    resultado = {
+        "plano_e_casos_de_teste": {
+            "casos_de_teste_gherkin": [{"titulo": "Login", "cenario": ["Dado"]}]
+        },
+        "relatorio_plano_de_testes": "### Plano",
+    }
+    job = get_job_runner().submit("test_plan", lambda state: resultado, analysis_state)
+    st_com_url.query_params["job"] = job.id
+
+    with patch("qa_core.app._save_current_analysis_to_history") as mock_save:
+        app.render_main_analysis_page()
+
+    assert st_com_url.session_state["analysis_state"] == analysis_state
+    assert st_com_url.session_state["user_story_input"] == USER_STORY
+    assert st_com_url.session_state["analysis_finished"] is True
+    assert st_com_url.session_state["test_plan"].df.iloc[0]["titulo"] == "Login"
+    mock_save.assert_called_once()
+
+
+def test_watch_ai_job_reexecuta_a_pagina_ao_fim(mocked_st, jobs_em_thread):
+    liberar = threading.Event()
+    job = get_job_runner().submit("analysis", lambda: liberar.wait(5))
+
+    app._watch_ai_job(job.id)
+    mocked_st.rerun.assert_not_called()
+    mocked_st.caption.assert_called_once()
+
+    liberar.set()
+    _aguardar(job.id)
+    app._watch_ai_job(job.id)
+    mocked_st.rerun.assert_called_once()
+
+
+def test_id_desconhecido_na_url_e_ignorado(st_com_url):
+    st_com_url.query_params["job"] = "inexistente"
+    st_com_url.session_state.update({"analysis_state": None})
+
+    assert app._render_ai_job() is False
+    assert "job" not in st_com_url.query_params
+    st_com_url.status.assert_not_called()
@@ -1,26 +1,53 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 import pandas as pd
-from qa_core import app
+from qa_core import app, exports
+from qa_core.plan_state import TestPlan
+
+
+def _select(mocked_st, formato):
+    mocked_st.radio.return_value = formato
+
+
+def test_render_export_previews_nao_gera_nada_sem_formato_escolhido(mocked_st):
+    df = pd.DataFrame([{"titulo": "Teste"}])
+    mocked_st.session_state.update({"test_plan": TestPlan.from_dataframe(df)})
+    _select(mocked_st, None)
+
+    with (
+        patch("qa_core.app.stream_csv_azure_from_df") as mock_azure,
+        patch("qa_core.app.preparar_df_para_zephyr_xlsx") as mock_zephyr,
+    ):
+        app._render_export_previews()
+
+    mock_azure.assert_not_called()
+    mock_zephyr.assert_not_called()
+    mocked_st.code.assert_not_called()
 
 
 def test_render_export_previews_azure_success(mocked_st):
     # Setup
     df = pd.DataFrame([{"titulo": "Teste"}])
     mocked_st.session_state.update(
-        {"test_plan_df": df, "area_path_input": "Area", "assigned_to_input": "User"}
+        {
+            "test_plan": TestPlan.from_dataframe(df),
+            "area_path_input": "Area",
+            "assigned_to_input": "User",
+        }
     )
-
-    # Mock tabs
-    mock_tabs = [MagicMock() for _ in range(5)]
-    mocked_st.tabs.return_value = mock_tabs
-
-    with patch(
-        "qa_core.app.gerar_csv_azure_from_df", return_value=b"ID,Title\n1,Teste"
-    ) as mock_azure:
+    _select(mocked_st, "Azure CSV")
+
+    with (
+        patch(
+            "qa_core.app.stream_csv_azure_from_df",
+            return_value=iter([b"\xef\xbb\xbf", b"ID,Title\n1,Teste"]),
+        ) as mock_azure,
+        patch("qa_core.app.stream_csv_testrail_from_df") as mock_testrail,
+    ):
         app._render_export_previews()
 
         # Verify call
         mock_azure.assert_called_once()
+        mock_testrail.assert_not_called()
         # Verify decoding and display
         mocked_st.code.assert_any_call("ID,Title\n1,Teste", language="csv")
 
@@ -30,18 +57,16 @@ def test_render_export_previews_testrail_success(mocked_st):
     df = pd.DataFrame([{"titulo": "Teste"}])
     mocked_st.session_state.update(
         {
-            "test_plan_df": df,
+            "test_plan": TestPlan.from_dataframe(df),
             "testrail_section": "Section",
             "testrail_priority": "Medium",
         }
     )
-
-    mock_tabs = [MagicMock() for _ in range(5)]
-    mocked_st.tabs.return_value = mock_tabs
+    _select(mocked_st, "TestRail CSV")
 
     with patch(
-        "qa_core.app.gerar_csv_testrail_from_df",
-        return_value=b"Title,Section\nTeste,Section",
+        "qa_core.app.stream_csv_testrail_from_df",
+        return_value=iter([b"Title,Section\nTeste,Section"]),
     ) as mock_testrail:
         app._render_export_previews()
 
@@ -54,20 +79,18 @@ def test_render_export_previews_xray_success(mocked_st):
     df = pd.DataFrame([{"titulo": "Teste"}])
     mocked_st.session_state.update(
         {
-            "test_plan_df": df,
+            "test_plan": TestPlan.from_dataframe(df),
             "xray_test_folder": "Folder",
             "xray_labels": "Label1",
             "xray_priority": "High",
             "xray_custom_fields": "Key=Value",
         }
     )
-
-    mock_tabs = [MagicMock() for _ in range(5)]
-    mocked_st.tabs.return_value = mock_tabs
+    _select(mocked_st, "Xray CSV")
 
     with patch(
-        "qa_core.app.gerar_csv_xray_from_df",
-        return_value=b"Summary,Folder\nTeste,Folder",
+        "qa_core.app.stream_csv_xray_from_df",
+        return_value=iter([b"Summary,Folder\nTeste,Folder"]),
     ) as mock_xray:
         app._render_export_previews()
 
@@ -82,16 +105,95 @@ def test_render_export_previews_xray_success(mocked_st):
 def test_render_export_previews_error_handling(mocked_st):
     # Setup
     df = pd.DataFrame([{"titulo": "Teste"}])
-    mocked_st.session_state.update({"test_plan_df": df})
-
-    mock_tabs = [MagicMock() for _ in range(5)]
-    mocked_st.tabs.return_value = mock_tabs
+    mocked_st.session_state.update({"test_plan": TestPlan.from_dataframe(df)})
+    _select(mocked_st, "Azure CSV")
 
     with patch(
-        "qa_core.app.gerar_csv_azure_from_df", side_effect=Exception("Erro simulado")
+        "qa_core.app.stream_csv_azure_from_df", side_effect=Exception("Erro simulado")
     ):
         app._render_export_previews()
 
         mocked_st.warning.assert_any_call(
             "⚠️ Não foi possível gerar o preview do Azure: Erro simulado"
         )
+
+
+def test_csv_preview_consome_so_os_blocos_necessarios():
+    consumidos = []
+
+    def chunks():
+        for i in range(100):
+            consumidos.append(i)
+            yield b"".join(f"linha {i}-{j}\r\n".encode() for j in range(10))
+
+    preview = app._csv_preview(chunks(), max_lines=25)
+
+    assert preview.splitlines()[-1] == "linha 2-4"
+    assert len(preview.splitlines()) == 25
+    assert consumidos == [0, 1, 2]
+
+
+def test_render_export_previews_azure_gera_so_as_primeiras_linhas(mocked_st):
+    df = pd.DataFrame(
+        [
+            {"titulo": f"Caso {i}", "cenario": "Dado algo\nQuando ajo\nEntão vejo"}
+            for i in range(1_000)
+        ]
+    )
+    mocked_st.session_state.update({"test_plan": TestPlan.from_dataframe(df)})
+    _select(mocked_st, "Azure CSV")
+
+    with patch(
+        "qa_core.exports.parse_cenario", wraps=exports.parse_cenario
+    ) as mock_parse:
+        app._render_export_previews()
+
+    preview = mocked_st.code.call_args[0][0]
+    assert len(preview.splitlines()) == app.PREVIEW_CSV_LINES
+    assert preview.startswith("ID")
+    # Só os casos necessários para as primeiras linhas são processados
+    assert mock_parse.call_count < 50
+
+
+def test_render_export_previews_zephyr_processa_apenas_casos_iniciais(mocked_st):
+    df = pd.DataFrame(
+        [{"titulo": f"Caso {i}", "cenario": "Dado algo"} for i in range(500)]
+    )
+    mocked_st.session_state.update({"test_plan": TestPlan.from_dataframe(df)})
+    _select(mocked_st, "Zephyr (Dados)")
+
+    with patch(
+        "qa_core.app.preparar_df_para_zephyr_xlsx",
+        wraps=app.preparar_df_para_zephyr_xlsx,
+    ) as mock_zephyr:
+        app._render_export_previews()
+
+    processed = sum(len(call.args[0]) for call in mock_zephyr.call_args_list)
+    assert processed == app.PREVIEW_ZEPHYR_ROWS
+    shown = mocked_st.dataframe.call_args[0][0]
+    assert len(shown) == app.PREVIEW_ZEPHYR_ROWS
+
+
+def test_render_export_previews_reaproveita_cache_em_reruns(mocked_st):
+    df = pd.DataFrame([{"titulo": "Teste", "cenario": "Dado algo"}])
+    mocked_st.session_state.update({"test_plan": TestPlan.from_dataframe(df)})
+    _select(mocked_st, "Azure CSV")
+
+    with patch(
+        "qa_core.app.stream_csv_azure_from_df",
+        side_effect=lambda *a, **k: iter([b"ID,Title"]),
+    ) as mock_azure:
+        app._render_export_previews()
+        app._render_export_previews()
+        mock_azure.assert_called_once()
+
+        # Opções diferentes geram um novo artefato
+        mocked_st.session_state["area_path_input"] = "Outra/Area"
+        app._render_export_previews()
+        assert mock_azure.call_count == 2
+
+        # Alterar o plano invalida o cache
+        with patch("qa_core.pdf_generator.generate_pdf_report", return_value=b"%PDF"):
+            app._update_test_plan_outputs(df.copy())
+        app._render_export_previews()
+        assert mock_azure.call_count == 3
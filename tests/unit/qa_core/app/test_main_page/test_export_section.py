@@ -3,6 +3,7 @@ from unittest.mock import MagicMock, patch
 import pandas as pd
 
 from qa_core import app
+from qa_core.plan_state import TestPlan
 
 
 @patch("qa_core.app._render_export_previews")
@@ -18,7 +19,7 @@ def test_render_export_section_com_campos_xray_e_testrail(mock_preview, mocked_s
     )
     mocked_st.session_state.update(
         {
-            "test_plan_df": df,
+            "test_plan": TestPlan.from_dataframe(df),
             "xray_test_folder": "QA/FOLDER",
             "xray_labels": "Regression",
             "xray_priority": "High",
@@ -69,3 +70,207 @@ def test_render_export_section_com_campos_xray_e_testrail(mock_preview, mocked_s
     assert kwargs["mime"] == "text/csv"
     assert kwargs["use_container_width"] is True
     assert kwargs["file_name"].endswith("testrail.csv")
+
+
+def test_render_export_bundle_gera_somente_apos_solicitacao(mocked_st):
+    df = pd.DataFrame([{"titulo": "Caso", "cenario": "Dado algo"}])
+    options = {"azure_csv": {"area_path": "Area", "assigned_to": "QA"}}
+    plano = TestPlan.from_dataframe(df)
+    plano.pdf = b"%PDF"
+    mocked_st.session_state.update({"user_story_input": "US", "test_plan": plano})
+
+    with patch(
+        "qa_core.utils.exporters.export_bundle_zip", return_value=b"PK-pacote"
+    ) as mock_bundle:
+        app._render_export_bundle(df, options)
+        mock_bundle.assert_not_called()
+        mocked_st.download_button.assert_not_called()
+
+        # Clique em "Preparar pacote completo"
+        mocked_st.button.call_args.kwargs["on_click"]()
+        app._render_export_bundle(df, options)
+        app._render_export_bundle(df, options)  # rerun usa o cache
+
+    mock_bundle.assert_called_once()
+    assert mock_bundle.call_args.kwargs["options"] == options
+    assert mock_bundle.call_args.kwargs["pdf_bytes"] == b"%PDF"
+    label, payload = mocked_st.download_button.call_args[0][:2]
+    assert label == "📦 Exportar tudo (.zip)"
+    assert payload == b"PK-pacote"
+    assert mocked_st.download_button.call_args.kwargs["file_name"].endswith(
+        "pacote.zip"
+    )
+
+    app._invalidate_export_cache()
+    assert "export_bundle_requested" not in mocked_st.session_state
+
+
+def test_pdf_gerado_sob_demanda_e_reaproveitado_pelo_conteudo(mocked_st):
+    df = pd.DataFrame([{"titulo": "Caso", "cenario": "Dado algo"}])
+    mocked_st.session_state.update(
+        {
+            "analysis_state": {"relatorio_analise_inicial": "Relatório"},
+            "test_plan": TestPlan.from_dataframe(df, summary="Plano"),
+        }
+    )
+    col_pdf = MagicMock()
+
+    with patch(
+        "qa_core.pdf_generator.generate_pdf_report", return_value=b"%PDF"
+    ) as mock_pdf:
+        # Editar o plano só descarta a visão PDF (gerada sob demanda)
+        app._update_test_plan_outputs(df.copy())
+        assert mocked_st.session_state["test_plan"].pdf is None
+
+        app._render_pdf_export(col_pdf)
+        mock_pdf.assert_not_called()
+        col_pdf.download_button.assert_not_called()
+
+        # Clique em "Preparar PDF"
+        col_pdf.button.call_args.kwargs["on_click"]()
+        app._render_pdf_export(col_pdf)
+        app._render_pdf_export(col_pdf)  # rerun usa os bytes já gerados
+
+        # Mesma edição (mesmo conteúdo): o PDF sai do cache
+        app._update_test_plan_outputs(df.copy())
+        app._render_pdf_export(col_pdf)
+
+    mock_pdf.assert_called_once()
+    assert col_pdf.download_button.call_count == 3
+    label, payload = col_pdf.download_button.call_args[0][:2]
+    assert label == "📄 Relatório (.pdf)"
+    assert payload == b"%PDF"
+    assert mocked_st.session_state["test_plan"].pdf == b"%PDF"
+
+
+def test_edicao_agenda_pre_geracao_do_pdf(mocked_st):
+    df = pd.DataFrame([{"titulo": "Caso", "cenario": "Dado algo"}])
+    mocked_st.session_state.update(
+        {"analysis_state": {"relatorio_analise_inicial": "Relatório"}}
+    )
+
+    with (
+        patch("qa_core.app.schedule_pdf_build") as mock_schedule,
+        patch(
+            "qa_core.pdf_generator.generate_pdf_report", return_value=b"%PDF"
+        ) as mock_pdf,
+    ):
+        app._update_test_plan_outputs(df)
+        slot, key, builder = mock_schedule.call_args[0]
+        mock_pdf.assert_not_called()
+
+        assert slot == mocked_st.session_state["pdf_build_slot"]
+        assert key == app._export_plan_fingerprint()
+        assert builder() == b"%PDF"
+    analysis_report, casos_usados = mock_pdf.call_args[0]
+    assert analysis_report == "Relatório"
+    esperado = [{"titulo": "Caso", "cenario": "Dado algo"}]
+    assert casos_usados == esperado
+    # Edições seguintes trocam a lista do plano: a da thread não muda
+    mocked_st.session_state["test_plan"].update_case(0, "cenario", "Dado outro")
+    assert casos_usados == esperado
+
+
+def test_pdf_conta_a_exportacao_so_no_download(mocked_st):
+    df = pd.DataFrame([{"titulo": "Caso", "cenario": "Dado algo"}])
+    mocked_st.session_state.update(
+        {"analysis_state": {"relatorio_analise_inicial": "Relatório"}}
+    )
+    collector = MagicMock()
+
+    with (
+        patch("qa_core.app.get_metrics_collector", return_value=collector),
+        patch("qa_core.app.schedule_pdf_build") as mock_schedule,
+        patch("qa_core.pdf_generator.generate_pdf_report", return_value=b"%PDF"),
+    ):
+        app._update_test_plan_outputs(df)
+        builder = mock_schedule.call_args[0][2]
+        # Pré-geração especulativa: nenhuma métrica de exportação
+        assert builder() == b"%PDF"
+        collector.record_export.assert_not_called()
+        collector.time_export.assert_not_called()
+
+        col_pdf = MagicMock()
+        mocked_st.session_state["pdf_report_requested"] = True
+        app._render_pdf_export(col_pdf)
+        collector.record_export.assert_not_called()
+        collector.time_export.assert_called_once_with(format="pdf")
+
+        kwargs = col_pdf.download_button.call_args.kwargs
+        kwargs["on_click"](*kwargs["args"])
+    collector.record_export.assert_called_once_with(format="pdf", status="success")
+
+
+def test_markdown_conta_a_exportacao_no_clique_e_nao_a_cada_rerun(mocked_st):
+    col_md = MagicMock()
+    mocked_st.columns.side_effect = lambda n: (
+        col_md,
+        *(MagicMock() for _ in range(n - 1)),
+    )
+    mocked_st.session_state.update(
+        {"analysis_state": {"relatorio_analise_inicial": "Relatório"}}
+    )
+    collector = MagicMock()
+
+    with patch("qa_core.app.get_metrics_collector", return_value=collector):
+        app._render_basic_exports()
+        app._render_basic_exports()
+        collector.record_export.assert_not_called()
+
+        kwargs = col_md.download_button.call_args.kwargs
+        kwargs["on_click"](*kwargs["args"])
+    collector.record_export.assert_called_once_with(format="markdown", status="success")
+
+
+def _pdf_solicitado(mocked_st):
+    mocked_st.session_state.update(
+        {
+            "analysis_state": {"relatorio_analise_inicial": "Relatório"},
+            "test_plan": TestPlan.from_dataframe(
+                pd.DataFrame([{"titulo": "Caso", "cenario": "Dado"}]), summary="Plano"
+            ),
+            "pdf_report_requested": True,
+        }
+    )
+
+
+def test_pdf_mostra_progresso_enquanto_o_pool_renderiza(mocked_st):
+    _pdf_solicitado(mocked_st)
+    col_pdf = MagicMock()
+
+    def _render(analysis_report, df, *, on_progress):
+        on_progress()
+        return b"%PDF"
+
+    with patch("qa_core.app.render_pdf_report", side_effect=_render):
+        app._render_pdf_export(col_pdf)
+
+    assert col_pdf.button.call_args.kwargs["key"] == "pdf_report_cancel"
+    status = col_pdf.empty.return_value
+    assert "Gerando PDF" in status.caption.call_args[0][0]
+    status.empty.assert_called_once()
+    assert col_pdf.download_button.call_args[0][1] == b"%PDF"
+
+    # Cancelar volta ao botão "Preparar PDF"
+    col_pdf.button.call_args.kwargs["on_click"]()
+    assert "pdf_report_requested" not in mocked_st.session_state
+
+
+def test_pdf_tempo_limite_avisa_e_permite_nova_tentativa(mocked_st):
+    from qa_core.render_pool import RenderTimeoutError
+
+    _pdf_solicitado(mocked_st)
+    col_pdf = MagicMock()
+
+    with (
+        patch(
+            "qa_core.app.render_pdf_report",
+            side_effect=RenderTimeoutError("excedeu"),
+        ),
+        patch("qa_core.app.announce") as mock_announce,
+    ):
+        app._render_pdf_export(col_pdf)
+
+    mock_announce.assert_called_once()
+    assert "pdf_report_requested" not in mocked_st.session_state
+    assert col_pdf.download_button.call_args.kwargs["disabled"] is True
@@ -1,9 +1,9 @@
-import json
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 
 from qa_core import app
+from qa_core.plan_state import TestPlan
 
 FOUR_COLUMN_COUNT = 4
 TWO_COLUMN_COUNT = 2
@@ -44,9 +44,7 @@ def test_render_main_analysis_page_downloads_sem_dados(mock_st):
     mock_st.session_state = {
         "analysis_finished": True,
         "analysis_state": {"relatorio_analise_inicial": "Fake"},
-        "test_plan_report": None,
-        "test_plan_df": None,
-        "pdf_report_bytes": None,
+        "test_plan": None,
         "user_story_input": "História teste",
     }
 
@@ -129,60 +127,37 @@ def test_render_main_page_edicao_e_salvamento_gherkin(mocked_st):
     Testa que cenários são exibidos em modo de visualização por padrão.
     Com a nova UX, edições só são salvas quando o usuário clica em 'Confirmar'.
     """
+    plano = TestPlan(
+        [
+            {
+                "id": 1,
+                "titulo": "Login válido",
+                "prioridade": "Alta",
+                "criterio_de_aceitacao_relacionado": "Usuário autenticado",
+                "justificativa_acessibilidade": "",
+                "cenario": "Cenário antigo",
+            }
+        ],
+        summary="Resumo original",
+    )
+    relatorio_original = plano.markdown
     mocked_st.session_state.update(
         {
             "analysis_finished": True,
-            "test_plan_df": pd.DataFrame(
-                [
-                    {
-                        "id": 1,
-                        "titulo": "Login válido",
-                        "prioridade": "Alta",
-                        "criterio_de_aceitacao_relacionado": "Usuário autenticado",
-                        "justificativa_acessibilidade": "",
-                        "cenario": "Cenário antigo",
-                    }
-                ]
-            ),
-            "test_plan_report": "### 🧩 Login válido\n```gherkin\nCenário antigo\n```",
-            "test_plan_report_intro": "Resumo original",
-            "test_plan_df_records": [
-                {
-                    "id": 1,
-                    "titulo": "Login válido",
-                    "prioridade": "Alta",
-                    "criterio_de_aceitacao_relacionado": "Usuário autenticado",
-                    "justificativa_acessibilidade": "",
-                    "cenario": "Cenário antigo",
-                }
-            ],
-            "test_plan_df_json": json.dumps(
-                [
-                    {
-                        "id": 1,
-                        "titulo": "Login válido",
-                        "prioridade": "Alta",
-                        "criterio_de_aceitacao_relacionado": "Usuário autenticado",
-                        "justificativa_acessibilidade": "",
-                        "cenario": "Cenário antigo",
-                    }
-                ],
-                ensure_ascii=False,
-            ),
+            "test_plan": plano,
             "user_story_input": "US de login",
             "analysis_state": {"relatorio_analise_inicial": "Análise mock"},
         }
     )
 
     # Cenários agora são exibidos em modo de visualização por padrão (st.code)
-    # Não há auto-save, então o relatório não deve mudar
+    # Não há auto-save, então o plano não deve mudar
     app.render_main_analysis_page()
 
-    # Verifica que o relatório permanece inalterado (modo visualização)
-    assert (
-        mocked_st.session_state["test_plan_report"]
-        == "### 🧩 Login válido\n```gherkin\nCenário antigo\n```"
-    )
+    # Verifica que o plano permanece inalterado (modo visualização)
+    assert mocked_st.session_state["test_plan"] is plano
+    assert plano.records[0]["cenario"] == "Cenário antigo"
+    assert plano.markdown == relatorio_original
     # st.code deve ter sido chamado para exibir o cenário
     mocked_st.code.assert_called()
 
@@ -291,7 +266,9 @@ def test_render_main_page_gera_plano_com_sucesso(mocked_st):
                 "relatorio_plano_de_testes": "### Plano",
             },
         ),
-        patch("qa_core.app.generate_pdf_report", return_value=b"pdf-gerado"),
+        patch(
+            "qa_core.pdf_generator.generate_pdf_report", return_value=b"pdf-gerado"
+        ) as mock_pdf,
         patch("qa_core.app._save_current_analysis_to_history") as mock_save,
         patch(
             "qa_core.app.accessible_text_area",
@@ -302,11 +279,12 @@ def test_render_main_page_gera_plano_com_sucesso(mocked_st):
 
     assert mocked_st.session_state["analysis_finished"] is True
     assert mocked_st.session_state["history_saved"] is True
-    assert (
-        mocked_st.session_state["test_plan_df"].iloc[0]["cenario"]
-        == "Dado\nQuando\nEntão"
-    )
-    assert mocked_st.session_state["pdf_report_bytes"] == b"pdf-gerado"
+    plano = mocked_st.session_state["test_plan"]
+    assert plano.df.iloc[0]["cenario"] == "Dado\nQuando\nEntão"
+    assert plano.summary == "### Plano"
+    # O PDF fica para o download (ou para a pré-geração em segundo plano)
+    mock_pdf.assert_not_called()
+    assert plano.pdf is None
     mock_save.assert_called_once()
     mocked_st.rerun.assert_called()
 
@@ -316,20 +294,21 @@ def test_render_main_page_sem_cenario_dispara_aviso(mocked_st):
         {
             "analysis_finished": True,
             "analysis_state": {"relatorio_analise_inicial": "Relatório"},
-            "test_plan_df": pd.DataFrame(
-                [
-                    {
-                        "id": "CT-1",
-                        "titulo": "Caso",
-                        "prioridade": "Alta",
-                        "criterio_de_aceitacao_relacionado": "Critério",
-                        "justificativa_acessibilidade": "",
-                        "cenario": "",
-                    }
-                ]
+            "test_plan": TestPlan.from_dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "id": "CT-1",
+                            "titulo": "Caso",
+                            "prioridade": "Alta",
+                            "criterio_de_aceitacao_relacionado": "Critério",
+                            "justificativa_acessibilidade": "",
+                            "cenario": "",
+                        }
+                    ]
+                ),
+                summary="### Plano",
             ),
-            "test_plan_report": "### Plano",
-            "pdf_report_bytes": b"",
             "user_story_input": "História",
         }
     )
@@ -344,6 +323,12 @@ def test_render_main_page_sem_cenario_dispara_aviso(mocked_st):
     )
 
 
+def _plano_com_pdf(df):
+    plano = TestPlan.from_dataframe(df, summary="Relatório")
+    plano.pdf = b"bytes"
+    return plano
+
+
 def test_render_main_page_dispara_confirmacao_exclusao(mocked_st):
     df = pd.DataFrame(
         [
@@ -362,14 +347,7 @@ def test_render_main_page_dispara_confirmacao_exclusao(mocked_st):
         {
             "analysis_finished": True,
             "analysis_state": {"relatorio_analise_inicial": "Relatório"},
-            "test_plan_df": df,
-            "test_plan_report": "Relatório",
-            "test_plan_report_intro": "Relatório",
-            "test_plan_df_records": df.to_dict(orient="records"),
-            "test_plan_df_json": json.dumps(
-                df.to_dict(orient="records"), ensure_ascii=False
-            ),
-            "pdf_report_bytes": b"bytes",
+            "test_plan": _plano_com_pdf(df),
         }
     )
 
@@ -413,14 +391,7 @@ def test_render_main_page_confirma_exclusao_remove_cenario(mocked_st):
         {
             "analysis_finished": True,
             "analysis_state": {"relatorio_analise_inicial": "Relatório"},
-            "test_plan_df": df,
-            "test_plan_report": "Relatório",
-            "test_plan_report_intro": "Relatório",
-            "test_plan_df_records": df.to_dict(orient="records"),
-            "test_plan_df_json": json.dumps(
-                df.to_dict(orient="records"), ensure_ascii=False
-            ),
-            "pdf_report_bytes": b"bytes",
+            "test_plan": _plano_com_pdf(df),
             "pending_case_deletion": {
                 "row_index": 0,
                 "label": "CT-1 — Caso 1",
@@ -435,22 +406,24 @@ def test_render_main_page_confirma_exclusao_remove_cenario(mocked_st):
     )
 
     with (
-        patch("qa_core.app.generate_pdf_report", return_value=b"novo_pdf") as mock_pdf,
+        patch(
+            "qa_core.pdf_generator.generate_pdf_report", return_value=b"novo_pdf"
+        ) as mock_pdf,
         patch("qa_core.app._save_current_analysis_to_history") as mock_save,
     ):
         app.render_main_analysis_page()
 
-    updated_df = mocked_st.session_state["test_plan_df"]
+    plano = mocked_st.session_state["test_plan"]
+    updated_df = plano.df
     assert len(updated_df) == 1
     assert updated_df.iloc[0]["id"] == "CT-2"
     assert mocked_st.session_state.get("pending_case_deletion") is None
     mock_save.assert_called_once_with(update_existing=True)
-    mock_pdf.assert_called_once()
-    assert mocked_st.session_state["pdf_report_bytes"] == b"novo_pdf"
-    assert mocked_st.session_state["test_plan_df_records"] == [
-        df.to_dict(orient="records")[1]
-    ]
-    assert "### 🧩" in mocked_st.session_state["test_plan_report"]
-    assert "Caso 2" in mocked_st.session_state["test_plan_report"]
+    mock_pdf.assert_not_called()
+    # DataFrame, registros, Markdown e PDF mudam juntos
+    assert plano.pdf is None
+    assert plano.records == [df.to_dict(orient="records")[1]]
+    assert "### 🧩" in plano.markdown
+    assert "Caso 2" in plano.markdown
     mocked_st.toast.assert_called_with("🗑️ Cenário excluído com sucesso.")
     mocked_st.rerun.assert_called()
@@ -4,10 +4,12 @@ import pandas as pd
 import pytest
 
 from qa_core import app
+from qa_core.plan_state import TestPlan
 from tests.fixtures.datasets import (
     TEST_ANALYSIS_STATE,
     TEST_DF_BASIC,
     TEST_EDIT_STATE,
+    TEST_PLAN_REPORT,
     TEST_SESSION_STATE_FINISHED,
 )
 
@@ -55,7 +57,7 @@ def test_nao_encerrar_fluxo(mock_save, mock_streamlit):
     mock_streamlit.session_state["analysis_finished"] = False
     mock_streamlit.session_state["analysis_state"] = make_analysis_state()
     mock_streamlit.session_state["show_generate_plan_button"] = True
-    mock_streamlit.session_state["test_plan_report"] = ""
+    mock_streamlit.session_state["test_plan"] = None
 
     cols = mock_streamlit.columns([1, 1, 2])
     cols[0].button.return_value = False
@@ -65,7 +67,7 @@ def test_nao_encerrar_fluxo(mock_save, mock_streamlit):
 
 
 @patch("qa_core.app.save_analysis_to_history")
-@patch("qa_core.app.generate_pdf_report", return_value=b"fakepdf")
+@patch("qa_core.pdf_generator.generate_pdf_report", return_value=b"fakepdf")
 @patch("qa_core.app.run_test_plan_graph")
 def test_sim_gerar_plano(mock_run, mock_pdf, mock_save, mock_streamlit):
     mock_streamlit.session_state["analysis_finished"] = False
@@ -90,7 +92,7 @@ def test_sim_gerar_plano(mock_run, mock_pdf, mock_save, mock_streamlit):
 def test_nova_analise_button(mock_reset, mock_streamlit):
     mock_streamlit.session_state["analysis_finished"] = True
     mock_streamlit.session_state["analysis_state"] = make_analysis_state()
-    mock_streamlit.session_state["test_plan_report"] = "Plano final"
+    mock_streamlit.session_state["test_plan"] = TestPlan([], summary="Plano final")
     mock_streamlit.session_state["history_saved"] = True
 
     def button_side_effect(*args, **kwargs):
@@ -150,7 +152,9 @@ def test_salvar_edicao_formulario(mock_streamlit):
 def test_render_main_analysis_page_exportadores(mock_render_export, mock_streamlit):
     test_df = pd.DataFrame(TEST_DF_BASIC)
     mock_streamlit.session_state.update(TEST_SESSION_STATE_FINISHED.copy())
-    mock_streamlit.session_state["test_plan_df"] = test_df
+    mock_streamlit.session_state["test_plan"] = TestPlan.from_dataframe(
+        test_df, summary=TEST_PLAN_REPORT
+    )
 
     app.render_main_analysis_page()
 
@@ -1,6 +1,9 @@
 from unittest.mock import patch
 
+import pytest
+
 from qa_core import app
+from qa_core.graph_cache import graph_cache_stats
 
 
 def test_run_analysis_graph():
@@ -25,3 +28,52 @@ def test_run_test_plan_graph():
         args, _ = mock_grafo.invoke.call_args
         assert args[0]["analise"] == "x"
         assert "trace_id" in args[0]
+
+
+@pytest.fixture
+def caches_dos_grafos_vazios():
+    app._cached_analysis_graph.clear()
+    app._cached_test_plan_graph.clear()
+    graph_cache_stats.reset()
+    yield
+    app._cached_analysis_graph.clear()
+    app._cached_test_plan_graph.clear()
+    graph_cache_stats.reset()
+
+
+def test_plano_reaproveita_o_cache_com_trace_id_diferente(caches_dos_grafos_vazios):
+    analise = {"user_story": "US", "analise_da_us": {"riscos": ["a", "b"]}}
+    with patch("qa_core.app.grafo_plano_testes") as mock_grafo:
+        mock_grafo.invoke.return_value = {"plano": True}
+        primeiro = app.run_test_plan_graph({**analise, "trace_id": "t1"})
+        segundo = app.run_test_plan_graph({**analise, "trace_id": "t2"})
+
+    assert primeiro == segundo == {"plano": True}
+    mock_grafo.invoke.assert_called_once()
+    assert graph_cache_stats.misses == {"test_plan": 1}
+    assert graph_cache_stats.hits == {"test_plan": 1}
+
+
+def test_analise_diferente_nao_reaproveita_o_cache(caches_dos_grafos_vazios):
+    with patch("qa_core.app.grafo_plano_testes") as mock_grafo:
+        mock_grafo.invoke.return_value = {"plano": True}
+        app.run_test_plan_graph({"user_story": "US", "analise_da_us": {"r": 1}})
+        app.run_test_plan_graph({"user_story": "US", "analise_da_us": {"r": 2}})
+
+    assert mock_grafo.invoke.call_count == 2
+    assert graph_cache_stats.misses == {"test_plan": 2}
+
+
+def test_analise_da_mesma_us_e_contabilizada_como_hit(caches_dos_grafos_vazios):
+    with (
+        patch("qa_core.app.grafo_analise") as mock_grafo,
+        patch("qa_core.graph_cache.get_metrics_collector") as mock_metrics,
+    ):
+        mock_grafo.invoke.return_value = {"ok": True}
+        app.run_analysis_graph("US Teste\r\n")
+        app.run_analysis_graph("US Teste")
+
+    mock_grafo.invoke.assert_called_once()
+    mock_metrics.return_value.record_graph_cache.assert_called_with(
+        graph="analysis", result="hit"
+    )
@@ -0,0 +1,140 @@
+"""
+Testes para o cache de artefatos de exportação e de fragmentos por caso.
+"""
+
+import pandas as pd
+
+from qa_core.export_cache import (
+    CaseFragmentCache,
+    ExportArtifactCache,
+    artifact_key,
+    case_key,
+    plan_fingerprint,
+    render_fragment,
+)
+
+
+def test_plan_fingerprint_separa_as_partes():
+    assert plan_fingerprint("ab", "") != plan_fingerprint("a", "b")
+    assert plan_fingerprint(None, "x") == plan_fingerprint("", "x")
+
+
+def test_artifact_key_considera_opcoes_sem_depender_da_ordem():
+    fp = plan_fingerprint("plano")
+
+    assert artifact_key("azure", fp, {"a": 1, "b": 2}) == artifact_key(
+        "azure", fp, {"b": 2, "a": 1}
+    )
+    assert artifact_key("azure", fp, {"a": 1}) != artifact_key("azure", fp, {"a": 2})
+    assert artifact_key("azure", fp) != artifact_key("xray", fp)
+
+
+def test_get_or_build_gera_uma_unica_vez():
+    cache = ExportArtifactCache()
+    calls = []
+
+    def builder():
+        calls.append(1)
+        return b"conteudo"
+
+    for _ in range(3):
+        assert cache.get_or_build("md", "fp", builder) == b"conteudo"
+
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_erro_no_builder_nao_fica_em_cache():
+    cache = ExportArtifactCache()
+
+    def failing():
+        raise ValueError("falhou")
+
+    try:
+        cache.get_or_build("md", "fp", failing)
+    except ValueError:
+        pass
+
+    assert len(cache) == 0
+    assert cache.get_or_build("md", "fp", lambda: "ok") == "ok"
+
+
+def test_limites_de_itens_e_bytes_descartam_os_mais_antigos():
+    cache = ExportArtifactCache(max_entries=2, max_bytes=10)
+
+    cache.get_or_build("a", "fp", lambda: b"1234")
+    cache.get_or_build("b", "fp", lambda: b"1234")
+    cache.get_or_build("a", "fp", lambda: b"nunca")  # "a" vira o mais recente
+    cache.get_or_build("c", "fp", lambda: b"12345")  # estoura bytes: sai "b"
+
+    assert len(cache) == 2
+    assert cache.total_bytes == 9
+    assert cache.get_or_build("a", "fp", lambda: b"nunca") == b"1234"
+
+    # Artefato maior que o limite inteiro é devolvido, mas não guardado
+    assert cache.get_or_build("d", "fp", lambda: b"x" * 50) == b"x" * 50
+    assert len(cache) == 2
+
+
+def test_invalidate_e_tamanho_de_dataframe():
+    cache = ExportArtifactCache()
+    cache.get_or_build("zephyr", "fp", lambda: pd.DataFrame({"a": ["x"] * 10}))
+
+    assert cache.total_bytes > 0
+    cache.invalidate()
+    assert len(cache) == 0
+    assert cache.total_bytes == 0
+
+
+def test_fragmentos_sao_reaproveitados_por_conteudo_e_opcoes():
+    fragments = CaseFragmentCache()
+    renders = []
+
+    def render(valor):
+        renders.append(valor)
+        return valor.upper()
+
+    caso = {"titulo": "A", "cenario": "Dado a"}
+    assert fragments.get_or_render("md", caso, lambda: render("a")) == "A"
+    # Outro objeto com o mesmo conteúdo usa o cache
+    assert fragments.get_or_render("md", dict(caso), lambda: render("x")) == "A"
+    # Tipo de fragmento, opções ou conteúdo diferentes geram de novo
+    fragments.get_or_render("csv", caso, lambda: render("b"))
+    fragments.get_or_render("md", caso, lambda: render("c"), options="Area")
+    fragments.get_or_render("md", {**caso, "cenario": "Dado b"}, lambda: render("d"))
+
+    assert renders == ["a", "b", "c", "d"]
+    assert (fragments.hits, fragments.misses) == (1, 4)
+
+
+def test_fragmentos_descartam_os_menos_usados():
+    fragments = CaseFragmentCache(max_entries=2)
+
+    for titulo in ("A", "B", "C"):
+        fragments.get_or_render("md", {"titulo": titulo}, lambda titulo=titulo: titulo)
+
+    assert len(fragments) == 2
+    assert fragments.get_or_render("md", {"titulo": "A"}, lambda: "novo") == "novo"
+
+
+def test_case_key_distingue_tipos_e_aceita_valores_nao_hasheaveis():
+    assert case_key({"a": 1}) != case_key({"a": True})
+    assert case_key({"cenario": ["Dado a"]}) == case_key({"cenario": ["Dado a"]})
+    assert case_key({"cenario": ["Dado a"]}) != case_key({"cenario": ["Dado b"]})
+
+
+def test_case_key_de_nan_e_estavel_entre_copias():
+    df = pd.DataFrame([{"titulo": "A", "prioridade": float("nan")}])
+    primeiro, segundo = df.to_dict("records")[0], df.to_dict("records")[0]
+    fragments = CaseFragmentCache()
+
+    assert case_key(primeiro) == case_key(segundo)
+    assert case_key(primeiro) != case_key({"titulo": "A", "prioridade": ""})
+    assert case_key(primeiro) != case_key({"titulo": "A", "prioridade": "NaN"})
+    render_fragment(fragments, "markdown", primeiro, lambda: "md")
+    render_fragment(fragments, "markdown", segundo, lambda: "md")
+    assert (fragments.hits, fragments.misses) == (1, 1)
+
+
+def test_render_fragment_sem_cache_apenas_renderiza():
+    assert render_fragment(None, "md", {"a": 1}, lambda: "ok") == "ok"
@@ -0,0 +1,113 @@
+"""
+Testes para a representação intermediária dos cenários Gherkin.
+"""
+
+import pytest
+
+from qa_core import gherkin
+from qa_core.gherkin import StepKeyword, classify_step, parse_cenario
+
+CENARIO = (
+    "Dado que estou logado\n"
+    "  Quando clico em salvar  \n"
+    "\n"
+    "E confirmo a operação\n"
+    "Então vejo a mensagem de sucesso\n"
+    "E recebo um e-mail"
+)
+
+
+@pytest.fixture(autouse=True)
+def _cache_limpo():
+    gherkin.clear_cache()
+    yield
+    gherkin.clear_cache()
+
+
+@pytest.mark.parametrize(
+    "linha, esperado",
+    [
+        ("Dado que existe um usuário", StepKeyword.DADO),
+        ("QUANDO envio o formulário", StepKeyword.QUANDO),
+        ("Então vejo o resultado", StepKeyword.ENTAO),
+        ("Entao vejo o resultado", StepKeyword.ENTAO),
+        ("e confirmo", StepKeyword.E),
+        ("Enviar sem palavra-chave", StepKeyword.OUTRO),
+    ],
+)
+def test_classify_step(linha, esperado):
+    assert classify_step(linha) is esperado
+
+
+def test_parse_cenario_classifica_e_herda_secao():
+    parsed = parse_cenario(CENARIO)
+
+    assert parsed.definition == CENARIO.strip()
+    assert parsed.texts[1] == "Quando clico em salvar"
+    assert len(parsed.texts) == 5
+    assert [step.keyword for step in parsed.steps] == [
+        StepKeyword.DADO,
+        StepKeyword.QUANDO,
+        StepKeyword.E,
+        StepKeyword.ENTAO,
+        StepKeyword.E,
+    ]
+    # O "E" herda a seção do passo anterior
+    assert parsed.steps[2].section is StepKeyword.QUANDO
+    assert parsed.steps[4].section is StepKeyword.ENTAO
+    assert parsed.steps[0].body == "que estou logado"
+    assert parsed.section_text(StepKeyword.ENTAO) == (
+        "vejo a mensagem de sucesso\nrecebo um e-mail"
+    )
+
+
+def test_parse_cenario_pareia_passos_e_resultados():
+    parsed = parse_cenario(CENARIO)
+
+    assert parsed.step_pairs == (
+        ("Dado que estou logado", ""),
+        ("E confirmo a operação", ""),
+        ("Quando clico em salvar", "Então vejo a mensagem de sucesso"),
+        ("", "E recebo um e-mail"),
+    )
+    assert parsed.expected_results == (
+        "",
+        "",
+        "Então vejo a mensagem de sucesso",
+        "",
+    )
+
+
+def test_quando_sem_entao_vira_acao_sem_resultado():
+    parsed = parse_cenario(["Dado algo", "Quando faço algo"])
+
+    assert parsed.step_pairs == (("Dado algo", ""), ("Quando faço algo", ""))
+
+
+def test_valores_nao_textuais_resultam_em_cenario_vazio():
+    parsed = parse_cenario(float("nan"))
+
+    assert parsed.texts == ()
+    assert parsed.step_pairs == ()
+    assert parsed.definition == "nan"
+
+
+def test_cache_reaproveita_o_mesmo_conteudo():
+    primeiro = parse_cenario(CENARIO)
+
+    assert parse_cenario("".join(CENARIO)) is primeiro
+    # Lista e texto com o mesmo conteúdo não colidem no cache
+    assert parse_cenario(["Dado a\nb"]) is not parse_cenario(["Dado a", "b"])
+
+
+def test_cache_descarta_os_menos_usados(monkeypatch):
+    monkeypatch.setattr(gherkin, "MAX_CACHE_SIZE", 2)
+
+    a = parse_cenario("Dado a")
+    parse_cenario("Dado b")
+    assert parse_cenario("Dado a") is a  # "a" passa a ser o mais recente
+    parse_cenario("Dado c")  # descarta "b"
+
+    assert parse_cenario("Dado a") is a
+    assert len(gherkin._cache) == 2
+    assert "Dado b" not in gherkin._cache
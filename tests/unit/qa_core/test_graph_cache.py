@@ -0,0 +1,43 @@
+"""
+Testes das chaves de conteúdo do cache dos grafos.
+"""
+
+from qa_core.graph_cache import graph_cache_key, normalize_analysis
+
+ANALISE = {
+    "user_story": "Como tester, quero validar o login",
+    "analise_da_us": {"riscos": ["senha fraca"], "perguntas": ["SSO?"]},
+    "relatorio_analise_inicial": "### Análise",
+    "trace_id": "abc",
+}
+
+
+def test_campos_volateis_e_ordem_das_chaves_nao_mudam_a_chave():
+    reordenada = dict(reversed(list(ANALISE.items())))
+    outra_execucao = {**reordenada, "trace_id": "def"}
+
+    assert graph_cache_key("test_plan", "US", ANALISE) == graph_cache_key(
+        "test_plan", "US", outra_execucao
+    )
+
+
+def test_saidas_do_plano_nao_fazem_parte_da_chave():
+    com_plano = {**ANALISE, "relatorio_plano_de_testes": "### Plano"}
+
+    assert normalize_analysis(com_plano) == normalize_analysis(ANALISE)
+
+
+def test_user_story_e_normalizada():
+    assert graph_cache_key("analysis", "  US\r\nlinha 2\n") == graph_cache_key(
+        "analysis", "US\nlinha 2"
+    )
+
+
+def test_conteudo_e_grafo_diferentes_geram_chaves_diferentes():
+    alterada = {**ANALISE, "analise_da_us": {"riscos": ["outro"]}}
+
+    assert graph_cache_key("test_plan", "US", ANALISE) != graph_cache_key(
+        "test_plan", "US", alterada
+    )
+    assert graph_cache_key("analysis", "US") != graph_cache_key("test_plan", "US")
+    assert graph_cache_key("analysis", "US 1") != graph_cache_key("analysis", "US 2")
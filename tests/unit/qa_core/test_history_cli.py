@@ -0,0 +1,76 @@
+"""
+Testes para a CLI de exportação/importação NDJSON do histórico.
+"""
+
+import json
+from contextlib import closing
+
+from qa_core import database, history_cli
+
+
+def test_cli_export_e_import_entre_bancos(tmp_path, monkeypatch, capsys):
+    origem = str(tmp_path / "origem.db")
+    destino = str(tmp_path / "destino.db")
+    arquivo = str(tmp_path / "backup.ndjson")
+    monkeypatch.setattr(database, "DB_NAME", origem)
+
+    database.init_db()
+    database.save_analysis_to_history("us", "a", "p", test_cases=[{"titulo": "T"}])
+
+    assert history_cli.main(["--db", origem, "export", arquivo]) == 0
+    assert "1 análises exportadas" in capsys.readouterr().err
+
+    assert history_cli.main(["--db", destino, "import", arquivo]) == 0
+    assert (
+        history_cli.main(
+            ["--db", destino, "--quiet", "import", "--skip-duplicates", arquivo]
+        )
+        == 0
+    )
+    assert capsys.readouterr().err.count("1 importadas") == 1
+
+    with open(arquivo, encoding="utf-8") as fp:
+        assert json.loads(fp.readline())["test_cases"] == [{"titulo": "T"}]
+    # --db aponta o módulo para o banco de destino
+    assert len(database.get_all_analysis_history()) == 1
+
+
+def test_cli_retorna_erro_para_arquivo_inexistente(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(database, "DB_NAME", database.DB_NAME)
+    codigo = history_cli.main(
+        ["--db", str(tmp_path / "h.db"), "import", str(tmp_path / "nao_existe.ndjson")]
+    )
+
+    assert codigo == 1
+    assert "Falha" in capsys.readouterr().err
+
+
+def test_cli_prune_arquiva_e_remove(tmp_path, monkeypatch, capsys):
+    banco = str(tmp_path / "h.db")
+    arquivo = str(tmp_path / "arquivo.ndjson.gz")
+    monkeypatch.setattr(database, "DB_NAME", banco)
+    database.init_db()
+    for i in range(3):
+        database.save_analysis_to_history(f"us {i}", "a", "p")
+
+    codigo = history_cli.main(
+        ["--db", banco, "prune", "--max-entries", "1", "--archive", arquivo]
+    )
+
+    assert codigo == 0
+    assert "2 análises removidas (2 arquivadas)" in capsys.readouterr().err
+    assert len(database.get_all_analysis_history()) == 1
+    assert history_cli.main(["--db", banco, "--quiet", "import", arquivo]) == 0
+    assert len(database.get_all_analysis_history()) == 3
+
+
+def test_cli_vacuum_ativa_o_modo_incremental(tmp_path, monkeypatch, capsys):
+    banco = str(tmp_path / "h.db")
+    monkeypatch.setattr(database, "DB_NAME", banco)
+    database.init_db()
+
+    assert history_cli.main(["--db", banco, "vacuum"]) == 0
+
+    assert "páginas liberadas" in capsys.readouterr().err
+    with closing(database.get_db_connection()) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
@@ -0,0 +1,135 @@
+"""
+Testes para a fila write-behind do histórico.
+"""
+
+import sqlite3
+
+import pytest
+
+from qa_core import database
+from qa_core.history_writer import HistoryWriter
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    """Banco SQLite em arquivo com uma tabela simples para as escritas."""
+    path = tmp_path / "writer.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (k TEXT PRIMARY KEY, v TEXT)")
+    conn.commit()
+    conn.close()
+
+    connections = []
+
+    def _connect():
+        connections.append(1)
+        return sqlite3.connect(path)
+
+    monkeypatch.setattr(database, "get_db_connection", _connect)
+    return path, connections
+
+
+def _upsert(key, value):
+    def operation(cursor):
+        cursor.execute(
+            "INSERT INTO t (k, v) VALUES (?, ?) "
+            "ON CONFLICT(k) DO UPDATE SET v = excluded.v",
+            (key, value),
+        )
+
+    return operation
+
+
+def _rows(path):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT k, v FROM t").fetchall())
+
+
+def test_flush_grava_operacoes_em_um_unico_lote(db_file):
+    path, connections = db_file
+    writer = HistoryWriter(flush_interval=0.5)
+
+    for i in range(10):
+        writer.submit(_upsert(f"k{i}", "v"))
+
+    assert writer.flush(timeout=5)
+    assert len(_rows(path)) == 10
+    assert len(connections) == 1
+    writer.shutdown()
+
+
+def test_coalesce_atualizacoes_com_a_mesma_chave(db_file):
+    path, _ = db_file
+    calls = []
+    writer = HistoryWriter(flush_interval=0.5)
+
+    for value in ("a", "b", "c"):
+
+        def operation(cursor, value=value):
+            calls.append(value)
+            _upsert("registro", value)(cursor)
+
+        writer.submit(operation, key=("analysis_history", 1))
+
+    assert writer.flush(timeout=5)
+    assert calls == ["c"]
+    assert _rows(path) == {"registro": "c"}
+    writer.shutdown()
+
+
+def test_operacao_sem_chave_funciona_como_barreira(db_file):
+    path, _ = db_file
+    order = []
+    writer = HistoryWriter(flush_interval=0.5)
+
+    def tagged(tag, key, value):
+        def operation(cursor):
+            order.append(tag)
+            _upsert(key, value)(cursor)
+
+        return operation
+
+    writer.submit(tagged("edit-1", "x", "1"), key="caso")
+    writer.submit(tagged("delete", "y", "d"))
+    writer.submit(tagged("edit-2", "x", "2"), key="caso")
+
+    assert writer.flush(timeout=5)
+    assert order == ["edit-1", "delete", "edit-2"]
+    assert _rows(path) == {"x": "2", "y": "d"}
+    writer.shutdown()
+
+
+def test_erro_isolado_e_devolvido_para_a_sessao(db_file):
+    path, _ = db_file
+    writer = HistoryWriter(flush_interval=0.5)
+
+    def failing(cursor):
+        cursor.execute("INSERT INTO tabela_inexistente VALUES (1)")
+
+    writer.submit(_upsert("ok-1", "v"), owner="s1")
+    writer.submit(failing, owner="s1")
+    writer.submit(_upsert("ok-2", "v"), owner="s2")
+
+    assert writer.flush(timeout=5)
+    assert set(_rows(path)) == {"ok-1", "ok-2"}
+    errors = writer.drain_errors("s1")
+    assert len(errors) == 1
+    assert "tabela_inexistente" in errors[0]
+    assert writer.drain_errors("s1") == []
+    assert writer.drain_errors("s2") == []
+    writer.shutdown()
+
+
+def test_shutdown_grava_pendencias(db_file):
+    path, _ = db_file
+    writer = HistoryWriter(flush_interval=5)
+
+    writer.submit(_upsert("pendente", "v"))
+    writer.shutdown(timeout=5)
+
+    assert _rows(path) == {"pendente": "v"}
+    assert writer.pending_count() == 0
+
+    # Após o shutdown, escritas são feitas de forma síncrona
+    writer.submit(_upsert("tardia", "v"))
+    assert _rows(path)["tardia"] == "v"
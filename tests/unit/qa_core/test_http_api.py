@@ -0,0 +1,243 @@
+"""
+Testes da API HTTP (jobs de análise, histórico e exportações em streaming).
+"""
+
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from qa_core import database, http_api
+
+US = "Como cliente, quero fazer login para acessar minha conta."
+
+ANALISE = {
+    "user_story": US,
+    "analise_da_us": {"avaliacao_geral": "Boa"},
+    "relatorio_analise_inicial": "## Análise",
+}
+PLANO = {
+    "plano_e_casos_de_teste": {
+        "casos_de_teste_gherkin": [
+            {
+                "titulo": "Login válido",
+                "prioridade": "Alta",
+                "cenario": ["Dado um usuário", "Quando faz login", "Então entra"],
+            }
+        ]
+    },
+    "relatorio_plano_de_testes": "## Plano",
+}
+
+
+@pytest.fixture
+def grafos():
+    with (
+        patch.object(http_api, "grafo_analise") as analise,
+        patch.object(http_api, "grafo_plano_testes") as plano,
+    ):
+        analise.invoke.return_value = dict(ANALISE)
+        plano.invoke.return_value = PLANO
+        yield analise, plano
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch, grafos):
+    """Servidor em uma porta livre, com um banco de histórico temporário."""
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "historico.db"))
+    monkeypatch.delenv("HTTP_API_TOKEN", raising=False)
+    database.init_db()
+    server = http_api.create_server("127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _request(url, data=None, headers=None):
+    body = json.dumps(data).encode() if data is not None else None
+    request = urllib.request.Request(url, data=body, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def _json(url, data=None, headers=None):
+    status, _, body = _request(url, data, headers)
+    return status, json.loads(body)
+
+
+def _analise_salva(api):
+    status, job = _json(f"{api}/analyses", {"user_story": US})
+    assert status == 202
+    assert job["status"] == "done"
+    return job["result"]["analysis_id"]
+
+
+def test_analise_roda_os_grafos_e_salva_no_historico(api, grafos):
+    status, job = _json(f"{api}/analyses", {"user_story": US})
+
+    assert status == 202
+    assert job["result"]["analysis_report"] == "## Análise"
+    assert job["result"]["test_cases"][0]["cenario"] == (
+        "Dado um usuário\nQuando faz login\nEntão entra"
+    )
+    analysis_id = job["result"]["analysis_id"]
+    assert job["links"]["history"] == f"/history/{analysis_id}"
+    assert _json(f"{api}/jobs/{job['id']}") == (200, job)
+
+    _, historico = _json(f"{api}/history")
+    assert historico["total"] == 1
+    assert historico["items"][0]["id"] == analysis_id
+    _, pagina = _json(f"{api}/history?limit=1&offset=1")
+    assert (pagina["total"], pagina["items"]) == (1, [])
+    _, entrada = _json(f"{api}/history/{analysis_id}")
+    assert entrada["test_cases"] == job["result"]["test_cases"]
+    assert entrada["test_plan_report"].startswith("## Plano\n\n---\n\n### 🧩 Login")
+
+    # Mesma entrada: o job é reaproveitado, sem nova chamada à IA
+    _, repetido = _json(f"{api}/analyses", {"user_story": US})
+    assert repetido["id"] == job["id"]
+    assert grafos[0].invoke.call_count == 1
+
+
+def test_requisicoes_rodam_no_pool_de_jobs(api, grafos, monkeypatch):
+    from qa_core.job_runner import shutdown_job_runner
+
+    monkeypatch.setenv("ANALYSIS_JOB_WORKERS", "2")
+    shutdown_job_runner()
+    liberar = threading.Event()
+    grafos[0].invoke.side_effect = lambda estado: liberar.wait(5) and dict(ANALISE)
+
+    _, job = _json(f"{api}/analyses", {"user_story": US, "test_plan": False})
+    assert job["status"] in ("pending", "running")
+    # O servidor segue atendendo enquanto o job roda
+    assert _json(f"{api}/health") == (200, {"status": "ok"})
+
+    liberar.set()
+    status, headers, body = _request(f"{api}/jobs/{job['id']}/events")
+    assert status == 200
+    assert headers["Content-Type"] == "text/event-stream"
+    assert body.rstrip().split(b"\n")[-2] == b"event: done"
+    final = json.loads(body.rstrip().split(b"\n")[-1].removeprefix(b"data: "))
+    assert final["status"] == "done"
+    assert final["result"]["test_cases"] == []
+
+
+def test_exportacoes_em_streaming(api):
+    analysis_id = _analise_salva(api)
+    base = f"{api}/history/{analysis_id}/exports"
+
+    status, headers, body = _request(f"{base}/azure_csv?area_path=QA&assigned_to=Ana")
+    assert status == 200
+    assert "Content-Length" not in headers
+    assert 'filename="como-cliente' in headers["Content-Disposition"]
+    assert "Login válido" in body.decode("utf-8-sig")
+
+    _, _, markdown = _request(f"{base}/markdown")
+    assert "## Análise" in markdown.decode()
+
+    _, headers, pacote = _request(f"{base}/bundle_zip?xray.Labels=web")
+    assert headers["Content-Type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(pacote)) as zip_file:
+        manifest = json.loads(zip_file.read("manifest.json"))
+    assert manifest["test_cases"] == 1
+
+
+def test_exportacao_pdf_usa_o_gerador_do_pool(api):
+    analysis_id = _analise_salva(api)
+    gerador = MagicMock(return_value=b"%PDF-api")
+
+    with patch("qa_core.pdf_generator.generate_pdf_report", gerador):
+        status, headers, body = _request(f"{api}/history/{analysis_id}/exports/pdf")
+
+    assert (status, body) == (200, b"%PDF-api")
+    assert headers["Content-Type"] == "application/pdf"
+    assert gerador.call_args[0][0] == "## Análise"
+
+
+def test_metrica_da_exportacao_cobre_todo_o_streaming(api, monkeypatch):
+    analysis_id = _analise_salva(api)
+    metrics = MagicMock()
+    monkeypatch.setattr(http_api, "get_metrics_collector", lambda: metrics)
+
+    def _csv_quebrado(*args):
+        yield b"cabecalho\n"
+        raise RuntimeError("falha no meio do arquivo")
+
+    status, _, _ = _request(f"{api}/history/{analysis_id}/exports/markdown")
+    assert status == 200
+    metrics.time_export.assert_called_once_with(format="markdown")
+    metrics.record_export.assert_called_once_with(format="markdown", status="success")
+
+    metrics.reset_mock()
+    with patch("qa_core.exports.stream_csv_azure_from_df", side_effect=_csv_quebrado):
+        status, _, body = _request(f"{api}/history/{analysis_id}/exports/azure_csv")
+    assert (status, body) == (200, b"cabecalho\n")
+    metrics.record_export.assert_called_once_with(format="azure_csv", status="error")
+    metrics.record_error.assert_called_once_with(error_type="RuntimeError")
+
+
+@pytest.mark.parametrize("formato", ["pdf", "bundle_zip"])
+def test_tempo_limite_do_pdf_vira_504(api, formato):
+    from qa_core.render_pool import RenderTimeoutError
+
+    analysis_id = _analise_salva(api)
+
+    with patch.object(
+        http_api, "render_pdf_report", side_effect=RenderTimeoutError("lento")
+    ):
+        status, payload = _json(f"{api}/history/{analysis_id}/exports/{formato}")
+
+    assert status == 504
+    assert payload["error"]
+
+
+@pytest.mark.parametrize(
+    ("caminho", "dados", "status_esperado"),
+    [
+        ("/analyses", {"user_story": "curta"}, 400),
+        ("/analyses", {}, 400),
+        ("/jobs/desconhecido", None, 404),
+        ("/history/999", None, 404),
+        ("/history/1/exports/docx", None, 404),
+        ("/history?limit=muitos", None, 400),
+        ("/nada", None, 404),
+    ],
+)
+def test_erros_viram_json(api, caminho, dados, status_esperado):
+    status, payload = _json(f"{api}{caminho}", dados)
+
+    assert status == status_esperado
+    assert payload["error"]
+
+
+def test_metodo_nao_permitido(api):
+    status, _ = _json(f"{api}/history", {"x": 1})
+    assert status == 405
+
+
+def test_token_obrigatorio_quando_configurado(api, monkeypatch):
+    monkeypatch.setenv("HTTP_API_TOKEN", "segredo")
+
+    assert _json(f"{api}/health")[0] == 401
+    assert _json(f"{api}/health", headers={"Authorization": "Bearer errado"})[0] == 401
+    assert _json(f"{api}/health", headers={"Authorization": "Bearer segredo"}) == (
+        200,
+        {"status": "ok"},
+    )
+
+
+def test_servidor_em_segundo_plano_so_com_porta_configurada(monkeypatch):
+    monkeypatch.delenv("HTTP_API_PORT", raising=False)
+    assert http_api.start_api_server_in_background() is None
+
+    monkeypatch.setenv("HTTP_API_PORT", "invalida")
+    assert http_api.start_api_server_in_background() is None
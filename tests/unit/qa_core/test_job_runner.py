@@ -0,0 +1,137 @@
+"""
+Testes do executor de jobs da IA (status, deduplicação e retenção).
+"""
+
+import threading
+import time
+
+import pytest
+
+from qa_core import job_runner
+from qa_core.job_runner import DONE, FAILED, JobRunner, job_key
+
+
+@pytest.fixture
+def runner():
+    runner = JobRunner(max_workers=2)
+    yield runner
+    runner.shutdown()
+
+
+def _aguardar(job, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while not job.done and time.monotonic() < limite:
+        time.sleep(0.01)
+    return job.done
+
+
+def test_job_roda_em_segundo_plano(runner):
+    liberar = threading.Event()
+
+    def chamada_lenta(texto):
+        liberar.wait(5)
+        return texto.upper()
+
+    job = runner.submit("analysis", chamada_lenta, "us")
+
+    assert not job.done
+    assert runner.get(job.id) is job
+    liberar.set()
+    assert _aguardar(job)
+    assert job.status == DONE
+    assert job.result == "US"
+    assert job.error is None
+
+
+def test_mesma_chave_reaproveita_job_em_andamento_e_concluido(runner):
+    liberar = threading.Event()
+    chamadas = []
+
+    def chamada(texto):
+        chamadas.append(texto)
+        liberar.wait(5)
+        return {"analise": texto}
+
+    primeiro = runner.submit("analysis", chamada, "us", key="k")
+    assert runner.submit("analysis", chamada, "us", key="k") is primeiro
+    liberar.set()
+    assert _aguardar(primeiro)
+
+    assert runner.submit("analysis", chamada, "us", key="k") is primeiro
+    assert chamadas == ["us"]
+
+
+def test_job_com_erro_e_refeito_na_proxima_submissao(runner):
+    def falha():
+        raise RuntimeError("LLM indisponível")
+
+    job = runner.submit("analysis", falha, key="k")
+    assert _aguardar(job)
+    assert job.status == FAILED
+    assert job.error == "LLM indisponível"
+
+    novo = runner.submit("analysis", lambda: "ok", key="k")
+    assert novo is not job
+    assert _aguardar(novo)
+    assert novo.result == "ok"
+
+
+def test_sem_threads_executa_no_submit():
+    runner = JobRunner(max_workers=0)
+
+    job = runner.submit("analysis", pow, 2, 5)
+
+    assert job.status == DONE
+    assert job.result == 32  # noqa: PLR2004
+
+
+def test_jobs_concluidos_expiram_e_respeitam_o_limite():
+    runner = JobRunner(max_workers=0, ttl=60, max_finished=2)
+    jobs = [runner.submit("analysis", str, i, key=i) for i in range(3)]
+
+    # O quarto envio descarta o concluído mais antigo (limite de 2)
+    runner.submit("analysis", str, 3, key=3)
+    assert runner.get(jobs[0].id) is None
+    assert runner.get(jobs[2].id) is jobs[2]
+
+    runner.ttl = 0
+    jobs[2].finished_at -= 1
+    runner.submit("analysis", str, 4, key=4)
+    assert runner.get(jobs[2].id) is None
+    assert runner.submit("analysis", str, 2, key=2) is not jobs[2]
+
+
+def test_discard_esquece_o_job(runner):
+    job = runner.submit("analysis", str, "x", key="k")
+    assert _aguardar(job)
+
+    runner.discard(job.id)
+
+    assert runner.get(job.id) is None
+    assert runner.submit("analysis", str, "x", key="k") is not job
+
+
+def test_job_key_depende_do_conteudo():
+    assert job_key("analysis", {"a": 1, "b": 2}) == job_key(
+        "analysis", {"b": 2, "a": 1}
+    )
+    assert job_key("analysis", "us") != job_key("test_plan", "us")
+    assert job_key("analysis", "us") != job_key("analysis", "us 2")
+
+
+@pytest.mark.parametrize(
+    "variavel, valor, funcao, esperado",
+    [
+        ("ANALYSIS_JOB_WORKERS", "", job_runner.job_workers, 4),
+        ("ANALYSIS_JOB_WORKERS", "-1", job_runner.job_workers, 0),
+        ("ANALYSIS_JOB_WORKERS", "abc", job_runner.job_workers, 4),
+        ("ANALYSIS_JOB_TTL_SECONDS", "", job_runner.job_ttl, 3600.0),
+        ("ANALYSIS_JOB_TTL_SECONDS", "90", job_runner.job_ttl, 90.0),
+    ],
+)
+def test_configuracao_por_variaveis_de_ambiente(
+    monkeypatch, variavel, valor, funcao, esperado
+):
+    monkeypatch.setenv(variavel, valor)
+
+    assert funcao() == esperado
@@ -0,0 +1,131 @@
+"""
+Testes do cache de PDF sob demanda e da pré-geração em segundo plano.
+"""
+
+import threading
+
+import pytest
+
+from qa_core import pdf_cache
+from qa_core.pdf_cache import (
+    build_pdf,
+    cancel_pdf_build,
+    get_cached_pdf,
+    schedule_pdf_build,
+)
+
+
+def test_build_pdf_gera_uma_vez_por_conteudo():
+    chamadas = []
+
+    def builder():
+        chamadas.append(1)
+        return b"%PDF-1"
+
+    assert get_cached_pdf("plano-a") is None
+    assert build_pdf("plano-a", builder) == b"%PDF-1"
+    assert build_pdf("plano-a", builder) == b"%PDF-1"
+    assert get_cached_pdf("plano-a") == b"%PDF-1"
+    assert len(chamadas) == 1
+
+
+def test_build_pdf_nao_guarda_falhas():
+    def falha():
+        raise RuntimeError("fonte")
+
+    with pytest.raises(RuntimeError):
+        build_pdf("plano-a", falha)
+
+    assert get_cached_pdf("plano-a") is None
+    assert build_pdf("plano-a", lambda: b"%PDF") == b"%PDF"
+
+
+def test_build_pdf_aguarda_geracao_em_andamento():
+    iniciou, liberar = threading.Event(), threading.Event()
+    chamadas = []
+
+    def lento():
+        chamadas.append(1)
+        iniciou.set()
+        liberar.wait(5)
+        return b"%PDF-lento"
+
+    resultados = []
+    primeira = threading.Thread(
+        target=lambda: resultados.append(build_pdf("plano-a", lento))
+    )
+    primeira.start()
+    assert iniciou.wait(5)
+
+    segunda = threading.Thread(
+        target=lambda: resultados.append(build_pdf("plano-a", lento))
+    )
+    segunda.start()
+    liberar.set()
+    primeira.join(5)
+    segunda.join(5)
+
+    assert resultados == [b"%PDF-lento", b"%PDF-lento"]
+    assert len(chamadas) == 1
+
+
+def test_cache_descarta_os_pdfs_menos_usados(monkeypatch):
+    monkeypatch.setattr(pdf_cache, "DEFAULT_MAX_ENTRIES", 2)
+
+    build_pdf("a", lambda: b"A")
+    build_pdf("b", lambda: b"B")
+    get_cached_pdf("a")  # "a" passa a ser o mais recente
+    build_pdf("c", lambda: b"C")
+
+    assert get_cached_pdf("b") is None
+    assert get_cached_pdf("a") == b"A"
+    assert get_cached_pdf("c") == b"C"
+
+
+def test_schedule_pdf_build_reinicia_a_contagem_a_cada_edicao():
+    gerados = []
+    pronto = threading.Event()
+
+    def builder(versao):
+        def _build():
+            gerados.append(versao)
+            pronto.set()
+            return versao.encode()
+
+        return _build
+
+    assert schedule_pdf_build("sessao", "v1", builder("v1"), delay=0.2)
+    assert schedule_pdf_build("sessao", "v2", builder("v2"), delay=0.05)
+
+    assert pronto.wait(5)
+    assert gerados == ["v2"]
+    assert get_cached_pdf("v2") == b"v2"
+    assert "sessao" not in pdf_cache._timers
+
+
+def test_schedule_pdf_build_desativado_ou_ja_em_cache():
+    build_pdf("v1", lambda: b"%PDF")
+
+    # A fixture da suíte define PDF_PREBUILD_DELAY_SECONDS=0
+    assert schedule_pdf_build("sessao", "v2", lambda: b"x") is False
+    assert schedule_pdf_build("sessao", "v1", lambda: b"x", delay=1) is False
+
+
+def test_cancel_pdf_build_descarta_o_agendamento():
+    chamadas = []
+    schedule_pdf_build("sessao", "v1", lambda: chamadas.append(1), delay=0.05)
+
+    cancel_pdf_build("sessao")
+    threading.Event().wait(0.2)
+
+    assert chamadas == []
+    assert get_cached_pdf("v1") is None
+
+
+@pytest.mark.parametrize(
+    "valor, esperado", [("", 5.0), ("2.5", 2.5), ("0", 0.0), ("abc", 5.0)]
+)
+def test_prebuild_delay_le_variavel_de_ambiente(monkeypatch, valor, esperado):
+    monkeypatch.setenv("PDF_PREBUILD_DELAY_SECONDS", valor)
+
+    assert pdf_cache.prebuild_delay() == esperado
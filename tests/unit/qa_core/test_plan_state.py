@@ -0,0 +1,115 @@
+"""
+Testes do plano de testes da sessão (casos + sumário e visões derivadas).
+"""
+
+import json
+
+import pandas as pd
+
+from qa_core.export_cache import CaseFragmentCache
+from qa_core.plan_state import TestPlan, compose_test_plan_report, extract_plan_summary
+
+CASOS = [
+    {"id": "CT-1", "titulo": "Login", "prioridade": "Alta", "cenario": "Dado A"},
+    {"id": "CT-2", "titulo": "Logout", "prioridade": "Baixa", "cenario": "Dado B"},
+]
+
+
+def test_json_montado_por_fragmentos():
+    df = pd.DataFrame(
+        [
+            {"titulo": 'Caso "A"', "cenario": "Dado A", "extra": None},
+            {"titulo": "Caso B", "cenario": "Dado ção", "extra": 2},
+        ]
+    )
+    fragments = CaseFragmentCache()
+    plano = TestPlan.from_dataframe(df, fragments=fragments)
+
+    esperado = json.dumps(df.fillna("").to_dict("records"), ensure_ascii=False)
+    assert plano.json == esperado
+
+    # Após editar um caso, só ele é serializado de novo
+    plano.update_case(1, "cenario", "Dado B editado")
+    assert json.loads(plano.json)[1]["cenario"] == "Dado B editado"
+    assert fragments.misses == 3
+
+    plano.replace_cases(df.head(0))
+    assert plano.json is None
+    assert plano.empty
+
+
+def test_visoes_sao_memorizadas_e_descartadas_juntas():
+    plano = TestPlan([dict(caso) for caso in CASOS], summary="## Objetivo")
+    df, markdown, content_hash = plano.df, plano.markdown, plano.content_hash
+    plano.pdf = b"%PDF"
+
+    assert plano.df is df
+    assert plano.markdown is markdown
+    assert plano.content_hash is content_hash
+
+    plano.update_case(0, "cenario", "Dado A editado")
+
+    assert plano.pdf is None
+    assert plano.content_hash != content_hash
+    assert "Dado A editado" in plano.markdown
+    # O DataFrame é copiado com a célula alterada: o anterior não muda
+    assert plano.df is not df
+    assert plano.df.at[0, "cenario"] == "Dado A editado"
+    assert df.at[0, "cenario"] == "Dado A"
+
+
+def test_update_case_nao_altera_a_lista_anterior():
+    plano = TestPlan([dict(caso) for caso in CASOS])
+    anteriores = plano.records
+
+    registro = plano.update_case(1, "cenario", "Dado novo")
+
+    assert registro == {**CASOS[1], "cenario": "Dado novo"}
+    assert anteriores[1]["cenario"] == "Dado B"
+    assert plano.records[1] is registro
+
+
+def test_update_case_com_campo_novo_mantem_df_e_registros_iguais():
+    plano = TestPlan([dict(caso) for caso in CASOS])
+    plano.df  # visão já montada
+
+    plano.update_case(1, "observacao", "Revisar")
+
+    assert [caso["observacao"] for caso in plano.records] == ["", "Revisar"]
+    assert plano.df.to_dict("records") == plano.records
+    assert plano.content_hash == TestPlan(plano.records).content_hash
+
+
+def test_replace_cases_usa_o_dataframe_informado():
+    plano = TestPlan([dict(caso) for caso in CASOS], summary="Resumo")
+    novo_df = pd.DataFrame(CASOS[1:])
+
+    plano.replace_cases(novo_df)
+
+    assert plano.df is novo_df
+    assert plano.records == CASOS[1:]
+    assert plano.summary == "Resumo"
+    assert "Login" not in plano.markdown
+
+
+def test_mesmo_conteudo_gera_o_mesmo_hash():
+    assert (
+        TestPlan(CASOS, summary="S").content_hash
+        == TestPlan.from_dataframe(pd.DataFrame(CASOS), summary="S").content_hash
+    )
+    assert TestPlan(CASOS, summary="S").content_hash != (
+        TestPlan(CASOS, summary="Outro").content_hash
+    )
+
+
+def test_markdown_combina_sumario_e_cenarios():
+    plano = TestPlan(CASOS, summary="Resumo\n\n### 🧩 Cenário antigo")
+
+    assert plano.markdown.startswith("Resumo\n\n### 🧩 Login")
+    assert "Cenário antigo" not in plano.markdown
+    assert compose_test_plan_report("Resumo", "") == "Resumo"
+    assert compose_test_plan_report("", "### 🧩 A") == "### 🧩 A"
+    assert compose_test_plan_report("Resumo", "### 🧩 A") == (
+        "Resumo\n\n---\n\n### 🧩 A"
+    )
+    assert extract_plan_summary("Resumo\n\n### 🧩 A") == "Resumo"
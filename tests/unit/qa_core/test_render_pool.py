@@ -0,0 +1,135 @@
+"""
+Testes do pool de processos de renderização (tempo limite e cancelamento).
+
+Os jobs usam funções da biblioteca padrão (`pow`, `time.sleep`), que os
+processos "spawn" conseguem importar.
+"""
+
+import time
+from concurrent.futures import CancelledError
+
+import pandas as pd
+import pytest
+
+from qa_core import render_pool
+from qa_core.render_pool import RenderPool, RenderTimeoutError, render_pdf_report
+
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(max_workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_job_devolve_o_resultado_do_processo(pool):
+    job = pool.submit(pow, 2, 10)
+
+    assert job.result() == 1024
+    assert job.done()
+
+
+def test_tempo_limite_cancela_e_preserva_os_outros_jobs(pool):
+    pool.submit(pow, 1, 1).result()  # sobe os processos antes de medir
+    vizinho = pool.submit(time.sleep, 0.5)
+    lento = pool.submit(time.sleep, 30, timeout=0.5)
+
+    inicio = time.monotonic()
+    with pytest.raises(RenderTimeoutError):
+        lento.result()
+
+    assert time.monotonic() - inicio < 5
+    # O job vizinho perdeu o processo no reinício do pool e foi reenviado
+    assert vizinho.result() is None
+    assert pool.submit(pow, 3, 3).result() == 27
+
+
+def test_jobs_na_fila_sao_reenviados_quando_outro_reinicia_o_pool():
+    pool = RenderPool(max_workers=1)
+    try:
+        pool.submit(pow, 1, 1).result()  # sobe o processo antes de medir
+        lento = pool.submit(time.sleep, 30, timeout=0.5)
+        # Além da fila interna do executor: descartados (cancelados) no reinício
+        na_fila = [pool.submit(pow, 2, i) for i in range(4)]
+
+        with pytest.raises(RenderTimeoutError):
+            lento.result()
+
+        assert [job.result() for job in na_fila] == [1, 2, 4, 8]
+    finally:
+        pool.shutdown()
+
+
+def test_cancelar_job_em_execucao(pool):
+    job = pool.submit(time.sleep, 30)
+    time.sleep(0.3)
+
+    job.cancel()
+
+    with pytest.raises(CancelledError):
+        job.result()
+    assert pool.submit(pow, 2, 2).result() == 4
+
+
+def test_on_progress_e_interrupcao_da_espera_cancelam_o_job(pool):
+    chamadas = []
+
+    def on_progress():
+        chamadas.append(1)
+        if len(chamadas) == 3:
+            raise KeyboardInterrupt
+
+    job = pool.submit(time.sleep, 30)
+    with pytest.raises(KeyboardInterrupt):
+        job.result(on_progress=on_progress, poll_interval=0.05)
+
+    assert len(chamadas) == 3
+    with pytest.raises(CancelledError):
+        job.result()
+
+
+def test_render_pdf_report_sem_pool_gera_no_proprio_processo(monkeypatch):
+    monkeypatch.setenv("PDF_RENDER_WORKERS", "0")
+    chamadas = []
+
+    def gerador(analysis_report, test_plan_df):
+        chamadas.append((analysis_report, test_plan_df))
+        return b"%PDF"
+
+    assert render_pool.get_render_pool() is None
+    assert render_pdf_report("Relatório", None, generator=gerador) == b"%PDF"
+    assert chamadas == [("Relatório", None)]
+
+
+def test_render_pdf_report_no_pool_compartilhado(monkeypatch):
+    monkeypatch.setenv("PDF_RENDER_WORKERS", "1")
+    df = pd.DataFrame([{"titulo": "Caso", "cenario": "Dado algo\nEntão ok"}])
+    progresso = []
+    try:
+        pdf_bytes = render_pdf_report(
+            "Relatório", df, on_progress=lambda: progresso.append(1)
+        )
+        assert render_pool.get_render_pool() is render_pool.get_render_pool()
+    finally:
+        render_pool.shutdown_render_pool()
+
+    assert pdf_bytes.startswith(b"%PDF")
+    assert progresso  # o processo leva mais que um intervalo para subir
+
+
+@pytest.mark.parametrize(
+    "variavel, valor, funcao, esperado",
+    [
+        ("PDF_RENDER_WORKERS", "3", render_pool.render_workers, 3),
+        ("PDF_RENDER_WORKERS", "-1", render_pool.render_workers, 0),
+        ("PDF_RENDER_TIMEOUT_SECONDS", "", render_pool.render_timeout, 120.0),
+        ("PDF_RENDER_TIMEOUT_SECONDS", "0", render_pool.render_timeout, None),
+        ("PDF_RENDER_TIMEOUT_SECONDS", "abc", render_pool.render_timeout, 120.0),
+    ],
+)
+def test_configuracao_por_variaveis_de_ambiente(
+    monkeypatch, variavel, valor, funcao, esperado
+):
+    monkeypatch.setenv(variavel, valor)
+
+    assert funcao() == esperado
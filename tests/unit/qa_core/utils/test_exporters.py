@@ -1,10 +1,16 @@
 import io
 import json
 import zipfile
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock
 
 import pandas as pd
+import pytest
 
+from qa_core.render_pool import RenderTimeoutError
 from qa_core.utils.exporters import (
+    export_batch_zip,
     export_to_cucumber_zip,
     export_to_postman_collection,
     _generate_feature_file,
@@ -108,3 +114,259 @@ def test_export_to_postman_collection_empty_df():
     collection = json.loads(collection_json)
 
     assert collection["item"] == []
+
+
+def test_generate_feature_file_usa_cenario_gherkin_sem_colunas_de_secao():
+    row = {
+        "titulo": "Login",
+        "cenario": "Dado que estou na tela de login\nQuando informo a senha\nEntão acesso o sistema",
+    }
+
+    feature_content = _generate_feature_file(row)
+
+    assert "  Cenário: Login\n" in feature_content
+    assert "    Dado que estou na tela de login\n" in feature_content
+    assert "    Quando informo a senha\n" in feature_content
+    assert "    Então acesso o sistema\n" in feature_content
+
+
+def test_export_to_postman_collection_extrai_secoes_do_cenario():
+    df = pd.DataFrame(
+        [
+            {
+                "titulo": "Cadastro",
+                "cenario": "Dado dados válidos\nQuando envio a requisição\nE aguardo\nEntão recebo 201",
+            }
+        ]
+    )
+
+    collection = json.loads(export_to_postman_collection(df))
+    body = json.loads(collection["item"][0]["request"]["body"]["raw"])
+
+    assert body["dado"] == "dados válidos"
+    assert body["quando"] == "envio a requisição\naguardo"
+    assert body["entao"] == "recebo 201"
+
+
+def _batch_db(tmp_path, monkeypatch, total):
+    from qa_core import database
+
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "batch.db"))
+    database.init_db()
+    for i in range(total):
+        database.save_analysis_to_history(f"US {i}", f"Relatório {i}", f"Plano {i}")
+    return sorted(row["id"] for row in database.get_all_analysis_history())
+
+
+def test_export_batch_zip_ordem_deterministica_e_progresso(tmp_path, monkeypatch):
+    ids = _batch_db(tmp_path, monkeypatch, 3)
+    selected = [ids[2], 999, ids[0]]
+    progress = []
+
+    zip_bytes = export_batch_zip(selected, progress.append, max_workers=1)
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+        names = zip_file.namelist()
+        assert [name.rsplit("_", 1)[1] for name in names] == [
+            f"{ids[2]}.md",
+            f"{ids[0]}.md",
+        ]
+        assert "Relatório 2" in zip_file.read(names[0]).decode("utf-8")
+    assert progress == [f"Exportando análise {i}/3" for i in (1, 2, 3)]
+
+
+@pytest.fixture
+def render_pool_ativo(monkeypatch):
+    from qa_core import render_pool
+
+    monkeypatch.setenv("PDF_RENDER_WORKERS", "2")
+    yield
+    render_pool.shutdown_render_pool()
+
+
+def test_export_batch_zip_em_paralelo_mantem_a_ordem(
+    tmp_path, monkeypatch, render_pool_ativo
+):
+    ids = _batch_db(tmp_path, monkeypatch, 4)
+    selected = list(reversed(ids))
+
+    zip_bytes = export_batch_zip(selected, max_workers=2)
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+        names = zip_file.namelist()
+    assert [name.rsplit("_", 1)[1] for name in names] == [f"{i}.md" for i in selected]
+
+
+def test_export_batch_zip_tempo_limite_mantem_o_markdown(
+    tmp_path, monkeypatch, render_pool_ativo
+):
+    ids = _batch_db(tmp_path, monkeypatch, 3)
+    # Nenhum processo sobe a tempo: cada análise cai no fallback sem PDF
+    monkeypatch.setenv("PDF_RENDER_TIMEOUT_SECONDS", "0.01")
+
+    zip_bytes = export_batch_zip(ids, max_workers=2)
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+        names = zip_file.namelist()
+        assert "Relatório 0" in zip_file.read(names[0]).decode("utf-8")
+    assert [name.rsplit("_", 1)[1] for name in names] == [f"{i}.md" for i in ids]
+
+
+@pytest.mark.parametrize(
+    "erro",
+    [BrokenProcessPool("pool quebrado"), CancelledError(), TypeError("pickle")],
+)
+def test_falha_do_job_do_lote_mantem_o_markdown(erro):
+    from qa_core.utils import exporters
+
+    job = MagicMock()
+    job.result.side_effect = erro
+
+    md_content, pdf_bytes = exporters._batch_job_result(
+        job, ("US", "Relatório", "Plano", [{"titulo": "Caso"}])
+    )
+
+    assert "Relatório" in md_content
+    assert pdf_bytes is None
+
+
+def test_build_cucumber_zip_store_only_e_spool_em_disco(monkeypatch):
+    from qa_core.utils import exporters
+
+    df = pd.DataFrame(
+        [{"titulo": f"Caso {i}", "cenario": "Dado algo"} for i in range(3)]
+    )
+    monkeypatch.setattr(exporters, "ZIP_SPOOL_MAX_MEMORY", 10)
+    monkeypatch.setenv("EXPORT_ZIP_STORE_ONLY", "true")
+
+    with exporters.build_cucumber_zip(df) as spool:
+        assert spool._rolled  # passou do limite: foi para arquivo temporário
+        with zipfile.ZipFile(spool) as zip_file:
+            infos = zip_file.infolist()
+
+    assert len(infos) == 3
+    assert {info.compress_type for info in infos} == {zipfile.ZIP_STORED}
+    assert exporters._zip_compression(store_only=False) == zipfile.ZIP_DEFLATED
+
+
+def _plano_bundle():
+    return pd.DataFrame(
+        [
+            {
+                "titulo": f"Caso {i}",
+                "prioridade": "Alta",
+                "criterio_de_aceitacao_relacionado": "Critério",
+                "cenario": "Dado algo\nQuando faço algo\nEntão vejo o resultado",
+            }
+            for i in range(3)
+        ]
+    )
+
+
+def test_export_bundle_zip_gera_todos_os_formatos_em_um_percurso(monkeypatch):
+    from qa_core import exports
+    from qa_core.utils import exporters
+
+    df = _plano_bundle()
+    options = {
+        "azure_csv": {"area_path": "Area", "assigned_to": "QA"},
+        "xray_csv": {"test_repository_folder": "Login", "custom_fields": {"L": "x"}},
+        "testrail_csv": {"section": "Seção"},
+        "zephyr_xlsx": {"priority": "High", "labels": "qa", "description": "d"},
+    }
+    esperado = {
+        "azure.csv": exports.gerar_csv_azure_from_df(df, "Area", "QA"),
+        "xray.csv": exports.gerar_csv_xray_from_df(df, "Login", {"L": "x"}),
+        "testrail.csv": exports.gerar_csv_testrail_from_df(df, "Seção"),
+    }
+
+    percursos = []
+    original = exports.iter_case_records
+    monkeypatch.setattr(
+        exports,
+        "iter_case_records",
+        lambda frame: percursos.append(len(frame)) or original(frame),
+    )
+
+    zip_bytes = exporters.export_bundle_zip(
+        df,
+        user_story="US de login",
+        analysis_report="Análise",
+        test_plan_report="Plano",
+        options=options,
+        pdf_bytes=b"%PDF-em-cache",
+    )
+
+    assert percursos == [3]
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+        manifest = json.loads(zip_file.read(exporters.BUNDLE_MANIFEST))
+        for nome, conteudo in esperado.items():
+            assert zip_file.read(nome) == conteudo
+        assert zip_file.read("relatorio.pdf") == b"%PDF-em-cache"
+        assert "US de login" in zip_file.read("relatorio.md").decode("utf-8")
+        zephyr = pd.read_excel(io.BytesIO(zip_file.read("zephyr.xlsx")))
+        tamanhos = {info.filename: info.file_size for info in zip_file.infolist()}
+
+    assert len(zephyr) == 9
+    assert manifest["test_cases"] == 3
+    assert [item["format"] for item in manifest["files"]] == list(
+        exporters.BUNDLE_FILES
+    )
+    for item in manifest["files"]:
+        assert item["bytes"] == tamanhos[item["file"]]
+
+
+def test_export_bundle_zip_sem_pdf():
+    from qa_core.utils import exporters
+
+    zip_bytes = exporters.export_bundle_zip(_plano_bundle(), include_pdf=False)
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+        nomes = zip_file.namelist()
+    assert "relatorio.pdf" not in nomes
+    assert "zephyr.xlsx" in nomes and exporters.BUNDLE_MANIFEST in nomes
+
+
+def test_export_bundle_zip_gera_o_pdf_pelo_pool(monkeypatch):
+    from qa_core.utils import exporters
+
+    render = MagicMock(return_value=b"%PDF-pool")
+    monkeypatch.setattr(exporters, "render_pdf_report", render)
+
+    zip_bytes = exporters.export_bundle_zip(_plano_bundle(), analysis_report="A")
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+        assert zip_file.read("relatorio.pdf") == b"%PDF-pool"
+    assert render.call_args[0][0] == "A"
+
+    render.side_effect = RenderTimeoutError("lento")
+    zip_bytes = exporters.export_bundle_zip(_plano_bundle())
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+        manifest = json.loads(zip_file.read(exporters.BUNDLE_MANIFEST))
+    assert "pdf" not in [item["format"] for item in manifest["files"]]
+
+
+def test_cucumber_e_postman_com_fragmentos_equivalem_a_geracao_completa():
+    from qa_core.export_cache import CaseFragmentCache
+
+    df = _plano_bundle()
+    fragments = CaseFragmentCache()
+
+    postman = export_to_postman_collection(df, "US", fragments=fragments)
+    assert postman == export_to_postman_collection(df, "US")
+    assert len(json.loads(postman)["item"]) == 3
+
+    df.at[1, "cenario"] = "Dado algo editado\nEntão vejo a edição"
+    with zipfile.ZipFile(io.BytesIO(export_to_cucumber_zip(df))) as completo:
+        esperado = {nome: completo.read(nome) for nome in completo.namelist()}
+    export_to_cucumber_zip(df, fragments=fragments)
+    misses = fragments.misses
+    with zipfile.ZipFile(
+        io.BytesIO(export_to_cucumber_zip(df, fragments=fragments))
+    ) as zip_file:
+        assert {nome: zip_file.read(nome) for nome in zip_file.namelist()} == esperado
+    assert fragments.misses == misses
+    assert export_to_postman_collection(df, "US", fragments=fragments) == (
+        export_to_postman_collection(df, "US")
+    )